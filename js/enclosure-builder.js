@@ -1145,8 +1145,14 @@ class EnclosureBuilder {
         mesh.castShadow = true;
         mesh.receiveShadow = true;
 
-        // Position the item at the center of the enclosure
-        mesh.position.y = -this.enclosureDimensions.height * 0.0254 / 2 + itemData.dimensions.height * 0.0254 / 2;
+        if (itemData.position) {
+            // Placement from python_3d_modeling/place_decor.py (meters, enclosure-centered)
+            mesh.position.set(itemData.position.x, itemData.position.y, itemData.position.z);
+            mesh.rotation.y = itemData.rotationY || 0;
+        } else {
+            // Position the item at the center of the enclosure
+            mesh.position.y = -this.enclosureDimensions.height * 0.0254 / 2 + itemData.dimensions.height * 0.0254 / 2;
+        }
 
         this.scene.add(mesh);
         this.items.push(mesh);
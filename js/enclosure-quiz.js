@@ -7,6 +7,15 @@
 // - Example: enclosure-builder.html?reptile=leopard-gecko
 // - If detected, Step 1 shows a confirmation question instead of selection
 // - The animal ID must exist in window.reptileData to be valid
+//
+// Recommendations come from the prebuilt outcome table at data/index/quiz.json
+// (python/build_quiz_table.py), keyed by animal, life stage and enclosure type
+
+// Outcome table generated by python/build_quiz_table.py
+const QUIZ_TABLE_VERSION = 1;
+
+// Life stages the outcome table may list, in the order they are offered
+const LIFE_STAGES = { adult: 'Adult', juvenile: 'Juvenile' };
 
 class EnclosureBuilderQuiz {
     constructor() {
@@ -14,6 +23,7 @@ class EnclosureBuilderQuiz {
         this.totalSteps = 4;
         this.quizState = {
             animal: null,
+            lifeStage: 'adult',
             enclosureType: null,
             selectedEnclosure: null,
             selectedDecor: [],
@@ -31,6 +41,10 @@ class EnclosureBuilderQuiz {
             other: []
         };
         
+        // Precomputed quiz outcomes, loaded once
+        this.outcomeTable = null;
+        this.loadOutcomeTable();
+        
         // Initialize quiz
         this.init();
     }
@@ -50,6 +64,35 @@ class EnclosureBuilderQuiz {
         this.setupEventListeners();
     }
     
+    loadOutcomeTable() {
+        fetch('data/index/quiz.json')
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('Failed to load quiz table: ' + response.status);
+                }
+                return response.json();
+            })
+            .then(table => {
+                if (table.version !== QUIZ_TABLE_VERSION) {
+                    throw new Error('Unsupported quiz table version: ' + table.version);
+                }
+                this.outcomeTable = table;
+                if (this.currentStep === 2 || this.currentStep === 4) {
+                    this.renderCurrentStep();
+                }
+            })
+            .catch(error => {
+                console.error('Error loading quiz table:', error);
+            });
+    }
+    
+    // Outcomes for the current animal and life stage, keyed by enclosure type
+    lookupOutcomes() {
+        if (!this.outcomeTable) return null;
+        const stages = this.outcomeTable.quiz[this.quizState.animal] || {};
+        return stages[this.quizState.lifeStage] || {};
+    }
+    
     isValidAnimal(animalId) {
         // Check if animal exists in reptileData
         return window.reptileData && window.reptileData[animalId];
@@ -251,14 +294,36 @@ class EnclosureBuilderQuiz {
             return;
         }
         
-        // Get enclosures from compatibility layer (which uses normalized data)
-        const enclosures = animalData.enclosures || [];
+        // Offer a life stage choice when the table has paths for more than one
+        const stages = this.outcomeTable
+            ? Object.keys(LIFE_STAGES).filter(stage => stage in (this.outcomeTable.quiz[this.quizState.animal] || {}))
+            : [];
+        if (!stages.includes(this.quizState.lifeStage)) {
+            this.quizState.lifeStage = 'adult';
+        }
+        
+        // Offer the enclosures the outcome table approves for this animal and life stage
+        const outcomes = this.lookupOutcomes();
+        let enclosures = animalData.enclosures || [];
+        if (outcomes) {
+            const approved = new Set(Object.values(outcomes).flatMap(outcome => outcome.enclosures));
+            enclosures = enclosures.filter(enclosure => approved.has(enclosure.id));
+        }
         
         step2Container.innerHTML = `
             <div class="quiz-question">
                 <h2>What type of enclosure do you want?</h2>
                 <p>Select an enclosure size and style for your ${animalData.name}</p>
             </div>
+            ${stages.length > 1 ? `
+                <div class="quiz-options life-stage-options">
+                    ${stages.map(stage => `
+                        <button class="quiz-option-btn life-stage-option${stage === this.quizState.lifeStage ? ' selected' : ''}" data-life-stage="${stage}">
+                            ${LIFE_STAGES[stage]}
+                        </button>
+                    `).join('')}
+                </div>
+            ` : ''}
             <div class="quiz-options enclosure-grid">
                 ${enclosures.map(enclosure => `
                     <div class="quiz-option-card enclosure-option" data-enclosure-id="${enclosure.id}">
@@ -280,6 +345,24 @@ class EnclosureBuilderQuiz {
         `;
         
         // Setup event listeners
+        step2Container.querySelectorAll('.life-stage-option').forEach(btn => {
+            btn.addEventListener('click', (e) => {
+                const stage = e.target.closest('.life-stage-option').dataset.lifeStage;
+                if (stage === this.quizState.lifeStage) return;
+                this.quizState.lifeStage = stage;
+                
+                // The approved enclosures differ by stage, so choose again
+                this.quizState.selectedEnclosure = null;
+                this.quizState.enclosureType = null;
+                const nextBtn = document.getElementById('quiz-next');
+                if (nextBtn) {
+                    nextBtn.disabled = true;
+                    nextBtn.classList.remove('enabled');
+                }
+                this.renderStep2();
+            });
+        });
+        
         step2Container.querySelectorAll('.enclosure-option').forEach(card => {
             card.addEventListener('click', (e) => {
                 // Remove previous selection
@@ -296,7 +379,7 @@ class EnclosureBuilderQuiz {
                 
                 if (enclosure) {
                     this.quizState.selectedEnclosure = enclosure;
-                    this.quizState.enclosureType = enclosure.id;
+                    this.quizState.enclosureType = enclosure.enclosureType;
                     
                     // Update 3D enclosure
                     if (window.enclosureBuilder) {
@@ -378,6 +461,9 @@ class EnclosureBuilderQuiz {
     }
     
     loadDecorItems() {
+        // The decor list does not depend on the path, so build it once
+        if (this.decorCategories.hides.length) return;
+        
         // Define decor items (can be loaded from items.json or hardcoded)
         this.decorCategories.hides = [
             { id: 'hide-001', name: 'Cave Hide', price: 14.99, category: 'hides' },
@@ -572,32 +658,13 @@ class EnclosureBuilderQuiz {
     }
     
     generateRecommendations() {
-        const animalId = this.quizState.animal;
-        
-        // Substrate recommendations based on animal
-        const substrateMap = {
-            'leopard-gecko': { name: 'Reptile Carpet', price: 19.99 },
-            'bearded-dragon': { name: 'Natural Slate Tile', price: 24.99 },
-            'crested-gecko': { name: 'Eco Earth Coconut Fiber', price: 14.99 },
-        };
-        
-        this.quizState.recommendedSubstrate = substrateMap[animalId] || null;
-        
-        // Plant recommendations
-        const plantMap = {
-            'leopard-gecko': [
-                { name: 'Artificial Succulent', price: 9.99 }
-            ],
-            'bearded-dragon': [
-                { name: 'Artificial Succulent', price: 9.99 }
-            ],
-            'crested-gecko': [
-                { name: 'Hanging Vine', price: 14.99 },
-                { name: 'Artificial Succulent', price: 9.99 }
-            ],
-        };
+        // One lookup in the precomputed table replaces per-step filtering
+        const outcomes = this.lookupOutcomes() || {};
+        const outcome = outcomes[this.quizState.enclosureType];
+        const items = this.outcomeTable ? this.outcomeTable.items : {};
         
-        this.quizState.recommendedPlants = plantMap[animalId] || [];
+        this.quizState.recommendedSubstrate = outcome && outcome.substrate ? items[outcome.substrate] : null;
+        this.quizState.recommendedPlants = outcome ? outcome.plants.map(id => items[id]) : [];
     }
     
     nextStep() {
@@ -1,7 +1,8 @@
 /**
  * Mobile Menu Functionality
  * Handles the hamburger menu toggle and mobile navigation
- * Works with header.html loaded via fetch
+ * Works with header.html loaded via fetch, or inlined at build time by
+ * python/build_site.py (marked with data-prerendered)
  */
 
 (function() {
@@ -119,6 +120,14 @@
             return;
         }
 
+        // Header was inlined at build time - no fetch needed
+        if (headerElement.hasAttribute('data-prerendered')) {
+            initMobileMenu();
+            loadSearchFunctionality();
+            loadFooter();
+            return;
+        }
+
         const headerPath = getHeaderPath();
         console.log('Loading header from:', headerPath);
 
@@ -174,6 +183,11 @@
             return;
         }
 
+        // Footer was inlined at build time - nothing to load
+        if (footerElement.hasAttribute('data-prerendered')) {
+            return;
+        }
+
         const footerPath = getFooterPath();
         console.log('Loading footer from:', footerPath);
 
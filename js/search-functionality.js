@@ -1,121 +1,142 @@
 /**
  * Search Functionality with Autocomplete
  * Provides search suggestions for reptile care guides and enclosure builder
+ * Queries the prebuilt index at data/index/search.json (python/build_search_index.py)
  */
 
 (function() {
     'use strict';
     
-    // Search data for all available content
-    const searchData = [
-        // Leopard Gecko
-        {
-            title: "Leopard Gecko Care Guide",
-            keywords: ["leopard", "gecko", "leopard gecko", "care", "guide", "leo"],
-            url: "leopard-gecko.html",
-            type: "Care Guide",
-            icon: "📚"
-        },
-        {
-            title: "Design Leopard Gecko Enclosure",
-            keywords: ["leopard", "gecko", "leopard gecko", "enclosure", "design", "builder", "habitat", "tank", "terrarium"],
-            url: "enclosure-builder.html?reptile=leopard-gecko",
-            type: "Enclosure Builder",
-            icon: "🔧"
-        },
-        
-        // Bearded Dragon
-        {
-            title: "Bearded Dragon Care Guide",
-            keywords: ["bearded", "dragon", "bearded dragon", "care", "guide", "beardie"],
-            url: "bearded-dragon.html",
-            type: "Care Guide",
-            icon: "📚"
-        },
-        {
-            title: "Design Bearded Dragon Enclosure",
-            keywords: ["bearded", "dragon", "bearded dragon", "enclosure", "design", "builder", "habitat", "tank", "terrarium"],
-            url: "enclosure-builder.html?reptile=bearded-dragon",
-            type: "Enclosure Builder",
-            icon: "🔧"
-        },
-        
-        // Crested Gecko
-        {
-            title: "Crested Gecko Care Guide",
-            keywords: ["crested", "gecko", "crested gecko", "care", "guide", "crestie"],
-            url: "crested-gecko.html",
-            type: "Care Guide",
-            icon: "📚"
-        },
-        {
-            title: "Design Crested Gecko Enclosure",
-            keywords: ["crested", "gecko", "crested gecko", "enclosure", "design", "builder", "habitat", "tank", "terrarium"],
-            url: "enclosure-builder.html?reptile=crested-gecko",
-            type: "Enclosure Builder",
-            icon: "🔧"
-        },
-        
-        // General pages
-        {
-            title: "All Care Guides",
-            keywords: ["all", "care", "guides", "list", "overview"],
-            url: "all-care-guides.html",
-            type: "Page",
-            icon: "📚"
-        },
-        {
-            title: "Enclosure Designer",
-            keywords: ["enclosure", "designer", "builder", "design", "build", "create"],
-            url: "enclosure-builder.html",
-            type: "Tool",
-            icon: "🔧"
+    // Search index generated by python/build_search_index.py
+    const SEARCH_INDEX_VERSION = 1;
+    const MAX_RESULTS = 6;
+
+    let searchIndex = null;
+    let searchIndexRequest = null;
+    let stopwords = new Set();
+
+    // Resolve a site-relative path from the current page location
+    function resolveSitePath(path) {
+        const currentPath = window.location.pathname;
+        const isInSubdirectory = currentPath.includes('/crested-gecko');
+        return isInSubdirectory ? '../' + path : path;
+    }
+
+    // Fetch the search index once and share the request between inputs
+    function loadSearchIndex() {
+        if (!searchIndexRequest) {
+            searchIndexRequest = fetch(resolveSitePath('data/index/search.json'))
+                .then(response => {
+                    if (!response.ok) {
+                        throw new Error('Failed to load search index: ' + response.status);
+                    }
+                    return response.json();
+                })
+                .then(index => {
+                    if (index.version !== SEARCH_INDEX_VERSION) {
+                        throw new Error('Unsupported search index version: ' + index.version);
+                    }
+                    stopwords = new Set(index.stopwords);
+                    searchIndex = index;
+                    return index;
+                })
+                .catch(error => {
+                    console.error('Error loading search index:', error);
+                    searchIndexRequest = null;
+                    return null;
+                });
         }
-    ];
+        return searchIndexRequest;
+    }
 
-    // Search function
-    function searchContent(query) {
-        if (!query || query.length < 1) return [];
-        
-        const queryLower = query.toLowerCase().trim();
-        const results = [];
-        
-        searchData.forEach(item => {
-            // Check if query matches any keywords
-            const matches = item.keywords.some(keyword => 
-                keyword.toLowerCase().includes(queryLower)
+    // Tokenize exactly like the Python indexer
+    function tokenize(text, keepStopwords = false) {
+        const normalized = text.normalize('NFKD').replace(/[^\x00-\x7F]/g, '').toLowerCase().replace(/'/g, '');
+        const tokens = normalized.match(/[a-z0-9]+/g) || [];
+        if (keepStopwords) return tokens;
+        return tokens.filter(token => token.length > 1 && !stopwords.has(token));
+    }
+
+    function trigrams(term) {
+        const grams = new Set();
+        for (let i = 0; i + 3 <= term.length; i++) {
+            grams.add(term.slice(i, i + 3));
+        }
+        return grams;
+    }
+
+    // Find vocabulary terms for a query token: prefix range first, trigram infix fallback
+    function matchTerms(token) {
+        const terms = searchIndex.terms;
+        const matches = [];
+
+        let low = 0;
+        let high = terms.length;
+        while (low < high) {
+            const mid = (low + high) >> 1;
+            if (terms[mid] < token) low = mid + 1; else high = mid;
+        }
+        for (let i = low; i < terms.length && terms[i].startsWith(token); i++) {
+            matches.push([i, token.length / terms[i].length]);
+        }
+
+        if (matches.length === 0 && token.length >= 3) {
+            const grams = [...trigrams(token)].sort((a, b) =>
+                (searchIndex.trigrams[a] || []).length - (searchIndex.trigrams[b] || []).length
             );
-            
-            if (matches) {
-                // Calculate relevance score
-                let score = 0;
-                
-                // Exact title match gets highest score
-                if (item.title.toLowerCase().includes(queryLower)) {
-                    score += 100;
-                }
-                
-                // Exact keyword match gets high score
-                if (item.keywords.some(keyword => keyword.toLowerCase() === queryLower)) {
-                    score += 50;
+            let candidates = new Set(searchIndex.trigrams[grams[0]] || []);
+            grams.slice(1).forEach(gram => {
+                const ids = new Set(searchIndex.trigrams[gram] || []);
+                candidates = new Set([...candidates].filter(id => ids.has(id)));
+            });
+            [...candidates].sort((a, b) => a - b).forEach(id => {
+                if (terms[id].includes(token)) {
+                    matches.push([id, 0.5 * token.length / terms[id].length]);
                 }
-                
-                // Partial keyword match gets medium score
-                if (item.keywords.some(keyword => keyword.toLowerCase().startsWith(queryLower))) {
-                    score += 25;
+            });
+        }
+
+        return matches;
+    }
+
+    // Search function
+    function searchContent(query) {
+        if (!query || query.length < 1 || !searchIndex) return [];
+
+        let tokens = tokenize(query);
+        if (tokens.length === 0) tokens = tokenize(query, true);
+        if (tokens.length === 0) return [];
+
+        let scores = null;
+        for (const token of tokens) {
+            const tokenScores = new Map();
+            matchTerms(token).forEach(([termId, closeness]) => {
+                const posting = searchIndex.postings[termId];
+                // Exact matches count in full, prefix/infix matches partially
+                const factor = closeness === 1 ? 1 : 0.5 + 0.5 * closeness;
+                for (let i = 0; i < posting.length; i += 2) {
+                    const weight = posting[i + 1] * factor;
+                    tokenScores.set(posting[i], Math.max(tokenScores.get(posting[i]) || 0, weight));
                 }
-                
-                // Any keyword containing query gets low score
-                score += 10;
-                
-                results.push({ ...item, score });
+            });
+
+            if (scores === null) {
+                scores = tokenScores;
+            } else {
+                const combined = new Map();
+                scores.forEach((score, docId) => {
+                    if (tokenScores.has(docId)) combined.set(docId, score + tokenScores.get(docId));
+                });
+                scores = combined;
             }
-        });
-        
-        // Sort by relevance score and return top 6 results
-        return results
-            .sort((a, b) => b.score - a.score)
-            .slice(0, 6);
+            if (scores.size === 0) return [];
+        }
+
+        // Sort by relevance score and return the top results
+        return [...scores.entries()]
+            .sort((a, b) => b[1] - a[1] || a[0] - b[0])
+            .slice(0, MAX_RESULTS)
+            .map(([docId, score]) => ({ ...searchIndex.docs[docId], score }));
     }
 
     // Create suggestions dropdown
@@ -181,12 +202,9 @@
 
     // Navigate to page
     function navigateToPage(url) {
-        // Check if we're in a subdirectory and adjust path accordingly
-        const currentPath = window.location.pathname;
-        const isInSubdirectory = currentPath.includes('/crested-gecko');
-        
-        if (isInSubdirectory && !url.startsWith('http') && !url.startsWith('../')) {
-            url = '../' + url;
+        // Adjust relative URLs when we're in a subdirectory
+        if (!url.startsWith('http') && !url.startsWith('../')) {
+            url = resolveSitePath(url);
         }
         
         window.location.href = url;
@@ -203,15 +221,23 @@
             container.style.position = 'relative';
         }
 
-        // Input event handler
-        input.addEventListener('input', function() {
-            const query = this.value.trim();
+        // Render suggestions for the current input value
+        function showSuggestions() {
+            const query = input.value.trim();
             
             if (query.length < 1) {
                 suggestionsDropdown.style.display = 'none';
                 return;
             }
             
+            if (!searchIndex) {
+                // Render once the index arrives
+                loadSearchIndex().then(index => {
+                    if (index) showSuggestions();
+                });
+                return;
+            }
+            
             const results = searchContent(query);
             
             if (results.length === 0) {
@@ -229,7 +255,10 @@
             });
             
             suggestionsDropdown.style.display = 'block';
-        });
+        }
+
+        // Input event handler
+        input.addEventListener('input', showSuggestions);
 
         // Focus event handler
         input.addEventListener('focus', function() {
@@ -249,10 +278,12 @@
                 const query = input.value.trim();
                 
                 if (query) {
-                    const results = searchContent(query);
-                    if (results.length > 0) {
-                        navigateToPage(results[0].url);
-                    }
+                    loadSearchIndex().then(() => {
+                        const results = searchContent(query);
+                        if (results.length > 0) {
+                            navigateToPage(results[0].url);
+                        }
+                    });
                 }
             });
         }
@@ -293,6 +324,11 @@
             initializeSearchInput(mobileSearch, false);
         }
         
+        // Warm the index so the first keystroke is instant
+        if (desktopSearch || mobileSearch) {
+            loadSearchIndex();
+        }
+        
         setupOutsideClickHandler();
     }
 
@@ -312,6 +348,7 @@
     // Make functions available globally if needed
     window.searchFunctionality = {
         initialize: initializeAllSearchInputs,
+        loadIndex: loadSearchIndex,
         search: searchContent
     };
 
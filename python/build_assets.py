@@ -0,0 +1,241 @@
+"""
+Release Asset Bundler
+Turns the dist/ site build into release/: CSS and JS are minified, every
+asset gets a content-hashed copy (styles.3f9a1c0b2e.css), HTML and CSS
+references are rewritten to the hashed names, and text assets get .gz and
+.br siblings. asset-manifest.json records which files can be cached forever.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import posixpath
+import re
+import shutil
+from pathlib import Path
+from urllib.parse import quote, unquote, urlsplit
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DIST_DIR = REPO_ROOT / "dist"
+RELEASE_DIR = REPO_ROOT / "release"
+MANIFEST_NAME = "asset-manifest.json"
+
+MANIFEST_VERSION = 1
+HASH_LENGTH = 10
+
+COMPRESSIBLE_SUFFIXES = {".html", ".css", ".js", ".json", ".svg", ".txt", ".xml", ".glb", ".obj"}
+ENCODING_SUFFIXES = {"gzip": ".gz", "br": ".br"}
+# Skip a compressed sibling unless it saves at least this fraction of the bytes
+MIN_COMPRESSION_SAVING = 0.05
+
+CACHE_IMMUTABLE = "public, max-age=31536000, immutable"
+CACHE_REVALIDATE = "no-cache"
+
+HASHED_NAME = re.compile(r"\.[0-9a-f]{%d}\.[^./]+$" % HASH_LENGTH)
+
+_CSS_TOKENS = re.compile(r'/\*.*?\*/|"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'', re.S)
+_CSS_URL = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+_HTML_REF = re.compile(r'\b(src|href|poster|srcset)="([^"]*)"')
+
+
+def minify_css(css):
+    """Strip comments and redundant whitespace without touching strings"""
+    css = _CSS_TOKENS.sub(lambda m: "" if m.group(0).startswith("/*") else m.group(0), css)
+    out = []
+    last = 0
+    for match in _CSS_TOKENS.finditer(css):
+        out.append(_squeeze_css(css[last:match.start()]))
+        out.append(match.group(0))
+        last = match.end()
+    out.append(_squeeze_css(css[last:]))
+    return "".join(out).strip()
+
+
+def _squeeze_css(text):
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+    text = re.sub(r":\s+", ":", text)
+    return text.replace(";}", "}")
+
+
+def minify_js(js):
+    """Minify with rjsmin when installed, otherwise only drop indentation and blank lines"""
+    if rjsmin is not None:
+        return rjsmin.jsmin(js)
+    return "\n".join(line.strip() for line in js.splitlines() if line.strip()) + "\n"
+
+
+def hashed_name(relative, content):
+    """styles.css -> styles.<hash>.css"""
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    path = posixpath.splitext(relative)
+    return f"{path[0]}.{digest}{path[1]}"
+
+
+def _rewrite_url(url, base, mapping):
+    """Map one relative or root-relative URL to its hashed asset, if there is one"""
+    if not url or url.startswith(("#", "data:", "mailto:", "tel:", "javascript:")) or "//" in url[:8]:
+        return url
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc:
+        return url
+    rooted = parts.path.startswith("/")
+    target = posixpath.normpath(posixpath.join("" if rooted else base, unquote(parts.path).lstrip("/")))
+    if target not in mapping:
+        return url
+    hashed = mapping[target]
+    new_path = "/" + hashed if rooted else posixpath.relpath(hashed, base or ".")
+    suffix = ("?" + parts.query if parts.query else "") + ("#" + parts.fragment if parts.fragment else "")
+    return quote(new_path, safe="/") + suffix
+
+
+def rewrite_css_urls(css, relative, mapping):
+    base = posixpath.dirname(relative)
+    return _CSS_URL.sub(lambda m: f"url({m.group(1)}{_rewrite_url(m.group(2), base, mapping)}{m.group(1)})", css)
+
+
+def rewrite_html_refs(page, relative, mapping):
+    """Point src/href/srcset attributes and inline url()s at hashed assets"""
+    base = posixpath.dirname(relative)
+
+    def attribute(match):
+        name, value = match.groups()
+        if name == "srcset":
+            candidates = []
+            for candidate in value.split(","):
+                pieces = candidate.strip().split(" ", 1)
+                pieces[0] = _rewrite_url(pieces[0], base, mapping)
+                candidates.append(" ".join(pieces))
+            value = ", ".join(candidates)
+        else:
+            value = _rewrite_url(value, base, mapping)
+        return f'{name}="{value}"'
+
+    return rewrite_css_urls(_HTML_REF.sub(attribute, page), relative, mapping)
+
+
+def compress(data):
+    """Return the gzip and brotli encodings of ``data`` that are worth serving"""
+    encoders = {"gzip": lambda d: gzip.compress(d, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoders["br"] = lambda d: brotli.compress(d, quality=11)
+    encoded = {}
+    for encoding, encode in encoders.items():
+        result = encode(data)
+        if len(result) <= len(data) * (1 - MIN_COMPRESSION_SAVING):
+            encoded[encoding] = result
+    return encoded
+
+
+def build_release(src=DIST_DIR, out=RELEASE_DIR):
+    """Bundle ``src`` into ``out`` and return the asset manifest"""
+    src = Path(src)
+    out = Path(out)
+    if out.exists():
+        shutil.rmtree(out)
+    out.mkdir(parents=True)
+
+    files = sorted(p.relative_to(src).as_posix() for p in src.rglob("*")
+                   if p.is_file() and not any(part.startswith(".") for part in p.relative_to(src).parts))
+    pages = [f for f in files if f.endswith(".html")]
+    stylesheets = [f for f in files if f.endswith(".css")]
+    others = [f for f in files if f not in pages and f not in stylesheets]
+
+    mapping = {}
+    contents = {}
+    source_bytes = {}
+
+    # Leaf assets first so stylesheets and pages can reference their hashed names
+    for relative in others:
+        data = (src / relative).read_bytes()
+        source_bytes[relative] = len(data)
+        if relative.endswith(".js"):
+            data = minify_js(data.decode("utf-8")).encode("utf-8")
+        contents[relative] = data
+        mapping[relative] = hashed_name(relative, data)
+
+    for relative in stylesheets:
+        css = (src / relative).read_text(encoding="utf-8")
+        source_bytes[relative] = len(css.encode("utf-8"))
+        data = rewrite_css_urls(minify_css(css), relative, mapping).encode("utf-8")
+        contents[relative] = data
+        mapping[relative] = hashed_name(relative, data)
+
+    for relative in pages:
+        page = (src / relative).read_text(encoding="utf-8")
+        source_bytes[relative] = len(page.encode("utf-8"))
+        contents[relative] = rewrite_html_refs(page, relative, mapping).encode("utf-8")
+
+    assets = {}
+    for relative, data in contents.items():
+        encoded = compress(data) if posixpath.splitext(relative)[1] in COMPRESSIBLE_SUFFIXES else {}
+        # Originals stay available for scripts that build paths at runtime
+        targets = [relative] + ([mapping[relative]] if relative in mapping else [])
+        for target in targets:
+            path = out / target
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+            for encoding, payload in encoded.items():
+                path.with_name(path.name + ENCODING_SUFFIXES[encoding]).write_bytes(payload)
+        assets[relative] = {
+            "hashed": mapping.get(relative),
+            "sourceBytes": source_bytes[relative],
+            "bytes": len(data),
+            **{encoding: len(payload) for encoding, payload in encoded.items()},
+        }
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "cacheControl": {"hashed": CACHE_IMMUTABLE, "default": CACHE_REVALIDATE},
+        "assets": assets,
+    }
+    (out / MANIFEST_NAME).write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+    return manifest
+
+
+def cache_control(relative):
+    """Cache-Control value for a release path"""
+    return CACHE_IMMUTABLE if HASHED_NAME.search(relative) else CACHE_REVALIDATE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minify, hash and precompress dist/ into release/")
+    parser.add_argument("--src", type=Path, default=DIST_DIR, help="site build directory")
+    parser.add_argument("--out", type=Path, default=RELEASE_DIR, help="release directory")
+    args = parser.parse_args()
+
+    if not args.src.exists():
+        print(f"❌ {args.src} not found - run python/build_site.py first")
+        return
+
+    print("📦 Bundling release assets...")
+    if rjsmin is None:
+        print("⚠️  rjsmin not installed - JavaScript is only whitespace-trimmed")
+    if brotli is None:
+        print("⚠️  brotli not installed - skipping .br files")
+
+    manifest = build_release(args.src, args.out)
+    assets = manifest["assets"]
+    for name in ("styles.css", "js/enclosure-builder.js", "enclosure-builder.html", "all-care-guides.html"):
+        if name in assets:
+            a = assets[name]
+            print(f"   • {name}: {a['sourceBytes'] / 1024:.1f} KB → {a['bytes'] / 1024:.1f} KB, "
+                  f"gzip {a.get('gzip', a['bytes']) / 1024:.1f} KB, br {a.get('br', a['bytes']) / 1024:.1f} KB")
+    hashed = sum(1 for a in assets.values() if a["hashed"])
+    print(f"✅ {len(assets)} files, {hashed} with immutable hashed copies")
+    print(f"💾 Output: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
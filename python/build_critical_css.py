@@ -0,0 +1,492 @@
+"""
+Critical CSS Stage
+For every page in dist/, matches the rules of its linked stylesheets against
+the elements above the fold, inlines just those rules in place of the
+render-blocking <link> and loads the full stylesheet asynchronously.
+Running it again first restores the original links, so the output always
+reflects the current CSS.
+"""
+
+import argparse
+import posixpath
+import re
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from build_assets import minify_css
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DIST_DIR = REPO_ROOT / "dist"
+
+# Elements rendered before the fold: the site header plus this many body
+# elements after it in document order
+FOLD_ELEMENTS = 60
+
+MARKER = "data-critical-css"
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+# Interaction states can apply to any matching element, so they never exclude a rule
+DYNAMIC_PSEUDOS = {
+    "hover", "focus", "focus-within", "focus-visible", "active", "visited", "link", "any-link",
+    "target", "checked", "disabled", "enabled", "placeholder-shown", "invalid", "valid", "required", "optional",
+}
+
+# At-rules whose blocks hold ordinary style rules
+GROUPING_AT_RULES = {"media", "supports", "layer", "container"}
+
+_COMMENT_OR_STRING = re.compile(r'/\*.*?\*/|"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'', re.S)
+_SELECTOR_TOKEN = re.compile(r"""
+    (?P<combinator>\s*[>+~]\s*|\s+)
+  | (?P<id>\#[-\w]+)
+  | (?P<cls>\.[-\w]+)
+  | (?P<attr>\[\s*[-\w]+\s*(?:[~|^$*]?=\s*(?:"[^"]*"|'[^']*'|[^\]\s]+)\s*(?:[iIsS]\s*)?)?\])
+  | (?P<pseudo_element>::[-\w]+(?:\([^)]*\))?)
+  | (?P<pseudo>:[-\w]+(?:\((?:[^()]|\([^()]*\))*\))?)
+  | (?P<tag>\*|[-\w]+)
+""", re.X)
+_ATTRIBUTE = re.compile(r"""\[\s*([-\w]+)\s*(?:([~|^$*]?=)\s*("[^"]*"|'[^']*'|[^\]\s]+)\s*([iIsS])?\s*)?\]""")
+_STYLESHEET_LINK = re.compile(r'<link\b[^>]*\brel="stylesheet"[^>]*>', re.I)
+_HREF = re.compile(r'\bhref="([^"]+)"')
+_CSS_URL = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+_INLINED = re.compile(r'<style %s>.*?</style><link\b[^>]*%s><noscript %s>(<link\b[^>]*>)</noscript>'
+                      % (MARKER, MARKER, MARKER), re.S)
+
+
+# --- HTML ---------------------------------------------------------------
+
+class Element:
+    __slots__ = ("tag", "attrs", "classes", "parent", "children")
+
+    def __init__(self, tag, attrs, parent):
+        self.tag = tag
+        self.attrs = attrs
+        self.classes = set((attrs.get("class") or "").split())
+        self.parent = parent
+        self.children = []
+
+    def previous_siblings(self):
+        """Element siblings before this one, nearest first"""
+        if self.parent is None:
+            return []
+        siblings = self.parent.children
+        return siblings[:siblings.index(self)][::-1]
+
+    def iter(self):
+        yield self
+        for child in self.children:
+            yield from child.iter()
+
+
+class TreeBuilder(HTMLParser):
+    """Build a lightweight element tree, tolerating unclosed tags"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = None
+        self._stack = []
+
+    def handle_starttag(self, tag, attrs):
+        parent = self._stack[-1] if self._stack else None
+        element = Element(tag, {k: v or "" for k, v in attrs}, parent)
+        if parent is None:
+            if self.root is None:
+                self.root = element
+            else:
+                # Stray top-level content belongs to the document element
+                element.parent = self.root
+                self.root.children.append(element)
+        else:
+            parent.children.append(element)
+        if tag not in VOID_TAGS:
+            self._stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self._stack.pop()
+
+    def handle_endtag(self, tag):
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if self._stack[depth].tag == tag:
+                del self._stack[depth:]
+                break
+
+
+def parse_html(source):
+    builder = TreeBuilder()
+    builder.feed(source)
+    builder.close()
+    return builder.root
+
+
+def fold_elements(root, limit=FOLD_ELEMENTS):
+    """The elements visible on first paint: the header plus the first ``limit`` body elements"""
+    body = next((e for e in root.iter() if e.tag == "body"), root)
+    visible = set()
+    remaining = limit
+    for element in body.iter():
+        inside_header = any(a.tag == "header" for a in _ancestors(element, include_self=True))
+        if inside_header:
+            visible.add(element)
+        elif remaining > 0 and element.tag not in ("script", "template", "noscript", "footer"):
+            visible.add(element)
+            remaining -= 1
+    for element in list(visible):
+        visible.update(_ancestors(element))
+    return visible
+
+
+def _ancestors(element, include_self=False):
+    node = element if include_self else element.parent
+    while node is not None:
+        yield node
+        node = node.parent
+
+
+# --- Selectors ----------------------------------------------------------
+
+def split_top_level(text, separator=","):
+    """Split on ``separator`` outside brackets, parentheses and strings"""
+    parts, depth, quote, current = [], 0, None, []
+    for char in text:
+        if quote:
+            quote = None if char == quote else quote
+        elif char in "\"'":
+            quote = char
+        elif char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif char == separator and depth == 0:
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    parts.append("".join(current))
+    return [p.strip() for p in parts if p.strip()]
+
+
+def parse_selector(selector):
+    """Parse a complex selector into ``[(combinator, compound), ...]``, or None if unsupported"""
+    parts = []
+    compound = {"tag": None, "ids": [], "classes": [], "attrs": [], "pseudos": []}
+    combinator = None
+    position = 0
+    selector = selector.strip()
+    while position < len(selector):
+        match = _SELECTOR_TOKEN.match(selector, position)
+        if not match:
+            return None
+        position = match.end()
+        kind, value = match.lastgroup, match.group(0)
+        if kind == "combinator":
+            parts.append((combinator, compound))
+            combinator = value.strip() or " "
+            compound = {"tag": None, "ids": [], "classes": [], "attrs": [], "pseudos": []}
+        elif kind == "tag":
+            compound["tag"] = None if value == "*" else value.lower()
+        elif kind == "id":
+            compound["ids"].append(value[1:])
+        elif kind == "cls":
+            compound["classes"].append(value[1:])
+        elif kind == "attr":
+            name, op, expected, flag = _ATTRIBUTE.match(value).groups()
+            compound["attrs"].append((name.lower(), op, (expected or "").strip("\"'"), bool(flag and flag in "iI")))
+        elif kind == "pseudo":
+            name, _, argument = value[1:].partition("(")
+            compound["pseudos"].append((name.lower(), argument[:-1] if argument else None))
+    parts.append((combinator, compound))
+    return parts
+
+
+def _attribute_matches(element, name, op, expected, ignore_case):
+    if name not in element.attrs:
+        return False
+    if op is None:
+        return True
+    actual = element.attrs[name]
+    if ignore_case:
+        actual, expected = actual.lower(), expected.lower()
+    if op == "=":
+        return actual == expected
+    if op == "~=":
+        return expected in actual.split()
+    if op == "|=":
+        return actual == expected or actual.startswith(expected + "-")
+    if op == "^=":
+        return bool(expected) and actual.startswith(expected)
+    if op == "$=":
+        return bool(expected) and actual.endswith(expected)
+    return bool(expected) and expected in actual
+
+
+def _pseudo_matches(element, name, argument):
+    if name in DYNAMIC_PSEUDOS:
+        return True
+    if name == "root":
+        return element.parent is None
+    if name in ("first-child", "last-child", "only-child"):
+        siblings = element.parent.children if element.parent else [element]
+        if name == "first-child":
+            return siblings[0] is element
+        if name == "last-child":
+            return siblings[-1] is element
+        return len(siblings) == 1
+    if name in ("not", "is", "where", "matches") and argument is not None:
+        selectors = [parse_selector(s) for s in split_top_level(argument)]
+        if any(s is None for s in selectors):
+            return True
+        matched = any(_matches(element, s, len(s) - 1) for s in selectors)
+        return not matched if name == "not" else matched
+    # Structural and unknown pseudo-classes are kept rather than risk dropping a rule
+    return True
+
+
+def _compound_matches(element, compound):
+    if compound["tag"] and compound["tag"] != element.tag:
+        return False
+    if any(element.attrs.get("id") != i for i in compound["ids"]):
+        return False
+    if any(c not in element.classes for c in compound["classes"]):
+        return False
+    if not all(_attribute_matches(element, *attr) for attr in compound["attrs"]):
+        return False
+    return all(_pseudo_matches(element, *pseudo) for pseudo in compound["pseudos"])
+
+
+def _matches(element, parts, index):
+    combinator, compound = parts[index]
+    if not _compound_matches(element, compound):
+        return False
+    if index == 0:
+        return True
+    if combinator == ">":
+        return element.parent is not None and _matches(element.parent, parts, index - 1)
+    if combinator == " ":
+        return any(_matches(a, parts, index - 1) for a in _ancestors(element))
+    siblings = element.previous_siblings()
+    if combinator == "+":
+        return bool(siblings) and _matches(siblings[0], parts, index - 1)
+    return any(_matches(s, parts, index - 1) for s in siblings)
+
+
+def selector_matches(selector, elements):
+    """True if ``selector`` matches any of ``elements``; unsupported syntax counts as a match"""
+    parts = parse_selector(selector)
+    if parts is None:
+        return True
+    return any(_matches(element, parts, len(parts) - 1) for element in elements)
+
+
+# --- Stylesheets --------------------------------------------------------
+
+def strip_comments(css):
+    return _COMMENT_OR_STRING.sub(lambda m: "" if m.group(0).startswith("/*") else m.group(0), css)
+
+
+def _block_end(css, start):
+    """Index just past the } closing the block whose { is at ``start``"""
+    depth, quote = 0, None
+    for index in range(start, len(css)):
+        char = css[index]
+        if quote:
+            quote = None if char == quote and css[index - 1] != "\\" else quote
+        elif char in "\"'":
+            quote = char
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return index + 1
+    return len(css)
+
+
+def parse_css(css):
+    """Parse a stylesheet into nested nodes
+
+    Style rules are ``("rule", selectors, declarations)``; at-rules are
+    ``("at", name, prelude, body)`` where body is a node list for grouping
+    rules, raw text for other blocks, or None for statements.
+    """
+    nodes = []
+    position = 0
+    while True:
+        while position < len(css) and css[position].isspace():
+            position += 1
+        if position >= len(css):
+            return nodes
+        brace = css.find("{", position)
+        if css[position] == "@":
+            semicolon = css.find(";", position)
+            if semicolon != -1 and (brace == -1 or semicolon < brace):
+                prelude = css[position:semicolon].strip()
+                name = re.match(r"@([-\w]+)", prelude).group(1).lower()
+                nodes.append(("at", name, prelude, None))
+                position = semicolon + 1
+                continue
+        if brace == -1:
+            return nodes
+        end = _block_end(css, brace)
+        head, body = css[position:brace].strip(), css[brace + 1:end - 1]
+        if head.startswith("@"):
+            name = re.match(r"@([-\w]+)", head).group(1).lower()
+            nodes.append(("at", name, head, parse_css(body) if name in GROUPING_AT_RULES else body))
+        else:
+            nodes.append(("rule", split_top_level(head), body.strip()))
+        position = end
+
+
+def _critical_nodes(nodes, elements):
+    kept = []
+    for node in nodes:
+        if node[0] == "rule":
+            selectors = [s for s in node[1] if selector_matches(s, elements)]
+            if selectors:
+                kept.append(("rule", selectors, node[2]))
+        elif node[3] is None:
+            kept.append(node)
+        elif isinstance(node[3], list):
+            if node[1] == "media" and re.match(r"@media\s+print\b", node[2], re.I):
+                continue
+            children = _critical_nodes(node[3], elements)
+            if children:
+                kept.append((node[0], node[1], node[2], children))
+        else:
+            kept.append(node)
+    return kept
+
+
+def _keep_referenced(nodes, declarations):
+    """Drop @keyframes and @font-face blocks that no kept declaration refers to"""
+    kept = []
+    for node in nodes:
+        if node[0] == "at" and node[1] in ("keyframes", "-webkit-keyframes"):
+            name = node[2].split(None, 1)[1].strip().strip("\"'") if " " in node[2] else ""
+            if not re.search(r"\b%s\b" % re.escape(name), declarations):
+                continue
+        elif node[0] == "at" and node[1] == "font-face":
+            family = re.search(r"font-family\s*:\s*['\"]?([^;'\"]+)", node[3])
+            if family and family.group(1).strip().lower() not in declarations.lower():
+                continue
+        elif node[0] == "at" and isinstance(node[3], list):
+            node = (node[0], node[1], node[2], _keep_referenced(node[3], declarations))
+        kept.append(node)
+    return kept
+
+
+def _declarations(nodes):
+    return " ".join(node[2] if node[0] == "rule" else _declarations(node[3])
+                    for node in nodes if node[0] == "rule" or isinstance(node[3], list))
+
+
+def serialize(nodes):
+    out = []
+    for node in nodes:
+        if node[0] == "rule":
+            out.append(f"{','.join(node[1])}{{{node[2]}}}")
+        elif node[3] is None:
+            out.append(node[2] + ";")
+        elif isinstance(node[3], list):
+            out.append(f"{node[2]}{{{serialize(node[3])}}}")
+        else:
+            out.append(f"{node[2]}{{{node[3]}}}")
+    return "".join(out)
+
+
+def critical_css(nodes, elements):
+    """Minified CSS for the rules in ``nodes`` that apply to ``elements``"""
+    kept = _critical_nodes(nodes, elements)
+    kept = _keep_referenced(kept, _declarations(kept))
+    return minify_css(serialize(kept))
+
+
+def rebase_urls(css, stylesheet, page):
+    """Rewrite relative url()s from the stylesheet's directory to the page's"""
+    source_dir, page_dir = posixpath.dirname(stylesheet), posixpath.dirname(page)
+    if source_dir == page_dir:
+        return css
+
+    def rebase(match):
+        url = match.group(2)
+        parts = urlsplit(url)
+        if parts.scheme or url.startswith(("/", "#", "data:")) or "//" in url[:8]:
+            return match.group(0)
+        target = posixpath.normpath(posixpath.join(source_dir, url))
+        return f"url({match.group(1)}{posixpath.relpath(target, page_dir or '.')}{match.group(1)})"
+
+    return _CSS_URL.sub(rebase, css)
+
+
+def restore_links(source):
+    """Undo a previous run, putting back the original stylesheet links"""
+    return _INLINED.sub(lambda m: m.group(1), source)
+
+
+def inline_critical(out_dir=DIST_DIR):
+    """Inline critical CSS into every page and return per-page byte counts"""
+    out_dir = Path(out_dir)
+    parsed = {}
+    report = {}
+    for page in sorted(out_dir.rglob("*.html")):
+        relative = page.relative_to(out_dir).as_posix()
+        original = page.read_text(encoding="utf-8")
+        source = restore_links(original)
+        elements = None
+        stats = {"blocking": 0, "inlined": 0}
+
+        def replace(match):
+            nonlocal elements
+            tag = match.group(0)
+            href = _HREF.search(tag)
+            if not href or "data-font-preload" in tag or urlsplit(href.group(1)).scheme or href.group(1).startswith("//"):
+                return tag
+            stylesheet = posixpath.normpath(posixpath.join(posixpath.dirname(relative), urlsplit(href.group(1)).path))
+            path = out_dir / stylesheet
+            if not path.is_file():
+                return tag
+            if stylesheet not in parsed:
+                text = path.read_text(encoding="utf-8")
+                parsed[stylesheet] = (len(text.encode("utf-8")), parse_css(strip_comments(text)))
+            size, nodes = parsed[stylesheet]
+            if elements is None:
+                elements = fold_elements(parse_html(source))
+            css = rebase_urls(critical_css(nodes, elements), stylesheet, relative)
+            stats["blocking"] += size
+            stats["inlined"] += len(css.encode("utf-8"))
+            url = href.group(1)
+            return (f"<style {MARKER}>{css}</style>"
+                    f'<link rel="preload" href="{url}" as="style" '
+                    f"onload=\"this.onload=null;this.rel='stylesheet'\" {MARKER}>"
+                    f"<noscript {MARKER}>{tag}</noscript>")
+
+        updated = _STYLESHEET_LINK.sub(replace, source)
+        if updated != original:
+            page.write_text(updated, encoding="utf-8")
+        if stats["blocking"]:
+            report[relative] = {**stats, "saved": stats["blocking"] - stats["inlined"]}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inline above-the-fold CSS into the pages in dist/")
+    parser.add_argument("--out", type=Path, default=DIST_DIR, help="site build directory")
+    args = parser.parse_args()
+
+    if not args.out.exists():
+        print(f"❌ {args.out} not found - run python/build_site.py first")
+        return
+
+    print("🎨 Extracting critical CSS...")
+    report = inline_critical(args.out)
+    for relative, stats in report.items():
+        print(f"   • {relative}: {stats['blocking'] / 1024:.1f} KB blocking → "
+              f"{stats['inlined'] / 1024:.1f} KB inline (saved {stats['saved'] / 1024:.1f} KB)")
+    saved = sum(s["saved"] for s in report.values())
+    print(f"✅ {len(report)} pages, {saved / 1024:.0f} KB of render-blocking CSS removed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+Font Subsetting Stage
+Scans the built pages in dist/ for the characters they can display, subsets
+every font under dist/fonts/ to those characters as WOFF2, writes an
+@font-face stylesheet with unicode-range hints and adds preload links for
+the critical faces to the pages whose CSS uses them.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import posixpath
+import re
+from html.parser import HTMLParser
+from pathlib import Path
+
+try:
+    from fontTools import subset as ft_subset
+    from fontTools.ttLib import TTFont
+except ImportError:
+    ft_subset = None
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DIST_DIR = REPO_ROOT / "dist"
+FONTS_DIR = Path("fonts")
+SUBSET_DIR = FONTS_DIR / "subset"
+MANIFEST_NAME = "manifest.json"
+STYLESHEET_NAME = "fonts.css"
+
+# Bump when subsetter options change so every font is regenerated
+PIPELINE_VERSION = 1
+
+FONT_SUFFIXES = {".woff2", ".woff", ".ttf", ".otf"}
+
+# Printable ASCII is always kept so text inserted at runtime still renders
+BASE_CHARACTERS = set(range(0x20, 0x7F))
+
+# Faces worth preloading: the upright regular and bold weights used for body text and headings
+CRITICAL_WEIGHTS = {400, 700}
+
+# Attributes whose values are rendered as text
+TEXT_ATTRIBUTES = {"alt", "title", "placeholder", "aria-label", "value"}
+
+PRELOAD_MARKER = "data-font-preload"
+
+# fontTools reports every table it cannot subset; those are dropped safely
+logging.getLogger("fontTools").setLevel(logging.ERROR)
+
+_FONT_FAMILY = re.compile(r"font-family\s*:\s*([^;}\"']*(?:(?:\"[^\"]*\"|'[^']*')[^;}\"']*)*)", re.I)
+_STYLE_BLOCK = re.compile(r"<style\b[^>]*>(.*?)</style>", re.S | re.I)
+_STYLESHEET_LINK = re.compile(r'<link\b[^>]*rel="stylesheet"[^>]*href="([^"]+)"', re.I)
+_PRELOAD_LINK = re.compile(r"[ \t]*<link\b[^>]*%s[^>]*>\n?" % PRELOAD_MARKER)
+
+
+class PageTextParser(HTMLParser):
+    """Collect every character a page renders as text"""
+
+    SKIP_TAGS = {"script", "style"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.characters = set()
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        for name, value in attrs:
+            if value and (name in TEXT_ATTRIBUTES or (tag == "meta" and name == "content")):
+                self.characters.update(map(ord, value))
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.characters.update(map(ord, data))
+
+
+def collect_characters(out_dir=DIST_DIR):
+    """Return the code points used by the pages plus scripts and data they render"""
+    out_dir = Path(out_dir)
+    characters = set(BASE_CHARACTERS)
+    for page in sorted(out_dir.rglob("*.html")):
+        parser = PageTextParser()
+        parser.feed(page.read_text(encoding="utf-8"))
+        characters |= parser.characters
+    # Scripts and data files fill in product names, search results and care sheets
+    for pattern in ("js/**/*.js", "data/**/*.json"):
+        for path in sorted(out_dir.glob(pattern)):
+            characters.update(map(ord, path.read_text(encoding="utf-8", errors="ignore")))
+    return {c for c in characters if c >= 0x20 and not 0x7F <= c < 0xA0}
+
+
+def unicode_range(codepoints):
+    """Format code points as a CSS unicode-range value, merging runs"""
+    ranges = []
+    for point in sorted(codepoints):
+        if ranges and point == ranges[-1][1] + 1:
+            ranges[-1][1] = point
+        else:
+            ranges.append([point, point])
+    return ",".join(f"U+{a:X}" if a == b else f"U+{a:X}-{b:X}" for a, b in ranges)
+
+
+def font_info(font):
+    """Family, weight and style of a loaded font"""
+    names = font["name"]
+    family = str(names.getDebugName(16) or names.getDebugName(1))
+    subfamily = str(names.getDebugName(17) or names.getDebugName(2) or "")
+    italic = bool(font["OS/2"].fsSelection & 1) or any(w in subfamily for w in ("Italic", "Oblique"))
+    return {"family": family, "weight": font["OS/2"].usWeightClass, "style": "italic" if italic else "normal"}
+
+
+def subset_font(source, target, codepoints):
+    """Write a WOFF2 subset of ``source`` and return its face metadata"""
+    options = ft_subset.Options()
+    options.flavor = "woff2"
+    options.hinting = False
+    options.desubroutinize = True
+    options.name_IDs = [1, 2, 16, 17]
+
+    font = TTFont(source)
+    info = font_info(font)
+    covered = set(font.getBestCmap()) & set(codepoints)
+    subsetter = ft_subset.Subsetter(options=options)
+    subsetter.populate(unicodes=sorted(covered))
+    subsetter.subset(font)
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    font.flavor = "woff2"
+    font.save(target)
+    return {**info, "unicodeRange": unicode_range(covered), "glyphs": len(font.getGlyphOrder())}
+
+
+def _subset_name(relative):
+    """fonts/helvetica-255/Helvetica-Bold.woff2 -> fonts/subset/helvetica-255/helvetica-bold.woff2"""
+    path = Path(relative).relative_to(FONTS_DIR)
+    stem = re.sub(r"[^a-z0-9]+", "-", path.stem.lower()).strip("-")
+    return (SUBSET_DIR / path.parent / f"{stem}.woff2").as_posix()
+
+
+def font_face_css(faces):
+    """@font-face rules for the subset faces, relative to the stylesheet"""
+    rules = []
+    for entry in faces.values():
+        url = posixpath.relpath(entry["subset"], SUBSET_DIR.as_posix())
+        rules.append(
+            "@font-face {\n"
+            f"    font-family: '{entry['family']}';\n"
+            f"    src: url('{url}') format('woff2');\n"
+            f"    font-weight: {entry['weight']};\n"
+            f"    font-style: {entry['style']};\n"
+            "    font-display: swap;\n"
+            f"    unicode-range: {entry['unicodeRange']};\n"
+            "}\n"
+        )
+    return "\n".join(rules)
+
+
+def build_fonts(out_dir=DIST_DIR, force=False):
+    """Subset every font in ``out_dir``/fonts and return ``(manifest, report)``"""
+    if ft_subset is None:
+        raise RuntimeError("fontTools is required for font subsetting: pip install fonttools brotli")
+
+    out_dir = Path(out_dir)
+    subset_root = out_dir / SUBSET_DIR
+    manifest_path = subset_root / MANIFEST_NAME
+    previous = {}
+    if manifest_path.exists() and not force:
+        stored = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if stored.get("version") == PIPELINE_VERSION:
+            previous = stored["faces"]
+
+    codepoints = collect_characters(out_dir)
+    charset = hashlib.sha256(unicode_range(codepoints).encode("ascii")).hexdigest()
+
+    faces = {}
+    report = {"processed": [], "skipped": [], "failed": []}
+    sources = sorted(p for p in (out_dir / FONTS_DIR).rglob("*")
+                     if p.suffix.lower() in FONT_SUFFIXES and subset_root not in p.parents)
+    for source in sources:
+        relative = source.relative_to(out_dir).as_posix()
+        digest = hashlib.sha256(source.read_bytes() + charset.encode("ascii")).hexdigest()
+        entry = previous.get(relative)
+        if entry and entry["hash"] == digest and (out_dir / entry["subset"]).exists():
+            faces[relative] = entry
+            report["skipped"].append(relative)
+            continue
+        name = _subset_name(relative)
+        try:
+            info = subset_font(source, out_dir / name, codepoints)
+        except Exception as e:
+            report["failed"].append((relative, str(e)))
+            continue
+        faces[relative] = {
+            "hash": digest,
+            "subset": name,
+            **info,
+            "sourceBytes": source.stat().st_size,
+            "bytes": (out_dir / name).stat().st_size,
+        }
+        report["processed"].append(relative)
+
+    subset_root.mkdir(parents=True, exist_ok=True)
+    (subset_root / STYLESHEET_NAME).write_text(font_face_css(faces), encoding="utf-8")
+    manifest = {
+        "version": PIPELINE_VERSION,
+        "stylesheet": (SUBSET_DIR / STYLESHEET_NAME).as_posix(),
+        "characters": len(codepoints),
+        "faces": faces,
+    }
+    manifest_path.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+    return manifest, report
+
+
+def font_families(css):
+    """Lowercase family names named in font-family declarations"""
+    families = set()
+    for declaration in _FONT_FAMILY.findall(css):
+        for name in declaration.split(","):
+            name = name.strip().strip("'\"").strip().lower()
+            if name:
+                families.add(name)
+    return families
+
+
+def page_families(page, out_dir):
+    """Font families used by a page's inline styles and local stylesheets"""
+    source = page.read_text(encoding="utf-8")
+    css = "\n".join(_STYLE_BLOCK.findall(source))
+    base = page.parent
+    for href in _STYLESHEET_LINK.findall(source):
+        path = (base / href.split("?")[0]).resolve()
+        if out_dir.resolve() in path.parents and path.is_file() and path.name != STYLESHEET_NAME:
+            css += "\n" + path.read_text(encoding="utf-8")
+    return font_families(css)
+
+
+def add_preloads(out_dir, manifest):
+    """Link the subset stylesheet and preload critical faces on pages that use them
+
+    Links added by an earlier run carry a marker attribute and are replaced,
+    so running the stage again never duplicates them.
+    """
+    out_dir = Path(out_dir)
+    updated = {}
+    for page in sorted(out_dir.rglob("*.html")):
+        source = page.read_text(encoding="utf-8")
+        cleaned = _PRELOAD_LINK.sub("", source)
+        families = page_families(page, out_dir)
+        used = [f for f in manifest["faces"].values() if f["family"].lower() in families]
+        links = []
+        if used:
+            base = page.parent.relative_to(out_dir).as_posix()
+            relative = lambda target: posixpath.relpath(target, base or ".")
+            links = [f'<link rel="preload" href="{relative(f["subset"])}" as="font" type="font/woff2" '
+                     f'crossorigin {PRELOAD_MARKER}>'
+                     for f in used if f["style"] == "normal" and f["weight"] in CRITICAL_WEIGHTS]
+            links.append(f'<link rel="stylesheet" href="{relative(manifest["stylesheet"])}" {PRELOAD_MARKER}>')
+        result = cleaned
+        if links and "</head>" in cleaned:
+            result = cleaned.replace("</head>", "".join(f"    {link}\n" for link in links) + "</head>", 1)
+        if result != source:
+            page.write_text(result, encoding="utf-8")
+        if links:
+            updated[page.relative_to(out_dir).as_posix()] = len(links) - 1
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Subset the fonts in dist/ to the characters the site uses")
+    parser.add_argument("--out", type=Path, default=DIST_DIR, help="site build directory")
+    parser.add_argument("--force", action="store_true", help="re-subset every font")
+    parser.add_argument("--no-preload", action="store_true", help="only write the subsets and stylesheet")
+    args = parser.parse_args()
+
+    if not (args.out / FONTS_DIR).exists():
+        print(f"❌ {args.out / FONTS_DIR} not found - run python/build_site.py first")
+        return
+
+    print("🔤 Subsetting fonts...")
+    manifest, report = build_fonts(out_dir=args.out, force=args.force)
+    print(f"✅ Processed {len(report['processed'])}, unchanged {len(report['skipped'])} "
+          f"({manifest['characters']} characters in use)")
+    for relative, error in report["failed"]:
+        print(f"⚠️  Skipped {relative}: {error}")
+    for relative, face in manifest["faces"].items():
+        print(f"   • {relative}: {face['sourceBytes'] / 1024:.1f} KB → {face['bytes'] / 1024:.1f} KB")
+    saved = sum(f["sourceBytes"] - f["bytes"] for f in manifest["faces"].values())
+    print(f"📉 Saved {saved / 1024:.0f} KB across {len(manifest['faces'])} faces")
+
+    if not args.no_preload:
+        updated = add_preloads(args.out, manifest)
+        if updated:
+            print(f"📝 Added {sum(updated.values())} preload hints to {len(updated)} pages")
+        else:
+            print("ℹ️  No page CSS names a bundled font family - no preload hints added")
+    print(f"💾 Stylesheet: {args.out / manifest['stylesheet']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Responsive Image Pipeline
+Resizes everything under images/ into several widths, encodes AVIF and WebP
+plus a JPEG (or PNG for transparent images) fallback with metadata stripped,
+and writes a srcset-ready manifest. Work is spread over a process pool and
+images whose content hash has not changed are skipped.
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import unquote
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SOURCE_DIR = REPO_ROOT / "images"
+DIST_DIR = REPO_ROOT / "dist"
+RESPONSIVE_DIR = Path("images") / "responsive"
+MANIFEST_NAME = "manifest.json"
+
+# Bump when encoder settings change so every image is regenerated
+PIPELINE_VERSION = 1
+
+WIDTHS = (320, 640, 960, 1280, 1920)
+SOURCE_SUFFIXES = {".jpg", ".jpeg", ".png"}
+
+QUALITY = {"avif": 60, "webp": 80, "jpg": 82}
+MIME_TYPES = {"avif": "image/avif", "webp": "image/webp", "jpg": "image/jpeg", "png": "image/png"}
+
+DEFAULT_SIZES = "100vw"
+
+
+def output_stem(relative):
+    """Turn "images/animals/corn snake.png" into "animals/corn-snake" (URL-safe)"""
+    path = Path(relative).relative_to("images")
+    stem = re.sub(r"[^a-z0-9]+", "-", path.stem.lower()).strip("-")
+    return (path.parent / stem).as_posix()
+
+
+def target_widths(width):
+    """Standard widths below the source width, plus the (capped) source width itself"""
+    largest = min(width, WIDTHS[-1])
+    return [w for w in WIDTHS if w < largest] + [largest]
+
+
+def modern_formats():
+    """Modern formats this Pillow build can encode, best first"""
+    return [fmt for fmt in ("avif", "webp") if features.check(fmt)]
+
+
+def _has_alpha(image):
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        return image.convert("RGBA").getchannel("A").getextrema()[0] < 255
+    return False
+
+
+def _save(image, path, fmt):
+    # Passing no exif/icc_profile/info drops all source metadata
+    if fmt == "jpg":
+        image.convert("RGB").save(path, "JPEG", quality=QUALITY["jpg"], optimize=True, progressive=True)
+    elif fmt == "png":
+        image.save(path, "PNG", optimize=True)
+    elif fmt == "webp":
+        image.save(path, "WEBP", quality=QUALITY["webp"], method=4)
+    elif fmt == "avif":
+        image.save(path, "AVIF", quality=QUALITY["avif"])
+
+
+def process_image(job):
+    """Worker: encode every width and format for one source image"""
+    source, relative, out_dir, digest, formats = job
+    try:
+        with Image.open(source) as original:
+            image = ImageOps.exif_transpose(original)
+            image.load()
+    except Exception as e:
+        return relative, {"error": str(e)}
+
+    alpha = _has_alpha(image)
+    image = image.convert("RGBA" if alpha else "RGB")
+    fallback = "png" if alpha else "jpg"
+    stem = output_stem(relative)
+
+    variants = {fmt: [] for fmt in formats + [fallback]}
+    for width in target_widths(image.width):
+        height = round(image.height * width / image.width)
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for fmt in variants:
+            name = (RESPONSIVE_DIR / f"{stem}-{width}.{fmt}").as_posix()
+            target = Path(out_dir) / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            _save(resized, target, fmt)
+            variants[fmt].append({"src": name, "width": width, "bytes": target.stat().st_size})
+
+    return relative, {
+        "hash": digest,
+        "width": image.width,
+        "height": image.height,
+        "sourceBytes": Path(source).stat().st_size,
+        "fallback": fallback,
+        "variants": variants,
+        "srcset": {fmt: ", ".join(f"{v['src']} {v['width']}w" for v in entries) for fmt, entries in variants.items()},
+    }
+
+
+def _file_hash(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def _entry_is_current(entry, digest, out_dir):
+    if not entry or entry.get("hash") != digest or "variants" not in entry:
+        return False
+    return all((out_dir / v["src"]).exists() for entries in entry["variants"].values() for v in entries)
+
+
+def build_images(root=REPO_ROOT, out_dir=DIST_DIR, jobs=None, force=False):
+    """Generate responsive variants and return ``(manifest, report)``"""
+    if Image is None:
+        raise RuntimeError("Pillow is required for the image pipeline: pip install pillow")
+
+    root = Path(root)
+    out_dir = Path(out_dir)
+    manifest_path = out_dir / RESPONSIVE_DIR / MANIFEST_NAME
+    previous = {}
+    if manifest_path.exists() and not force:
+        stored = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if stored.get("version") == PIPELINE_VERSION:
+            previous = stored["images"]
+
+    formats = modern_formats()
+    images = {}
+    report = {"processed": [], "skipped": [], "failed": []}
+    jobs_to_run = []
+
+    for source in sorted((root / "images").rglob("*")):
+        if source.suffix.lower() not in SOURCE_SUFFIXES or RESPONSIVE_DIR.as_posix() in source.as_posix():
+            continue
+        relative = source.relative_to(root).as_posix()
+        digest = _file_hash(source)
+        if _entry_is_current(previous.get(relative), digest, out_dir):
+            images[relative] = previous[relative]
+            report["skipped"].append(relative)
+        else:
+            jobs_to_run.append((str(source), relative, str(out_dir), digest, formats))
+
+    if jobs_to_run:
+        with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+            for relative, entry in pool.map(process_image, jobs_to_run):
+                if "error" in entry:
+                    report["failed"].append((relative, entry["error"]))
+                else:
+                    images[relative] = entry
+                    report["processed"].append(relative)
+
+    manifest = {"version": PIPELINE_VERSION, "formats": formats, "images": dict(sorted(images.items()))}
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    manifest_path.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+    return manifest, report
+
+
+IMG_TAG = re.compile(r"<img\b[^>]*>", re.I)
+ATTRIBUTE = re.compile(r'([\w-]+)\s*=\s*"([^"]*)"')
+
+
+def picture_html(entry, attributes):
+    """Build a <picture> element for a manifest entry, keeping the <img> attributes"""
+    sizes = attributes.pop("sizes", DEFAULT_SIZES)
+    attributes.pop("src", None)
+    attributes.pop("srcset", None)
+
+    fallback = entry["variants"][entry["fallback"]]
+    sources = "".join(
+        f'<source type="{MIME_TYPES[fmt]}" srcset="{entry["srcset"][fmt]}" sizes="{sizes}">'
+        for fmt in entry["variants"] if fmt != entry["fallback"]
+    )
+    extra = "".join(f' {name}="{html.escape(value, quote=True)}"' for name, value in attributes.items())
+    img = (f'<img src="{fallback[-1]["src"]}" srcset="{entry["srcset"][entry["fallback"]]}" '
+           f'sizes="{sizes}"{extra} data-responsive>')
+    return f"<picture>{sources}{img}</picture>"
+
+
+def rewrite_html(out_dir, manifest):
+    """Swap <img> tags that point at processed images for <picture> elements"""
+    out_dir = Path(out_dir)
+    rewritten = {}
+
+    def replace(match):
+        tag = match.group(0)
+        if "data-responsive" in tag:
+            return tag
+        attributes = {k: html.unescape(v) for k, v in ATTRIBUTE.findall(tag)}
+        entry = manifest["images"].get(unquote(attributes.get("src", "")))
+        if not entry:
+            return tag
+        return picture_html(entry, attributes)
+
+    for page in sorted(out_dir.glob("*.html")):
+        source = page.read_text(encoding="utf-8")
+        updated, count = IMG_TAG.subn(replace, source)
+        if updated != source:
+            page.write_text(updated, encoding="utf-8")
+            rewritten[page.name] = count
+    return rewritten
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate responsive image variants into dist/")
+    parser.add_argument("--out", type=Path, default=DIST_DIR, help="site build directory")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="re-encode every image")
+    parser.add_argument("--no-rewrite", action="store_true", help="only write variants and the manifest")
+    args = parser.parse_args()
+
+    print("🖼️  Building responsive images...")
+    manifest, report = build_images(out_dir=args.out, jobs=args.jobs, force=args.force)
+    print(f"✅ Processed {len(report['processed'])}, unchanged {len(report['skipped'])}")
+    for relative, error in report["failed"]:
+        print(f"⚠️  Skipped {relative}: {error}")
+
+    source_bytes = sum(e["sourceBytes"] for e in manifest["images"].values())
+    best = manifest["formats"][0] if manifest["formats"] else None
+    if best:
+        largest = sum(e["variants"][best][-1]["bytes"] for e in manifest["images"].values())
+        print(f"📉 Originals {source_bytes / 1024:.0f} KB → largest {best.upper()} {largest / 1024:.0f} KB")
+
+    if not args.no_rewrite:
+        rewritten = rewrite_html(args.out, manifest)
+        print(f"📝 Rewrote {sum(rewritten.values())} <img> tags in {len(rewritten)} pages")
+    print(f"💾 Manifest: {args.out / RESPONSIVE_DIR / MANIFEST_NAME}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Build Inverted Index for data/items.json
+Produces one lazily-loaded JSON shard per species with per-category postings
+lists sorted by price and bucketed by size, so queries like
+"decor for crested-gecko under $30 that fits in 18 inches" never scan the catalog
+"""
+
+import bisect
+import hashlib
+import heapq
+import json
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+ITEMS_PATH = REPO_ROOT / "data" / "items.json"
+INDEX_DIR = REPO_ROOT / "data" / "index" / "items"
+
+INDEX_VERSION = 1
+
+# Upper bounds (inches) on an item's longest dimension; anything larger is "oversize"
+SIZE_BUCKETS = [6, 12, 18, 24, 36, 48]
+OVERSIZE = "oversize"
+
+# compatibleSpecies value meaning the item suits every species
+UNIVERSAL_SPECIES = "all"
+
+
+def longest_dimension(item):
+    """Return the largest of an item's length/width/height in inches"""
+    dimensions = item.get("dimensions") or {}
+    return max((float(v) for v in dimensions.values()), default=0.0)
+
+
+def size_bucket(longest):
+    """Return the bucket key an item with the given longest dimension falls into"""
+    position = bisect.bisect_left(SIZE_BUCKETS, longest)
+    if position == len(SIZE_BUCKETS):
+        return OVERSIZE
+    return str(SIZE_BUCKETS[position])
+
+
+def bucket_bounds(key):
+    """Return the (exclusive lower, inclusive upper) longest-dimension range of a bucket"""
+    if key == OVERSIZE:
+        return SIZE_BUCKETS[-1], float("inf")
+    upper = int(key)
+    position = SIZE_BUCKETS.index(upper)
+    return (SIZE_BUCKETS[position - 1] if position else 0), upper
+
+
+def _postings(records):
+    """Build a price-sorted postings list with a parallel price column for bisecting"""
+    ordered = sorted(records, key=lambda r: (r["price"], r["id"]))
+    return {
+        "ids": [r["id"] for r in ordered],
+        "prices": [r["price"] for r in ordered],
+    }
+
+
+def build_shard(species, items_by_category):
+    """Build the index shard for one species from the already-filtered items"""
+    items = {}
+    categories = {}
+
+    for category, records in items_by_category.items():
+        buckets = {}
+        for record in records:
+            items[record["id"]] = record
+            buckets.setdefault(record["bucket"], []).append(record)
+
+        categories[category] = {
+            **_postings(records),
+            "sizeBuckets": {key: _postings(bucket) for key, bucket in buckets.items()},
+        }
+
+    return {
+        "version": INDEX_VERSION,
+        "species": species,
+        "items": items,
+        "categories": categories,
+    }
+
+
+def build_index(catalog):
+    """Split the items catalog into per-species shards
+
+    Items marked compatible with "all" are copied into every species shard and
+    also published on their own under the "all" shard for species that have no
+    dedicated items yet.
+    """
+    species_names = set()
+    for records in catalog.values():
+        for item in records:
+            species_names.update(item.get("compatibleSpecies", []))
+    species_names.add(UNIVERSAL_SPECIES)
+
+    per_species = {name: {} for name in species_names}
+
+    for category, records in catalog.items():
+        for item in records:
+            longest = longest_dimension(item)
+            record = {
+                "id": item["id"],
+                "name": item["name"],
+                "category": category,
+                "price": float(item["price"]),
+                "image": item.get("image"),
+                "dimensions": item.get("dimensions"),
+                "longest": longest,
+                "bucket": size_bucket(longest),
+            }
+
+            compatible = set(item.get("compatibleSpecies", []))
+            targets = species_names if UNIVERSAL_SPECIES in compatible else compatible
+            for species in targets:
+                per_species[species].setdefault(category, []).append(record)
+
+    return {species: build_shard(species, per_species[species]) for species in sorted(per_species)}
+
+
+def query_shard(shard, category, max_price=None, max_size=None, limit=None):
+    """Return items from a shard in price order, filtered by price and size
+
+    Only the postings whose bucket can satisfy ``max_size`` are touched and each
+    of those is cut at ``max_price`` with a binary search.
+    """
+    postings = shard["categories"].get(category)
+    if not postings:
+        return []
+
+    def prefix(posting):
+        end = len(posting["prices"])
+        if max_price is not None:
+            end = bisect.bisect_right(posting["prices"], max_price)
+        return [(posting["prices"][i], posting["ids"][i]) for i in range(end)]
+
+    if max_size is None:
+        candidates = prefix(postings)
+    else:
+        streams = []
+        for key, posting in postings["sizeBuckets"].items():
+            lower, upper = bucket_bounds(key)
+            if lower >= max_size:
+                continue
+            stream = prefix(posting)
+            if upper > max_size:
+                # Straddling bucket: the only place a per-item size check is needed
+                stream = [p for p in stream if shard["items"][p[1]]["longest"] <= max_size]
+            streams.append(stream)
+        candidates = heapq.merge(*streams)
+
+    results = []
+    for _, item_id in candidates:
+        results.append(shard["items"][item_id])
+        if limit is not None and len(results) >= limit:
+            break
+    return results
+
+
+def write_index(shards, output_dir=INDEX_DIR, source_bytes=b""):
+    """Write every shard plus a manifest describing them to ``output_dir``"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    manifest = {
+        "version": INDEX_VERSION,
+        "source": "data/items.json",
+        "sourceHash": hashlib.sha256(source_bytes).hexdigest()[:16],
+        "sizeBuckets": SIZE_BUCKETS,
+        "fallback": UNIVERSAL_SPECIES,
+        "shards": {},
+    }
+
+    for species, shard in shards.items():
+        payload = json.dumps(shard, separators=(",", ":"), sort_keys=True)
+        filename = f"{species}.json"
+        (output_dir / filename).write_text(payload, encoding="utf-8")
+        manifest["shards"][species] = {
+            "file": filename,
+            "items": len(shard["items"]),
+            "bytes": len(payload.encode("utf-8")),
+        }
+
+    # Remove shards for species that no longer have any items
+    for stale in output_dir.glob("*.json"):
+        if stale.name != "manifest.json" and stale.stem not in shards:
+            stale.unlink()
+
+    (output_dir / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def main():
+    """Build the items index from data/items.json"""
+    print("🗂️  Building items index...")
+
+    source_bytes = ITEMS_PATH.read_bytes()
+    catalog = json.loads(source_bytes)
+    shards = build_index(catalog)
+    manifest = write_index(shards, source_bytes=source_bytes)
+
+    for species, info in manifest["shards"].items():
+        print(f"   • {species}: {info['items']} items, {info['bytes']} bytes")
+    print(f"💾 Wrote {len(manifest['shards'])} shards to {INDEX_DIR.relative_to(REPO_ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
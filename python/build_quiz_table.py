@@ -0,0 +1,122 @@
+"""
+Build the Enclosure Quiz Outcome Table
+Enumerates every (animal, enclosure type, life stage) path through the
+enclosure builder quiz and precomputes its recommended enclosures, substrate
+and plants from js/enclosure-data.js and data/items.json, so
+js/enclosure-quiz.js only looks its answers up in data/index/quiz.json
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+from enclosure_data import ENCLOSURE_DATA_PATH, load_enclosure_data
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+ITEMS_PATH = REPO_ROOT / "data" / "items.json"
+TABLE_PATH = REPO_ROOT / "data" / "index" / "quiz.json"
+
+TABLE_VERSION = 1
+
+# Which approved-enclosure list each life stage reads; like
+# getApprovedEnclosuresForAnimal, a stage without its own list uses the adult one
+LIFE_STAGES = {"adult": "approvedEnclosureIds", "juvenile": "juvenileApprovedEnclosureIds"}
+
+# Curated substrate picks; other species get their cheapest compatible substrate
+SUBSTRATE_PICKS = {"bearded-dragon": "sub-003"}
+
+# compatibleSpecies value meaning the item suits every species
+UNIVERSAL_SPECIES = "all"
+
+
+def stage_enclosures(animal, stage, enclosures):
+    """Listed enclosures approved for an animal at a life stage, in approval order"""
+    ids = animal.get(LIFE_STAGES[stage])
+    if ids is None:
+        ids = animal.get(LIFE_STAGES["adult"], [])
+    return [enclosures[i] for i in ids if i in enclosures and enclosures[i].get("show")]
+
+
+def recommend_substrate(slug, substrates):
+    """Id of the substrate recommended for a species, or None"""
+    if slug in SUBSTRATE_PICKS:
+        return SUBSTRATE_PICKS[slug]
+    compatible = [item for item in substrates if slug in item.get("compatibleSpecies", [])]
+    if not compatible:
+        compatible = [item for item in substrates if UNIVERSAL_SPECIES in item.get("compatibleSpecies", [])]
+    return min(compatible, key=lambda item: (item["price"], item["id"]))["id"] if compatible else None
+
+
+def recommend_plants(slug, plants):
+    """Ids of the plants recommended for a species: species-specific ones first, then universal ones"""
+    specific = [item["id"] for item in plants if slug in item.get("compatibleSpecies", [])]
+    universal = [item["id"] for item in plants if UNIVERSAL_SPECIES in item.get("compatibleSpecies", [])]
+    return specific + [i for i in universal if i not in specific]
+
+
+def build_table(enclosures, animals, catalog):
+    """Outcome table keyed ``quiz[animal][stage][enclosureType]``
+
+    Paths with no approved enclosure are left out, so a missing key means
+    the quiz has nothing to offer there. ``items`` holds the name and price
+    of every recommended item so the client can render without items.json.
+    """
+    quiz = {}
+    referenced = set()
+    for slug, animal in animals.items():
+        substrate = recommend_substrate(slug, catalog.get("substrate", []))
+        plants = recommend_plants(slug, catalog.get("plants", []))
+        for stage in LIFE_STAGES:
+            by_type = {}
+            for enclosure in stage_enclosures(animal, stage, enclosures):
+                kind = enclosure.get("enclosureType") or "other"
+                by_type.setdefault(kind, {"enclosures": [], "substrate": substrate, "plants": plants})
+                by_type[kind]["enclosures"].append(enclosure["id"])
+            if by_type:
+                quiz.setdefault(slug, {})[stage] = by_type
+                referenced.update(plants)
+                if substrate:
+                    referenced.add(substrate)
+
+    items = {item["id"]: {"name": item["name"], "price": float(item["price"])}
+             for records in catalog.values() for item in records if item["id"] in referenced}
+    return {"version": TABLE_VERSION, "items": dict(sorted(items.items())), "quiz": quiz}
+
+
+def lookup(table, animal, enclosure_type, stage="adult"):
+    """The recommendations for one quiz path, or None when the path has none"""
+    return table["quiz"].get(animal, {}).get(stage, {}).get(enclosure_type)
+
+
+def source_hash(*paths):
+    """Short hash of the files a table was built from"""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def write_table(table, path=TABLE_PATH):
+    """Write the table as compact JSON and return its size in bytes"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = json.dumps(table, separators=(",", ":"))
+    path.write_text(payload, encoding="utf-8")
+    return len(payload.encode("utf-8"))
+
+
+def main():
+    """Build data/index/quiz.json from enclosure-data.js and items.json"""
+    print("🧭 Building quiz outcome table...")
+    enclosures, animals = load_enclosure_data()
+    catalog = json.loads(ITEMS_PATH.read_text(encoding="utf-8"))
+    table = build_table(enclosures, animals, catalog)
+    table["sourceHash"] = source_hash(ENCLOSURE_DATA_PATH, ITEMS_PATH)
+    size = write_table(table)
+    paths = sum(len(types) for stages in table["quiz"].values() for types in stages.values())
+    print(f"   • {len(table['quiz'])} animals, {paths} paths, {len(table['items'])} items")
+    print(f"💾 Wrote {TABLE_PATH.relative_to(REPO_ROOT)} ({size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""
+Build the Site Search Index
+Crawls the care guide pages and data/*.json and writes a versioned
+prefix/trigram inverted index with TF-IDF weights for js/search-functionality.js
+"""
+
+import bisect
+import json
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from html.parser import HTMLParser
+from pathlib import Path
+
+from enclosure_data import load_enclosure_data
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DATA_DIR = REPO_ROOT / "data"
+INDEX_PATH = DATA_DIR / "index" / "search.json"
+
+INDEX_VERSION = 1
+
+# Relative importance of each field when computing term frequencies
+FIELD_WEIGHTS = {"title": 4, "keywords": 3, "summary": 2, "body": 1}
+
+# Postings below this normalized weight are dropped to keep the index compact
+MIN_WEIGHT = 0.01
+WEIGHT_SCALE = 1000
+
+MAX_RESULTS = 6
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "can", "for", "from",
+    "has", "have", "here", "in", "into", "is", "it", "its", "of", "on", "or",
+    "so", "such", "than", "that", "the", "their", "them", "there", "these",
+    "they", "this", "to", "was", "will", "with", "you", "your",
+}
+
+# Pages that are not care guides but should still be searchable
+GENERAL_PAGES = {
+    "all-care-guides.html": {
+        "title": "All Care Guides",
+        "type": "Page",
+        "icon": "📚",
+        "keywords": ["all", "care", "guides", "list", "overview"],
+    },
+    "enclosure-builder.html": {
+        "title": "Enclosure Designer",
+        "type": "Tool",
+        "icon": "🔧",
+        "keywords": ["enclosure", "designer", "builder", "design", "build", "create"],
+    },
+    "about.html": {
+        "title": "About ReptileCare",
+        "type": "Page",
+        "icon": "📚",
+        "keywords": ["about", "mission", "research"],
+    },
+}
+
+# Hobbyist nicknames that never appear in the page text
+NICKNAMES = {
+    "leopard-gecko": ["leo"],
+    "bearded-dragon": ["beardie"],
+    "crested-gecko": ["crestie"],
+}
+
+BUILDER_KEYWORDS = ["enclosure", "design", "builder", "habitat", "tank", "terrarium"]
+
+
+def slugify(name):
+    """Convert a common name like "White's Tree Frog" to "whites-tree-frog" """
+    name = name.lower().replace("'", "").replace("’", "")
+    return re.sub(r"[^a-z0-9]+", "-", name).strip("-")
+
+
+def tokenize(text, keep_stopwords=False):
+    """Split text into lowercase ASCII word tokens"""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    text = text.lower().replace("'", "")
+    tokens = re.findall(r"[a-z0-9]+", text)
+    if keep_stopwords:
+        return tokens
+    return [t for t in tokens if len(t) > 1 and t not in STOPWORDS]
+
+
+def trigrams(term):
+    """Return the set of character trigrams of a term"""
+    return {term[i:i + 3] for i in range(len(term) - 2)}
+
+
+class PageTextParser(HTMLParser):
+    """Collect the title, hero text and visible body text of a page"""
+
+    SKIP_TAGS = {"script", "style", "header", "footer", "nav", "noscript"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.heading = ""
+        self.summary = []
+        self.body = []
+        self._stack = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("meta", "img", "br", "hr", "input", "link", "source"):
+            attrs = dict(attrs)
+            if tag == "meta" and attrs.get("name") == "description":
+                self.summary.append(attrs.get("content") or "")
+            return
+        classes = (dict(attrs).get("class") or "").split()
+        self._stack.append((tag, classes))
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        while self._stack:
+            open_tag, _ = self._stack.pop()
+            if open_tag in self.SKIP_TAGS:
+                self._skip_depth -= 1
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if not data.strip():
+            return
+        tags = [t for t, _ in self._stack]
+        if "title" in tags:
+            self.title += data.strip()
+        elif self._skip_depth:
+            return
+        elif "h1" in tags and not self.heading:
+            self.heading = data.strip()
+        elif any("species-hero-subhead" in c for _, c in self._stack):
+            self.summary.append(data)
+        else:
+            self.body.append(data)
+
+
+def parse_page(path):
+    """Parse one HTML page into its searchable fields"""
+    parser = PageTextParser()
+    parser.feed(Path(path).read_text(encoding="utf-8"))
+    return {
+        "title": parser.heading or parser.title,
+        "summary": " ".join(parser.summary),
+        "body": " ".join(parser.body),
+    }
+
+
+def is_care_guide(path):
+    """Care guide pages are the ones built around the species hero section"""
+    return 'class="species-hero"' in Path(path).read_text(encoding="utf-8")
+
+
+def collect_documents(root=REPO_ROOT):
+    """Gather every searchable document from the pages and data files"""
+    root = Path(root)
+    documents = []
+    care_guides = {}
+
+    for page in sorted(root.glob("*.html")):
+        if page.name in GENERAL_PAGES:
+            fields = parse_page(page)
+            meta = GENERAL_PAGES[page.name]
+            documents.append({
+                "title": meta["title"],
+                "url": page.name,
+                "type": meta["type"],
+                "icon": meta["icon"],
+                "fields": {**fields, "title": meta["title"], "keywords": " ".join(meta["keywords"])},
+            })
+        elif is_care_guide(page):
+            fields = parse_page(page)
+            slug = page.stem
+            title = fields["title"] or slug.replace("-", " ").title()
+            document = {
+                "title": title,
+                "url": page.name,
+                "type": "Care Guide",
+                "icon": "📚",
+                "fields": {**fields, "title": title,
+                           "keywords": " ".join(["care", "guide"] + NICKNAMES.get(slug, []))},
+            }
+            care_guides[slug] = document
+            documents.append(document)
+
+    # Care sheet data adds scientific names to the matching guides
+    care_data_path = root / "data" / "reptile_care_data.json"
+    if care_data_path.exists():
+        for row in json.loads(care_data_path.read_text(encoding="utf-8")):
+            guide = care_guides.get(slugify(row.get("Common Name") or ""))
+            if guide and row.get("Species"):
+                guide["fields"]["keywords"] += " " + row["Species"]
+
+    # One "design an enclosure" entry per animal the builder supports
+    enclosure_data_path = root / "js" / "enclosure-data.js"
+    if enclosure_data_path.exists():
+        _, animals = load_enclosure_data(enclosure_data_path)
+        for slug, animal in animals.items():
+            name = animal["commonName"]
+            keywords = [name, animal.get("scientificName", "")] + BUILDER_KEYWORDS + NICKNAMES.get(slug, [])
+            documents.append({
+                "title": f"Design {name} Enclosure",
+                "url": f"enclosure-builder.html?reptile={slug}",
+                "type": "Enclosure Builder",
+                "icon": "🔧",
+                "fields": {"title": f"Design {name} Enclosure", "keywords": " ".join(keywords)},
+            })
+
+    # Enclosure products shown in the builder
+    products_path = root / "data" / "enclosure_products.json"
+    if products_path.exists():
+        for product in json.loads(products_path.read_text(encoding="utf-8")):
+            if product.get("Show or Hide") != "Show":
+                continue
+            documents.append({
+                "title": product["Product Name"],
+                "url": "enclosure-builder.html",
+                "type": "Enclosure",
+                "icon": "🏠",
+                "fields": {
+                    "title": product["Product Name"],
+                    "keywords": " ".join(filter(None, [product.get("Material"), product.get("Dimensions"),
+                                                       "enclosure", "terrarium"])),
+                },
+            })
+
+    return documents
+
+
+def build_index(documents):
+    """Build the TF-IDF weighted inverted index for a list of documents"""
+    term_frequencies = []
+    heading_terms = []
+    for document in documents:
+        counts = Counter()
+        heading = set()
+        for field, text in document["fields"].items():
+            for token in tokenize(text):
+                counts[token] += FIELD_WEIGHTS.get(field, 1)
+                if field != "body":
+                    heading.add(token)
+        term_frequencies.append(counts)
+        heading_terms.append(heading)
+
+    document_frequency = Counter()
+    for counts in term_frequencies:
+        document_frequency.update(counts.keys())
+
+    total = len(documents)
+    postings = defaultdict(list)
+    for doc_id, counts in enumerate(term_frequencies):
+        weights = {
+            term: (1 + math.log(tf)) * math.log(1 + total / document_frequency[term])
+            for term, tf in counts.items()
+        }
+        # Normalize against the heading fields only so a long care guide is not
+        # outranked by a short entry just because its body has more words
+        heading = [w for t, w in weights.items() if t in heading_terms[doc_id]] or list(weights.values())
+        norm = math.sqrt(sum(w * w for w in heading)) or 1.0
+        for term, weight in weights.items():
+            weight = min(weight / norm, 1.0)
+            if weight >= MIN_WEIGHT:
+                postings[term].append((doc_id, round(weight * WEIGHT_SCALE)))
+
+    terms = sorted(postings)
+    trigram_table = defaultdict(list)
+    for term_id, term in enumerate(terms):
+        for gram in sorted(trigrams(term)):
+            trigram_table[gram].append(term_id)
+
+    return {
+        "version": INDEX_VERSION,
+        "weightScale": WEIGHT_SCALE,
+        # Shipped so the client tokenizes queries exactly like the indexer
+        "stopwords": sorted(STOPWORDS),
+        "docs": [{k: d[k] for k in ("title", "url", "type", "icon")} for d in documents],
+        "terms": terms,
+        # Flattened [docId, weight, docId, weight, ...] per term
+        "postings": [[v for pair in postings[term] for v in pair] for term in terms],
+        "trigrams": dict(sorted(trigram_table.items())),
+    }
+
+
+def match_terms(index, token):
+    """Return ``(term_id, closeness)`` pairs for a query token
+
+    Prefix matches come from a binary search over the sorted vocabulary; if
+    there are none, terms sharing every trigram of the token are checked for
+    a substring match.
+    """
+    terms = index["terms"]
+    matches = []
+    position = bisect.bisect_left(terms, token)
+    while position < len(terms) and terms[position].startswith(token):
+        matches.append((position, len(token) / len(terms[position])))
+        position += 1
+
+    if not matches and len(token) >= 3:
+        grams = sorted(trigrams(token), key=lambda g: len(index["trigrams"].get(g, [])))
+        candidates = set(index["trigrams"].get(grams[0], []))
+        for gram in grams[1:]:
+            candidates &= set(index["trigrams"].get(gram, []))
+        matches = [(t, 0.5 * len(token) / len(terms[t])) for t in sorted(candidates) if token in terms[t]]
+
+    return matches
+
+
+def search(index, query, limit=MAX_RESULTS):
+    """Rank documents for a query; every query token must match"""
+    tokens = tokenize(query) or tokenize(query, keep_stopwords=True)
+    if not tokens:
+        return []
+
+    scores = None
+    for token in tokens:
+        token_scores = {}
+        for term_id, closeness in match_terms(index, token):
+            posting = index["postings"][term_id]
+            # Exact matches count in full, prefix/infix matches partially
+            factor = 1.0 if closeness == 1.0 else 0.5 + 0.5 * closeness
+            for i in range(0, len(posting), 2):
+                doc_id, weight = posting[i], posting[i + 1] * factor
+                token_scores[doc_id] = max(token_scores.get(doc_id, 0), weight)
+        if scores is None:
+            scores = token_scores
+        else:
+            scores = {d: s + token_scores[d] for d, s in scores.items() if d in token_scores}
+        if not scores:
+            return []
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+    return [{**index["docs"][doc_id], "score": score} for doc_id, score in ranked]
+
+
+def write_index(index, path=INDEX_PATH):
+    """Write the index as compact JSON"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = json.dumps(index, separators=(",", ":"), ensure_ascii=False)
+    path.write_text(payload, encoding="utf-8")
+    return len(payload.encode("utf-8"))
+
+
+def main():
+    """Crawl the site and write data/index/search.json"""
+    print("🔍 Building search index...")
+    documents = collect_documents()
+    index = build_index(documents)
+    size = write_index(index)
+    print(f"📄 Documents: {len(index['docs'])}")
+    print(f"🔤 Terms: {len(index['terms'])}, trigrams: {len(index['trigrams'])}")
+    print(f"💾 Wrote {INDEX_PATH.relative_to(REPO_ROOT)} ({size / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Static Site Builder
+Renders the species care pages from templates/species-page.html plus
+data/species_pages.json, inlines header.html and footer.html at build time
+and copies the rest of the site into dist/. Only outputs whose inputs
+changed since the last build are rewritten.
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import shutil
+from pathlib import Path
+from string import Template
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DIST_DIR = REPO_ROOT / "dist"
+TEMPLATE_PATH = REPO_ROOT / "templates" / "species-page.html"
+SPECIES_DATA_PATH = REPO_ROOT / "data" / "species_pages.json"
+HEADER_PATH = REPO_ROOT / "header.html"
+FOOTER_PATH = REPO_ROOT / "footer.html"
+
+STATE_FILE = ".build-state.json"
+
+# Site files and directories copied verbatim into the build
+STATIC_PATHS = ["styles.css", "js", "images", "fonts", "models", "data", "about"]
+STATIC_EXCLUDE_SUFFIXES = {".xlsx", ".obj"}
+
+# Modal sections on every care page, in display order
+SECTION_IDS = ["speciesInfo", "habitatSize", "heatingReqs", "humidityAirflow", "foodReqs", "enrichment"]
+
+HEADER_SLOT = re.compile(r'<header id="main-header"></header>')
+FOOTER_SLOT = re.compile(r'<div id="main-footer"></div>')
+
+QUICK_FACTS_INDENT = "    "
+SECTION_INDENT = "        "
+
+
+def placeholder_content(record):
+    """Default copy for a species whose care content has not been written yet"""
+    name = record["commonName"]
+    scientific = record.get("scientificName", "")
+    return {
+        "quickFacts": [
+            f"{name} (<em>{scientific}</em>) placeholder description will be added here. "
+            "Placeholder information about their natural habitat, behavior, and care requirements.",
+            "Placeholder care information will be added here. This species requires appropriate "
+            "enclosure size, substrate, temperature, and humidity conditions.",
+            "Placeholder information about morphs, pricing, and availability will be added here.",
+        ],
+        "sections": {
+            "speciesInfo": [f"<strong>{name} (<em>{scientific}</em>)</strong> placeholder information "
+                            "about their natural habitat, size, and lifespan will be added here."],
+            "habitatSize": ["Placeholder information about enclosure size requirements, substrate "
+                            "choices, and habitat setup will be added here."],
+            "heatingReqs": ["Placeholder information about temperature requirements, heating methods, "
+                            "and lighting needs will be added here."],
+            "humidityAirflow": ["Placeholder information about humidity requirements and ventilation "
+                                "needs will be added here."],
+            "foodReqs": ["Placeholder information about feeding requirements, prey items, and feeding "
+                         "schedule will be added here."],
+            "enrichment": ["Placeholder information about enrichment items, hiding places, and "
+                           "behavioral needs will be added here."],
+        },
+    }
+
+
+def render_paragraphs(paragraphs, indent):
+    """Render a list of paragraph bodies as indented <p> blocks"""
+    return "\n".join(f"{indent}<p>\n{indent}  {body}\n{indent}</p>" for body in paragraphs)
+
+
+def render_species_page(template, record, header="", footer=""):
+    """Render one care page; empty header/footer leave the runtime loader in charge"""
+    defaults = placeholder_content(record)
+    sections = record.get("sections", {})
+    values = {
+        "common_name": record["commonName"],
+        "plural_name": record.get("pluralName", record["commonName"] + "s"),
+        "image": record["image"],
+        "quick_facts": render_paragraphs(record.get("quickFacts") or defaults["quickFacts"], QUICK_FACTS_INDENT),
+        "header": header,
+        "footer": footer,
+        "header_attrs": " data-prerendered" if header else "",
+        "footer_attrs": " data-prerendered" if footer else "",
+    }
+    for section_id in SECTION_IDS:
+        paragraphs = sections.get(section_id) or defaults["sections"][section_id]
+        values[section_id] = render_paragraphs(paragraphs, SECTION_INDENT)
+    return Template(template).substitute(values)
+
+
+def inline_partials(html, header, footer):
+    """Fill the empty header/footer mount points of a hand-written page"""
+    html = HEADER_SLOT.sub(lambda _: f'<header id="main-header" data-prerendered>{header}</header>', html)
+    return FOOTER_SLOT.sub(lambda _: f'<div id="main-footer" data-prerendered>{footer}</div>', html)
+
+
+def _paragraphs(fragment):
+    return [p.strip() for p in re.findall(r"<p>(.*?)</p>", fragment, re.S)]
+
+
+def import_page(path, animals=None):
+    """Extract a species record from an existing hand-written care page"""
+    html = Path(path).read_text(encoding="utf-8")
+    name = re.search(r"<h1>(.*?) Care Guide</h1>", html).group(1)
+    plural = re.search(r"care info for (.*?)\.</p>", html).group(1)
+    image = re.search(r'<section class="care-guide-content">\s*<img src="([^"]+)"', html).group(1)
+
+    start = html.index('<h2 class="quick-facts-heading">')
+    quick_facts = _paragraphs(html[start:html.index("<!-- Button Grid -->", start)])
+
+    sections = {}
+    for section_id in SECTION_IDS:
+        match = re.search(r'<div id="%s" class="section-content">(.*?)\n      </div>' % section_id, html, re.S)
+        sections[section_id] = _paragraphs(match.group(1))
+
+    text = " ".join(quick_facts + sections["speciesInfo"])
+    scientific = re.search(r"<em>([A-Z][a-z]+ [a-z]+)</em>", text) or \
+        re.search(r"\(([A-Z][a-z]+ [a-z]+)\)", re.sub(r"<[^>]+>", "", text))
+    slug = Path(path).stem
+    record = {
+        "commonName": name,
+        "scientificName": scientific.group(1) if scientific else (animals or {}).get(slug, {}).get("scientificName", ""),
+        "image": image,
+    }
+    if plural != name + "s":
+        record["pluralName"] = plural
+
+    # Only keep copy that differs from the generated placeholders
+    defaults = placeholder_content(record)
+    if quick_facts != defaults["quickFacts"]:
+        record["quickFacts"] = quick_facts
+    custom = {k: v for k, v in sections.items() if v != defaults["sections"][k]}
+    if custom:
+        record["sections"] = custom
+    return record
+
+
+def import_pages(root=REPO_ROOT, output=SPECIES_DATA_PATH):
+    """Seed data/species_pages.json from the existing care pages"""
+    species = {}
+    for page in sorted(Path(root).glob("*.html")):
+        if 'class="species-hero"' in page.read_text(encoding="utf-8"):
+            species[page.stem] = import_page(page)
+    Path(output).write_text(json.dumps({"species": species}, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return species
+
+
+def _digest(*parts):
+    sha = hashlib.sha256()
+    for part in parts:
+        sha.update(part if isinstance(part, bytes) else part.encode("utf-8"))
+        sha.update(b"\0")
+    return sha.hexdigest()
+
+
+def _static_files(root):
+    for entry in STATIC_PATHS:
+        path = root / entry
+        if path.is_file():
+            yield path
+        elif path.is_dir():
+            for file in sorted(path.rglob("*")):
+                if file.is_file() and file.suffix.lower() not in STATIC_EXCLUDE_SUFFIXES:
+                    yield file
+
+
+def build(root=REPO_ROOT, out_dir=DIST_DIR, force=False):
+    """Build the site into ``out_dir`` and return what was written or skipped"""
+    root = Path(root)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    state_path = out_dir / STATE_FILE
+    previous = {}
+    if state_path.exists() and not force:
+        previous = json.loads(state_path.read_text(encoding="utf-8")).get("outputs", {})
+
+    header = (root / "header.html").read_text(encoding="utf-8")
+    footer = (root / "footer.html").read_text(encoding="utf-8")
+    template = (root / "templates" / "species-page.html").read_text(encoding="utf-8")
+    species = json.loads((root / "data" / "species_pages.json").read_text(encoding="utf-8"))["species"]
+    builder_hash = _digest(Path(__file__).read_bytes())
+
+    outputs = {}
+    report = {"built": [], "skipped": [], "removed": []}
+
+    def emit(relative, signature, produce):
+        outputs[relative] = signature
+        target = out_dir / relative
+        if previous.get(relative) == signature and target.exists():
+            report["skipped"].append(relative)
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        produce(target)
+        report["built"].append(relative)
+
+    # Data-driven care pages
+    for slug, record in sorted(species.items()):
+        signature = _digest(builder_hash, template, header, footer, json.dumps(record, sort_keys=True))
+        emit(f"{slug}.html", signature, lambda target, record=record: target.write_text(
+            render_species_page(template, record, header, footer), encoding="utf-8"))
+
+    # Hand-written pages only get the partials inlined
+    for page in sorted(root.glob("*.html")):
+        if page.name in ("header.html", "footer.html") or page.stem in species:
+            continue
+        source = page.read_text(encoding="utf-8")
+        signature = _digest(builder_hash, source, header, footer)
+        emit(page.name, signature, lambda target, source=source: target.write_text(
+            inline_partials(source, header, footer), encoding="utf-8"))
+
+    # Everything else is copied; size and mtime are enough to spot changes
+    for file in _static_files(root):
+        stat = file.stat()
+        relative = file.relative_to(root).as_posix()
+        emit(relative, f"{stat.st_size}:{stat.st_mtime_ns}", lambda target, file=file: shutil.copy2(file, target))
+
+    for relative in sorted(set(previous) - set(outputs)):
+        stale = out_dir / relative
+        if stale.exists():
+            stale.unlink()
+        report["removed"].append(relative)
+
+    state_path.write_text(json.dumps({"outputs": outputs}, indent=1, sort_keys=True), encoding="utf-8")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the static site into dist/")
+    parser.add_argument("--out", type=Path, default=DIST_DIR, help="output directory")
+    parser.add_argument("--force", action="store_true", help="rebuild every output")
+    parser.add_argument("--import-pages", action="store_true",
+                        help="regenerate data/species_pages.json from the hand-written care pages")
+    args = parser.parse_args()
+
+    if args.import_pages:
+        species = import_pages()
+        print(f"📥 Imported {len(species)} care pages into {SPECIES_DATA_PATH.relative_to(REPO_ROOT)}")
+        return
+
+    print("🏗️  Building site...")
+    report = build(out_dir=args.out, force=args.force)
+    print(f"✅ Built {len(report['built'])}, unchanged {len(report['skipped'])}, removed {len(report['removed'])}")
+    for relative in report["built"]:
+        if relative.endswith(".html"):
+            print(f"   • {relative}")
+    print(f"💾 Output: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Load js/enclosure-data.js from Python
+Reads the ENCLOSURES_BY_ID and ANIMALS_BY_SLUG object literals so build
+scripts share one source of truth with the enclosure builder
+"""
+
+import json
+import re
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+ENCLOSURE_DATA_PATH = REPO_ROOT / "js" / "enclosure-data.js"
+
+_IDENTIFIER = re.compile(r"[A-Za-z_$][A-Za-z0-9_$]*")
+
+
+def literal_end(source, start):
+    """Index just past the ``{...}`` literal whose opening brace is at ``start``
+
+    Skips braces inside quoted strings and ``//`` comments, so it works on
+    both enclosure-data.js and hand-formatted JSON.
+    """
+    depth = 0
+    quote = None
+    i = start
+    while i < len(source):
+        char = source[i]
+        if quote:
+            if char == "\\":
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif source.startswith("//", i):
+            i = source.index("\n", i)
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    raise ValueError("Unterminated object literal")
+
+
+def _extract_literal(source, name):
+    """Return the text of the ``{...}`` literal assigned to ``const name``"""
+    match = re.search(r"const\s+" + re.escape(name) + r"\s*=\s*\{", source)
+    if not match:
+        raise ValueError(f"{name} not found in enclosure data")
+    try:
+        return source[match.end() - 1:literal_end(source, match.end() - 1)]
+    except ValueError:
+        raise ValueError(f"Unterminated object literal for {name}") from None
+
+
+def js_literal_to_python(literal):
+    """Convert a plain JS object literal (no expressions) into Python data
+
+    Handles single-quoted strings, bare keys, comments and trailing commas,
+    which is everything enclosure-data.js uses.
+    """
+    out = []
+    i = 0
+    while i < len(literal):
+        char = literal[i]
+        if char in "'\"":
+            j = i + 1
+            chars = []
+            while literal[j] != char:
+                if literal[j] == "\\":
+                    j += 1
+                chars.append(literal[j])
+                j += 1
+            out.append(json.dumps("".join(chars)))
+            i = j + 1
+        elif literal.startswith("//", i):
+            i = literal.index("\n", i)
+        elif literal.startswith("/*", i):
+            i = literal.index("*/", i) + 2
+        elif char == "," and re.match(r",\s*(//[^\n]*\s*)*[}\]]", literal[i:]):
+            i += 1
+        else:
+            identifier = _IDENTIFIER.match(literal, i)
+            if identifier and not (out and out[-1][-1:].isalnum()):
+                word = identifier.group(0)
+                if word in ("true", "false", "null"):
+                    out.append(word)
+                else:
+                    out.append(json.dumps(word))
+                i = identifier.end()
+            else:
+                out.append(char)
+                i += 1
+    return json.loads("".join(out))
+
+
+def load_enclosure_data(path=ENCLOSURE_DATA_PATH):
+    """Return ``(enclosures_by_id, animals_by_slug)`` parsed from enclosure-data.js"""
+    source = Path(path).read_text(encoding="utf-8")
+    enclosures = js_literal_to_python(_extract_literal(source, "ENCLOSURES_BY_ID"))
+    animals = js_literal_to_python(_extract_literal(source, "ANIMALS_BY_SLUG"))
+    return enclosures, animals
+
+
+def update_enclosures(updates, path=ENCLOSURE_DATA_PATH):
+    """Rewrite ``price`` and ``lastUpdated`` of the given enclosures in enclosure-data.js
+
+    ``updates`` maps enclosure ids to ``{"price": float, "lastUpdated": "YYYY-MM-DD"}``.
+    Only those two values are edited in place, so the rest of the hand-written
+    file (comments, formatting, other records) is left exactly as it was.
+    """
+    path = Path(path)
+    source = path.read_text(encoding="utf-8")
+    table = re.search(r"const\s+ENCLOSURES_BY_ID\s*=\s*\{", source)
+    if not table:
+        raise ValueError("ENCLOSURES_BY_ID not found in enclosure data")
+    table_end = literal_end(source, table.end() - 1)
+    for enclosure_id, fields in updates.items():
+        record = re.compile(r"['\"]" + re.escape(enclosure_id) + r"['\"]\s*:\s*\{").search(source, table.end(), table_end)
+        if not record:
+            raise KeyError(f"unknown enclosure: {enclosure_id}")
+        start, end = record.end() - 1, literal_end(source, record.end() - 1)
+        block = source[start:end]
+        if "price" in fields:
+            block = re.sub(r"(\bprice\s*:\s*)[\d.]+", lambda m: f"{m.group(1)}{fields['price']:.2f}", block, count=1)
+        if "lastUpdated" in fields:
+            block = re.sub(r"(\blastUpdated\s*:\s*)(['\"])[^'\"]*\2",
+                           lambda m: f"{m.group(1)}{m.group(2)}{fields['lastUpdated']}{m.group(2)}", block, count=1)
+        source = source[:start] + block + source[end:]
+        table_end += len(block) - (end - start)
+    path.write_text(source, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    enclosures, animals = load_enclosure_data()
+    print(f"📦 {len(enclosures)} enclosures: {', '.join(enclosures)}")
+    print(f"🦎 {len(animals)} animals: {', '.join(animals)}")
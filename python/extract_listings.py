@@ -0,0 +1,328 @@
+"""
+Stream Listing Records from Paginated Search Results
+Walks every page of a MorphMarket search concurrently, within a cap on
+requests in flight and a minimum spacing between request starts, parses
+each listing card into a record (morph, price, sex, region) and appends it
+to a JSON Lines file as soon as its page arrives. Only the pages in flight
+are ever held in memory, so tens of thousands of listings stream through
+in constant space. A summary pass folds the file into per-morph counts and
+price histograms.
+
+Search results are rendered by JavaScript, so pages are loaded in headless
+Chromium by default; ``--http`` fetches the raw HTML instead, for sites or
+mirrors that serve it.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import inspect
+import json
+import math
+import re
+import sys
+import time
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from urllib.request import Request, urlopen
+
+from scrape_scheduler import SPECIES_URLS, BrowserPages, CircuitBreaker, backoff_delay, parse_listing_count
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+OUT_DIR = REPO_ROOT / "data" / "listings"
+
+# Politeness limits for one host: requests in flight and spacing between starts (seconds)
+CONCURRENCY = 3
+HOST_INTERVAL = 1.0
+RETRIES = 3
+TIMEOUT = 30
+USER_AGENT = "ReptileCare availability research (+https://reptilecare.example)"
+PAGE_PARAM = "page"
+
+# The site's CSS-module classes carry a hashed suffix (container--NarxF), so
+# cards, their fields and the results label are matched on class-name
+# prefixes. These defaults are unverified against the live site (they are
+# only exercised by the test stub); override them with --selectors once the
+# rendered markup has been checked
+SELECTORS = {
+    "card": "listingCard--",
+    "results": "resultsCount--",
+    "morph": "title--",
+    "price": "price--",
+    "sex": "sex--",
+    "region": "location--",
+}
+FIELDS = ("morph", "price", "sex", "region")
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+# Upper bounds (dollars) of the summary's price histogram; the last bucket is open
+PRICE_BUCKETS = [50, 100, 250, 500, 1000, 2500, 5000]
+
+
+class ListingParser(HTMLParser):
+    """Collect listing cards and the "of N" results label from a search page"""
+
+    def __init__(self, selectors=None):
+        super().__init__(convert_charrefs=True)
+        self.selectors = {**SELECTORS, **(selectors or {})}
+        self.listings = []
+        self.results_text = ""
+        self._stack = []  # (tag, role) per open element
+        self._card = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            return
+        classes = (dict(attrs).get("class") or "").split()
+        role = None
+        if any(c.startswith(self.selectors["card"]) for c in classes):
+            role = "card"
+            self._card = {field: "" for field in FIELDS}
+        elif any(c.startswith(self.selectors["results"]) for c in classes):
+            role = "results"
+        elif self._card is not None:
+            role = next((field for field in FIELDS
+                         if any(c.startswith(self.selectors[field]) for c in classes)), None)
+        self._stack.append((tag, role))
+
+    def handle_endtag(self, tag):
+        if not any(open_tag == tag for open_tag, _ in self._stack):
+            return
+        while self._stack:
+            open_tag, role = self._stack.pop()
+            if role == "card":
+                self.listings.append(self._card)
+                self._card = None
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        role = next((role for _, role in reversed(self._stack) if role and role != "card"), None)
+        if role == "results":
+            self.results_text += data
+        elif role and self._card is not None:
+            self._card[role] += data
+
+
+def normalize_sex(text):
+    text = text.lower()
+    if "female" in text:
+        return "female"
+    if "male" in text:
+        return "male"
+    return "unknown"
+
+
+def parse_price(text):
+    """Dollar amount in a price label, or None for "Inquire" and the like"""
+    match = re.search(r"\d[\d,]*(?:\.\d+)?", text)
+    return float(match.group(0).replace(",", "")) if match else None
+
+
+def parse_page(html, selectors=None):
+    """``(records, total)`` for one results page; ``total`` is None without a results label"""
+    parser = ListingParser(selectors)
+    parser.feed(html)
+    parser.close()
+    records = [{
+        "morph": " ".join(card["morph"].split()) or None,
+        "price": parse_price(card["price"]),
+        "sex": normalize_sex(card["sex"]),
+        "region": " ".join(card["region"].split()) or None,
+    } for card in parser.listings]
+    return records, parse_listing_count(parser.results_text)
+
+
+def page_url(url, page):
+    """``url`` with its page query parameter set"""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != PAGE_PARAM]
+    return urlunsplit(parts._replace(query=urlencode(query + [(PAGE_PARAM, str(page))])))
+
+
+def http_get(url):
+    """Body of a GET request as text"""
+    request = Request(url, headers={"User-Agent": USER_AGENT, "Accept": "text/html"})
+    with urlopen(request, timeout=TIMEOUT) as response:
+        return response.read().decode(response.headers.get_content_charset() or "utf-8", "replace")
+
+
+class PoliteFetcher:
+    """Spaces request starts, retries with jittered backoff and trips a circuit breaker
+
+    ``fetch_page(url)`` may be a plain function, run in a worker thread, or
+    a coroutine function such as ``BrowserPages.load``, awaited directly.
+    """
+
+    def __init__(self, fetch_page=http_get, interval=HOST_INTERVAL, retries=RETRIES, breaker=None):
+        self.fetch_page = fetch_page
+        self.interval = interval
+        self.retries = retries
+        self.breaker = breaker or CircuitBreaker()
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _wait_turn(self):
+        async with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def get(self, url):
+        """Page text, or None once every attempt failed or the circuit is open"""
+        for attempt in range(self.retries):
+            if not self.breaker.allow():
+                return None
+            if attempt:
+                await asyncio.sleep(backoff_delay(attempt - 1, base=self.interval))
+            await self._wait_turn()
+            try:
+                if inspect.iscoroutinefunction(self.fetch_page):
+                    text = await self.fetch_page(url)
+                else:
+                    text = await asyncio.to_thread(self.fetch_page, url)
+            except Exception:  # HTTP errors, truncated bodies, timeouts and browser failures alike
+                self.breaker.record_failure()
+                continue
+            self.breaker.record_success()
+            return text
+        return None
+
+
+async def extract(url, out, species=None, fetch_page=http_get, concurrency=CONCURRENCY,
+                  interval=HOST_INTERVAL, retries=RETRIES, max_pages=None, selectors=None):
+    """Stream every listing of a paginated search to ``out`` (a text file) as JSON Lines
+
+    The first page gives the total and the page size; the rest are shared
+    out to ``concurrency`` workers. Without a results label the workers
+    walk on until they reach an empty page. Returns ``{"pages", "records",
+    "failed", "skipped"}`` where ``failed`` lists the pages that could not be
+    fetched and ``skipped`` the labelled pages never tried because the
+    circuit breaker opened. ``selectors`` overrides entries of ``SELECTORS``.
+    """
+    fetcher = PoliteFetcher(fetch_page, interval, retries)
+    summary = {"pages": 0, "records": 0, "failed": [], "skipped": []}
+    written = set()
+
+    def write(page, records):
+        for record in records:
+            out.write(json.dumps({"species": species, **record, "page": page}, separators=(",", ":")) + "\n")
+        out.flush()
+        summary["pages"] += 1
+        summary["records"] += len(records)
+        written.add(page)
+
+    first = await fetcher.get(page_url(url, 1))
+    if first is None:
+        summary["failed"].append(1)
+        return summary
+    records, total = parse_page(first, selectors)
+    write(1, records)
+    if not records:
+        return summary
+    last_page = math.ceil(total / len(records)) if total else math.inf
+    if max_pages is not None:
+        last_page = min(last_page, max_pages)
+    pages = iter(range(2, sys.maxsize))
+
+    async def worker():
+        nonlocal last_page
+        for page in pages:
+            if page > last_page:
+                return
+            text = await fetcher.get(page_url(url, page))
+            if text is None:
+                summary["failed"].append(page)
+                if not fetcher.breaker.allow():
+                    return
+                continue
+            records, _ = parse_page(text, selectors)
+            if not records:  # walked past the end
+                last_page = min(last_page, page - 1)
+                continue
+            write(page, records)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    summary["failed"].sort()
+    if last_page != math.inf:
+        attempted = written.union(summary["failed"])
+        summary["skipped"] = [page for page in range(2, last_page + 1) if page not in attempted]
+    return summary
+
+
+def summarize(lines):
+    """Per-morph listing counts, sex split and price histogram from JSON Lines records"""
+    morphs = {}
+    for line in lines:
+        record = json.loads(line)
+        entry = morphs.setdefault(record["morph"] or "unknown", {
+            "count": 0, "sexes": {}, "priced": 0, "min": None, "max": None, "total": 0.0,
+            "histogram": [0] * (len(PRICE_BUCKETS) + 1),
+        })
+        entry["count"] += 1
+        entry["sexes"][record["sex"]] = entry["sexes"].get(record["sex"], 0) + 1
+        price = record["price"]
+        if price is not None:
+            entry["priced"] += 1
+            entry["total"] += price
+            entry["min"] = price if entry["min"] is None else min(entry["min"], price)
+            entry["max"] = price if entry["max"] is None else max(entry["max"], price)
+            entry["histogram"][next((i for i, b in enumerate(PRICE_BUCKETS) if price <= b), len(PRICE_BUCKETS))] += 1
+    for entry in morphs.values():
+        entry["mean"] = round(entry.pop("total") / entry["priced"], 2) if entry["priced"] else None
+    return dict(sorted(morphs.items(), key=lambda item: (-item[1]["count"], item[0])))
+
+
+def main():
+    """Stream one species' listings to data/listings/<species>.jsonl"""
+    parser = argparse.ArgumentParser(description="Stream paginated listing records as JSON Lines")
+    parser.add_argument("species", help=f"one of {', '.join(SPECIES_URLS)} or a search URL")
+    parser.add_argument("--out", type=Path, help="JSON Lines output (default: data/listings/<species>.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--interval", type=float, default=HOST_INTERVAL, help="seconds between request starts")
+    parser.add_argument("--max-pages", type=int)
+    parser.add_argument("--summary", action="store_true", help="print per-morph counts and prices afterwards")
+    parser.add_argument("--http", action="store_true", help="fetch raw HTML instead of rendering in Chromium")
+    parser.add_argument("--selectors", type=json.loads, default={},
+                        help=f'JSON overriding the class-name prefixes, e.g. \'{{"card": "listingCard--"}}\'')
+    args = parser.parse_args()
+
+    url = SPECIES_URLS.get(args.species, args.species)
+    species = args.species if args.species in SPECIES_URLS else None
+    out_path = args.out or OUT_DIR / f"{species or 'listings'}.jsonl"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    print(f"📄 Streaming listings from {urlsplit(url).netloc}...")
+    start = time.perf_counter()
+
+    async def run(out):
+        async with contextlib.AsyncExitStack() as stack:
+            # One browser tab per worker, so pages render concurrently
+            fetch_page = http_get if args.http else (await stack.enter_async_context(BrowserPages(args.concurrency))).load
+            return await extract(url, out, species, fetch_page, concurrency=args.concurrency,
+                                 interval=args.interval, max_pages=args.max_pages, selectors=args.selectors)
+
+    with open(out_path, "w", encoding="utf-8") as out:
+        summary = asyncio.run(run(out))
+    print(f"   • {summary['records']} listings from {summary['pages']} pages "
+          f"in {time.perf_counter() - start:.1f}s")
+    if summary["pages"] and not summary["records"]:
+        print("⚠️  No listing cards matched; check --selectors against the rendered page")
+    if summary["failed"]:
+        print(f"❌ Pages that failed: {', '.join(map(str, summary['failed']))}")
+    if summary["skipped"]:
+        skipped = summary["skipped"]
+        print(f"⏸️  Circuit open, skipped {len(skipped)} pages ({skipped[0]}-{skipped[-1]})")
+    if args.summary:
+        with open(out_path, encoding="utf-8") as lines:
+            for morph, entry in list(summarize(lines).items())[:20]:
+                mean = f"${entry['mean']:.0f}" if entry["mean"] is not None else "n/a"
+                print(f"   • {morph}: {entry['count']} listed, mean {mean}")
+    print(f"💾 Wrote {out_path}")
+
+
+if __name__ == "__main__":
+    main()
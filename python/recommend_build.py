@@ -0,0 +1,189 @@
+"""
+Recommend Complete Enclosure Builds
+Finds the cheapest (or best-value) complete builds for a species: one of its
+approved enclosures from js/enclosure-data.js plus the required item
+categories from data/items.json (substrate and hides by default), where
+every item is compatible with the species and fits the enclosure. Candidate
+lists are precomputed per species from the items index shards, and a
+branch-and-bound search over them keeps only the top-k builds, pruning any
+branch whose cheapest possible completion cannot beat the k-th best.
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import sys
+import time
+from pathlib import Path
+
+from build_items_index import ITEMS_PATH, build_index
+from enclosure_data import load_enclosure_data
+
+# How many of each category a complete build needs
+REQUIRED = {"substrate": 1, "hides": 2}
+# Categories that stand on the floor; substrate is a layer and lights and heaters mount on top
+FLOOR_CATEGORIES = ("decor", "hides", "plants")
+# Share of the floor that floor items may cover, leaving room to move
+FLOOR_FILL = 0.5
+# "value" objective: dollars a square foot of floor is worth
+VALUE_PER_SQ_FT = 10.0
+OBJECTIVES = ("price", "value")
+
+
+def fits(item, enclosure):
+    """Whether an item fits inside an enclosure in either floor orientation"""
+    dimensions, model = item["dimensions"] or {}, enclosure["model"]
+    length, width = dimensions.get("length", 0), dimensions.get("width", 0)
+    footprint = (length <= model["length"] and width <= model["width"]) or \
+        (width <= model["length"] and length <= model["width"])
+    return footprint and dimensions.get("height", 0) <= model["height"]
+
+
+def footprint(item):
+    """Floor area an item covers in square inches (0 for items that do not stand on the floor)"""
+    if item["category"] not in FLOOR_CATEGORIES:
+        return 0.0
+    return float(item["dimensions"]["length"] * item["dimensions"]["width"])
+
+
+def enclosure_cost(enclosure, objective):
+    """Objective contribution of the enclosure itself"""
+    price = float(enclosure["price"])
+    if objective == "value":
+        model = enclosure["model"]
+        return price - VALUE_PER_SQ_FT * model["length"] * model["width"] / 144
+    return price
+
+
+def build_candidates(catalog, enclosures, animals):
+    """Per-species enclosure and item candidate lists, each sorted by price
+
+    Items come from the species' items index shard, so "all" items are
+    included; enclosures are the species' approved, listed ones.
+    """
+    shards = build_index(catalog)
+    candidates = {}
+    for slug, animal in animals.items():
+        shard = shards.get(slug, shards["all"])
+        approved = [enclosures[i] for i in animal.get("approvedEnclosureIds", [])
+                    if i in enclosures and enclosures[i].get("show", True) and enclosures[i].get("price")]
+        candidates[slug] = {
+            "enclosures": sorted(approved, key=lambda e: (float(e["price"]), e["id"])),
+            "categories": {category: [shard["items"][i] for i in postings["ids"]]
+                           for category, postings in shard["categories"].items()},
+        }
+    return candidates
+
+
+def recommend(candidates, species, k=3, objective="price", required=None, budget=None):
+    """Top-k complete builds for a species, best first
+
+    Each build is ``{"cost", "price", "enclosure", "items"}``; ``cost`` is
+    the objective being minimized. Slots (one per required item) are filled
+    in order with items no cheaper than the previous pick of the same
+    category, so every multiset is visited once.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"unknown objective: {objective}")
+    if species not in candidates:
+        raise KeyError(f"unknown species: {species}")
+    required = REQUIRED if required is None else required
+    pool = candidates[species]
+    slots = [category for category, count in required.items() for _ in range(count)]
+
+    # Cheapest item of each slot ignoring fit: a bound that holds for every enclosure
+    cheapest = [pool["categories"][c][0]["price"] if pool["categories"].get(c) else None for c in slots]
+    if None in cheapest:
+        return []
+    best = []  # max-heap of (-cost, order, build) holding the k best so far
+    order = itertools.count()
+
+    def worst():
+        return -best[0][0] if len(best) == k else float("inf")
+
+    for enclosure in sorted(pool["enclosures"], key=lambda e: enclosure_cost(e, objective)):
+        base = enclosure_cost(enclosure, objective)
+        if base + sum(cheapest) >= worst():
+            break
+        model = enclosure["model"]
+        floor = FLOOR_FILL * model["length"] * model["width"]
+        lists = [[item for item in pool["categories"][c] if fits(item, enclosure)] for c in slots]
+        if not all(lists):
+            continue
+        # bound[i]: cheapest way to fill slots i.. in this enclosure
+        bound = [0.0] * (len(slots) + 1)
+        for i in range(len(slots) - 1, -1, -1):
+            bound[i] = bound[i + 1] + lists[i][0]["price"]
+
+        def search(slot, start, cost, area, chosen):
+            if slot == len(slots):
+                build = {"cost": round(cost, 2), "price": round(cost - base + float(enclosure["price"]), 2),
+                         "enclosure": enclosure["id"], "items": [item["id"] for item in chosen]}
+                entry = (-cost, -next(order), build)
+                if len(best) < k:
+                    heapq.heappush(best, entry)
+                else:
+                    heapq.heappushpop(best, entry)
+                return
+            for index in range(start, len(lists[slot])):
+                item = lists[slot][index]
+                total = cost + item["price"]
+                if total + bound[slot + 1] >= worst() or total + bound[slot + 1] > limit:
+                    break  # items are sorted by price, so every later one is pruned too
+                used = area + footprint(item)
+                if used > floor:
+                    continue
+                same = slot + 1 < len(slots) and slots[slot + 1] == slots[slot]
+                search(slot + 1, index if same else 0, total, used, chosen + [item])
+
+        # The objective and the price differ only by the enclosure term
+        limit = float("inf") if budget is None else budget - float(enclosure["price"]) + base
+        search(0, 0, base, 0.0, [])
+
+    return [build for _, _, build in sorted(best, key=lambda entry: (-entry[0], -entry[1]))]
+
+
+def main():
+    """Print the top builds for one species"""
+    parser = argparse.ArgumentParser(description="Recommend the cheapest complete builds for a species")
+    parser.add_argument("species", help="animal slug from enclosure-data.js")
+    parser.add_argument("-k", type=int, default=3, help="number of builds to return")
+    parser.add_argument("--objective", choices=OBJECTIVES, default="price")
+    parser.add_argument("--budget", type=float, help="maximum total price in dollars")
+    parser.add_argument("--require", nargs="+", metavar="CATEGORY=COUNT",
+                        help=f"required items per category (default: {' '.join(f'{c}={n}' for c, n in REQUIRED.items())})")
+    args = parser.parse_args()
+
+    required = None
+    if args.require:
+        required = {}
+        for pair in args.require:
+            category, _, count = pair.partition("=")
+            if not category or not count.isdigit():
+                parser.error(f"--require expects CATEGORY=COUNT with a whole-number count, got {pair!r}")
+            required[category] = int(count)
+    enclosures, animals = load_enclosure_data()
+    catalog = json.loads(Path(ITEMS_PATH).read_text(encoding="utf-8"))
+    candidates = build_candidates(catalog, enclosures, animals)
+
+    start = time.perf_counter()
+    try:
+        builds = recommend(candidates, args.species, args.k, args.objective, required, args.budget)
+    except KeyError as e:
+        print(f"❌ {e}")
+        return 1
+    elapsed = (time.perf_counter() - start) * 1000
+
+    print(f"🦎 Top {len(builds)} builds for {args.species} by {args.objective}:")
+    for rank, build in enumerate(builds, 1):
+        name = enclosures[build["enclosure"]]["name"]
+        print(f"   {rank}. ${build['price']:.2f}: {name} + {', '.join(build['items'])}")
+    if not builds:
+        print("⚠️  No complete build meets the constraints")
+    print(f"✅ Searched in {elapsed:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
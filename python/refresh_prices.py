@@ -0,0 +1,324 @@
+"""
+Refresh Catalog Prices from Product Pages
+Fetches the product page of every enclosure in js/enclosure-data.js (and of
+every data/items.json item that has a ``link``) with bounded concurrency,
+at most a couple of requests in flight per retailer. Requests are
+conditional (If-None-Match / If-Modified-Since) against an on-disk cache of
+validators and parsed results, so unchanged pages cost a 304 and recently
+checked ones no request at all. Affiliate links are reduced to the plain
+product URL first (tracking parameters dropped, short links resolved once
+and remembered), so checks never register as affiliate clicks and every
+link to one retailer shares its limits. Prices are diffed against the stored
+values and only changed records are written back; the items index and quiz
+table are then rebuilt from the updated items.json.
+"""
+
+import argparse
+import asyncio
+import datetime
+import hashlib
+import html
+import json
+import re
+import time
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+from urllib.request import HTTPRedirectHandler, Request, build_opener, urlopen
+
+import build_items_index
+import build_quiz_table
+from enclosure_data import ENCLOSURE_DATA_PATH, literal_end, load_enclosure_data, update_enclosures
+from extract_listings import PoliteFetcher
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+ITEMS_PATH = REPO_ROOT / "data" / "items.json"
+CACHE_DIR = REPO_ROOT / ".cache" / "prices"
+
+# Requests in flight overall and per retailer, and spacing per retailer (seconds)
+CONCURRENCY = 8
+HOST_CONCURRENCY = 2
+HOST_INTERVAL = 1.0
+RETRIES = 2
+TIMEOUT = 30
+USER_AGENT = "Mozilla/5.0 (compatible; ReptileCare price check; +https://reptilecare.example)"
+# Pages checked this recently are answered from the cache without a request (seconds)
+CACHE_TTL = 3600
+# Bump when parse_product changes so cached results are re-parsed
+PARSER_VERSION = 2
+# Smallest price change worth writing back (dollars)
+PRICE_EPSILON = 0.005
+
+# Affiliate and tracking query parameters stripped before a link is fetched
+TRACKING_PARAMS = {"tag", "linkCode", "linkId", "ref", "ref_", "ascsubtag"}
+# Short-link hosts, resolved through their redirect, and the retailer they belong to
+SHORT_LINKS = {"amzn.to": "amazon.com"}
+# Public suffixes of two labels, so that shop.co.uk is a retailer and co.uk is not
+TWO_LABEL_SUFFIXES = {"co.uk", "org.uk", "com.au", "co.jp", "com.br", "com.mx", "co.nz"}
+REDIRECTS = {301, 302, 303, 307, 308}
+
+# Pages carry plenty of unrelated prices (carousels, accessories, embedded
+# JSON), so each pattern is anchored to the product's own offer
+PRICE_PATTERNS = [
+    # schema.org Product offers (JSON-LD), used by Shopify and Wayfair pages
+    re.compile(r'"offers"\s*:\s*\[?\s*\{[^{}]*?"price"\s*:\s*"?\$?(\d[\d,]*(?:\.\d+)?)'),
+    # Open Graph product tags
+    re.compile(r'<meta[^>]+property="(?:product|og):price:amount"[^>]+content="(\d[\d,]*(?:\.\d+)?)"'),
+    # Amazon's buy box
+    re.compile(r'id="corePrice(?:Display_desktop)?_feature_div".*?class="a-offscreen">\s*\$(\d[\d,]*(?:\.\d+)?)',
+               re.DOTALL),
+]
+IN_STOCK = re.compile(r"schema\.org/InStock|\bIn Stock\b", re.IGNORECASE)
+OUT_OF_STOCK = re.compile(r"schema\.org/(?:OutOfStock|SoldOut)|Currently unavailable|\bSold out\b", re.IGNORECASE)
+
+
+def parse_product(page):
+    """``{"price", "available"}`` from a product page; either may be None when not found"""
+    price = None
+    for pattern in PRICE_PATTERNS:
+        match = pattern.search(page)
+        if match:
+            price = float(match.group(1).replace(",", ""))
+            break
+    text = html.unescape(page)
+    available = False if OUT_OF_STOCK.search(text) else True if IN_STOCK.search(text) else None
+    return {"price": price, "available": available}
+
+
+def catalog_products(enclosure_path=ENCLOSURE_DATA_PATH, items_path=ITEMS_PATH):
+    """Every catalog record with a product link: ``{"kind", "id", "name", "url", "price"}``"""
+    enclosures, _ = load_enclosure_data(enclosure_path)
+    products = [{"kind": "enclosure", "id": e["id"], "name": e["name"], "url": e["link"], "price": float(e["price"])}
+                for e in enclosures.values() if e.get("link")]
+    catalog = json.loads(Path(items_path).read_text(encoding="utf-8"))
+    products += [{"kind": "item", "id": i["id"], "name": i["name"], "url": i["link"], "price": float(i["price"])}
+                 for records in catalog.values() for i in records if i.get("link")]
+    return products
+
+
+def canonical_url(link):
+    """``link`` without affiliate and tracking query parameters"""
+    parts = urlsplit(link)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in TRACKING_PARAMS]
+    return urlunsplit(parts._replace(query=urlencode(query), fragment=""))
+
+
+def retailer(url):
+    """Registrable domain a URL belongs to, which is what request limits are shared by"""
+    host = (urlsplit(url).hostname or "").lower()
+    if host in SHORT_LINKS:
+        return SHORT_LINKS[host]
+    labels = host.split(".")
+    if host.replace(".", "").isdigit() or len(labels) <= 2:
+        return host
+    keep = 3 if ".".join(labels[-2:]) in TWO_LABEL_SUFFIXES else 2
+    return ".".join(labels[-keep:])
+
+
+class _NoRedirect(HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def resolve_short_link(url):
+    """Canonical target of a short link, read from its redirect without following it"""
+    request = Request(url, method="HEAD", headers={"User-Agent": USER_AGENT})
+    try:
+        with build_opener(_NoRedirect).open(request, timeout=TIMEOUT):
+            pass
+    except HTTPError as e:
+        if e.code in REDIRECTS and e.headers.get("Location"):
+            return canonical_url(urljoin(url, e.headers["Location"]))
+        raise
+    raise OSError(f"{url} did not redirect")
+
+
+class ResponseCache:
+    """One JSON file per URL holding its validators and the parsed result, plus resolved short links"""
+
+    def __init__(self, directory=CACHE_DIR):
+        self.directory = Path(directory)
+
+    def _path(self, url):
+        return self.directory / (hashlib.sha256(url.encode("utf-8")).hexdigest()[:24] + ".json")
+
+    def get(self, url):
+        path = self._path(url)
+        if not path.exists():
+            return None
+        entry = json.loads(path.read_text(encoding="utf-8"))
+        return entry if entry.get("parser") == PARSER_VERSION and entry.get("url") == url else None
+
+    def put(self, url, entry):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(url)
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps({**entry, "url": url, "parser": PARSER_VERSION}), encoding="utf-8")
+        temporary.replace(path)
+
+    def resolved(self, link):
+        """Previously resolved target of a short link, or None"""
+        path = self.directory / "links.json"
+        return json.loads(path.read_text(encoding="utf-8")).get(link) if path.exists() else None
+
+    def put_resolved(self, link, url):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / "links.json"
+        links = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps({**links, link: url}, indent=2, sort_keys=True), encoding="utf-8")
+        temporary.replace(path)
+
+
+def conditional_get(url, cached):
+    """GET with the cached validators; returns ``(status, headers, text or None)``"""
+    headers = {"User-Agent": USER_AGENT, "Accept": "text/html", "Accept-Language": "en-US"}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("lastModified"):
+            headers["If-Modified-Since"] = cached["lastModified"]
+    try:
+        with urlopen(Request(url, headers=headers), timeout=TIMEOUT) as response:
+            body = response.read().decode(response.headers.get_content_charset() or "utf-8", "replace")
+            return response.status, dict(response.headers), body
+    except HTTPError as e:
+        if e.code == 304:
+            return 304, dict(e.headers), None
+        raise
+
+
+async def check_prices(products, cache, fetch=conditional_get, concurrency=CONCURRENCY,
+                       host_concurrency=HOST_CONCURRENCY, interval=HOST_INTERVAL, ttl=CACHE_TTL, clock=time.time,
+                       resolve=resolve_short_link):
+    """Current price and availability for every product, with how each was obtained
+
+    Each result is the product plus ``{"current", "available", "status"}``;
+    ``status`` is ``fresh`` (answered from the cache), ``not-modified`` (304),
+    ``fetched`` (200) or ``failed``. Links are fetched by their canonical
+    URL, each URL at most once, and limits are shared per retailer.
+    """
+    limit = asyncio.Semaphore(concurrency)
+    retailers = {}
+    pages = {}
+
+    def slot(url):
+        name = retailer(url)
+        if name not in retailers:
+            fetch_page = lambda u: resolve(u) if urlsplit(u).hostname in SHORT_LINKS else fetch(u, cache.get(u))
+            retailers[name] = (asyncio.Semaphore(host_concurrency), PoliteFetcher(fetch_page, interval, RETRIES))
+        return retailers[name]
+
+    async def request(url):
+        host_limit, fetcher = slot(url)
+        # Wait for the retailer first so tasks queued behind a busy host hold no global slot
+        async with host_limit, limit:
+            return await fetcher.get(url)
+
+    async def check_page(link):
+        url = canonical_url(link)
+        if urlsplit(url).hostname in SHORT_LINKS:
+            short, url = url, cache.resolved(url)
+            if url is None:
+                url = await request(short)
+                if url is None:
+                    return {"current": None, "available": None, "status": "failed"}
+                cache.put_resolved(short, url)
+        cached = cache.get(url)
+        if cached and clock() - cached["checked"] < ttl:
+            return {"current": cached["price"], "available": cached["available"], "status": "fresh"}
+        response = await request(url)
+        if response is None:
+            return {"current": None, "available": None, "status": "failed"}
+        status, headers, body = response
+        if status == 304 and cached:
+            result, outcome = {"price": cached["price"], "available": cached["available"]}, "not-modified"
+        else:
+            result, outcome = parse_product(body or ""), "fetched"
+        headers = {k.lower(): v for k, v in headers.items()}
+        cache.put(url, {**result, "checked": clock(), "etag": headers.get("etag", cached and cached.get("etag")),
+                        "lastModified": headers.get("last-modified", cached and cached.get("lastModified"))})
+        return {"current": result["price"], "available": result["available"], "status": outcome}
+
+    async def check(product):
+        if product["url"] not in pages:
+            pages[product["url"]] = asyncio.ensure_future(check_page(product["url"]))
+        return {**product, **await pages[product["url"]]}
+
+    return await asyncio.gather(*(check(product) for product in products))
+
+
+def price_changes(results):
+    """Results whose page price differs from the stored one"""
+    return [r for r in results if r["current"] is not None and abs(r["current"] - r["price"]) >= PRICE_EPSILON]
+
+
+def update_items(updates, path=ITEMS_PATH):
+    """Rewrite the ``price`` of the given items in the hand-formatted items.json, in place"""
+    path = Path(path)
+    source = path.read_text(encoding="utf-8")
+    for item_id, price in updates.items():
+        match = re.search(r'"id"\s*:\s*"' + re.escape(item_id) + '"', source)
+        if not match:
+            raise KeyError(f"unknown item: {item_id}")
+        start = source.rindex("{", 0, match.start())
+        end = literal_end(source, start)
+        block = re.sub(r'("price"\s*:\s*)[\d.]+', lambda m: f"{m.group(1)}{price}", source[start:end], count=1)
+        source = source[:start] + block + source[end:]
+    path.write_text(source, encoding="utf-8")
+
+
+def write_changes(changes, today=None, enclosure_path=ENCLOSURE_DATA_PATH, items_path=ITEMS_PATH,
+                  index_dir=build_items_index.INDEX_DIR, table_path=build_quiz_table.TABLE_PATH):
+    """Write changed prices back and rebuild the data that depends on items.json"""
+    today = today or datetime.date.today().isoformat()
+    enclosures = {c["id"]: {"price": c["current"], "lastUpdated": today} for c in changes if c["kind"] == "enclosure"}
+    items = {c["id"]: c["current"] for c in changes if c["kind"] == "item"}
+    if enclosures:
+        update_enclosures(enclosures, enclosure_path)
+    if items:
+        update_items(items, items_path)
+        source_bytes = Path(items_path).read_bytes()
+        build_items_index.write_index(build_items_index.build_index(json.loads(source_bytes)), index_dir, source_bytes)
+    if enclosures or items:
+        # The quiz table's source hash covers both files
+        catalog = json.loads(Path(items_path).read_text(encoding="utf-8"))
+        enclosure_data, animals = load_enclosure_data(enclosure_path)
+        table = build_quiz_table.build_table(enclosure_data, animals, catalog)
+        table["sourceHash"] = build_quiz_table.source_hash(enclosure_path, items_path)
+        build_quiz_table.write_table(table, table_path)
+
+
+def main():
+    """Check every product page and write back the prices that changed"""
+    parser = argparse.ArgumentParser(description="Refresh enclosure and item prices from their product pages")
+    parser.add_argument("--dry-run", action="store_true", help="report changes without writing them")
+    parser.add_argument("--ttl", type=float, default=CACHE_TTL, help="seconds a cached check stays fresh")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--cache", type=Path, default=CACHE_DIR)
+    args = parser.parse_args()
+
+    products = catalog_products()
+    print(f"🏷️  Checking {len(products)} product pages...")
+    start = time.perf_counter()
+    results = asyncio.run(check_prices(products, ResponseCache(args.cache), concurrency=args.concurrency, ttl=args.ttl))
+    statuses = {}
+    for result in results:
+        statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+        if result["status"] == "failed" or result["current"] is None:
+            print(f"❌ {result['name']}: {'request failed' if result['status'] == 'failed' else 'no price on page'}")
+        elif result["available"] is False:
+            print(f"⚠️  {result['name']}: out of stock")
+    changes = price_changes(results)
+    for change in changes:
+        print(f"   • {change['name']}: ${change['price']:.2f} → ${change['current']:.2f}")
+    print(f"   {', '.join(f'{n} {s}' for s, n in sorted(statuses.items()))} in {time.perf_counter() - start:.1f}s")
+    if changes and not args.dry_run:
+        write_changes(changes)
+        print(f"💾 Wrote {len(changes)} changed prices (lastUpdated {datetime.date.today().isoformat()})")
+    else:
+        print(f"✅ {len(changes)} price changes{' (dry run)' if changes else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""
+Schedule Incremental Availability Scrapes
+Tracks when each species' MorphMarket listing count was last scraped
+successfully and, on each run, fetches only the entries that have gone
+stale, oldest first. Failed fetches are retried with jittered exponential
+backoff, a per-host circuit breaker stops hammering a site that keeps
+failing, and requests to one host are spaced out. A failure never
+overwrites a species' last known good count.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+try:
+    from playwright.async_api import async_playwright
+except ImportError:
+    async_playwright = None
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+STATE_PATH = REPO_ROOT / "data" / "scrape_state.json"
+AVAILABILITY_PATH = REPO_ROOT / "data" / "listing_counts.json"
+
+SPECIES_URLS = {
+    "leopard_gecko": "https://www.morphmarket.com/us/c/reptiles/lizards/leopard-geckos?state=for_sale",
+    "crested_gecko": "https://www.morphmarket.com/us/c/reptiles/lizards/crested-geckos?state=for_sale",
+    "bearded_dragon": "https://www.morphmarket.com/us/c/reptiles/lizards/bearded-dragons?state=for_sale",
+    "collared_lizard": "https://www.morphmarket.com/us/c/reptiles/lizards/collared-lizards?state=for_sale",
+}
+
+# An entry is stale once its last success is older than this (seconds)
+MAX_AGE = 3600
+# Attempts per species per run, and the backoff between them (seconds)
+RETRIES = 3
+BACKOFF_BASE = 2.0
+BACKOFF_CAP = 60.0
+# Consecutive failures that open a host's circuit, and how long it stays open
+FAILURE_THRESHOLD = 5
+COOLDOWN = 900.0
+# Minimum spacing between two requests to the same host (seconds)
+HOST_INTERVAL = 5.0
+# State key holding each host's breaker and last request, so both outlast a run
+HOSTS_KEY = "_hosts"
+
+# Listing count element on a MorphMarket search page ("1-48 of 2,148")
+COUNT_SELECTOR = "#mainApp > div:nth-child(3) > div > div > div.container--_dmBk.mobile--RisAv.mobileLarge--tRtgo.tablet--d7O9X > div > div.container--NarxF > span:nth-child(1)"
+PAGE_SETTLE_MS = 7000
+
+
+def parse_listing_count(text):
+    """Total from a "1-48 of 2,148" results label, or None"""
+    match = re.search(r"of\s*([\d,]+)", text or "")
+    return int(match.group(1).replace(",", "")) if match else None
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP, rng=random):
+    """Full-jitter exponential backoff before retry number ``attempt`` (0-based)"""
+    return rng.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Per-host breaker: opens after repeated failures, lets one trial through after a cooldown
+
+    ``closed`` passes every request. ``open`` rejects them until ``cooldown``
+    seconds have passed, then becomes ``half-open`` and allows a single
+    trial: success closes the circuit again, failure reopens it.
+    """
+
+    def __init__(self, threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if self.clock() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self):
+        return self.state != "open"
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half-open" or self.failures >= self.threshold:
+            self.opened_at = self.clock()
+
+
+class ScrapeScheduler:
+    """Scrape stale species with ``fetch(url) -> count or None``, keeping per-species state
+
+    ``state`` maps each species to ``{"url", "count", "lastSuccess",
+    "lastAttempt", "failures", "lastError"}``, and ``HOSTS_KEY`` to
+    ``{host: {"failures", "openedAt", "lastRequest"}}``; times are Unix
+    seconds. Host entries are restored on first use, so an open circuit
+    stays open across runs until its cooldown has passed.
+    """
+
+    def __init__(self, fetch, state=None, max_age=MAX_AGE, retries=RETRIES, host_interval=HOST_INTERVAL,
+                 clock=time.time, sleep=time.sleep, rng=None):
+        self.fetch = fetch
+        self.state = state if state is not None else {}
+        self.max_age = max_age
+        self.retries = retries
+        self.host_interval = host_interval
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        self.breakers = {}
+        self.last_request = {}
+
+    def breaker(self, host):
+        if host not in self.breakers:
+            saved = self.state.get(HOSTS_KEY, {}).get(host, {})
+            breaker = CircuitBreaker(clock=self.clock)
+            breaker.failures = saved.get("failures", 0)
+            breaker.opened_at = saved.get("openedAt")
+            self.breakers[host] = breaker
+            if saved.get("lastRequest") is not None:
+                self.last_request.setdefault(host, saved["lastRequest"])
+        return self.breakers[host]
+
+    def _save_host(self, host):
+        breaker = self.breakers[host]
+        self.state.setdefault(HOSTS_KEY, {})[host] = {
+            "failures": breaker.failures, "openedAt": breaker.opened_at, "lastRequest": self.last_request.get(host)}
+
+    def stale(self, species_urls):
+        """Names due for a scrape: never scraped first, then by oldest success"""
+        now = self.clock()
+        due = []
+        for name, url in species_urls.items():
+            entry = self.state.get(name, {})
+            last = entry.get("lastSuccess")
+            if last is None or now - last >= self.max_age or entry.get("url") != url:
+                due.append(name)
+        return sorted(due, key=lambda n: (self.state.get(n, {}).get("lastSuccess") or 0,
+                                          self.state.get(n, {}).get("failures", 0), n))
+
+    def _wait_for_host(self, host):
+        last = self.last_request.get(host)
+        if last is not None:
+            remaining = self.host_interval - (self.clock() - last)
+            if remaining > 0:
+                self.sleep(remaining)
+        self.last_request[host] = self.clock()
+
+    def scrape(self, name, url):
+        """Fetch one species with retries; returns the count, or None after every attempt failed"""
+        host = urlsplit(url).netloc
+        breaker = self.breaker(host)
+        entry = self.state.setdefault(name, {"count": None, "lastSuccess": None, "failures": 0})
+        entry["url"] = url
+        try:
+            return self._attempts(entry, url, host, breaker)
+        finally:
+            self._save_host(host)
+
+    def _attempts(self, entry, url, host, breaker):
+        for attempt in range(self.retries):
+            if not breaker.allow():
+                entry["lastError"] = f"circuit open for {host}"
+                return None
+            if attempt:
+                self.sleep(backoff_delay(attempt - 1, rng=self.rng))
+            self._wait_for_host(host)
+            entry["lastAttempt"] = self.clock()
+            try:
+                count = self.fetch(url)
+                error = None if count is not None else "listing count not found"
+            except Exception as e:  # the page, the browser or the network
+                count, error = None, f"{type(e).__name__}: {e}"
+            if error is None:
+                breaker.record_success()
+                entry.update(count=count, lastSuccess=self.clock(), failures=0, lastError=None)
+                return count
+            breaker.record_failure()
+            entry["lastError"] = error
+        entry["failures"] = entry.get("failures", 0) + 1
+        return None
+
+    def run(self, species_urls, limit=None):
+        """Scrape up to ``limit`` stale species; returns ``{"scraped", "failed", "skipped"}`` name lists"""
+        due = self.stale(species_urls)
+        if limit is not None:
+            due = due[:limit]
+        summary = {"scraped": [], "failed": [], "skipped": []}
+        for name in due:
+            url = species_urls[name]
+            if not self.breaker(urlsplit(url).netloc).allow():
+                summary["skipped"].append(name)
+                continue
+            summary["scraped" if self.scrape(name, url) is not None else "failed"].append(name)
+        return summary
+
+
+def availability(state):
+    """Last known good listing count per species, omitting ones never scraped successfully"""
+    return {name: entry["count"] for name, entry in sorted(state.items())
+            if name != HOSTS_KEY and entry.get("count") is not None}
+
+
+def load_state(path=STATE_PATH):
+    path = Path(path)
+    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+
+def write_json(data, path):
+    """Write JSON through a temporary file so an interrupted run never leaves half a file"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_suffix(path.suffix + ".tmp")
+    temporary.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(temporary, path)
+
+
+class BrowserPages:
+    """Headless Chromium with a pool of ``pages`` tabs, so that many loads can render at once
+
+    ``await load(url)`` returns the rendered HTML of a URL; ``read`` can
+    instead pull something out of the live page (``await read(page)``).
+    """
+
+    def __init__(self, pages=1, settle_ms=PAGE_SETTLE_MS):
+        self.pages = pages
+        self.settle_ms = settle_ms
+
+    async def __aenter__(self):
+        if async_playwright is None:
+            raise RuntimeError("Playwright is required to render pages: pip install playwright && playwright install chromium")
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=True)
+        self._idle = asyncio.Queue()
+        for _ in range(self.pages):
+            self._idle.put_nowait(await self._browser.new_page())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._browser.close()
+        await self._playwright.stop()
+
+    async def load(self, url, read=None):
+        page = await self._idle.get()
+        try:
+            await page.goto(url)
+            await page.wait_for_timeout(self.settle_ms)
+            return await read(page) if read else await page.content()
+        finally:
+            self._idle.put_nowait(page)
+
+
+async def read_listing_count(page):
+    """Listing count shown on a rendered MorphMarket search page, or None"""
+    element = await page.query_selector(COUNT_SELECTOR)
+    return parse_listing_count(await element.inner_text()) if element else None
+
+
+class BrowserFetcher:
+    """Synchronous ``fetch(url) -> count`` for the scheduler, backed by a one-tab BrowserPages"""
+
+    def __enter__(self):
+        self._loop = asyncio.new_event_loop()
+        self._pages = BrowserPages()
+        self._loop.run_until_complete(self._pages.__aenter__())
+        return self
+
+    def __exit__(self, *exc_info):
+        self._loop.run_until_complete(self._pages.__aexit__(*exc_info))
+        self._loop.close()
+
+    def __call__(self, url):
+        return self._loop.run_until_complete(self._pages.load(url, read_listing_count))
+
+
+def main():
+    """Scrape the stale species and write their last known good counts"""
+    parser = argparse.ArgumentParser(description="Scrape stale MorphMarket listing counts")
+    parser.add_argument("--max-age", type=float, default=MAX_AGE, help="seconds before a count is stale")
+    parser.add_argument("--limit", type=int, help="scrape at most this many species this run")
+    parser.add_argument("--state", type=Path, default=STATE_PATH)
+    parser.add_argument("--out", type=Path, default=AVAILABILITY_PATH)
+    args = parser.parse_args()
+
+    state = load_state(args.state)
+    print("🕸️  Scraping stale listing counts...")
+    with BrowserFetcher() as fetch:
+        scheduler = ScrapeScheduler(fetch, state, max_age=args.max_age)
+        try:
+            summary = scheduler.run(SPECIES_URLS, args.limit)
+        finally:
+            write_json(state, args.state)
+            write_json(availability(state), args.out)
+
+    for name in summary["scraped"]:
+        print(f"   • {name}: {state[name]['count']}")
+    for name in summary["failed"]:
+        print(f"❌ {name}: {state[name].get('lastError')} (keeping {state[name].get('count')})")
+    if summary["skipped"]:
+        print(f"⏸️  Circuit open, skipped: {', '.join(summary['skipped'])}")
+    fresh = len(SPECIES_URLS) - len(scheduler.stale(SPECIES_URLS))
+    print(f"💾 {fresh}/{len(SPECIES_URLS)} species fresh, wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+"""
+Local Static Server
+asyncio HTTP/1.1 server for the site build with strong ETags and 304s,
+precompressed .br/.gz siblings, byte ranges for the models/*.glb files, an
+LRU cache for small files and per-request latency logging. Serves release/
+when it has been built, then dist/, then the repository itself.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import mimetypes
+import posixpath
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from build_assets import ENCODING_SUFFIXES, cache_control
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_ROOTS = [REPO_ROOT / "release", REPO_ROOT / "dist", REPO_ROOT]
+DEFAULT_PORT = 3001
+
+# Files up to this size are kept in memory; larger ones are streamed from disk
+CACHE_FILE_LIMIT = 512 * 1024
+CACHE_BYTES = 64 * 1024 * 1024
+STREAM_CHUNK = 256 * 1024
+
+MAX_HEADER_BYTES = 16 * 1024
+KEEP_ALIVE_SECONDS = 15
+
+CONTENT_TYPES = {
+    ".glb": "model/gltf-binary",
+    ".gltf": "model/gltf+json",
+    ".obj": "model/obj",
+    ".woff2": "font/woff2",
+    ".avif": "image/avif",
+    ".webp": "image/webp",
+    ".js": "text/javascript; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".html": "text/html; charset=utf-8",
+    ".json": "application/json",
+    ".svg": "image/svg+xml",
+}
+
+REASONS = {
+    200: "OK", 206: "Partial Content", 304: "Not Modified", 400: "Bad Request", 403: "Forbidden",
+    404: "Not Found", 405: "Method Not Allowed", 416: "Range Not Satisfiable", 500: "Internal Server Error",
+}
+
+log = logging.getLogger("serve")
+
+
+def default_root():
+    """The most optimized build that exists"""
+    return next(root for root in DEFAULT_ROOTS if root.is_dir())
+
+
+def content_type(path):
+    suffix = Path(path).suffix.lower()
+    return CONTENT_TYPES.get(suffix) or mimetypes.guess_type(str(path))[0] or "application/octet-stream"
+
+
+def accepted_encodings(header):
+    """Encodings from an Accept-Encoding header that the client did not refuse"""
+    accepted = set()
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name and q > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def parse_range(header, size):
+    """Return ``(start, end)`` for a single byte range, None to ignore it, or "invalid" for a 416"""
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[6:].strip().partition("-")
+    try:
+        if not first:
+            length = int(last)
+            if length <= 0:
+                return "invalid"
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return "invalid"
+    return start, min(end, size - 1)
+
+
+def etag_matches(header, etag):
+    """If-None-Match comparison (weak, as the spec requires for GET)"""
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+class FileCache:
+    """LRU cache of small file contents plus ETags for every file seen"""
+
+    def __init__(self, max_bytes=CACHE_BYTES, file_limit=CACHE_FILE_LIMIT):
+        self.max_bytes = max_bytes
+        self.file_limit = file_limit
+        self.size = 0
+        self._entries = OrderedDict()
+        self._etags = {}
+        self.hits = 0
+        self.misses = 0
+        # respond() runs on executor threads
+        self._lock = threading.Lock()
+
+    def lookup(self, path, stat):
+        """Return ``(etag, data)``; data is None for files too large to cache"""
+        with self._lock:
+            return self._lookup(path, stat)
+
+    def _lookup(self, path, stat):
+        signature = (stat.st_size, stat.st_mtime_ns)
+        entry = self._entries.get(path)
+        if entry and entry[0] == signature:
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry[1], entry[2]
+        self.misses += 1
+
+        if stat.st_size > self.file_limit:
+            known = self._etags.get(path)
+            if known and known[0] == signature:
+                return known[1], None
+            sha = hashlib.sha256()
+            with open(path, "rb") as handle:
+                for chunk in iter(lambda: handle.read(STREAM_CHUNK), b""):
+                    sha.update(chunk)
+            etag = f'"{sha.hexdigest()[:20]}"'
+            self._etags[path] = (signature, etag)
+            return etag, None
+
+        data = Path(path).read_bytes()
+        etag = f'"{hashlib.sha256(data).hexdigest()[:20]}"'
+        if entry:
+            self.size -= len(entry[2])
+        self._entries[path] = (signature, etag, data)
+        self._entries.move_to_end(path)
+        self.size += len(data)
+        while self.size > self.max_bytes and self._entries:
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+        return etag, data
+
+
+class StaticServer:
+    """Serve the files under ``root``"""
+
+    def __init__(self, root=None, cache=None):
+        self.root = Path(root or default_root()).resolve()
+        self.cache = cache or FileCache()
+        self.latencies = []
+
+    def resolve(self, target):
+        """Map a request target to a file, or None"""
+        path = posixpath.normpath(unquote(urlsplit(target).path))
+        parts = [p for p in path.split("/") if p]
+        if any(p.startswith(".") for p in parts):
+            return None
+        candidate = self.root.joinpath(*parts)
+        if candidate.is_dir():
+            candidate = candidate / "index.html"
+        if not candidate.is_file() or self.root not in candidate.resolve().parents:
+            return None
+        return candidate
+
+    def respond(self, method, target, headers):
+        """Build ``(status, headers, body)``; body is bytes or a ``(path, start, length)`` stream"""
+        if method not in ("GET", "HEAD"):
+            return 405, {"Allow": "GET, HEAD"}, b""
+        path = self.resolve(target)
+        if path is None:
+            return 404, {"Content-Type": "text/plain; charset=utf-8"}, b"Not Found\n"
+
+        relative = path.relative_to(self.root).as_posix()
+        response = {
+            "Content-Type": content_type(path),
+            "Cache-Control": cache_control(relative),
+            "Accept-Ranges": "bytes",
+        }
+
+        # Ranges apply to the identity representation, so skip encodings for them
+        accepted = set() if "range" in headers else accepted_encodings(headers.get("accept-encoding"))
+        chosen = path
+        for encoding in ("br", "gzip"):
+            sibling = path.with_name(path.name + ENCODING_SUFFIXES[encoding])
+            if encoding in accepted and sibling.is_file():
+                chosen = sibling
+                response["Content-Encoding"] = encoding
+                break
+        if any(path.with_name(path.name + suffix).is_file() for suffix in ENCODING_SUFFIXES.values()):
+            response["Vary"] = "Accept-Encoding"
+
+        stat = chosen.stat()
+        etag, data = self.cache.lookup(chosen, stat)
+        response["ETag"] = etag
+        response["Last-Modified"] = formatdate(stat.st_mtime, usegmt=True)
+
+        if "if-none-match" in headers:
+            if etag_matches(headers["if-none-match"], etag):
+                return 304, response, b""
+        elif "if-modified-since" in headers:
+            try:
+                if int(stat.st_mtime) <= parsedate_to_datetime(headers["if-modified-since"]).timestamp():
+                    return 304, response, b""
+            except (TypeError, ValueError):
+                pass
+
+        size = stat.st_size
+        byte_range = parse_range(headers.get("range"), size)
+        if byte_range and headers.get("if-range", etag) != etag:
+            byte_range = None
+        if byte_range == "invalid":
+            return 416, {"Content-Range": f"bytes */{size}"}, b""
+
+        status, start, length = 200, 0, size
+        if byte_range:
+            start, end = byte_range
+            status, length = 206, end - start + 1
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(length)
+
+        if method == "HEAD":
+            return status, response, b""
+        if data is not None:
+            return status, response, data[start:start + length]
+        return status, response, (chosen, start, length)
+
+    async def handle(self, reader, writer):
+        """Serve requests on one keep-alive connection"""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_SECONDS)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self._send(writer, 400, {}, b"", keep_alive=False)
+                    return
+
+                started = time.perf_counter()
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self._send(writer, 400, {}, b"", keep_alive=False)
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version.upper() == "HTTP/1.1")
+
+                try:
+                    status, response, body = await loop.run_in_executor(
+                        None, self.respond, method, target, headers)
+                except Exception:
+                    log.exception("Error serving %s", target)
+                    status, response, body = 500, {}, b""
+                sent = await self._send(writer, status, response, body, keep_alive)
+
+                elapsed = (time.perf_counter() - started) * 1000
+                self.latencies.append(elapsed)
+                log.info("%s %s %d %dB%s %.2fms", method, target, status, sent,
+                         " " + response["Content-Encoding"] if "Content-Encoding" in response else "", elapsed)
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    async def _send(self, writer, status, headers, body, keep_alive=True):
+        headers = {"Date": formatdate(usegmt=True), "Server": "reptilecare-serve", **headers}
+        if status != 304:
+            headers.setdefault("Content-Length", str(len(body) if isinstance(body, bytes) else body[2]))
+        headers["Connection"] = "keep-alive" if keep_alive else "close"
+        head = f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items()) + "\r\n"
+        writer.write(head.encode("latin-1"))
+
+        sent = 0
+        if isinstance(body, bytes):
+            writer.write(body)
+            sent = len(body)
+        else:
+            path, start, length = body
+            loop = asyncio.get_running_loop()
+            with open(path, "rb") as handle:
+                handle.seek(start)
+                while sent < length:
+                    chunk = await loop.run_in_executor(None, handle.read, min(STREAM_CHUNK, length - sent))
+                    if not chunk:
+                        break
+                    writer.write(chunk)
+                    sent += len(chunk)
+                    await writer.drain()
+        await writer.drain()
+        return sent
+
+    def latency_summary(self):
+        """p50/p95/p99 request latency in milliseconds"""
+        if not self.latencies:
+            return {}
+        ordered = sorted(self.latencies)
+        pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+        return {"requests": len(ordered), "p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99)}
+
+
+async def start_server(root=None, host="127.0.0.1", port=DEFAULT_PORT):
+    """Start serving and return ``(server, asyncio_server)``"""
+    server = StaticServer(root)
+    listener = await asyncio.start_server(server.handle, host, port, limit=MAX_HEADER_BYTES)
+    return server, listener
+
+
+async def _serve_forever(args):
+    server, listener = await start_server(args.root, args.host, args.port)
+    port = listener.sockets[0].getsockname()[1]
+    print(f"🌐 Serving {server.root} at http://{args.host}:{port}/")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        summary = server.latency_summary()
+        if summary:
+            print(f"\n📊 {summary['requests']} requests, p50 {summary['p50']:.2f}ms, "
+                  f"p95 {summary['p95']:.2f}ms, p99 {summary['p99']:.2f}ms, "
+                  f"cache hits {server.cache.hits}/{server.cache.hits + server.cache.misses}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the site locally")
+    parser.add_argument("--root", type=Path, default=None,
+                        help="directory to serve (default: release/, else dist/, else the repo)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--quiet", action="store_true", help="do not log each request")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO,
+                        format="%(asctime)s %(message)s", datefmt="%H:%M:%S")
+    try:
+        asyncio.run(_serve_forever(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
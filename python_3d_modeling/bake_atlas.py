@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Bake Material Atlases
+Replaces the flat face colors of models/*.glb with one texture atlas per
+enclosure family (brushed aluminum, woven screen, dark latch hardware and
+tinted glass tiles), generates box-projected UVs into the atlas and writes
+textured GLBs that reference the shared family atlas.
+"""
+
+import argparse
+import io
+import json
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from generate_corrected_terrarium import VIEW_DIRECTION
+from gltf_utils import MODE_TRIANGLES, pack_glb
+from render_thumbnails import load_triangles
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+MODELS_DIR = REPO_ROOT / "models"
+BAKED_DIR = MODELS_DIR / "baked"
+REGISTRY_NAME = "model_registry.json"
+
+TILE = 64
+# Texels kept free around each tile's UV rectangle so mipmaps do not bleed between tiles
+GUTTER = 4
+SCREEN_PERIOD = 6
+SCREEN_WIRE = 2
+DARK_LUMINANCE = 0.1
+
+FLOAT, UNSIGNED_SHORT, UNSIGNED_INT = 5126, 5123, 5125
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+LINEAR, LINEAR_MIPMAP_LINEAR, CLAMP_TO_EDGE = 9729, 9987, 33071
+
+
+def appearance(rgba):
+    """Which procedural tile a face color is baked as"""
+    alpha = rgba[3] / 255
+    if alpha < 0.5:
+        return "glass"
+    if alpha < 1.0:
+        return "screen"
+    luminance = (0.2126 * rgba[0] + 0.7152 * rgba[1] + 0.0722 * rgba[2]) / 255
+    return "latch" if luminance < DARK_LUMINANCE else "aluminum"
+
+
+def _smooth_noise(rng, length, width):
+    noise = rng.normal(size=length + 2 * width)
+    kernel = np.hanning(2 * width + 1)
+    return np.convolve(noise, kernel / kernel.sum(), mode="valid")[:length] * math.sqrt(width)
+
+
+def bake_tile(rgba, seed=0):
+    """A ``(TILE, TILE, 4)`` uint8 tile whose mean color stays close to ``rgba``"""
+    rng = np.random.default_rng(seed)
+    base = np.asarray(rgba, dtype=np.float64)
+    rgb = np.broadcast_to(base[:3], (TILE, TILE, 3)).copy()
+    alpha = np.full((TILE, TILE), base[3])
+    y, x = np.mgrid[0:TILE, 0:TILE]
+    kind = appearance(rgba)
+
+    if kind == "aluminum":
+        # Brushed streaks along u
+        streaks = _smooth_noise(rng, TILE, 3)[:, None] * 0.05
+        rgb *= (1.0 + streaks)[..., None]
+    elif kind == "latch":
+        # Powder-coated hardware: speckle around the base color
+        rgb += rng.integers(-4, 5, size=(TILE, TILE))[..., None]
+    elif kind == "screen":
+        # Woven wires at full opacity; the holes keep the average alpha of the flat color
+        wires = ((x % SCREEN_PERIOD) < SCREEN_WIRE) | ((y % SCREEN_PERIOD) < SCREEN_WIRE)
+        coverage = wires.mean()
+        hole_alpha = max((base[3] - coverage * 255) / (1 - coverage), 0.0)
+        alpha = np.where(wires, 255.0, hole_alpha)
+        rgb *= np.where(wires, 1.15, 0.6)[..., None]
+    else:
+        # Tinted glass with a soft diagonal reflection
+        band = np.exp(-(((x + y) - TILE) / (0.18 * TILE)) ** 2)
+        alpha = alpha * (1.0 + 0.5 * band)
+        rgb += (255 - rgb) * 0.35 * band[..., None]
+
+    tile = np.concatenate([rgb, alpha[..., None]], axis=2)
+    return (tile + 0.5).clip(0, 255).astype(np.uint8)
+
+
+def atlas_layout(count):
+    """Tiles per row and the square power-of-two atlas size for ``count`` tiles"""
+    columns = max(1, math.ceil(math.sqrt(count)))
+    size = 1 << math.ceil(math.log2(columns * TILE))
+    return columns, size
+
+
+def bake_atlas(colors):
+    """Atlas image for a list of RGBA colors: ``(pixels, {color: (x0, y0, x1, y1) in UV})``"""
+    columns, size = atlas_layout(len(colors))
+    pixels = np.zeros((size, size, 4), dtype=np.uint8)
+    rects = {}
+    for i, color in enumerate(colors):
+        row, column = divmod(i, columns)
+        x, y = column * TILE, row * TILE
+        pixels[y:y + TILE, x:x + TILE] = bake_tile(color, seed=i)
+        inset = GUTTER + 0.5
+        rects[color] = ((x + inset) / size, (y + inset) / size, (x + TILE - inset) / size, (y + TILE - inset) / size)
+    return pixels, rects
+
+
+def box_uvs(triangles, colors, rects):
+    """Per-corner UVs ``(T, 3, 2)``: each face is projected along its dominant axis and
+    the faces of one color and axis are fitted into that color's tile"""
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    axis = np.abs(normals).argmax(axis=1)
+    planes = np.array([[1, 2], [0, 2], [0, 1]])[axis]
+    projected = np.take_along_axis(triangles, planes[:, None, :].repeat(3, axis=1), axis=2)
+
+    uvs = np.zeros(triangles.shape[:2] + (2,))
+    tiles = list(rects)
+    tile = np.array([tiles.index(tuple(int(v) for v in c)) for c in colors], dtype=np.int64)
+    for i, (u0, v0, u1, v1) in enumerate(rects.values()):
+        for a in range(3):
+            faces = np.flatnonzero((tile == i) & (axis == a))
+            if not len(faces):
+                continue
+            points = projected[faces]
+            low = points.reshape(-1, 2).min(axis=0)
+            extent = np.maximum(points.reshape(-1, 2).max(axis=0) - low, 1e-9)
+            unit = (points - low) / extent
+            # Image rows run downward, so the second projected axis (height for walls) is flipped
+            uvs[faces, :, 0] = u0 + unit[..., 0] * (u1 - u0)
+            uvs[faces, :, 1] = v1 - unit[..., 1] * (v1 - v0)
+    return uvs
+
+
+def _primitive_arrays(triangles, uvs):
+    """Deduplicate corners into indexed POSITION/TEXCOORD_0 arrays"""
+    corners = np.concatenate([triangles.reshape(-1, 3), uvs.reshape(-1, 2)], axis=1).astype(np.float32)
+    unique, inverse = np.unique(corners, axis=0, return_inverse=True)
+    # Keep first-use vertex order for better compression downstream
+    _, first = np.unique(inverse.ravel(), return_index=True)
+    order = np.argsort(first)
+    remap = np.empty(len(order), dtype=np.int64)
+    remap[order] = np.arange(len(order))
+    return unique[order, :3], unique[order, 3:], remap[inverse.ravel()].reshape(-1, 3)
+
+
+def textured_document(name, triangles, colors, rects, atlas_uri, view=VIEW_DIRECTION):
+    """glTF document and binary chunk for one model using the family atlas"""
+    uvs = box_uvs(triangles, colors, rects)
+    transparent = colors[:, 3] < 255
+    view = np.asarray(view, dtype=np.float64) / np.linalg.norm(view)
+    depth = triangles.mean(axis=1) @ view
+
+    gltf = {
+        "asset": {"version": "2.0", "generator": "bake_atlas.py"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"name": name, "mesh": 0}],
+        "meshes": [{"name": name, "primitives": []}],
+        "materials": [],
+        "textures": [{"source": 0, "sampler": 0}],
+        "images": [{"uri": atlas_uri}],
+        "samplers": [{"magFilter": LINEAR, "minFilter": LINEAR_MIPMAP_LINEAR,
+                      "wrapS": CLAMP_TO_EDGE, "wrapT": CLAMP_TO_EDGE}],
+        "accessors": [],
+        "bufferViews": [],
+        "buffers": [],
+    }
+    binary = bytearray()
+
+    def add(array, target, accessor):
+        gltf["bufferViews"].append({"buffer": 0, "byteOffset": len(binary), "byteLength": array.nbytes, "target": target})
+        binary.extend(array.tobytes())
+        binary.extend(b"\0" * (-len(binary) % 4))
+        gltf["accessors"].append({"bufferView": len(gltf["bufferViews"]) - 1, "count": len(array), **accessor})
+        return len(gltf["accessors"]) - 1
+
+    # One shared atlas; opaque and blended faces stay in separate primitives so only
+    # the glass and screens pay for sorting and blending
+    for blended in (False, True):
+        faces = np.flatnonzero(transparent == blended)
+        if not len(faces):
+            continue
+        if blended:
+            faces = faces[np.argsort(depth[faces], kind="stable")]
+        positions, texcoords, indices = _primitive_arrays(triangles[faces], uvs[faces])
+        index_type, component = (np.uint16, UNSIGNED_SHORT) if len(positions) < 65536 else (np.uint32, UNSIGNED_INT)
+        material = {
+            "name": "atlas_blend" if blended else "atlas_opaque",
+            "pbrMetallicRoughness": {"baseColorTexture": {"index": 0}, "metallicFactor": 0.0, "roughnessFactor": 0.5},
+            "alphaMode": "BLEND" if blended else "OPAQUE",
+        }
+        if blended:
+            material["doubleSided"] = True
+        gltf["materials"].append(material)
+        gltf["meshes"][0]["primitives"].append({
+            "attributes": {
+                "POSITION": add(positions, ARRAY_BUFFER, {"componentType": FLOAT, "type": "VEC3",
+                                                         "min": positions.min(axis=0).tolist(),
+                                                         "max": positions.max(axis=0).tolist()}),
+                "TEXCOORD_0": add(texcoords, ARRAY_BUFFER, {"componentType": FLOAT, "type": "VEC2"}),
+            },
+            "indices": add(indices.astype(index_type).ravel(), ELEMENT_ARRAY_BUFFER,
+                           {"componentType": component, "type": "SCALAR"}),
+            "material": len(gltf["materials"]) - 1,
+            "mode": MODE_TRIANGLES,
+        })
+    gltf["buffers"].append({"byteLength": len(binary)})
+    return gltf, bytes(binary)
+
+
+def model_families(models_dir=MODELS_DIR):
+    """``{family: [glb paths]}`` from the registry's ``type`` field, or the file name prefix"""
+    registry_path = Path(models_dir) / REGISTRY_NAME
+    models = json.loads(registry_path.read_text(encoding="utf-8"))["models"] if registry_path.exists() else {}
+    families = {}
+    for path in sorted(Path(models_dir).glob("*.glb")):
+        family = models.get(path.stem, {}).get("type") or path.stem.split("_")[0]
+        families.setdefault(family, []).append(path)
+    return families
+
+
+def bake_family(family, paths, out_dir=BAKED_DIR):
+    """Bake one family atlas and its textured models; returns a summary dict"""
+    if Image is None:
+        raise RuntimeError("Pillow is required to write atlases: pip install pillow")
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    models = {}
+    for path in paths:
+        triangles, colors = load_triangles(path)
+        models[path.stem] = (triangles, (colors * 255 + 0.5).astype(np.uint8))
+    palette = sorted({tuple(int(v) for v in c) for _, colors in models.values() for c in colors},
+                     key=lambda c: (c[3] < 255, c))
+    pixels, rects = bake_atlas(palette)
+
+    atlas_name = f"{family}_atlas.png"
+    buffer = io.BytesIO()
+    Image.fromarray(pixels, "RGBA").save(buffer, "PNG", optimize=True)
+    (out_dir / atlas_name).write_bytes(buffer.getvalue())
+
+    summary = {"atlas": atlas_name, "atlas_bytes": buffer.tell(), "tiles": len(palette), "models": {}}
+    for name, (triangles, colors) in models.items():
+        gltf, binary = textured_document(name, triangles, colors, rects, atlas_name)
+        data = pack_glb(gltf, binary)
+        (out_dir / f"{name}.glb").write_bytes(data)
+        summary["models"][name] = {"bytes": len(data), "primitives": len(gltf["meshes"][0]["primitives"])}
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bake one material atlas per enclosure family")
+    parser.add_argument("--models", type=Path, default=MODELS_DIR, help="directory of GLB files")
+    parser.add_argument("--out", type=Path, default=BAKED_DIR, help="output directory")
+    parser.add_argument("--family", action="append", help="only bake these families")
+    args = parser.parse_args()
+
+    families = model_families(args.models)
+    print(f"🎨 Baking atlases for {len(families)} families...")
+    for family, paths in families.items():
+        if args.family and family not in args.family:
+            continue
+        summary = bake_family(family, paths, args.out)
+        print(f"   • {family}: {summary['tiles']} tiles → {summary['atlas']} ({summary['atlas_bytes'] / 1024:.1f} KB)")
+        for name, model in summary["models"].items():
+            print(f"     - {name}.glb: {model['primitives']} primitives, {model['bytes'] / 1024:.1f} KB")
+    print(f"💾 Output: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Build the Model Registry
+Loads every GLB and JSON model in models/ in parallel, computes vertex,
+face and primitive counts, bounds, byte sizes and content hashes, and
+rewrites models/model_registry.json. Exits non-zero when the committed
+registry had drifted from the model files.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from gltf_utils import MODE_TRIANGLES, accessor_array, read_glb, scene_meshes, transform_points
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+MODELS_DIR = REPO_ROOT / "models"
+REGISTRY_NAME = "model_registry.json"
+
+MODEL_SUFFIXES = (".glb", ".json")
+HASH_LENGTH = 16
+BOUNDS_DECIMALS = 5
+
+INCH = 0.0254
+# Allowed difference between the modeled extents and the nominal dimensions
+DIMENSION_TOLERANCE = 0.5 * INCH
+
+# Fields derived from the model files; everything else in an entry is hand-written metadata
+COMPUTED_FIELDS = ("file", "vertices", "faces", "primitives", "bounds", "bytes", "hash", "fallback")
+# Metadata copied from a JSON model when a new entry is created
+METADATA_FIELDS = ("name", "description", "dimensions", "type", "fixes", "version", "last_updated")
+
+REGISTRY_DESCRIPTION = "Pre-generated 3D enclosure models for web loading"
+
+
+def _triangles(mode, count):
+    if mode == MODE_TRIANGLES:
+        return count // 3
+    if mode in (5, 6):  # strips and fans
+        return max(count - 2, 0)
+    return 0
+
+
+def glb_stats(path):
+    """Counts and world-space bounds for every mesh instance in a GLB"""
+    gltf, binary = read_glb(path)
+    vertices = faces = primitives = 0
+    lows, highs = [], []
+    for world, mesh_index in scene_meshes(gltf):
+        for primitive in gltf["meshes"][mesh_index]["primitives"]:
+            position = primitive["attributes"]["POSITION"]
+            accessor = gltf["accessors"][position]
+            count = accessor["count"]
+            indexed = gltf["accessors"][primitive["indices"]]["count"] if "indices" in primitive else count
+            vertices += count
+            faces += _triangles(primitive.get("mode", MODE_TRIANGLES), indexed)
+            primitives += 1
+            if "min" in accessor and "max" in accessor:
+                low, high = np.array(accessor["min"]), np.array(accessor["max"])
+                corners = np.array([[(low, high)[(i >> axis) & 1][axis] for axis in range(3)] for i in range(8)])
+            else:
+                corners = accessor_array(gltf, binary, position).astype(np.float64)
+            points = transform_points(world, corners)
+            lows.append(points.min(axis=0))
+            highs.append(points.max(axis=0))
+    bounds = [np.min(lows, axis=0), np.max(highs, axis=0)] if lows else [np.zeros(3), np.zeros(3)]
+    return {"vertices": vertices, "faces": faces, "primitives": primitives, "bounds": bounds}
+
+
+def json_stats(path):
+    """Counts and bounds for the simple JSON fallback models"""
+    model = json.loads(Path(path).read_text(encoding="utf-8"))["model_data"]
+    points = np.array(model["vertices"], dtype=np.float64).reshape(-1, 3)
+    bounds = [points.min(axis=0), points.max(axis=0)] if len(points) else [np.zeros(3), np.zeros(3)]
+    return {"vertices": len(points), "faces": len(model["faces"]), "primitives": 1, "bounds": bounds}
+
+
+def model_stats(path):
+    """Worker: stats for one model file, keyed by file name"""
+    path = Path(path)
+    data = path.read_bytes()
+    stats = glb_stats(path) if path.suffix == ".glb" else json_stats(path)
+    stats["bounds"] = [[round(float(v), BOUNDS_DECIMALS) + 0.0 for v in corner] for corner in stats["bounds"]]
+    stats["bytes"] = len(data)
+    stats["hash"] = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    return path.name, stats
+
+
+def _metadata(models_dir, name):
+    sibling = models_dir / f"{name}.json"
+    if not sibling.exists():
+        return {"name": name}
+    document = json.loads(sibling.read_text(encoding="utf-8"))
+    return {field: document[field] for field in METADATA_FIELDS if field in document}
+
+
+def build_registry(models_dir=MODELS_DIR, previous=None, jobs=None):
+    """Compute the registry for ``models_dir``, keeping hand-written metadata from ``previous``"""
+    models_dir = Path(models_dir)
+    previous = previous or {"models": {}}
+    files = sorted(p for p in models_dir.iterdir() if p.suffix in MODEL_SUFFIXES and p.name != REGISTRY_NAME)
+
+    if jobs == 1:
+        stats = dict(map(model_stats, files))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+            stats = dict(pool.map(model_stats, files))
+
+    names = sorted({Path(name).stem for name in stats})
+    # Existing entries keep their order; new models are appended
+    ordered = [n for n in previous["models"] if n in names] + [n for n in names if n not in previous["models"]]
+
+    models = {}
+    for name in ordered:
+        entry = {k: v for k, v in (previous["models"].get(name) or _metadata(models_dir, name)).items()
+                 if k not in COMPUTED_FIELDS}
+        glb, fallback = stats.get(f"{name}.glb"), stats.get(f"{name}.json")
+        primary = f"{name}.glb" if glb else f"{name}.json"
+        entry["file"] = primary
+        entry.update(glb or fallback)
+        if glb and fallback:
+            entry["fallback"] = {"file": f"{name}.json", **fallback}
+        models[name] = entry
+
+    return {
+        "models": models,
+        "generated_at": previous.get("generated_at"),
+        "description": previous.get("description", REGISTRY_DESCRIPTION),
+    }
+
+
+def registry_drift(previous, current):
+    """Human-readable differences in the computed fields of two registries"""
+    changes = []
+    try:
+        datetime.fromisoformat(previous.get("generated_at") or "")
+    except ValueError:
+        changes.append(f"generated_at: {previous.get('generated_at')!r} is not an ISO 8601 timestamp")
+    old, new = previous.get("models", {}), current["models"]
+    for name in old:
+        if name not in new:
+            changes.append(f"{name}: model files removed")
+    for name, entry in new.items():
+        if name not in old:
+            changes.append(f"{name}: new model")
+            continue
+        for field in COMPUTED_FIELDS:
+            if old[name].get(field) != entry.get(field):
+                changes.append(f"{name}.{field}: {old[name].get(field)!r} → {entry.get(field)!r}")
+    return changes
+
+
+def dimension_mismatches(registry):
+    """Models whose bounding box does not match their nominal inch dimensions"""
+    mismatches = []
+    for name, entry in registry["models"].items():
+        if "dimensions" not in entry:
+            continue
+        extents = [(high - low) / INCH for low, high in zip(*entry["bounds"])]
+        if any(abs(e - d) * INCH > DIMENSION_TOLERANCE for e, d in zip(extents, entry["dimensions"])):
+            mismatches.append((name, [round(e, 1) for e in extents], entry["dimensions"]))
+    return mismatches
+
+
+def write_registry(registry, path):
+    registry = {**registry, "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds")}
+    Path(path).write_text(json.dumps(registry, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return registry
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regenerate models/model_registry.json from the model files")
+    parser.add_argument("--models", type=Path, default=MODELS_DIR, help="models directory")
+    parser.add_argument("--check", action="store_true", help="report drift without rewriting the registry")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    registry_path = args.models / REGISTRY_NAME
+    previous = json.loads(registry_path.read_text(encoding="utf-8")) if registry_path.exists() else {"models": {}}
+
+    print("📊 Computing model stats...")
+    registry = build_registry(args.models, previous, args.jobs)
+    for name, entry in registry["models"].items():
+        print(f"   • {name}: {entry['vertices']} vertices, {entry['faces']} faces, "
+              f"{entry['primitives']} primitives, {entry['bytes'] / 1024:.1f} KB")
+
+    for name, extents, dimensions in dimension_mismatches(registry):
+        print(f"⚠️  {name}: model measures {extents} in but is listed as {dimensions}")
+
+    changes = registry_drift(previous, registry)
+    if not changes:
+        print("✅ Registry is up to date")
+        return 0
+
+    for change in changes:
+        print(f"⚠️  {change}")
+    if args.check:
+        print(f"❌ {registry_path.name} is out of date - run python_3d_modeling/build_model_registry.py")
+        return 1
+    write_registry(registry, registry_path)
+    print(f"💾 Rewrote {registry_path}")
+    return 1 if changes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
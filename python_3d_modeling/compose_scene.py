@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Compose Multi-Enclosure Scenes
+Streams a room or rack layout into a single GLB. Every model named in the
+layout is copied in once from models/ and each enclosure becomes a node that
+references it, so file size grows with the number of distinct models, not
+enclosures. Model data and instance nodes are spooled to temporary files as
+they arrive, which keeps memory flat for layouts with hundreds of enclosures.
+
+Layout format (JSON):
+
+    {
+      "name": "breeder_room",
+      "units": "in",
+      "instances": [
+        {"model": "reptizoo_36x18x18", "translation": [0, 0, 0], "yaw": 90},
+        {"model": "pvc_48x24x24", "grid": [3, 1, 4], "spacing": [50, 0, 26]}
+      ]
+    }
+
+``translation`` and ``spacing`` are in ``units`` (m, cm or in). ``yaw`` turns
+an enclosure about the vertical (Z) axis in degrees; ``rotation`` takes a
+quaternion instead. ``grid`` repeats one entry along X, Y and Z.
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from itertools import product
+from pathlib import Path
+
+import numpy as np
+
+from gltf_utils import CHUNK_BIN, CHUNK_JSON, GLB_MAGIC, parse_glb, scene_meshes
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+MODELS_DIR = REPO_ROOT / "models"
+REGISTRY_PATH = MODELS_DIR / "model_registry.json"
+
+UNITS = {"m": 1.0, "cm": 0.01, "in": 0.0254}
+# Model data is aligned to this many bytes in the output binary chunk
+ALIGNMENT = 8
+COPY_CHUNK = 1 << 20
+
+# Top-level arrays merged from every model; indices into them are remapped
+MERGED_ARRAYS = ("accessors", "bufferViews", "buffers", "materials", "meshes", "textures", "images", "samplers")
+
+
+def expand_layout(layout):
+    """Yield ``(model, translation, rotation, scale)`` for every enclosure, lazily"""
+    unit = UNITS[layout.get("units", "m")]
+    for entry in layout.get("instances", []):
+        if "rotation" in entry:
+            rotation = [float(v) for v in entry["rotation"]]
+        else:
+            half = math.radians(entry.get("yaw", 0.0)) / 2
+            rotation = [0.0, 0.0, math.sin(half), math.cos(half)]
+        scale = [float(v) for v in entry.get("scale", [1.0, 1.0, 1.0])]
+        origin = np.array(entry.get("translation", [0.0, 0.0, 0.0]), dtype=np.float64) * unit
+        spacing = np.array(entry.get("spacing", [0.0, 0.0, 0.0]), dtype=np.float64) * unit
+        for cell in product(*(range(n) for n in entry.get("grid", [1, 1, 1]))):
+            yield entry["model"], (origin + spacing * cell).tolist(), rotation, scale
+
+
+class SceneWriter:
+    """Incrementally writes a GLB of model instances
+
+    ``add_instance`` can be called any number of times; each distinct model's
+    JSON and binary data is merged on first use. ``close`` assembles the GLB
+    by streaming the spooled nodes and binary data into the output file.
+    """
+
+    def __init__(self, path, models_dir=MODELS_DIR, registry=None, name="scene"):
+        self.path = Path(path)
+        self.models_dir = Path(models_dir)
+        registry = registry or json.loads(REGISTRY_PATH.read_text(encoding="utf-8"))
+        self.files = {model_id: entry["file"] for model_id, entry in registry["models"].items()}
+        self.name = name
+        self.document = {key: [] for key in MERGED_ARRAYS}
+        self.document["buffers"].append({"byteLength": 0})
+        self.extensions_used, self.extensions_required = set(), set()
+        # model id -> [(local matrix or None, mesh index)]
+        self.models = {}
+        self.image_uris = {}
+        self.node_count = 0
+        self.roots = array("I")
+        self.bin_length = 0
+        self.bin_file = tempfile.TemporaryFile()
+        self.node_file = tempfile.TemporaryFile()
+        self.summary = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.bin_file.close()
+            self.node_file.close()
+
+    def _merge_model(self, model_id):
+        """Copy one model's meshes, materials and binary data into the scene"""
+        if model_id not in self.files:
+            raise KeyError(f"unknown model {model_id!r}; known models: {', '.join(sorted(self.files))}")
+        source = self.models_dir / self.files[model_id]
+        gltf, binary = parse_glb(source.read_bytes())
+        offsets = {key: len(self.document[key]) for key in MERGED_ARRAYS}
+
+        padding = -self.bin_length % ALIGNMENT
+        self.bin_file.write(b"\0" * padding)
+        base = self.bin_length + padding
+        self.bin_file.write(binary)
+        self.bin_length = base + len(binary)
+
+        # The GLB's own binary buffer becomes a slice of buffer 0; any other
+        # buffer (e.g. a meshopt fallback with no data) is carried over as-is
+        buffer_map = {}
+        for index, buffer in enumerate(gltf.get("buffers", [])):
+            if index == 0 and "uri" not in buffer:
+                buffer_map[index] = 0
+            elif "uri" in buffer:
+                raise ValueError(f"{source.name}: external buffers are not supported")
+            else:
+                buffer_map[index] = len(self.document["buffers"])
+                self.document["buffers"].append(buffer)
+
+        for view in gltf.get("bufferViews", []):
+            view = dict(view)
+            if buffer_map[view["buffer"]] == 0:
+                view["byteOffset"] = view.get("byteOffset", 0) + base
+            view["buffer"] = buffer_map[view["buffer"]]
+            meshopt = view.get("extensions", {}).get("EXT_meshopt_compression")
+            if meshopt:
+                meshopt = dict(meshopt, buffer=buffer_map[meshopt["buffer"]])
+                if meshopt["buffer"] == 0:
+                    meshopt["byteOffset"] = meshopt.get("byteOffset", 0) + base
+                view["extensions"] = dict(view["extensions"], EXT_meshopt_compression=meshopt)
+            self.document["bufferViews"].append(view)
+
+        for accessor in gltf.get("accessors", []):
+            accessor = dict(accessor)
+            if "bufferView" in accessor:
+                accessor["bufferView"] += offsets["bufferViews"]
+            self.document["accessors"].append(accessor)
+
+        image_map = {}
+        for index, image in enumerate(gltf.get("images", [])):
+            image = dict(image)
+            if "bufferView" in image:
+                image["bufferView"] += offsets["bufferViews"]
+            elif "uri" in image and not image["uri"].startswith("data:"):
+                # Keep external textures (e.g. baked atlases) resolvable from the output
+                # location, and share one image between models that use the same file
+                image["uri"] = os.path.relpath(source.parent / image["uri"], self.path.parent).replace(os.sep, "/")
+                if image["uri"] in self.image_uris:
+                    image_map[index] = self.image_uris[image["uri"]]
+                    continue
+                self.image_uris[image["uri"]] = len(self.document["images"])
+            image_map[index] = len(self.document["images"])
+            self.document["images"].append(image)
+
+        for texture in gltf.get("textures", []):
+            texture = dict(texture)
+            if "source" in texture:
+                texture["source"] = image_map[texture["source"]]
+            if "sampler" in texture:
+                texture["sampler"] += offsets["samplers"]
+            self.document["textures"].append(texture)
+        self.document["samplers"].extend(gltf.get("samplers", []))
+
+        for material in gltf.get("materials", []):
+            self.document["materials"].append(_remap_textures(material, offsets["textures"]))
+
+        for mesh in gltf.get("meshes", []):
+            primitives = []
+            for primitive in mesh["primitives"]:
+                primitive = dict(primitive)
+                primitive["attributes"] = {k: v + offsets["accessors"] for k, v in primitive["attributes"].items()}
+                for key, target in (("indices", "accessors"), ("material", "materials")):
+                    if key in primitive:
+                        primitive[key] += offsets[target]
+                primitives.append(primitive)
+            self.document["meshes"].append({**mesh, "primitives": primitives})
+
+        self.extensions_used.update(gltf.get("extensionsUsed", []))
+        self.extensions_required.update(gltf.get("extensionsRequired", []))
+
+        parts = []
+        for world, mesh_index in scene_meshes(gltf):
+            local = None if np.allclose(world, np.eye(4)) else world
+            parts.append((local, mesh_index + offsets["meshes"]))
+        self.models[model_id] = parts
+        return parts
+
+    def _write_node(self, node):
+        if self.node_count:
+            self.node_file.write(b",")
+        self.node_file.write(json.dumps(node, separators=(",", ":")).encode("utf-8"))
+        self.node_count += 1
+        return self.node_count - 1
+
+    def add_instance(self, model_id, translation=(0.0, 0.0, 0.0), rotation=(0.0, 0.0, 0.0, 1.0), scale=(1.0, 1.0, 1.0)):
+        """Place one enclosure; returns its node index"""
+        parts = self.models.get(model_id) or self._merge_model(model_id)
+        node = {"name": f"{model_id}_{len(self.roots)}"}
+        if any(translation):
+            node["translation"] = list(translation)
+        if tuple(rotation) != (0.0, 0.0, 0.0, 1.0):
+            node["rotation"] = list(rotation)
+        if tuple(scale) != (1.0, 1.0, 1.0):
+            node["scale"] = list(scale)
+
+        if len(parts) == 1 and parts[0][0] is None:
+            node["mesh"] = parts[0][1]
+            self.roots.append(self._write_node(node))
+            return self.roots[-1]
+        # Children are written right after their parent, so their indices are known up front
+        first_child = self.node_count + 1
+        node["children"] = list(range(first_child, first_child + len(parts)))
+        index = self._write_node(node)
+        for local, mesh_index in parts:
+            child = {"mesh": mesh_index}
+            if local is not None:
+                child["matrix"] = local.T.ravel().tolist()
+            self._write_node(child)
+        self.roots.append(index)
+        return index
+
+    def close(self):
+        """Assemble the output GLB and return a summary"""
+        if self.summary:
+            return self.summary
+        self.document["buffers"][0]["byteLength"] = self.bin_length
+        document = {"asset": {"version": "2.0", "generator": "compose_scene.py"}, "scene": 0,
+                    "scenes": [{"name": self.name, "nodes": self.roots.tolist()}]}
+        document.update({key: value for key, value in self.document.items() if value})
+        if self.extensions_used:
+            document["extensionsUsed"] = sorted(self.extensions_used)
+        if self.extensions_required:
+            document["extensionsRequired"] = sorted(self.extensions_required)
+
+        prefix = json.dumps(document, separators=(",", ":")).encode("utf-8")[:-1] + b',"nodes":['
+        suffix = b"]}"
+        json_length = len(prefix) + self.node_file.tell() + len(suffix)
+        json_padding = -json_length % 4
+        bin_padding = -self.bin_length % 4
+        total = 12 + 8 + json_length + json_padding + 8 + self.bin_length + bin_padding
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "wb") as out:
+            out.write(struct.pack("<4sII", GLB_MAGIC, 2, total))
+            out.write(struct.pack("<II", json_length + json_padding, CHUNK_JSON))
+            out.write(prefix)
+            self.node_file.seek(0)
+            shutil.copyfileobj(self.node_file, out, COPY_CHUNK)
+            out.write(suffix + b" " * json_padding)
+            out.write(struct.pack("<II", self.bin_length + bin_padding, CHUNK_BIN))
+            self.bin_file.seek(0)
+            shutil.copyfileobj(self.bin_file, out, COPY_CHUNK)
+            out.write(b"\0" * bin_padding)
+        self.bin_file.close()
+        self.node_file.close()
+        self.summary = {"instances": len(self.roots), "models": len(self.models), "nodes": self.node_count, "bytes": total}
+        return self.summary
+
+
+def _remap_textures(value, offset):
+    """Shift every ``{"index": n}`` texture reference inside a material"""
+    if isinstance(value, dict):
+        remapped = {k: _remap_textures(v, offset) for k, v in value.items()}
+        if _is_texture_info(value):
+            remapped["index"] = value["index"] + offset
+        return remapped
+    if isinstance(value, list):
+        return [_remap_textures(v, offset) for v in value]
+    return value
+
+
+def _is_texture_info(value):
+    return isinstance(value.get("index"), int) and set(value) <= {"index", "texCoord", "scale", "strength", "extensions", "extras"}
+
+
+def compose_layout(layout, out_path, models_dir=MODELS_DIR, registry=None):
+    """Stream every enclosure of ``layout`` into ``out_path``; returns the writer summary"""
+    with SceneWriter(out_path, models_dir, registry, layout.get("name", "scene")) as writer:
+        for model_id, translation, rotation, scale in expand_layout(layout):
+            writer.add_instance(model_id, translation, rotation, scale)
+    return writer.summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compose a multi-enclosure GLB from a layout file")
+    parser.add_argument("layout", type=Path, help="layout JSON file")
+    parser.add_argument("--out", type=Path, help="output GLB (default: next to the layout)")
+    parser.add_argument("--models", type=Path, default=MODELS_DIR,
+                        help="directory to read model files from, e.g. models/compressed")
+    args = parser.parse_args()
+
+    layout = json.loads(args.layout.read_text(encoding="utf-8"))
+    out_path = args.out or args.layout.with_suffix(".glb")
+    print(f"🧩 Composing {args.layout.name}...")
+    summary = compose_layout(layout, out_path, args.models)
+    print(f"✅ {summary['instances']} enclosures from {summary['models']} models, "
+          f"{summary['nodes']} nodes, {summary['bytes'] / 1024:.1f} KB")
+    print(f"💾 Output: {out_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Compress the Model GLBs
+Rewrites models/*.glb with quantized attributes (KHR_mesh_quantization) and
+meshopt-encoded buffer views (EXT_meshopt_compression), decodes every output
+again to check it against the source within the quantization error bound,
+and reports the compression ratio per model.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from gltf_utils import MODE_TRIANGLES, accessor_array, pack_glb, parse_glb, scene_meshes
+from meshopt_codec import decode_index_buffer, decode_vertex_buffer, encode_index_buffer, encode_vertex_buffer
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+MODELS_DIR = REPO_ROOT / "models"
+OUT_DIR = MODELS_DIR / "compressed"
+
+# Position grid resolution; 14 bits keeps a 1.2 m enclosure within 0.04 mm
+POSITION_BITS = 14
+
+MESHOPT = "EXT_meshopt_compression"
+QUANTIZATION = "KHR_mesh_quantization"
+BYTE, UNSIGNED_BYTE, UNSIGNED_SHORT, UNSIGNED_INT, FLOAT = 5120, 5121, 5123, 5125, 5126
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+
+# Allowance for float32 rounding on top of the quantization bound
+FLOAT_TOLERANCE = 1e-6
+
+
+def first_use_order(faces, vertex_count):
+    """Old vertex ids in order of first use, and the old -> new remap (-1 for unused)"""
+    _, first = np.unique(faces.ravel(), return_index=True)
+    order = faces.ravel()[np.sort(first)]
+    remap = np.full(vertex_count, -1, dtype=np.int64)
+    remap[order] = np.arange(len(order))
+    return order, remap
+
+
+def _pad_columns(array, dtype):
+    """Pad rows to a multiple of 4 bytes, as the meshopt vertex codec requires"""
+    array = np.ascontiguousarray(array, dtype=dtype)
+    row = array.shape[1] * array.itemsize
+    pad = (-row % 4) // array.itemsize
+    if pad:
+        array = np.hstack([array, np.zeros((len(array), pad), dtype=dtype)])
+    return array
+
+
+def quantize_attribute(name, values, offset=None, scale=None):
+    """``(padded_array, accessor_fields)`` for one attribute in its quantized form"""
+    if name == "POSITION":
+        quantized = np.round((values - offset) / scale).astype(np.uint16)
+        return _pad_columns(quantized, np.uint16), {
+            "componentType": UNSIGNED_SHORT,
+            "min": quantized.min(axis=0).tolist(),
+            "max": quantized.max(axis=0).tolist(),
+        }
+    if name == "NORMAL":
+        quantized = np.clip(np.round(values * 127), -127, 127).astype(np.int8)
+        return _pad_columns(quantized, np.int8), {"componentType": BYTE, "normalized": True}
+    if name.startswith("COLOR_"):
+        quantized = np.clip(np.round(values * 255), 0, 255).astype(np.uint8)
+        return _pad_columns(quantized, np.uint8), {"componentType": UNSIGNED_BYTE, "normalized": True}
+    if name.startswith("TEXCOORD_") and values.min() >= 0 and values.max() <= 1:
+        quantized = np.round(values * 65535).astype(np.uint16)
+        return _pad_columns(quantized, np.uint16), {"componentType": UNSIGNED_SHORT, "normalized": True}
+    return _pad_columns(values, np.float32), {"componentType": FLOAT}
+
+
+def _mesh_grid(gltf, binary, mesh, bits):
+    """Shared origin and uniform step for every primitive of a mesh"""
+    positions = [accessor_array(gltf, binary, p["attributes"]["POSITION"]).astype(np.float64)
+                 for p in mesh["primitives"]]
+    points = np.concatenate(positions) if positions else np.zeros((1, 3))
+    low, high = points.min(axis=0), points.max(axis=0)
+    step = max(float((high - low).max()), 1e-9) / ((1 << bits) - 1)
+    return low, step
+
+
+class BufferWriter:
+    """Collects meshopt-encoded buffer views; buffer 0 holds the encoded bytes and
+    buffer 1 is the uncompressed fallback, which has no data of its own"""
+
+    def __init__(self, gltf):
+        self.gltf = gltf
+        self.encoded = bytearray()
+        self.raw_length = 0
+
+    def add(self, array, mode, target):
+        raw = np.ascontiguousarray(array)
+        stride = raw.itemsize * (raw.shape[1] if raw.ndim > 1 else 1)
+        if mode == "TRIANGLES":
+            data = encode_index_buffer(raw)
+        else:
+            data = encode_vertex_buffer(raw.view(np.uint8).reshape(len(raw), stride))
+        self.encoded.extend(b"\0" * (-len(self.encoded) % 4))
+        extension = {"buffer": 0, "byteOffset": len(self.encoded), "byteLength": len(data),
+                     "byteStride": stride, "count": len(raw), "mode": mode}
+        self.encoded.extend(data)
+
+        self.raw_length += -self.raw_length % 4
+        view = {"buffer": 1, "byteOffset": self.raw_length, "byteLength": raw.nbytes, "target": target,
+                "extensions": {MESHOPT: extension}}
+        if mode == "ATTRIBUTES":
+            view["byteStride"] = stride
+        self.raw_length += raw.nbytes
+        self.gltf["bufferViews"].append(view)
+        return len(self.gltf["bufferViews"]) - 1
+
+    def buffers(self):
+        return [{"byteLength": len(self.encoded)},
+                {"byteLength": self.raw_length, "extensions": {MESHOPT: {"fallback": True}}}]
+
+
+def compress_document(gltf, binary, bits=POSITION_BITS):
+    """Quantize and meshopt-encode every triangle primitive: ``(gltf, bin_chunk)``"""
+    if gltf.get("animations") or gltf.get("skins") or any("bufferView" in i for i in gltf.get("images", [])):
+        raise ValueError("animations, skins and embedded images are not supported")
+    used = set(gltf.get("extensionsUsed", []))
+    if MESHOPT in used or "KHR_draco_mesh_compression" in used:
+        raise ValueError("model is already compressed")
+
+    out = {key: value for key, value in gltf.items() if key not in ("accessors", "bufferViews", "buffers")}
+    out["nodes"] = [dict(node) for node in gltf.get("nodes", [])]
+    out["meshes"] = []
+    out["accessors"], out["bufferViews"] = [], []
+    writer = BufferWriter(out)
+
+    grids = []
+    for mesh in gltf.get("meshes", []):
+        offset, step = _mesh_grid(gltf, binary, mesh, bits)
+        grids.append((offset, step))
+        primitives = []
+        for primitive in mesh["primitives"]:
+            if primitive.get("mode", MODE_TRIANGLES) != MODE_TRIANGLES or primitive.get("targets"):
+                raise ValueError("only triangle lists without morph targets are supported")
+            count = gltf["accessors"][primitive["attributes"]["POSITION"]]["count"]
+            if "indices" in primitive:
+                faces = accessor_array(gltf, binary, primitive["indices"]).reshape(-1, 3).astype(np.int64)
+            else:
+                faces = np.arange(count).reshape(-1, 3)
+            order, remap = first_use_order(faces, count)
+
+            attributes = {}
+            for name, index in primitive["attributes"].items():
+                values = accessor_array(gltf, binary, index).astype(np.float64)[order]
+                array, fields = quantize_attribute(name, values, offset, step)
+                accessor = {"bufferView": writer.add(array, "ATTRIBUTES", ARRAY_BUFFER), "count": len(order),
+                            "type": gltf["accessors"][index]["type"], **fields}
+                if name != "POSITION" and "min" in gltf["accessors"][index] and accessor["componentType"] == FLOAT:
+                    accessor["min"], accessor["max"] = values.min(axis=0).tolist(), values.max(axis=0).tolist()
+                out["accessors"].append(accessor)
+                attributes[name] = len(out["accessors"]) - 1
+
+            indices = remap[faces].astype(np.uint16 if len(order) < 65536 else np.uint32)
+            out["accessors"].append({
+                "bufferView": writer.add(indices.ravel(), "TRIANGLES", ELEMENT_ARRAY_BUFFER),
+                "componentType": UNSIGNED_SHORT if indices.dtype == np.uint16 else UNSIGNED_INT,
+                "count": indices.size,
+                "type": "SCALAR",
+            })
+            primitives.append({**primitive, "attributes": attributes, "indices": len(out["accessors"]) - 1})
+        out["meshes"].append({**mesh, "primitives": primitives})
+
+    # Dequantize through a child node so the parent's transform and children are untouched
+    for node in list(out["nodes"]):
+        if "mesh" not in node:
+            continue
+        offset, step = grids[node["mesh"]]
+        out["nodes"].append({"mesh": node.pop("mesh"), "translation": offset.tolist(), "scale": [step] * 3})
+        node["children"] = node.get("children", []) + [len(out["nodes"]) - 1]
+
+    out["buffers"] = writer.buffers()
+    for key in ("extensionsUsed", "extensionsRequired"):
+        out[key] = sorted(set(gltf.get(key, [])) | {MESHOPT, QUANTIZATION})
+    return out, bytes(writer.encoded)
+
+
+def decode_document(gltf, binary):
+    """Expand meshopt buffer views into their fallback buffers: ``(gltf, bin_chunk)``
+
+    Every buffer is laid out back to back in the returned binary chunk and
+    every view reads from buffer 0, so the result works with
+    :func:`gltf_utils.accessor_array` like an uncompressed file.
+    """
+    buffers = [bytearray(b["byteLength"]) if b.get("extensions", {}).get(MESHOPT, {}).get("fallback")
+               else bytearray(binary) for b in gltf["buffers"]]
+    for view in gltf["bufferViews"]:
+        extension = view.get("extensions", {}).get(MESHOPT)
+        if not extension:
+            continue
+        start = extension.get("byteOffset", 0)
+        chunk = buffers[extension["buffer"]][start:start + extension["byteLength"]]
+        count, stride = extension["count"], extension["byteStride"]
+        if extension["mode"] == "TRIANGLES":
+            dtype = np.uint16 if stride == 2 else np.uint32
+            decoded = decode_index_buffer(chunk, count).astype(dtype).tobytes()
+        else:
+            decoded = decode_vertex_buffer(chunk, count, stride).tobytes()
+        target = view.get("byteOffset", 0)
+        buffers[view["buffer"]][target:target + len(decoded)] = decoded
+
+    bases, data = [], bytearray()
+    for buffer in buffers:
+        data.extend(b"\0" * (-len(data) % 4))
+        bases.append(len(data))
+        data.extend(buffer)
+    views = [{k: v for k, v in view.items() if k != "extensions"}
+             | {"buffer": 0, "byteOffset": view.get("byteOffset", 0) + bases[view["buffer"]]}
+             for view in gltf["bufferViews"]]
+    return {**gltf, "bufferViews": views}, bytes(data)
+
+
+def _instances(gltf, binary):
+    """World-space positions, faces and the other attributes of every primitive instance"""
+    for world, mesh_index in scene_meshes(gltf):
+        for primitive in gltf["meshes"][mesh_index]["primitives"]:
+            attributes = {name: accessor_array(gltf, binary, index).astype(np.float64)
+                          for name, index in primitive["attributes"].items()}
+            positions = attributes.pop("POSITION") @ world[:3, :3].T + world[:3, 3]
+            if "indices" in primitive:
+                faces = accessor_array(gltf, binary, primitive["indices"]).reshape(-1, 3).astype(np.int64)
+            else:
+                faces = np.arange(len(positions)).reshape(-1, 3)
+            yield world, positions, faces, attributes
+
+
+def verify(source, compressed):
+    """Decode ``compressed`` and compare it with ``source`` (both GLB bytes)
+
+    Returns the worst position error and the bound it must stay within, in
+    model units. Raises ``ValueError`` when anything differs by more.
+    """
+    gltf, binary = parse_glb(source)
+    decoded = decode_document(*parse_glb(compressed))
+    before, after = list(_instances(gltf, binary)), list(_instances(*decoded))
+    if len(before) != len(after):
+        raise ValueError(f"{len(before)} primitive instances became {len(after)}")
+    worst = bound = 0.0
+    for (_, positions, faces, attributes), (world, new_positions, new_faces, new_attributes) in zip(before, after):
+        order, remap = first_use_order(faces, len(positions))
+        expected = remap[faces]
+        # The index codec may rotate a triangle, which keeps its winding
+        rotations = [np.roll(expected, -r, axis=1) for r in range(3)]
+        if not np.any([np.all(new_faces == r, axis=1) for r in rotations], axis=0).all():
+            raise ValueError("triangles changed")
+
+        # Half a grid step along each quantized axis, through the node's linear transform
+        step = np.linalg.norm(world[:3, :3], axis=0).max()
+        bound = max(bound, 0.5 * step + FLOAT_TOLERANCE)
+        error = float(np.abs(new_positions - positions[order]).max()) if len(order) else 0.0
+        worst = max(worst, error)
+        for name, values in attributes.items():
+            tolerance = {"NORMAL": 0.5 / 127, "COLOR": 0.5 / 255, "TEXCOORD": 0.5 / 65535}.get(name.split("_")[0], 0.0)
+            if np.abs(new_attributes[name] - values[order]).max() > tolerance + FLOAT_TOLERANCE:
+                raise ValueError(f"{name} differs by more than {tolerance}")
+    if worst > bound:
+        raise ValueError(f"position error {worst:.3g} exceeds bound {bound:.3g}")
+    return worst, bound
+
+
+def compress_model(job):
+    """Worker: compress and verify one GLB"""
+    source, out_dir, bits = job
+    started = time.perf_counter()
+    try:
+        data = Path(source).read_bytes()
+        compressed = pack_glb(*compress_document(*parse_glb(data), bits=bits))
+        max_error, bound = verify(data, compressed)
+    except Exception as e:
+        return Path(source).name, {"error": str(e)}
+    target = Path(out_dir) / Path(source).name
+    target.write_bytes(compressed)
+    return Path(source).name, {
+        "bytes": len(data),
+        "compressed": len(compressed),
+        "ratio": len(data) / len(compressed),
+        "max_error": max_error,
+        "bound": bound,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def compress_models(models_dir=MODELS_DIR, out_dir=OUT_DIR, bits=POSITION_BITS, jobs=None):
+    """Compress every GLB in ``models_dir`` into ``out_dir`` and return ``{file: result}``"""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    work = [(str(path), str(out_dir), bits) for path in sorted(Path(models_dir).glob("*.glb"))]
+    if jobs == 1:
+        return dict(map(compress_model, work))
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        return dict(pool.map(compress_model, work))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantize and meshopt-compress models/*.glb")
+    parser.add_argument("--models", type=Path, default=MODELS_DIR, help="directory of GLB files")
+    parser.add_argument("--out", type=Path, default=OUT_DIR, help="output directory")
+    parser.add_argument("--bits", type=int, default=POSITION_BITS, help="position quantization bits (1-16)")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+    if not 1 <= args.bits <= 16:
+        parser.error("--bits must be between 1 and 16")
+
+    print(f"🗜️  Compressing models with {args.bits}-bit positions...")
+    results = compress_models(args.models, args.out, args.bits, args.jobs)
+    failed = 0
+    for name, result in results.items():
+        if "compressed" not in result:
+            failed += 1
+            print(f"❌ {name}: {result['error']}")
+            continue
+        print(f"   • {name}: {result['bytes'] / 1024:.1f} KB → {result['compressed'] / 1024:.1f} KB "
+              f"({result['ratio']:.2f}x), max error {result['max_error'] * 1000:.3f} mm "
+              f"≤ {result['bound'] * 1000:.3f} mm")
+    total = sum(r["bytes"] for r in results.values() if "compressed" in r)
+    packed = sum(r["compressed"] for r in results.values() if "compressed" in r)
+    if packed:
+        print(f"✅ {total / 1024:.1f} KB → {packed / 1024:.1f} KB ({total / packed:.2f}x)")
+    print(f"💾 Output: {args.out}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,9 +4,29 @@ Fixes door gap issue and adds central lock mechanism
 Exports as GLB for web viewer
 """
 
+import argparse
+
 import trimesh
 import numpy as np
 
+from gltf_utils import MODE_TRIANGLES, pack_glb
+
+# glTF bufferView targets
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+FLOAT, UNSIGNED_SHORT, UNSIGNED_INT = 5126, 5123, 5125
+
+# Material names for the face colors used below; other colors get a generated name
+MATERIAL_NAMES = {
+    (180, 180, 190, 255): "aluminum",
+    (20, 20, 20, 255): "latch",
+    (100, 150, 255, 80): "glass",
+    (60, 60, 60, 200): "screen",
+}
+# Direction toward the default camera (front right, above; doors face +Y).
+# Transparent triangles are stored back to front as seen from here.
+VIEW_DIRECTION = (0.5, 1.0, 0.6)
+
 # ---------- Latch geometry (rounded clamp) ----------
 def _rounded_rectangle_2d(w, h, r, sections=16):
     import math
@@ -20,7 +40,7 @@ def _rounded_rectangle_2d(w, h, r, sections=16):
         for j in range(sections+1):
             a = ang0[i] + (j/sections)*math.pi/2.0
             pts.append([cx[i] + r*math.cos(a), cy[i] + r*math.sin(a)])
-    return trimesh.path.polygons.polygon(pts)
+    return trimesh.path.polygons.Polygon(pts)
 
 def make_latch(
     glass_thickness=0.0045,
@@ -248,12 +268,126 @@ def create_corrected_terrarium():
     
     return terrarium
 
+# ---------- Material-split GLB export ----------
+def _material(rgba):
+    name = MATERIAL_NAMES.get(rgba, "color_" + "".join(f"{c:02x}" for c in rgba))
+    material = {
+        "name": name,
+        "pbrMetallicRoughness": {
+            "baseColorFactor": [round(c / 255, 4) for c in rgba],
+            "metallicFactor": 0.0,
+            "roughnessFactor": 0.5,
+        },
+    }
+    if rgba[3] < 255:
+        # Glass is seen from inside the enclosure too
+        material.update(alphaMode="BLEND", doubleSided=True)
+    else:
+        material["alphaMode"] = "OPAQUE"
+    return material
+
+
+def material_primitives(mesh, view=VIEW_DIRECTION):
+    """Group faces by color: ``[(rgba, face_indices)]``, opaque groups first
+
+    Transparent groups follow, farthest first, with their faces sorted back
+    to front along ``view`` so they blend correctly from the default camera
+    without per-frame sorting.
+    """
+    colors = np.asarray(mesh.visual.face_colors, dtype=np.uint8)
+    view = np.asarray(view, dtype=np.float64) / np.linalg.norm(view)
+    depth = mesh.triangles_center @ view
+    palette, inverse = np.unique(colors, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+
+    groups = []
+    for i, color in enumerate(palette):
+        faces = np.flatnonzero(inverse == i)
+        if color[3] < 255:
+            faces = faces[np.argsort(depth[faces], kind="stable")]
+        groups.append((tuple(int(c) for c in color), faces))
+    groups.sort(key=lambda g: (g[0][3] < 255, depth[g[1]].mean() if g[0][3] < 255 else 0.0))
+    return groups
+
+
+def export_split_glb(mesh, path, view=VIEW_DIRECTION):
+    """Write ``mesh`` as a GLB with one primitive and material per face color"""
+    vertices = np.asarray(mesh.vertices, dtype=np.float32)
+    faces = np.asarray(mesh.faces)
+    gltf = {
+        "asset": {"version": "2.0", "generator": "generate_corrected_terrarium.py"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"name": mesh.metadata.get("name", "terrarium"), "mesh": 0}],
+        "meshes": [{"name": mesh.metadata.get("name", "terrarium"), "primitives": []}],
+        "materials": [],
+        "accessors": [],
+        "bufferViews": [],
+        "buffers": [],
+    }
+    binary = bytearray()
+
+    def add_view(array, target):
+        gltf["bufferViews"].append({"buffer": 0, "byteOffset": len(binary), "byteLength": array.nbytes, "target": target})
+        binary.extend(array.tobytes())
+        binary.extend(b"\0" * (-len(binary) % 4))
+        return len(gltf["bufferViews"]) - 1
+
+    for rgba, group in material_primitives(mesh, view):
+        used, local = np.unique(faces[group], return_inverse=True)
+        positions = vertices[used]
+        index_type, component = (np.uint16, UNSIGNED_SHORT) if len(used) < 65536 else (np.uint32, UNSIGNED_INT)
+        gltf["accessors"].append({
+            "bufferView": add_view(positions, ARRAY_BUFFER), "componentType": FLOAT, "count": len(positions),
+            "type": "VEC3", "min": positions.min(axis=0).tolist(), "max": positions.max(axis=0).tolist(),
+        })
+        gltf["accessors"].append({
+            "bufferView": add_view(local.astype(index_type).ravel(), ELEMENT_ARRAY_BUFFER),
+            "componentType": component, "count": local.size, "type": "SCALAR",
+        })
+        gltf["materials"].append(_material(rgba))
+        gltf["meshes"][0]["primitives"].append({
+            "attributes": {"POSITION": len(gltf["accessors"]) - 2},
+            "indices": len(gltf["accessors"]) - 1,
+            "material": len(gltf["materials"]) - 1,
+            "mode": MODE_TRIANGLES,
+        })
+
+    gltf["buffers"].append({"byteLength": len(binary)})
+    with open(path, "wb") as handle:
+        handle.write(pack_glb(gltf, binary))
+    return gltf
+
+
+def load_colored_mesh(path):
+    """Load a GLB as one mesh with per-face colors, whether it stores vertex colors or materials"""
+    parts = []
+    for geometry in trimesh.load(path, force="scene").dump():
+        if isinstance(geometry.visual, trimesh.visual.TextureVisuals):
+            color = geometry.visual.material.main_color
+            geometry.visual = trimesh.visual.ColorVisuals(geometry, face_colors=np.tile(color, (len(geometry.faces), 1)))
+        parts.append(geometry)
+    return trimesh.util.concatenate(parts)
+
+
 def main():
     """Generate and export the corrected terrarium model"""
-    print("🔧 Generating corrected REPTIZOO 36x18x18 terrarium...")
-    
-    # Create the corrected model
-    terrarium = create_corrected_terrarium()
+    parser = argparse.ArgumentParser(description="Generate the corrected REPTIZOO 36x18x18 terrarium")
+    parser.add_argument("--single-primitive", action="store_true",
+                        help="export one vertex-colored primitive instead of one primitive per material")
+    parser.add_argument("--source", help="re-export an existing GLB instead of generating the model")
+    parser.add_argument("--compress", action="store_true",
+                        help="also write a quantized, meshopt-compressed copy to models/compressed/")
+    args = parser.parse_args()
+
+    if args.source:
+        print(f"🔧 Loading {args.source}...")
+        terrarium = load_colored_mesh(args.source)
+        terrarium.metadata["name"] = "REPTIZOO_36x18x18_Corrected"
+    else:
+        print("🔧 Generating corrected REPTIZOO 36x18x18 terrarium...")
+        # Create the corrected model
+        terrarium = create_corrected_terrarium()
     
     print(f"✅ Model created successfully!")
     print(f"📊 Vertices: {len(terrarium.vertices)}")
@@ -262,12 +396,28 @@ def main():
     
     # Export as GLB for web viewer
     output_path = "../models/reptizoo_36x18x18.glb"
-    terrarium.export(output_path)
+    if args.single_primitive:
+        terrarium.export(output_path)
+    else:
+        gltf = export_split_glb(terrarium, output_path)
+        for material in gltf["materials"]:
+            print(f"   • {material['name']}: {material['alphaMode']}")
     print(f"💾 Exported to: {output_path}")
-    
-    # Also export as OBJ for backup
-    terrarium.export("../models/reptizoo_36x18x18_corrected.obj")
-    print(f"📁 Backup OBJ saved")
+
+    if args.compress:
+        from compress_models import OUT_DIR, POSITION_BITS, compress_model
+        OUT_DIR.mkdir(parents=True, exist_ok=True)
+        name, result = compress_model((output_path, OUT_DIR, POSITION_BITS))
+        if "compressed" not in result:
+            print(f"❌ Compression failed: {result['error']}")
+        else:
+            print(f"🗜️  Compressed to {result['compressed'] / 1024:.1f} KB ({result['ratio']:.2f}x), "
+                  f"max error {result['max_error'] * 1000:.3f} mm")
+    
+    if not args.source:
+        # Also export as OBJ for backup
+        terrarium.export("../models/reptizoo_36x18x18_corrected.obj")
+        print(f"📁 Backup OBJ saved")
     
     print(f"\n🎯 FIXES APPLIED:")
     print(f"   ✅ Door gap eliminated - doors now meet at center")
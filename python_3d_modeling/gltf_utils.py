@@ -0,0 +1,124 @@
+"""
+Binary glTF (GLB) Helpers
+Reads and writes GLB files as their JSON document and binary chunk, decodes
+accessors into NumPy arrays and walks the scene graph with world transforms.
+"""
+
+import json
+import struct
+
+import numpy as np
+
+GLB_MAGIC = b"glTF"
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+# glTF componentType -> NumPy dtype
+COMPONENT_TYPES = {
+    5120: np.int8,
+    5121: np.uint8,
+    5122: np.int16,
+    5123: np.uint16,
+    5125: np.uint32,
+    5126: np.float32,
+}
+TYPE_SIZES = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT2": 4, "MAT3": 9, "MAT4": 16}
+
+MODE_TRIANGLES = 4
+
+
+def parse_glb(data):
+    """Split GLB bytes into ``(gltf_json, bin_chunk)``"""
+    magic, version, length = struct.unpack_from("<4sII", data, 0)
+    if magic != GLB_MAGIC:
+        raise ValueError("not a GLB file")
+    if version != 2:
+        raise ValueError(f"unsupported glTF version {version}")
+    gltf, binary = None, b""
+    offset = 12
+    while offset < min(length, len(data)):
+        chunk_length, chunk_type = struct.unpack_from("<II", data, offset)
+        chunk = data[offset + 8:offset + 8 + chunk_length]
+        if chunk_type == CHUNK_JSON:
+            gltf = json.loads(chunk.decode("utf-8"))
+        elif chunk_type == CHUNK_BIN:
+            binary = bytes(chunk)
+        offset += 8 + chunk_length
+    if gltf is None:
+        raise ValueError("GLB has no JSON chunk")
+    return gltf, binary
+
+
+def pack_glb(gltf, binary):
+    """Serialize ``(gltf_json, bin_chunk)`` to GLB bytes, padding both chunks to 4 bytes"""
+    document = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+    document += b" " * (-len(document) % 4)
+    chunks = struct.pack("<II", len(document), CHUNK_JSON) + document
+    if binary:
+        binary = bytes(binary) + b"\0" * (-len(binary) % 4)
+        chunks += struct.pack("<II", len(binary), CHUNK_BIN) + binary
+    return struct.pack("<4sII", GLB_MAGIC, 2, 12 + len(chunks)) + chunks
+
+
+def read_glb(path):
+    with open(path, "rb") as handle:
+        return parse_glb(handle.read())
+
+
+def accessor_array(gltf, binary, index):
+    """Decode one accessor into an array of shape (count, components)"""
+    accessor = gltf["accessors"][index]
+    dtype = np.dtype(COMPONENT_TYPES[accessor["componentType"]])
+    components = TYPE_SIZES[accessor["type"]]
+    count = accessor["count"]
+    if "bufferView" not in accessor:
+        return np.zeros((count, components), dtype=dtype)
+
+    view = gltf["bufferViews"][accessor["bufferView"]]
+    start = view.get("byteOffset", 0) + accessor.get("byteOffset", 0)
+    element = dtype.itemsize * components
+    stride = view.get("byteStride") or element
+    if stride == element:
+        array = np.frombuffer(binary, dtype=dtype, count=count * components, offset=start)
+    else:
+        raw = np.frombuffer(binary, dtype=np.uint8, count=(count - 1) * stride + element, offset=start)
+        rows = np.lib.stride_tricks.as_strided(raw, shape=(count, element), strides=(stride, 1))
+        array = np.ascontiguousarray(rows).view(dtype)
+    array = array.reshape(count, components)
+    if accessor.get("normalized") and dtype.kind in "iu":
+        array = array.astype(np.float32) / np.iinfo(dtype).max
+    return array
+
+
+def node_matrix(node):
+    """Local 4x4 transform of a node (column vectors)"""
+    if "matrix" in node:
+        return np.array(node["matrix"], dtype=np.float64).reshape(4, 4).T
+    matrix = np.eye(4)
+    x, y, z, w = node.get("rotation", [0.0, 0.0, 0.0, 1.0])
+    matrix[:3, :3] = [
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
+    ]
+    matrix[:3, :3] *= node.get("scale", [1.0, 1.0, 1.0])
+    matrix[:3, 3] = node.get("translation", [0.0, 0.0, 0.0])
+    return matrix
+
+
+def scene_meshes(gltf):
+    """Yield ``(world_matrix, mesh_index)`` for every mesh instance in the default scene"""
+    nodes = gltf.get("nodes", [])
+    scenes = gltf.get("scenes") or [{"nodes": list(range(len(nodes)))}]
+    stack = [(index, np.eye(4)) for index in reversed(scenes[gltf.get("scene", 0)].get("nodes", []))]
+    while stack:
+        index, parent = stack.pop()
+        node = nodes[index]
+        world = parent @ node_matrix(node)
+        if "mesh" in node:
+            yield world, node["mesh"]
+        stack.extend((child, world) for child in reversed(node.get("children", [])))
+
+
+def transform_points(matrix, points):
+    return points @ matrix[:3, :3].T + matrix[:3, 3]
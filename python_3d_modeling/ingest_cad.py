@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Ingest Vendor CAD Models
+Streams a manufacturer STL or OBJ file in fixed-size chunks (binary STL is
+memory-mapped), converts it to meters and Z-up, simplifies it to a triangle
+budget with out-of-core quadric clustering, writes models/<name>.glb and
+registers it in models/model_registry.json with inch dimensions.
+
+The simplification follows Lindstrom's out-of-core scheme: every triangle's
+plane quadric is added to the grid cells of its three corners, triangles that
+span three different cells are kept as cell triples, and each cell's vertex
+is placed where its summed quadric error is smallest. Memory depends on the
+grid resolution (and so on the budget), never on the input size.
+"""
+
+import argparse
+import json
+import math
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from build_model_registry import INCH, REGISTRY_NAME, build_registry, write_registry
+from gltf_utils import MODE_TRIANGLES, pack_glb
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+MODELS_DIR = REPO_ROOT / "models"
+
+UNITS = {"mm": 0.001, "cm": 0.01, "m": 1.0, "in": INCH}
+# Rotations into the repo's Z-up convention
+UP_AXES = {
+    "z": np.eye(3),
+    "y": np.array([[1.0, 0.0, 0.0], [0.0, 0.0, -1.0], [0.0, 1.0, 0.0]]),
+}
+
+CHUNK_TRIANGLES = 1 << 16
+DEFAULT_BUDGET = 5000
+# The clustering grid is this many times finer than a budget-sized grid, then coarsened
+GRID_FACTOR = 2.0
+MAX_GRID = 1024
+# Singular values below this fraction of the largest are dropped when placing cell vertices
+SVD_CUTOFF = 1e-3
+
+STL_HEADER = 80
+STL_RECORD = np.dtype([("normal", "<f4", 3), ("vertices", "<f4", (3, 3)), ("attribute", "<u2")])
+
+# Upper triangle of the symmetric 4x4 plane quadric
+QUADRIC_TERMS = [(i, j) for i in range(4) for j in range(i, 4)]
+
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+FLOAT, UNSIGNED_SHORT, UNSIGNED_INT = 5126, 5123, 5125
+MATERIAL = {
+    "name": "aluminum",
+    "pbrMetallicRoughness": {"baseColorFactor": [0.7059, 0.7059, 0.7451, 1.0], "metallicFactor": 0.0, "roughnessFactor": 0.5},
+    "alphaMode": "OPAQUE",
+}
+
+
+def _is_binary_stl(path):
+    size = path.stat().st_size
+    if size < STL_HEADER + 4:
+        return False
+    with open(path, "rb") as f:
+        f.seek(STL_HEADER)
+        count = int(np.frombuffer(f.read(4), "<u4")[0])
+    return size == STL_HEADER + 4 + count * STL_RECORD.itemsize
+
+
+def _stl_binary_chunks(path, chunk):
+    records = np.memmap(path, dtype=STL_RECORD, mode="r", offset=STL_HEADER + 4)
+    for start in range(0, len(records), chunk):
+        yield np.array(records["vertices"][start:start + chunk], dtype=np.float64)
+    del records
+
+
+def _stl_ascii_chunks(path, chunk):
+    values = []
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("vertex"):
+                values.extend(line.split()[1:4])
+                if len(values) == chunk * 9:
+                    yield np.array(values, dtype=np.float64).reshape(-1, 3, 3)
+                    values = []
+    if values:
+        yield np.array(values, dtype=np.float64).reshape(-1, 3, 3)
+
+
+def _obj_chunks(path, chunk):
+    """Spool OBJ vertices to a temporary file, then resolve faces against it chunk by chunk"""
+    with tempfile.TemporaryFile() as spool:
+        count, values = 0, []
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if line.startswith("v "):
+                    values.extend(line.split()[1:4])
+                    if len(values) >= chunk * 3:
+                        spool.write(np.array(values, dtype=np.float32).tobytes())
+                        count, values = count + len(values) // 3, []
+        spool.write(np.array(values, dtype=np.float32).tobytes())
+        count += len(values) // 3
+        spool.flush()
+        if not count:
+            return
+        vertices = np.memmap(spool, dtype=np.float32, mode="r", shape=(count, 3))
+
+        # Negative indices count back from the vertices read so far, not from the end of the file
+        corners, seen = [], 0
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if line.startswith("v "):
+                    seen += 1
+                    continue
+                if not line.startswith("f "):
+                    continue
+                polygon = [int(token.split("/")[0]) for token in line.split()[1:]]
+                polygon = [i - 1 if i > 0 else seen + i for i in polygon]
+                for k in range(1, len(polygon) - 1):  # fan-triangulate quads and n-gons
+                    corners.extend((polygon[0], polygon[k], polygon[k + 1]))
+                if len(corners) >= chunk * 3:
+                    yield vertices[np.array(corners)].astype(np.float64).reshape(-1, 3, 3)
+                    corners = []
+        if corners:
+            yield vertices[np.array(corners)].astype(np.float64).reshape(-1, 3, 3)
+        del vertices
+
+
+def triangle_chunks(path, chunk=CHUNK_TRIANGLES):
+    """Yield ``(n, 3, 3)`` float64 triangle arrays from an STL or OBJ file, at most ``chunk`` at a time"""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".obj":
+        return _obj_chunks(path, chunk)
+    if suffix == ".stl":
+        return _stl_binary_chunks(path, chunk) if _is_binary_stl(path) else _stl_ascii_chunks(path, chunk)
+    raise ValueError(f"unsupported CAD format: {path.suffix}")
+
+
+class QuadricGrid:
+    """Per-cell quadric sums and the triangles that span three cells, on a ``resolution`` grid"""
+
+    def __init__(self, low, high, resolution):
+        self.low = np.asarray(low, dtype=np.float64)
+        self.cell = max(float(np.max(np.asarray(high) - self.low)), 1e-9) / resolution
+        self.shape = np.maximum(np.ceil((np.asarray(high) - self.low) / self.cell).astype(np.int64), 1)
+        self.resolution = resolution
+        self.keys = np.zeros(0, dtype=np.int64)
+        # 10 quadric terms, position sum and vertex count per occupied cell
+        self.sums = np.zeros((0, 14))
+        self.triangles = np.zeros((0, 3), dtype=np.int64)
+
+    def cells(self, points):
+        return np.clip(np.floor((points - self.low) / self.cell), 0, self.shape - 1).astype(np.int64)
+
+    def add(self, triangles):
+        """Accumulate one chunk of ``(n, 3, 3)`` triangles"""
+        normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+        doubled_area = np.linalg.norm(normals, axis=1)
+        valid = doubled_area > 0
+        triangles, normals, doubled_area = triangles[valid], normals[valid], doubled_area[valid]
+        if not len(triangles):
+            return
+        planes = np.empty((len(triangles), 4))
+        planes[:, :3] = normals / doubled_area[:, None]
+        planes[:, 3] = -np.einsum("ij,ij->i", planes[:, :3], triangles[:, 0])
+
+        keys = _cell_keys(self.cells(triangles.reshape(-1, 3)), self.shape)
+        chunk_keys, inverse = np.unique(keys, return_inverse=True)
+        columns = [np.repeat(planes[:, i] * planes[:, j] * doubled_area / 2, 3) for i, j in QUADRIC_TERMS]
+        columns += [triangles.reshape(-1, 3)[:, axis] for axis in range(3)] + [np.ones(len(keys))]
+        chunk_sums = np.stack([np.bincount(inverse, weights=c, minlength=len(chunk_keys)) for c in columns], axis=1)
+        self.keys, self.sums = _merge_cells(np.concatenate([self.keys, chunk_keys]), np.concatenate([self.sums, chunk_sums]))
+
+        spans = keys.reshape(-1, 3)
+        spans = spans[(spans[:, 0] != spans[:, 1]) & (spans[:, 1] != spans[:, 2]) & (spans[:, 0] != spans[:, 2])]
+        self.triangles = _unique_triangles(np.concatenate([self.triangles, _canonical(spans)]))
+
+    def coarsen(self, resolution):
+        """``(keys, sums, triangles)`` on a coarser grid, with triangles as indices into the cells"""
+        coords = np.stack(np.unravel_index(self.keys, self.shape), axis=1)
+        coarse_shape = (self.shape * resolution + self.resolution - 1) // self.resolution
+        coarse = _cell_keys(coords * resolution // self.resolution, coarse_shape)
+        keys, inverse = np.unique(coarse, return_inverse=True)
+        sums = np.stack([np.bincount(inverse, weights=c, minlength=len(keys)) for c in self.sums.T], axis=1)
+        triangles = inverse[np.searchsorted(self.keys, self.triangles)]
+        triangles = triangles[(triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2])
+                              & (triangles[:, 0] != triangles[:, 2])]
+        return keys, sums, _unique_triangles(_canonical(triangles)), coarse_shape
+
+    def simplify(self, budget):
+        """Vertices and faces of the finest coarsening with at most ``budget`` triangles"""
+        low, high = 1, self.resolution
+        while low < high:  # largest resolution whose triangle count fits the budget
+            middle = (low + high + 1) // 2
+            if len(self.coarsen(middle)[2]) <= budget:
+                low = middle
+            else:
+                high = middle - 1
+        keys, sums, triangles, shape = self.coarsen(low)
+        scale = self.resolution / low
+        coords = np.stack(np.unravel_index(keys, shape), axis=1)
+        box_low = self.low + np.ceil(coords * scale) * self.cell
+        box_high = self.low + np.minimum(np.ceil((coords + 1) * scale), self.shape) * self.cell
+        vertices = np.clip(_optimal_points(sums), box_low, box_high)
+
+        used, faces = np.unique(triangles, return_inverse=True)
+        return vertices[used], faces.reshape(-1, 3), low
+
+
+def _cell_keys(cells, shape):
+    return (cells[:, 0] * shape[1] + cells[:, 1]) * shape[2] + cells[:, 2]
+
+
+def _merge_cells(keys, sums):
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return unique, np.stack([np.bincount(inverse, weights=c, minlength=len(unique)) for c in sums.T], axis=1)
+
+
+def _canonical(triangles):
+    """Rotate each triangle so its smallest id comes first, keeping the winding"""
+    shift = np.argmin(triangles, axis=1)
+    rows = np.arange(len(triangles))[:, None]
+    return triangles[rows, (shift[:, None] + np.arange(3)) % 3]
+
+
+def _unique_triangles(triangles):
+    if not len(triangles):
+        return triangles
+    order = np.lexsort(triangles.T[::-1])
+    triangles = triangles[order]
+    keep = np.ones(len(triangles), dtype=bool)
+    keep[1:] = np.any(triangles[1:] != triangles[:-1], axis=1)
+    return triangles[keep]
+
+
+def _optimal_points(sums):
+    """Minimize each cell's quadric error, starting from the mean of its vertices"""
+    quadric = np.zeros((len(sums), 4, 4))
+    for column, (i, j) in enumerate(QUADRIC_TERMS):
+        quadric[:, i, j] = quadric[:, j, i] = sums[:, column]
+    mean = sums[:, 10:13] / sums[:, 13:14]
+    a, b = quadric[:, :3, :3], quadric[:, :3, 3]
+    u, s, vt = np.linalg.svd(a)
+    inverse_s = np.where(s > SVD_CUTOFF * s[:, :1], 1.0 / np.where(s > 0, s, 1.0), 0.0)
+    residual = -b - np.einsum("nij,nj->ni", a, mean)
+    projected = np.einsum("nji,nj->ni", u, residual) * inverse_s
+    return mean + np.einsum("nij,ni->nj", vt, projected)
+
+
+def stream_bounds(path, transform, chunk=CHUNK_TRIANGLES):
+    low, high, count = np.full(3, np.inf), np.full(3, -np.inf), 0
+    for triangles in triangle_chunks(path, chunk):
+        points = triangles.reshape(-1, 3) @ transform.T
+        low, high = np.minimum(low, points.min(axis=0)), np.maximum(high, points.max(axis=0))
+        count += len(triangles)
+    if not count:
+        raise ValueError(f"{path} has no triangles")
+    return low, high, count
+
+
+def decimate(path, budget=DEFAULT_BUDGET, units="mm", up="z", chunk=CHUNK_TRIANGLES):
+    """Stream ``path`` twice and return ``(vertices, faces, stats)`` in centered Z-up meters"""
+    transform = UP_AXES[up] * UNITS[units]
+    low, high, count = stream_bounds(path, transform, chunk)
+    resolution = int(min(MAX_GRID, max(8, math.ceil(GRID_FACTOR * math.sqrt(budget)))))
+    grid = QuadricGrid(low, high, resolution)
+    for triangles in triangle_chunks(path, chunk):
+        grid.add(triangles @ transform.T)
+    vertices, faces, used_resolution = grid.simplify(budget)
+    vertices -= (low + high) / 2
+    return vertices, faces, {"source_faces": count, "grid": used_resolution}
+
+
+def mesh_document(name, vertices, faces):
+    """A single-primitive GLB document for an ingested mesh: ``(gltf, binary)``"""
+    positions = np.asarray(vertices, dtype=np.float32)
+    index_type, component = (np.uint16, UNSIGNED_SHORT) if len(positions) < 65536 else (np.uint32, UNSIGNED_INT)
+    indices = np.asarray(faces, dtype=index_type).ravel()
+    index_offset = positions.nbytes
+    binary = positions.tobytes() + indices.tobytes()
+    gltf = {
+        "asset": {"version": "2.0", "generator": "ingest_cad.py"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"name": name, "mesh": 0}],
+        "meshes": [{"name": name, "primitives": [
+            {"attributes": {"POSITION": 0}, "indices": 1, "material": 0, "mode": MODE_TRIANGLES},
+        ]}],
+        "materials": [MATERIAL],
+        "accessors": [
+            {"bufferView": 0, "componentType": FLOAT, "count": len(positions), "type": "VEC3",
+             "min": positions.min(axis=0).tolist(), "max": positions.max(axis=0).tolist()},
+            {"bufferView": 1, "componentType": component, "count": indices.size, "type": "SCALAR"},
+        ],
+        "bufferViews": [
+            {"buffer": 0, "byteOffset": 0, "byteLength": positions.nbytes, "target": ARRAY_BUFFER},
+            {"buffer": 0, "byteOffset": index_offset, "byteLength": indices.nbytes, "target": ELEMENT_ARRAY_BUFFER},
+        ],
+        "buffers": [{"byteLength": len(binary) + (-len(binary) % 4)}],
+    }
+    return gltf, binary
+
+
+def ingest(source, name, model_type, budget=DEFAULT_BUDGET, units="mm", up="z", models_dir=MODELS_DIR,
+           description=None, chunk=CHUNK_TRIANGLES):
+    """Decimate ``source`` into ``models_dir/<name>.glb`` and register it; returns the registry entry"""
+    models_dir = Path(models_dir)
+    vertices, faces, stats = decimate(source, budget, units, up, chunk)
+    extents = vertices.max(axis=0) - vertices.min(axis=0)
+    (models_dir / f"{name}.glb").write_bytes(pack_glb(*mesh_document(name, vertices, faces)))
+
+    registry_path = models_dir / REGISTRY_NAME
+    previous = json.loads(registry_path.read_text(encoding="utf-8")) if registry_path.exists() else {"models": {}}
+    metadata = {
+        **previous["models"].get(name, {}),
+        "name": name,
+        "description": description or previous["models"].get(name, {}).get("description") or f"{name} (vendor CAD)",
+        "dimensions": [round(float(e) / INCH) for e in extents],
+        "type": model_type,
+        "source": {"file": Path(source).name, "faces": stats["source_faces"], "units": units, "budget": budget},
+    }
+    previous["models"][name] = metadata
+    write_registry(build_registry(models_dir, previous, jobs=1), registry_path)
+    return json.loads(registry_path.read_text(encoding="utf-8"))["models"][name]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decimate a vendor STL/OBJ model and add it to models/")
+    parser.add_argument("source", type=Path, help="STL (binary or ASCII) or OBJ file")
+    parser.add_argument("--name", required=True, help="registry id and output file stem")
+    parser.add_argument("--type", required=True, help="enclosure family, e.g. reptizoo, pvc or basic")
+    parser.add_argument("--budget", type=int, default=DEFAULT_BUDGET, help="maximum output triangles")
+    parser.add_argument("--units", choices=sorted(UNITS), default="mm", help="units of the source file")
+    parser.add_argument("--up", choices=sorted(UP_AXES), default="z", help="up axis of the source file")
+    parser.add_argument("--description", help="registry description")
+    parser.add_argument("--models", type=Path, default=MODELS_DIR, help="models directory")
+    parser.add_argument("--chunk", type=int, default=CHUNK_TRIANGLES, help="triangles read per chunk")
+    args = parser.parse_args()
+
+    print(f"📥 Ingesting {args.source.name} ({args.units}, {args.up}-up) to {args.budget} triangles...")
+    start = time.perf_counter()
+    entry = ingest(args.source, args.name, args.type, args.budget, args.units, args.up, args.models,
+                   args.description, args.chunk)
+    print(f"   • {entry['source']['faces']} → {entry['faces']} triangles, {entry['vertices']} vertices, "
+          f"{entry['bytes'] / 1024:.1f} KB in {time.perf_counter() - start:.1f}s")
+    print(f"   • Dimensions: {' x '.join(str(d) for d in entry['dimensions'])} in")
+    print(f"✅ Registered {args.name} in {args.models / REGISTRY_NAME}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
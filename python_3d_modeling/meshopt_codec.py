@@ -0,0 +1,379 @@
+"""
+Meshopt Buffer Codecs
+Pure NumPy/Python implementation of the vertex (ATTRIBUTES, version 0) and
+triangle index (TRIANGLES, version 1) bitstreams of EXT_meshopt_compression,
+so the output decodes with the stock meshoptimizer decoder in the browser.
+"""
+
+import numpy as np
+
+VERTEX_HEADER = 0xA0
+INDEX_HEADER = 0xE1
+
+VERTEX_BLOCK_BYTES = 8192
+VERTEX_BLOCK_MAX = 256
+BYTE_GROUP = 16
+VERTEX_TAIL_MIN = 32
+GROUP_BITS = (0, 2, 4, 8)
+
+# Static codeaux table used by the reference encoder; also pads the end of the stream
+CODEAUX_TABLE = bytes([0x00, 0x76, 0x87, 0x56, 0x67, 0x78, 0xA9, 0x86, 0x65, 0x89, 0x68, 0x98, 0x01, 0x69, 0, 0])
+TRIANGLE_ORDER = ((0, 1, 2), (1, 2, 0), (2, 0, 1))
+FEC_MAX = 13
+
+
+def vertex_block_size(stride):
+    """Vertices per block; part of the format, so it must match the decoder"""
+    return min((VERTEX_BLOCK_BYTES // stride) & ~(BYTE_GROUP - 1), VERTEX_BLOCK_MAX)
+
+
+def _zigzag(deltas):
+    return ((deltas << 1) ^ np.where(deltas & 0x80, 0xFF, 0)).astype(np.uint8)
+
+
+def _unzigzag(values):
+    return ((0 - (values & 1)) ^ (values >> 1)).astype(np.uint8)
+
+
+def _group_size(group, bits):
+    if bits == 0:
+        return 0 if not group.any() else None
+    if bits == 8:
+        return BYTE_GROUP
+    return BYTE_GROUP * bits // 8 + int(np.count_nonzero(group >= (1 << bits) - 1))
+
+
+def _encode_group(group, bits):
+    if bits == 0:
+        return b""
+    if bits == 8:
+        return group.tobytes()
+    sentinel = (1 << bits) - 1
+    per_byte = 8 // bits
+    packed = np.minimum(group, sentinel).astype(np.uint32).reshape(-1, per_byte)
+    shifts = bits * np.arange(per_byte - 1, -1, -1)
+    return (packed << shifts).sum(axis=1).astype(np.uint8).tobytes() + group[group >= sentinel].tobytes()
+
+
+def _encode_bytes(buffer):
+    """Header of 2-bit group modes followed by the groups, as the reference encoder picks them"""
+    groups = buffer.reshape(-1, BYTE_GROUP)
+    header = bytearray((len(groups) + 3) // 4)
+    body = bytearray()
+    last_bits = -1
+    for i, group in enumerate(groups):
+        sizes = [_group_size(group, bits) for bits in GROUP_BITS]
+        best = 3
+        for mode in range(3):
+            size = sizes[mode]
+            if size is None:
+                continue
+            if size < sizes[best] or (size == sizes[best] and GROUP_BITS[mode] == last_bits and GROUP_BITS[best] != 8):
+                best = mode
+        header[i // 4] |= best << ((i % 4) * 2)
+        body += _encode_group(group, GROUP_BITS[best])
+        last_bits = GROUP_BITS[best]
+    return bytes(header) + bytes(body)
+
+
+def encode_vertex_buffer(vertices):
+    """Encode a ``(count, stride)`` uint8 array; ``stride`` must be a multiple of 4"""
+    vertices = np.ascontiguousarray(vertices, dtype=np.uint8)
+    count, stride = vertices.shape
+    if stride % 4 or not 0 < stride <= 256:
+        raise ValueError(f"vertex stride {stride} must be a multiple of 4 up to 256")
+
+    out = bytearray([VERTEX_HEADER])
+    first = vertices[0] if count else np.zeros(stride, np.uint8)
+    last = first
+    block = vertex_block_size(stride)
+    for start in range(0, count, block):
+        chunk = vertices[start:start + block]
+        aligned = -(-len(chunk) // BYTE_GROUP) * BYTE_GROUP
+        previous = np.vstack([last, chunk[:-1]])
+        deltas = _zigzag(chunk - previous)
+        for k in range(stride):
+            buffer = np.zeros(aligned, np.uint8)
+            buffer[:len(chunk)] = deltas[:, k]
+            out += _encode_bytes(buffer)
+        last = chunk[-1]
+
+    out += bytes(max(VERTEX_TAIL_MIN, stride) - stride)
+    out += first.tobytes()
+    return bytes(out)
+
+
+def _decode_bytes(data, offset, length):
+    groups = length // BYTE_GROUP
+    header = data[offset:offset + (groups + 3) // 4]
+    offset += len(header)
+    values = np.zeros(length, np.uint8)
+    for i in range(groups):
+        bits = GROUP_BITS[(header[i // 4] >> ((i % 4) * 2)) & 3]
+        if bits == 8:
+            values[i * BYTE_GROUP:(i + 1) * BYTE_GROUP] = np.frombuffer(data, np.uint8, BYTE_GROUP, offset)
+            offset += BYTE_GROUP
+        elif bits:
+            per_byte = 8 // bits
+            sentinel = (1 << bits) - 1
+            packed = np.frombuffer(data, np.uint8, BYTE_GROUP // per_byte, offset)
+            offset += len(packed)
+            shifts = bits * np.arange(per_byte - 1, -1, -1)
+            group = ((packed[:, None] >> shifts) & sentinel).astype(np.uint8).ravel()
+            escaped = np.flatnonzero(group == sentinel)
+            group[escaped] = np.frombuffer(data, np.uint8, len(escaped), offset)
+            offset += len(escaped)
+            values[i * BYTE_GROUP:(i + 1) * BYTE_GROUP] = group
+    return values, offset
+
+
+def decode_vertex_buffer(data, count, stride):
+    """Decode an ATTRIBUTES stream back to a ``(count, stride)`` uint8 array"""
+    data = bytes(data)
+    tail = max(VERTEX_TAIL_MIN, stride)
+    if len(data) < 1 + tail or data[0] != VERTEX_HEADER:
+        raise ValueError("not a version 0 meshopt vertex stream")
+
+    vertices = np.zeros((count, stride), np.uint8)
+    last = np.frombuffer(data, np.uint8, stride, len(data) - stride)
+    offset = 1
+    block = vertex_block_size(stride)
+    for start in range(0, count, block):
+        size = min(block, count - start)
+        aligned = -(-size // BYTE_GROUP) * BYTE_GROUP
+        for k in range(stride):
+            deltas, offset = _decode_bytes(data, offset, aligned)
+            steps = _unzigzag(deltas[:size]).astype(np.int64)
+            vertices[start:start + size, k] = (int(last[k]) + np.cumsum(steps)) & 0xFF
+        last = vertices[start + size - 1]
+    if offset != len(data) - tail:
+        raise ValueError("meshopt vertex stream has trailing or missing data")
+    return vertices
+
+
+def _vbyte(value):
+    out = bytearray()
+    while True:
+        out.append((value & 127) | (128 if value > 127 else 0))
+        value >>= 7
+        if not value:
+            return bytes(out)
+
+
+def _encode_index(index, last):
+    delta = (index - last) & 0xFFFFFFFF
+    return _vbyte(((delta << 1) ^ (0xFFFFFFFF if delta & 0x80000000 else 0)) & 0xFFFFFFFF)
+
+
+def _fifo_find(fifo, offset, value):
+    for i in range(16):
+        if fifo[(offset - 1 - i) & 15] == value:
+            return i
+    return -1
+
+
+def _edge_find(fifo, offset, a, b, c):
+    for i in range(16):
+        edge = fifo[(offset - 1 - i) & 15]
+        if edge == (a, b):
+            return (i << 2) | 0
+        if edge == (b, c):
+            return (i << 2) | 1
+        if edge == (c, a):
+            return (i << 2) | 2
+    return -1
+
+
+def encode_index_buffer(indices):
+    """Encode a triangle list; triangles may come back rotated but keep their winding and order
+
+    Compresses best when vertices are numbered in first-use order.
+    """
+    indices = [int(i) for i in np.asarray(indices).ravel()]
+    if len(indices) % 3:
+        raise ValueError("index count must be a multiple of 3")
+
+    edges = [(-1, -1)] * 16
+    vertices = [-1] * 16
+    edge_offset = vertex_offset = 0
+    next_index = last = 0
+    codes = bytearray()
+    data = bytearray()
+
+    def push_vertex(v):
+        nonlocal vertex_offset
+        vertices[vertex_offset] = v
+        vertex_offset = (vertex_offset + 1) & 15
+
+    def push_edge(a, b):
+        nonlocal edge_offset
+        edges[edge_offset] = (a, b)
+        edge_offset = (edge_offset + 1) & 15
+
+    for t in range(0, len(indices), 3):
+        triangle = indices[t:t + 3]
+        fer = _edge_find(edges, edge_offset, *triangle)
+        if fer >= 0 and (fer >> 2) < 15:
+            a, b, c = (triangle[i] for i in TRIANGLE_ORDER[fer & 3])
+            fc = _fifo_find(vertices, vertex_offset, c)
+            if 1 <= fc < FEC_MAX:
+                fec = fc
+            elif c == next_index:
+                fec, next_index = 0, next_index + 1
+            else:
+                fec = 15
+                if c + 1 == last:
+                    fec, last = 13, c
+                if c == last + 1:
+                    fec, last = 14, c
+            codes.append(((fer >> 2) << 4) | fec)
+            if fec == 15:
+                data += _encode_index(c, last)
+                last = c
+            if fec == 0 or fec >= FEC_MAX:
+                push_vertex(c)
+            push_edge(c, b)
+            push_edge(a, c)
+            continue
+
+        rotation = 1 if triangle[1] == next_index else (2 if triangle[2] == next_index else 0)
+        a, b, c = (triangle[i] for i in TRIANGLE_ORDER[rotation])
+        reset = (a, b, c) == (0, 1, 2) and next_index > 0
+        if reset:
+            next_index = 0
+            vertices = [-1] * 16
+
+        fb = _fifo_find(vertices, vertex_offset, b)
+        fc = _fifo_find(vertices, vertex_offset, c)
+        fea = 0 if a == next_index else 15
+        next_index += fea == 0
+        if 0 <= fb < 14:
+            feb = fb + 1
+        else:
+            feb = 0 if b == next_index else 15
+            next_index += feb == 0
+        if 0 <= fc < 14:
+            fec = fc + 1
+        else:
+            fec = 0 if c == next_index else 15
+            next_index += fec == 0
+
+        codeaux = (feb << 4) | fec
+        aux = CODEAUX_TABLE.find(bytes([codeaux]))
+        if fea == 0 and 0 <= aux < 14 and not reset:
+            codes.append(0xF0 | aux)
+        else:
+            codes.append(0xF0 | 14 | fea)
+            data.append(codeaux)
+        for fe, v in ((fea, a), (feb, b), (fec, c)):
+            if fe == 15:
+                data += _encode_index(v, last)
+                last = v
+        for fe, v in ((fea, a), (feb, b), (fec, c)):
+            if fe in (0, 15):
+                push_vertex(v)
+        push_edge(b, a)
+        push_edge(c, b)
+        push_edge(a, c)
+
+    return bytes([INDEX_HEADER]) + bytes(codes) + bytes(data) + CODEAUX_TABLE
+
+
+def decode_index_buffer(data, count):
+    """Decode a TRIANGLES stream of ``count`` indices to a uint32 array"""
+    data = bytes(data)
+    if count % 3 or len(data) < 1 + count // 3 + 16 or data[0] & 0xF0 != 0xE0 or data[0] & 0x0F > 1:
+        raise ValueError("not a meshopt triangle index stream")
+    fec_max = FEC_MAX if data[0] & 0x0F else 15
+
+    edges = [(0, 0)] * 16
+    vertices = [0] * 16
+    edge_offset = vertex_offset = 0
+    next_index = last = 0
+    table = data[-16:]
+    pos = 1 + count // 3
+    out = []
+
+    def read_index():
+        nonlocal pos, last
+        value = shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            value |= (byte & 127) << shift
+            shift += 7
+            if byte < 128 or shift >= 35:
+                break
+        delta = ((value >> 1) ^ -(value & 1)) & 0xFFFFFFFF
+        last = (last + delta) & 0xFFFFFFFF
+        return last
+
+    def push_vertex(v, cond=True):
+        nonlocal vertex_offset
+        vertices[vertex_offset] = v
+        vertex_offset = (vertex_offset + int(cond)) & 15
+
+    def push_edges(*pairs):
+        nonlocal edge_offset
+        for pair in pairs:
+            edges[edge_offset] = pair
+            edge_offset = (edge_offset + 1) & 15
+
+    for code in data[1:1 + count // 3]:
+        if code < 0xF0:
+            a, b = edges[(edge_offset - 1 - (code >> 4)) & 15]
+            fec = code & 15
+            if fec < fec_max:
+                c = next_index if fec == 0 else vertices[(vertex_offset - 1 - fec) & 15]
+                next_index += fec == 0
+                push_vertex(c, fec == 0)
+            else:
+                c = last = (last + (fec - (fec ^ 3))) & 0xFFFFFFFF if fec != 15 else read_index()
+                push_vertex(c)
+            push_edges((c, b), (a, c))
+        elif code < 0xFE:
+            codeaux = table[code & 15]
+            feb, fec = codeaux >> 4, codeaux & 15
+            a = next_index
+            next_index += 1
+            b = next_index if feb == 0 else vertices[(vertex_offset - feb) & 15]
+            next_index += feb == 0
+            c = next_index if fec == 0 else vertices[(vertex_offset - fec) & 15]
+            next_index += fec == 0
+            push_vertex(a)
+            push_vertex(b, feb == 0)
+            push_vertex(c, fec == 0)
+            push_edges((b, a), (c, b), (a, c))
+        else:
+            codeaux = data[pos]
+            pos += 1
+            fea = 0 if code == 0xFE else 15
+            feb, fec = codeaux >> 4, codeaux & 15
+            if codeaux == 0:
+                next_index = 0
+            a = b = c = 0
+            if fea == 0:
+                a, next_index = next_index, next_index + 1
+            if feb == 0:
+                b, next_index = next_index, next_index + 1
+            elif feb != 15:
+                b = vertices[(vertex_offset - feb) & 15]
+            if fec == 0:
+                c, next_index = next_index, next_index + 1
+            elif fec != 15:
+                c = vertices[(vertex_offset - fec) & 15]
+            if fea == 15:
+                a = read_index()
+            if feb == 15:
+                b = read_index()
+            if fec == 15:
+                c = read_index()
+            push_vertex(a)
+            push_vertex(b, feb in (0, 15))
+            push_vertex(c, fec in (0, 15))
+            push_edges((b, a), (c, b), (a, c))
+        out += (a, b, c)
+
+    if pos != len(data) - 16:
+        raise ValueError("meshopt index stream has trailing or missing data")
+    return np.array(out, dtype=np.uint32)
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Measure Usable Space in Enclosures
+Voxelizes an enclosure's interior into a boolean occupancy grid, then
+subtracts the solid parts of the model that reach inside the walls (frame
+rails, hinges, vents), the substrate layer and the decor packed by
+place_decor. Reports the usable floor area, the climbable volume (free air
+within reach of a surface an animal can grip) and the free air volume for
+each configuration, next to the nominal outer dimensions it is sold by.
+
+Model solids come from Open3D's occupancy query when it is installed and
+from a NumPy winding-number ray cast otherwise; both treat overlapping
+closed parts as solid. The grid for each model is
+built once; every configuration after that is a handful of boolean array
+operations.
+"""
+
+import argparse
+import json
+import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from build_model_registry import INCH
+from place_decor import REGISTRY_PATH, intersect_rays, load_items, plan_decor, resolve_enclosure
+from render_thumbnails import load_triangles
+from thermal_sim import WALL_MATERIALS, voxelize
+
+try:
+    import open3d as o3d
+except ImportError:
+    o3d = None
+
+CELL = 0.5 * INCH
+# Bedding depth laid by each substrate item; anything else uses DEFAULT_SUBSTRATE
+SUBSTRATE_DEPTH = {"sub-001": 2.0 * INCH, "sub-002": 0.25 * INCH, "sub-003": 0.5 * INCH}
+DEFAULT_SUBSTRATE = 0.0
+# Surfaces an animal can grip: wall materials and items.json categories
+CLIMBABLE_WALLS = ("screen", "frame")
+CLIMBABLE_CATEGORIES = ("decor", "hides", "plants")
+# Free air this close to a grippable surface counts as climbing volume
+CLIMB_REACH = 2.0 * INCH
+RAY_CHUNK = 128
+
+
+def mesh_parts(triangles):
+    """Part label per triangle: triangles sharing a vertex position belong to the same part"""
+    _, vertex = np.unique(np.round(triangles.reshape(-1, 3), 9), axis=0, return_inverse=True)
+    vertex = vertex.reshape(-1, 3)
+    labels = np.arange(vertex.max() + 1 if len(vertex) else 0)
+    while True:
+        lowest = labels[vertex].min(axis=1)
+        updated = labels.copy()
+        np.minimum.at(updated, vertex, lowest[:, None])
+        updated = updated[updated]  # follow chains so long parts settle in few passes
+        if np.array_equal(updated, labels):
+            return np.unique(labels[vertex[:, 0]], return_inverse=True)[1]
+        labels = updated
+
+
+def model_solid(triangles, grid, backend=None):
+    """Cells of ``grid`` whose centers lie inside the model's closed meshes
+
+    ``backend`` is ``"open3d"`` or ``"numpy"``; by default Open3D is used
+    when installed. Open3D's occupancy query counts ray crossings by parity,
+    which would hollow out cells where closed parts overlap, so each part is
+    queried on its own and the results are united. The NumPy path runs one
+    ray per column up from below the model and sums the signed crossings
+    (entering faces point against the ray) into a winding number at every
+    cell center, which keeps overlaps solid directly.
+    """
+    axes = [(np.arange(n) + 0.5) * grid["size"][a] + grid["low"][a] for a, n in enumerate(grid["shape"])]
+    if backend is None:
+        backend = "numpy" if o3d is None else "open3d"
+    if backend == "open3d":
+        centers = o3d.core.Tensor(np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, 3).astype(np.float32))
+        parts = mesh_parts(triangles)
+        solid = np.zeros(grid["shape"], dtype=bool)
+        for part in range(parts.max() + 1 if len(parts) else 0):
+            vertices = triangles[parts == part].reshape(-1, 3).astype(np.float32)
+            scene = o3d.t.geometry.RaycastingScene()
+            scene.add_triangles(o3d.core.Tensor(vertices),
+                                o3d.core.Tensor(np.arange(len(vertices), dtype=np.uint32).reshape(-1, 3)))
+            solid |= scene.compute_occupancy(centers).numpy().reshape(grid["shape"]) > 0.5
+        return solid
+
+    normals_z = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])[:, 2]
+    crossing = -np.sign(normals_z)
+    columns = np.stack(np.meshgrid(axes[0], axes[1], indexing="ij"), axis=-1).reshape(-1, 2)
+    bottom = triangles[..., 2].min() - 1.0
+    origins = np.column_stack([columns, np.full(len(columns), bottom)])
+    up = np.tile([0.0, 0.0, 1.0], (len(columns), 1))
+    solid = np.zeros((len(columns), grid["shape"][2]), dtype=bool)
+    for start in range(0, len(columns), RAY_CHUNK):
+        t = intersect_rays(origins[start:start + RAY_CHUNK], up[start:start + RAY_CHUNK], triangles)
+        order = np.argsort(t, axis=1)
+        t = np.take_along_axis(t, order, axis=1)
+        signs = np.where(np.isfinite(t), crossing[order], 0.0)
+        # A ray through a shared edge meets both triangles at once; count it once
+        with np.errstate(invalid="ignore"):
+            repeated = (np.diff(t, axis=1) < 1e-7) & (signs[:, 1:] == signs[:, :-1])
+        signs[:, 1:][repeated] = 0.0
+        below = t[:, None, :] < (axes[2] - bottom)[None, :, None]
+        solid[start:start + RAY_CHUNK] = np.einsum("rzt,rt->rz", below, signs) > 0.5
+    return solid.reshape(grid["shape"])
+
+
+@lru_cache(maxsize=None)
+def enclosure_grid(enclosure_id, cell=CELL, registry_path=REGISTRY_PATH):
+    """Interior grid of an enclosure with its model solids and grippable wall faces
+
+    Enclosures without a generated model get a nominal box with smooth walls.
+    Returns the ``voxelize`` grid plus ``solid`` (bool cells), ``grip`` (the
+    grid padded by one cell per side, True where a padding cell is a
+    climbable wall) and ``nominal`` outer dimensions in inches.
+    """
+    model, size = resolve_enclosure(enclosure_id, registry_path)
+    if model is None:
+        high = np.array(size, dtype=np.float64) * INCH / 2
+        shape = np.maximum(np.round(2 * high / cell).astype(int), 2)
+        grid = {"low": -high, "high": high, "shape": tuple(int(n) for n in shape), "size": 2 * high / shape, "faces": {}}
+        solid = np.zeros(grid["shape"], dtype=bool)
+    else:
+        registry = json.loads(Path(registry_path).read_text(encoding="utf-8"))["models"]
+        family = next((e.get("type") for e in registry.values() if e["file"] == model.name), "basic")
+        grid = voxelize(model, family, cell)
+        solid = model_solid(load_triangles(model)[0], grid)
+
+    grip = np.zeros(tuple(n + 2 for n in grid["shape"]), dtype=bool)
+    climbable = np.isin(np.array(WALL_MATERIALS), CLIMBABLE_WALLS)
+    for (axis, side), labels in grid["faces"].items():
+        index = [slice(1, -1)] * 3
+        index[axis] = -1 if side else 0
+        grip[tuple(index)] = climbable[labels]
+    return {**grid, "solid": solid, "grip": grip, "nominal": tuple(size)}
+
+
+def box_cells(grid, low, high):
+    """Boolean mask of the cells whose centers fall inside the box ``low``..``high``"""
+    start = np.ceil((np.asarray(low) - grid["low"]) / grid["size"] - 0.5).astype(int)
+    stop = np.ceil((np.asarray(high) - grid["low"]) / grid["size"] - 0.5).astype(int)
+    start, stop = np.clip(start, 0, grid["shape"]), np.clip(stop, 0, grid["shape"])
+    mask = np.zeros(grid["shape"], dtype=bool)
+    mask[tuple(slice(a, b) for a, b in zip(start, stop))] = True
+    return mask
+
+
+def dilate(mask, steps):
+    """Grow a boolean grid by ``steps`` cells along every axis (a cube neighborhood)"""
+    for axis in range(mask.ndim):
+        grown = mask.copy()
+        for step in range(1, steps + 1):
+            ahead = [slice(None)] * mask.ndim
+            behind = [slice(None)] * mask.ndim
+            ahead[axis], behind[axis] = slice(step, None), slice(None, -step)
+            grown[tuple(ahead)] |= mask[tuple(behind)]
+            grown[tuple(behind)] |= mask[tuple(ahead)]
+        mask = grown
+    return mask
+
+
+def usable_space(enclosure_id, item_ids=(), substrate=None, items=None, cell=CELL, registry_path=REGISTRY_PATH):
+    """Usable floor, climbing and air space of one enclosure configuration
+
+    ``substrate`` is a depth in meters; by default it comes from the first
+    substrate item in ``item_ids``. Decor is packed by ``plan_decor`` and
+    rests on top of the substrate. Areas are in square inches and volumes
+    in cubic inches.
+    """
+    items = items or load_items()
+    grid = enclosure_grid(enclosure_id, cell, registry_path)
+    if substrate is None:
+        substrate = next((SUBSTRATE_DEPTH[i] for i in item_ids if i in SUBSTRATE_DEPTH), DEFAULT_SUBSTRATE)
+    bed = min(int(round(substrate / grid["size"][2])), grid["shape"][2])
+
+    solid = grid["solid"].copy()
+    solid[..., :bed] = True
+    grip = grid["grip"].copy()
+    plan = plan_decor(enclosure_id, list(item_ids), items, registry_path)
+    for placement in plan["placements"]:
+        if placement["mount"] != "floor":
+            continue
+        # Back from the builder frame (x, y up, z toward the doors) to the model frame
+        center = np.array([placement["position"]["x"], placement["position"]["z"], placement["position"]["y"] + substrate])
+        extent = np.array([placement["size"]["length"], placement["size"]["width"], placement["size"]["height"]])
+        piece = box_cells(grid, center - extent / 2, center + extent / 2)
+        solid |= piece
+        if items[placement["id"]]["category"] in CLIMBABLE_CATEGORIES:
+            grip[1:-1, 1:-1, 1:-1] |= piece
+    grip[1:-1, 1:-1, 1:-1] |= grid["solid"]
+
+    free = ~solid
+    reach = dilate(grip, max(1, int(round(CLIMB_REACH / grid["size"].min()))))[1:-1, 1:-1, 1:-1]
+    floor = free[..., bed] if bed < grid["shape"][2] else np.zeros(grid["shape"][:2], dtype=bool)
+    climb = free & reach
+    climb[..., :bed + 1] = False
+    cell_area = grid["size"][0] * grid["size"][1] / INCH ** 2
+    cell_volume = cell_area * grid["size"][2] / INCH
+    length, width, height = grid["nominal"]
+    return {
+        "enclosure": enclosure_id,
+        "items": list(item_ids),
+        "substrate_in": round(substrate / INCH, 3),
+        "nominal_floor_in2": round(length * width, 1),
+        "nominal_volume_in3": round(length * width * height, 1),
+        "floor_in2": round(float(floor.sum() * cell_area), 1),
+        "climb_in3": round(float(climb.sum() * cell_volume), 1),
+        "air_in3": round(float(free.sum() * cell_volume), 1),
+        "rejected": [r["id"] for r in plan["rejected"]],
+    }
+
+
+def evaluate(configurations, cell=CELL, registry_path=REGISTRY_PATH):
+    """``usable_space`` for every ``{"enclosure", "items", "substrate"}`` configuration"""
+    items = load_items()
+    return [usable_space(c["enclosure"], c.get("items", ()), c.get("substrate"), items, cell, registry_path)
+            for c in configurations]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report usable floor, climbing and air space per enclosure")
+    parser.add_argument("enclosures", nargs="*", help="registry model or enclosure-data.js ids (default: every model)")
+    parser.add_argument("--items", nargs="*", default=[], help="items.json ids placed in every enclosure")
+    parser.add_argument("--substrate", type=float, help="substrate depth in inches (default: from the items)")
+    parser.add_argument("--cell", type=float, default=CELL / INCH, help="voxel size in inches")
+    parser.add_argument("--out", type=Path, help="write the results JSON here")
+    args = parser.parse_args()
+
+    enclosures = args.enclosures or list(json.loads(REGISTRY_PATH.read_text(encoding="utf-8"))["models"])
+    substrate = None if args.substrate is None else args.substrate * INCH
+    configurations = [{"enclosure": e, "items": args.items, "substrate": substrate} for e in enclosures]
+    print("📦 Measuring usable space...")
+    start = time.perf_counter()
+    try:
+        results = evaluate(configurations, args.cell * INCH)
+    except KeyError as e:
+        print(f"❌ {e}")
+        return 1
+    elapsed = time.perf_counter() - start
+    for result in results:
+        print(f"   • {result['enclosure']}: floor {result['floor_in2']:.0f} of {result['nominal_floor_in2']:.0f} in², "
+              f"climbing {result['climb_in3']:.0f} in³, air {result['air_in3']:.0f} of {result['nominal_volume_in3']:.0f} in³")
+        if result["rejected"]:
+            print(f"⚠️  Did not fit: {', '.join(result['rejected'])}")
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"💾 Wrote {args.out}")
+    print(f"✅ {len(results)} configurations in {elapsed:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Place Decor in an Enclosure
+Measures an enclosure's interior from its model geometry, then packs the
+selected data/items.json pieces onto the floor (decor, hides, plants) or
+onto the screen top (lights and heat lamps). Collisions are tested against
+a bounding-volume hierarchy of the pieces placed so far. The result either
+places every piece or names the ones that do not fit, and positions are
+emitted in the enclosure builder's frame (meters, Y-up, +Z toward the
+doors) so js/enclosure-builder.js can render them directly.
+"""
+
+import argparse
+import json
+import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from build_model_registry import INCH
+from render_thumbnails import load_triangles
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+MODELS_DIR = REPO_ROOT / "models"
+REGISTRY_PATH = MODELS_DIR / "model_registry.json"
+ITEMS_PATH = REPO_ROOT / "data" / "items.json"
+
+sys.path.insert(0, str(REPO_ROOT / "python"))
+from enclosure_data import load_enclosure_data  # noqa: E402
+
+# Where each items.json category goes; anything else stands on the floor
+CATEGORY_MOUNTS = {"lighting": "top", "heating": "top", "substrate": "layer"}
+ITEM_MOUNTS = {"heat-002": "under"}  # under-tank heat mat
+# Registry family for each enclosure-data.js enclosureType
+ENCLOSURE_FAMILIES = {"glass": "reptizoo", "glass-mesh": "reptizoo", "pvc": "pvc"}
+
+# Rays per axis direction when measuring the interior (a RAY_GRID x RAY_GRID bundle)
+RAY_GRID = 5
+RAY_SPREAD = 0.8
+RAY_CHUNK = 256
+EPSILON = 1e-9
+
+
+def intersect_rays(origins, directions, triangles):
+    """``(R, T)`` distances along every ray to every triangle, ``inf`` where they miss (Möller-Trumbore)"""
+    v0 = triangles[None, :, 0]
+    edge1, edge2 = triangles[None, :, 1] - v0, triangles[None, :, 2] - v0
+    d = directions[:, None]
+    p = np.cross(d, edge2)
+    det = np.einsum("rtk,rtk->rt", edge1, p)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        inverse = 1.0 / det
+        s = origins[:, None] - v0
+        u = np.einsum("rtk,rtk->rt", s, p) * inverse
+        q = np.cross(s, edge1)
+        v = np.einsum("rtk,rtk->rt", d, q) * inverse
+        t = np.einsum("rtk,rtk->rt", edge2, q) * inverse
+        hit = (np.abs(det) > EPSILON) & (u >= 0) & (v >= 0) & (u + v <= 1) & (t > EPSILON)
+    return np.where(hit, t, np.inf)
+
+
+def ray_hits(origins, directions, triangles, chunk=RAY_CHUNK):
+    """Distance to and index of the nearest triangle along each ray (``inf`` and -1 on a miss)"""
+    distances = np.full(len(origins), np.inf)
+    indices = np.full(len(origins), -1, dtype=np.int64)
+    if not len(triangles):
+        return distances, indices
+    for start in range(0, len(origins), chunk):
+        t = intersect_rays(origins[start:start + chunk], directions[start:start + chunk], triangles)
+        nearest = t.argmin(axis=1)
+        closest = t[np.arange(len(t)), nearest]
+        distances[start:start + chunk] = closest
+        indices[start:start + chunk] = np.where(np.isfinite(closest), nearest, -1)
+    return distances, indices
+
+
+def ray_distances(origins, directions, triangles):
+    """Distance along each ray to the nearest triangle, ``inf`` on a miss"""
+    return ray_hits(origins, directions, triangles)[0]
+
+
+@lru_cache(maxsize=None)
+def model_interior(path):
+    """Interior box ``(low, high)`` of a model, in model meters
+
+    Bundles of parallel rays from the model's center go out along each axis;
+    the nearest wall any of them meets bounds the interior on that side. A
+    side with no wall (an open end) is inset by the opposite wall's thickness.
+    """
+    triangles, _ = load_triangles(path)
+    low, high = triangles.reshape(-1, 3).min(axis=0), triangles.reshape(-1, 3).max(axis=0)
+    center, half = (low + high) / 2, (high - low) / 2
+    offsets = np.linspace(-RAY_SPREAD, RAY_SPREAD, RAY_GRID)
+    interior = np.array([low, high], dtype=np.float64)
+    for axis in range(3):
+        others = [a for a in range(3) if a != axis]
+        grid = np.stack(np.meshgrid(offsets, offsets), axis=-1).reshape(-1, 2)
+        origins = np.tile(center, (len(grid), 1))
+        origins[:, others] += grid * half[others]
+        distances = []
+        for sign in (-1.0, 1.0):
+            directions = np.zeros_like(origins)
+            directions[:, axis] = sign
+            distances.append(ray_distances(origins, directions, triangles).min())
+        walls = [half[axis] - d for d in distances if np.isfinite(d)]
+        for side, distance in enumerate(distances):
+            if not np.isfinite(distance):
+                distance = half[axis] - (walls[0] if walls else 0.0)
+            interior[side, axis] = center[axis] + (2 * side - 1) * distance
+    return interior[0], interior[1]
+
+
+def load_items(path=ITEMS_PATH):
+    """Every items.json entry by id, with its ``category``"""
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    return {item["id"]: {**item, "category": category} for category, items in data.items() for item in items}
+
+
+def resolve_enclosure(enclosure_id, registry_path=REGISTRY_PATH):
+    """``(model_path or None, (length, width, height) in inches)`` for a registry or enclosure-data.js id"""
+    registry = json.loads(Path(registry_path).read_text(encoding="utf-8"))["models"]
+    if enclosure_id in registry:
+        entry = registry[enclosure_id]
+        return Path(registry_path).parent / entry["file"], tuple(entry["dimensions"])
+    enclosures, _ = load_enclosure_data()
+    if enclosure_id not in enclosures:
+        raise KeyError(f"unknown enclosure: {enclosure_id}")
+    enclosure = enclosures[enclosure_id]
+    size = (enclosure["model"]["length"], enclosure["model"]["width"], enclosure["model"]["height"])
+    family = ENCLOSURE_FAMILIES.get(enclosure.get("enclosureType"), "basic")
+    for entry in registry.values():
+        if entry.get("type") == family and tuple(entry.get("dimensions", ())) == size:
+            return Path(registry_path).parent / entry["file"], size
+    return None, size
+
+
+class AABBTree:
+    """Dynamic bounding-volume hierarchy of axis-aligned boxes
+
+    Leaves are inserted next to the sibling whose merged box grows least,
+    and ancestors are refit on the way back up. ``overlaps`` walks only the
+    branches whose boxes intersect the query. Boxes are plain tuples: for
+    the few dozen pieces in an enclosure that beats NumPy's per-call cost.
+    """
+
+    def __init__(self):
+        self.boxes, self.children, self.parent, self.payload = [], [], [], []
+        self.root = None
+
+    def _node(self, box, payload=None, children=None):
+        self.boxes.append(box)
+        self.children.append(children)
+        self.parent.append(None)
+        self.payload.append(payload)
+        return len(self.boxes) - 1
+
+    def __len__(self):
+        return sum(children is None for children in self.children)
+
+    def insert(self, low, high, payload):
+        leaf = self._node(tuple(map(float, low)) + tuple(map(float, high)), payload)
+        if self.root is None:
+            self.root = leaf
+            return leaf
+        node = self.root
+        while self.children[node] is not None:
+            node = min(self.children[node],
+                       key=lambda child: _area(_union(self.boxes[child], self.boxes[leaf])) - _area(self.boxes[child]))
+
+        parent = self.parent[node]
+        branch = self._node(_union(self.boxes[node], self.boxes[leaf]), children=[node, leaf])
+        self.parent[branch] = parent
+        self.parent[node] = self.parent[leaf] = branch
+        if parent is None:
+            self.root = branch
+        else:
+            self.children[parent][self.children[parent].index(node)] = branch
+        while parent is not None:
+            first, second = self.children[parent]
+            self.boxes[parent] = _union(self.boxes[first], self.boxes[second])
+            parent = self.parent[parent]
+        return leaf
+
+    def overlaps(self, low, high):
+        """Payloads of leaves whose boxes overlap ``[low, high]`` with positive volume"""
+        x0, y0, z0 = (float(v) + EPSILON for v in low)
+        x1, y1, z1 = (float(v) - EPSILON for v in high)
+        found, stack = [], [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            bx0, by0, bz0, bx1, by1, bz1 = self.boxes[node]
+            if bx0 >= x1 or by0 >= y1 or bz0 >= z1 or bx1 <= x0 or by1 <= y0 or bz1 <= z0:
+                continue
+            if self.children[node] is None:
+                found.append(self.payload[node])
+            else:
+                stack.extend(self.children[node])
+        return found
+
+
+def _union(a, b):
+    return (min(a[0], b[0]), min(a[1], b[1]), min(a[2], b[2]), max(a[3], b[3]), max(a[4], b[4]), max(a[5], b[5]))
+
+
+def _area(box):
+    dx, dy, dz = box[3] - box[0], box[4] - box[1], box[5] - box[2]
+    return dx * dy + dy * dz + dz * dx
+
+
+def pack_surface(items, low, high, gap=0.0):
+    """Place boxes on the rectangle ``low[:2]..high[:2]``, standing at ``low[2]`` and below ``high[2]``
+
+    Largest footprints go first; each takes the candidate corner nearest the
+    back-left (as given or turned 90°). Returns ``(placed, rejected)`` where
+    placed maps item index -> ``(box_low, box_high, turned)`` and rejected
+    maps item index -> reason.
+    """
+    tree = AABBTree()
+    (x_min, y_min, floor), (x_max, y_max, ceiling) = map(float, low), map(float, high)
+    corners = [(x_min, y_min)]
+    placed, rejected = {}, {}
+    order = sorted(range(len(items)), key=lambda index: -items[index]["size"][0] * items[index]["size"][1])
+    for index in order:
+        length, width, height = items[index]["size"]
+        if floor + height > ceiling + EPSILON:
+            rejected[index] = "taller than the interior"
+            continue
+        best = None
+        for turned, (dx, dy) in ((False, (length, width)), (True, (width, length))):
+            for x, y in corners:
+                if x + dx > x_max + EPSILON or y + dy > y_max + EPSILON:
+                    continue
+                if tree.overlaps((x - gap / 2, y - gap / 2, floor), (x + dx + gap / 2, y + dy + gap / 2, floor + height)):
+                    continue
+                if best is None or (y, x) < (best[1], best[0]):
+                    best = (x, y, dx, dy, turned)
+                break  # corners are sorted, so the first fit is this orientation's best
+        if best is None:
+            rejected[index] = "no room left"
+            continue
+        x, y, dx, dy, turned = best
+        tree.insert((x, y, floor), (x + dx, y + dy, floor + height), index)
+        placed[index] = (np.array([x, y, floor]), np.array([x + dx, y + dy, floor + height]), turned)
+        corners.extend([(x + dx + gap, y), (x, y + dy + gap)])
+        corners.sort(key=lambda corner: (corner[1], corner[0]))
+    return placed, rejected
+
+
+def plan_decor(enclosure_id, item_ids, items=None, registry_path=REGISTRY_PATH, gap=0.0):
+    """Pack ``item_ids`` into an enclosure; returns a JSON-ready plan for the builder"""
+    items = items or load_items()
+    model, size = resolve_enclosure(enclosure_id, registry_path)
+    if model is not None:
+        low, high = model_interior(str(model))
+    else:  # no generated model for these dimensions: use the nominal box
+        high = np.array(size, dtype=np.float64) * INCH / 2
+        low = -high
+    outer = np.array(size, dtype=np.float64) * INCH / 2
+
+    surfaces = {
+        "floor": (low, high),
+        "top": (np.array([low[0], low[1], outer[2]]), np.array([high[0], high[1], np.inf])),
+        "under": (np.array([low[0], low[1], -outer[2]]), np.array([high[0], high[1], np.inf])),
+    }
+    groups = {mount: [] for mount in surfaces}
+    placements, layers, rejected = [], [], []
+    for selection, item_id in enumerate(item_ids):
+        if item_id not in items:
+            rejected.append((selection, item_id, "not in items.json"))
+            continue
+        item = items[item_id]
+        mount = ITEM_MOUNTS.get(item_id, CATEGORY_MOUNTS.get(item["category"], "floor"))
+        if mount == "layer":
+            layers.append(item_id)
+            continue
+        dimensions = item["dimensions"]
+        size_m = [dimensions["length"] * INCH, dimensions["width"] * INCH, dimensions["height"] * INCH]
+        groups[mount].append({"id": item_id, "size": size_m, "selection": selection})
+
+    for mount, group in groups.items():
+        surface_low, surface_high = surfaces[mount]
+        placed, failed = pack_surface(group, surface_low, surface_high, gap)
+        rejected.extend((group[index]["selection"], group[index]["id"], reason) for index, reason in failed.items())
+        for index, (box_low, box_high, turned) in placed.items():
+            center = (box_low + box_high) / 2
+            extent = box_high - box_low
+            if mount == "under":  # mats hang below the floor of the enclosure
+                center[2] -= extent[2]
+            placements.append((group[index]["selection"], {
+                "id": group[index]["id"],
+                "mount": mount,
+                # Builder frame: x along the length, y up, z toward the doors
+                "position": {"x": round(center[0], 5), "y": round(center[2], 5), "z": round(center[1], 5)},
+                "rotationY": round(np.pi / 2, 6) if turned else 0.0,
+                "size": {"length": round(extent[0], 5), "height": round(extent[2], 5), "width": round(extent[1], 5)},
+            }))
+
+    return {
+        "enclosure": enclosure_id,
+        "model": model.name if model is not None else None,
+        "interior": {"low": np.round(low, 5).tolist(), "high": np.round(high, 5).tolist()},
+        "fits": not rejected,
+        "placements": [placement for _, placement in sorted(placements, key=lambda pair: pair[0])],
+        "layers": layers,
+        "rejected": [{"id": item_id, "reason": reason} for _, item_id, reason in sorted(rejected)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack selected decor into an enclosure")
+    parser.add_argument("enclosure", help="registry model id or enclosure-data.js id")
+    parser.add_argument("items", nargs="+", help="items.json ids")
+    parser.add_argument("--gap", type=float, default=0.0, help="clearance between pieces in inches")
+    parser.add_argument("--out", type=Path, help="write the plan JSON here")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    plan = plan_decor(args.enclosure, args.items, gap=args.gap * INCH)
+    elapsed = (time.perf_counter() - start) * 1000
+    for placement in plan["placements"]:
+        position = placement["position"]
+        print(f"   • {placement['id']} ({placement['mount']}): x {position['x']:+.3f} y {position['y']:+.3f} "
+              f"z {position['z']:+.3f}{' turned' if placement['rotationY'] else ''}")
+    for rejection in plan["rejected"]:
+        print(f"❌ {rejection['id']}: {rejection['reason']}")
+    if args.out:
+        args.out.write_text(json.dumps(plan, indent=2) + "\n", encoding="utf-8")
+        print(f"💾 Wrote {args.out}")
+    print(f"{'✅ Everything fits' if plan['fits'] else '⚠️  Selection does not fit'} ({elapsed:.1f} ms)")
+    return 0 if plan["fits"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Catalog Thumbnail Renderer
+Rasterizes every models/*.glb on the CPU with a vectorized NumPy z-buffer:
+flat-shaded opaque parts, depth-sorted alpha blending for glass and screen,
+2x supersampling, and PNG/WebP output written from a process pool.
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from gltf_utils import MODE_TRIANGLES, accessor_array, read_glb, scene_meshes, transform_points
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+MODELS_DIR = REPO_ROOT / "models"
+THUMBNAILS_DIR = REPO_ROOT / "images" / "thumbnails"
+
+DEFAULT_SIZE = (400, 300)
+SUPERSAMPLE = 2
+MARGIN = 0.08
+
+# Three-quarter view from the front right, slightly above; models are Z-up with the doors facing +Y
+CAMERA_AZIMUTH = 35.0
+CAMERA_ELEVATION = 22.0
+LIGHT_DIRECTION = (-0.4, 0.6, 0.7)
+AMBIENT = 0.45
+DIFFUSE = 0.55
+
+# Faces at or above this alpha go through the z-buffer; the rest are blended
+OPAQUE_ALPHA = 0.995
+# Rasterize at most this many candidate pixels at a time to bound memory
+FRAGMENT_BATCH = 4_000_000
+# Depth resolution used when ordering transparent fragments
+DEPTH_STEPS = 1 << 24
+
+
+def load_triangles(path):
+    """World-space triangles ``(T, 3, 3)`` and RGBA face colors ``(T, 4)`` of a GLB"""
+    gltf, binary = read_glb(path)
+    triangles, colors = [], []
+    for world, mesh_index in scene_meshes(gltf):
+        for primitive in gltf["meshes"][mesh_index]["primitives"]:
+            if primitive.get("mode", MODE_TRIANGLES) != MODE_TRIANGLES:
+                continue
+            positions = transform_points(world, accessor_array(gltf, binary, primitive["attributes"]["POSITION"]))
+            if "indices" in primitive:
+                faces = accessor_array(gltf, binary, primitive["indices"]).reshape(-1, 3).astype(np.int64)
+            else:
+                faces = np.arange(len(positions)).reshape(-1, 3)
+
+            material = gltf["materials"][primitive["material"]] if "material" in primitive else {}
+            base = np.array(material.get("pbrMetallicRoughness", {}).get("baseColorFactor", [1, 1, 1, 1]))
+            if "COLOR_0" in primitive["attributes"]:
+                vertex_colors = accessor_array(gltf, binary, primitive["attributes"]["COLOR_0"]).astype(np.float64)
+                if vertex_colors.shape[1] == 3:
+                    vertex_colors = np.hstack([vertex_colors, np.ones((len(vertex_colors), 1))])
+                face_colors = vertex_colors[faces].mean(axis=1) * base
+            else:
+                face_colors = np.tile(base, (len(faces), 1))
+            # An explicit OPAQUE material ignores alpha; exporters without materials keep it in COLOR_0
+            if material and material.get("alphaMode", "OPAQUE") == "OPAQUE":
+                face_colors[:, 3] = 1.0
+
+            triangles.append(positions[faces])
+            colors.append(face_colors)
+    if not triangles:
+        return np.zeros((0, 3, 3)), np.zeros((0, 4))
+    return np.concatenate(triangles).astype(np.float64), np.concatenate(colors)
+
+
+def camera_basis(azimuth=CAMERA_AZIMUTH, elevation=CAMERA_ELEVATION):
+    """Right, up and forward (into the screen) unit vectors for the thumbnail view"""
+    az, el = np.radians(azimuth), np.radians(elevation)
+    toward_camera = np.array([np.sin(az) * np.cos(el), np.cos(az) * np.cos(el), np.sin(el)])
+    forward = -toward_camera
+    right = np.cross(forward, [0.0, 0.0, 1.0])
+    right /= np.linalg.norm(right)
+    up = np.cross(right, forward)
+    return right, up, forward
+
+
+def shade(triangles, colors, light=LIGHT_DIRECTION):
+    """Flat Lambert shading, lit from both sides so open panels are never black"""
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+    light = np.asarray(light, dtype=np.float64) / np.linalg.norm(light)
+    intensity = AMBIENT + DIFFUSE * np.abs(normals @ light)
+    shaded = colors.copy()
+    shaded[:, :3] = np.clip(colors[:, :3] * intensity[:, None], 0.0, 1.0)
+    return shaded
+
+
+def project(triangles, width, height, basis=None, margin=MARGIN):
+    """Orthographic projection to pixel coordinates; returns ``(T, 3, 3)`` of x, y, depth"""
+    right, up, forward = basis or camera_basis()
+    points = triangles.reshape(-1, 3)
+    screen = np.stack([points @ right, points @ up, points @ forward], axis=1)
+    low, high = screen[:, :2].min(axis=0), screen[:, :2].max(axis=0)
+    extent = np.maximum(high - low, 1e-9)
+    scale = min(width * (1 - 2 * margin) / extent[0], height * (1 - 2 * margin) / extent[1])
+    center = (low + high) / 2
+    screen[:, 0] = (screen[:, 0] - center[0]) * scale + width / 2
+    screen[:, 1] = height / 2 - (screen[:, 1] - center[1]) * scale
+    return screen.reshape(-1, 3, 3)
+
+
+def _fragments(screen, width, height):
+    """Yield ``(pixel, depth, triangle)`` arrays for every covered pixel center, in batches
+
+    Each (triangle, row) pair is turned into an exact span by intersecting the
+    row with the three edge half-planes, so no pixels outside a triangle are
+    ever generated.
+    """
+    xs, ys, zs = screen[:, :, 0], screen[:, :, 1], screen[:, :, 2]
+    y0 = np.clip(np.ceil(ys.min(axis=1) - 0.5), 0, height).astype(np.int64)
+    y1 = np.clip(np.floor(ys.max(axis=1) - 0.5), -1, height - 1).astype(np.int64)
+    area = (xs[:, 1] - xs[:, 0]) * (ys[:, 2] - ys[:, 0]) - (ys[:, 1] - ys[:, 0]) * (xs[:, 2] - xs[:, 0])
+    rows = np.where(area != 0, np.maximum(y1 - y0 + 1, 0), 0)
+    sign = np.where(area < 0, -1.0, 1.0)
+
+    # Depth plane z = zx * x + zy * y + zc
+    safe_area = np.where(area != 0, area, 1.0)
+    zx = ((zs[:, 1] - zs[:, 0]) * (ys[:, 2] - ys[:, 0]) - (ys[:, 1] - ys[:, 0]) * (zs[:, 2] - zs[:, 0])) / safe_area
+    zy = ((xs[:, 1] - xs[:, 0]) * (zs[:, 2] - zs[:, 0]) - (zs[:, 1] - zs[:, 0]) * (xs[:, 2] - xs[:, 0])) / safe_area
+    zc = zs[:, 0] - zx * xs[:, 0] - zy * ys[:, 0]
+
+    start = 0
+    while start < len(screen):
+        # Bounding-box area is an upper bound on the fragments a triangle produces
+        boxes = rows[start:] * (np.ptp(xs[start:], axis=1) + 2)
+        stop = start + max(1, int(np.searchsorted(np.cumsum(boxes), FRAGMENT_BATCH)))
+        ids = np.arange(start, stop)
+        batch_rows = rows[start:stop]
+        start = stop
+        if batch_rows.sum() == 0:
+            continue
+
+        tri = np.repeat(ids, batch_rows)
+        row = y0[tri] + np.arange(batch_rows.sum()) - np.repeat(np.cumsum(batch_rows) - batch_rows, batch_rows)
+        cy = row + 0.5
+        low = np.full(len(tri), -np.inf)
+        high = np.full(len(tri), np.inf)
+        empty = np.zeros(len(tri), dtype=bool)
+        for a, b in ((1, 2), (2, 0), (0, 1)):
+            # sign * edge(x) = slope * x + intercept >= 0 inside the triangle
+            xa, ya, xb, yb = xs[tri, a], ys[tri, a], xs[tri, b], ys[tri, b]
+            slope = -(yb - ya) * sign[tri]
+            intercept = ((xb - xa) * (cy - ya) + (yb - ya) * xa) * sign[tri]
+            flat = slope == 0
+            bound = np.divide(-intercept, slope, out=np.zeros_like(slope), where=~flat)
+            low = np.where(slope > 0, np.maximum(low, bound), low)
+            high = np.where(slope < 0, np.minimum(high, bound), high)
+            empty |= flat & (intercept < 0)
+
+        first = np.clip(np.ceil(low - 0.5), 0, width).astype(np.int64)
+        last = np.clip(np.floor(high - 0.5), -1, width - 1).astype(np.int64)
+        spans = np.where(empty, 0, np.maximum(last - first + 1, 0))
+        if spans.sum() == 0:
+            continue
+
+        tri_f = np.repeat(tri, spans)
+        px = np.repeat(first, spans) + np.arange(spans.sum()) - np.repeat(np.cumsum(spans) - spans, spans)
+        py = np.repeat(row, spans)
+        depth = zx[tri_f] * (px + 0.5) + zy[tri_f] * (py + 0.5) + zc[tri_f]
+        yield py * width + px, depth, tri_f
+
+
+def rasterize(screen, colors, width, height):
+    """Render projected triangles to a straight-alpha RGBA float image"""
+    pixels = width * height
+    opaque = colors[:, 3] >= OPAQUE_ALPHA
+
+    zbuffer = np.full(pixels, np.inf)
+    surface = np.zeros((pixels, 3))
+    index = np.flatnonzero(opaque)
+    if len(index):
+        for pixel, depth, tri in _fragments(screen[index], width, height):
+            np.minimum.at(zbuffer, pixel, depth)
+            front = depth <= zbuffer[pixel]
+            surface[pixel[front]] = colors[index[tri[front]], :3]
+    coverage = np.isfinite(zbuffer).astype(np.float64)
+
+    # Blend transparent fragments in front of the opaque surface, nearest first:
+    # each contributes color * alpha * (transmittance of everything in front of it)
+    index = np.flatnonzero(~opaque)
+    transmittance = np.ones(pixels)
+    glass = np.zeros((pixels, 3))
+    if len(index):
+        batches = list(_fragments(screen[index], width, height))
+        pixel = np.concatenate([b[0] for b in batches]) if batches else np.zeros(0, np.int64)
+        depth = np.concatenate([b[1] for b in batches]) if batches else np.zeros(0)
+        tri = np.concatenate([b[2] for b in batches]) if batches else np.zeros(0, np.int64)
+        visible = depth < zbuffer[pixel]
+        pixel, depth, tri = pixel[visible], depth[visible], index[tri[visible]]
+        # One integer sort key (pixel, then quantized depth) is much faster than lexsort
+        span = max(depth.max() - depth.min(), 1e-12) if len(depth) else 1.0
+        quantized = ((depth - (depth.min() if len(depth) else 0.0)) / span * DEPTH_STEPS).astype(np.int64)
+        order = np.argsort(pixel.astype(np.int64) * (DEPTH_STEPS + 1) + quantized)
+        pixel, tri = pixel[order], tri[order]
+        alpha = np.clip(colors[tri, 3], 0.0, 0.999)
+
+        log_t = np.log1p(-alpha)
+        running = np.cumsum(log_t)
+        group_start = np.r_[True, pixel[1:] != pixel[:-1]]
+        offset = np.maximum.accumulate(np.where(group_start, np.arange(len(pixel)), 0))
+        before = running - log_t - (running[offset] - log_t[offset])
+        weight = alpha * np.exp(before)
+        for channel in range(3):
+            glass[:, channel] = np.bincount(pixel, weight * colors[tri, channel], minlength=pixels)
+        transmittance = np.exp(np.bincount(pixel, log_t, minlength=pixels))
+
+    premultiplied = glass + surface * coverage[:, None] * transmittance[:, None]
+    alpha = 1.0 - (1.0 - coverage) * transmittance
+    image = np.concatenate([premultiplied, alpha[:, None]], axis=1)
+    return image.reshape(height, width, 4)
+
+
+def render(path, size=DEFAULT_SIZE, supersample=SUPERSAMPLE):
+    """Render one GLB to an ``(H, W, 4)`` uint8 straight-alpha RGBA array"""
+    width, height = size
+    triangles, colors = load_triangles(path)
+    big_w, big_h = width * supersample, height * supersample
+    if len(triangles):
+        image = rasterize(project(triangles, big_w, big_h), shade(triangles, colors), big_w, big_h)
+    else:
+        image = np.zeros((big_h, big_w, 4))
+    # Box-filter the premultiplied image back down, then un-premultiply
+    image = image.reshape(height, supersample, width, supersample, 4).mean(axis=(1, 3))
+    alpha = image[..., 3:4]
+    rgb = np.divide(image[..., :3], alpha, out=np.zeros_like(image[..., :3]), where=alpha > 0)
+    return (np.concatenate([rgb, alpha], axis=2) * 255 + 0.5).clip(0, 255).astype(np.uint8)
+
+
+def render_thumbnail(job):
+    """Worker: render one model and save it in every requested format"""
+    source, out_dir, size, formats = job
+    started = time.perf_counter()
+    try:
+        pixels = render(source, size)
+    except Exception as e:
+        return Path(source).name, {"error": str(e)}
+    image = Image.fromarray(pixels, "RGBA")
+    outputs = []
+    for fmt in formats:
+        target = Path(out_dir) / f"{Path(source).stem}.{fmt}"
+        if fmt == "webp":
+            image.save(target, "WEBP", quality=85, method=4)
+        else:
+            image.save(target, "PNG", optimize=True)
+        outputs.append(target.name)
+    return Path(source).name, {"outputs": outputs, "seconds": time.perf_counter() - started}
+
+
+def render_catalog(models_dir=MODELS_DIR, out_dir=THUMBNAILS_DIR, size=DEFAULT_SIZE, jobs=None):
+    """Render every GLB in ``models_dir`` and return ``{file: result}``"""
+    if Image is None:
+        raise RuntimeError("Pillow is required to write thumbnails: pip install pillow")
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    formats = ["png"] + (["webp"] if features.check("webp") else [])
+    work = [(str(path), str(out_dir), tuple(size), formats) for path in sorted(Path(models_dir).glob("*.glb"))]
+    if jobs == 1:
+        return dict(map(render_thumbnail, work))
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        return dict(pool.map(render_thumbnail, work))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render catalog thumbnails for models/*.glb")
+    parser.add_argument("--models", type=Path, default=MODELS_DIR, help="directory of GLB files")
+    parser.add_argument("--out", type=Path, default=THUMBNAILS_DIR, help="output directory")
+    parser.add_argument("--size", default="x".join(map(str, DEFAULT_SIZE)), help="WIDTHxHEIGHT in pixels")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    size = tuple(int(v) for v in args.size.lower().split("x"))
+    print(f"🖼️  Rendering thumbnails at {size[0]}x{size[1]}...")
+    started = time.perf_counter()
+    results = render_catalog(args.models, args.out, size, args.jobs)
+    for name, result in results.items():
+        if "error" in result:
+            print(f"⚠️  {name}: {result['error']}")
+        else:
+            print(f"   • {name} → {', '.join(result['outputs'])} ({result['seconds'] * 1000:.0f} ms)")
+    print(f"✅ {len(results)} models in {time.perf_counter() - started:.2f}s")
+    print(f"💾 Output: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
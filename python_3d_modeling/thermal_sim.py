@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Simulate Enclosure Heat Gradients
+Voxelizes an enclosure's interior from its model, labels every wall cell
+face as glass, screen, PVC, frame or open by casting rays into the model,
+and solves the steady-state heat balance for a batch of heater setups at
+once with red-black SOR stencil sweeps. Reports the basking spot and the
+cool-side floor temperature in °F, and can sweep every model × heater ×
+wattage combination in the catalog against an animal's care-sheet ranges.
+
+The air is treated as a conductor with an effective conductivity that
+stands in for convective mixing; walls lose heat to the room through an
+overall heat-transfer coefficient per material.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from bake_atlas import appearance
+from build_model_registry import INCH
+from place_decor import REGISTRY_PATH, load_enclosure_data, model_interior, ray_hits, resolve_enclosure
+from render_thumbnails import load_triangles
+
+CELL = 1.0 * INCH
+AMBIENT_F = 72.0
+# W/(m·K); still air is 0.026, natural convection inside an enclosure mixes far more
+K_EFFECTIVE = 4.0
+# Overall heat-transfer coefficients to the room, W/(m²·K), including surface films
+WALL_U = {"glass": 5.8, "frame": 6.0, "pvc": 2.7, "screen": 15.0, "open": 25.0}
+WALL_MATERIALS = tuple(WALL_U)
+# Share of a top-mounted heater's output that passes the lid into the enclosure
+LID_TRANSMISSION = {"screen": 0.75, "open": 1.0}
+
+# How each heater kind delivers its power: radiant share lands on the floor
+# under it, the rest heats the air below the lid; mats heat the floor above them
+HEATERS = {
+    "lamp": {"radiant": 0.6, "convective": 0.25},
+    "emitter": {"radiant": 0.4, "convective": 0.45},
+    "mat": {"radiant": 0.7, "convective": 0.0},
+}
+HEATER_ITEMS = {"heat-001": "emitter", "heat-002": "mat", "heat-003": "lamp"}
+SWEEP_WATTAGES = {"lamp": (50, 75, 100, 150), "emitter": (50, 100, 150), "mat": (8, 16, 24)}
+# Radius of a lamp's floor footprint per unit of drop height (about a 35° half angle)
+BEAM_SPREAD = 0.7
+MAT_SIZE = (12 * INCH, 8 * INCH)
+BASKING_AT = (0.2, 0.5)
+
+TOLERANCE = 1e-3
+MAX_ITERATIONS = 5000
+CHECK_EVERY = 10
+
+
+def to_fahrenheit(celsius):
+    return celsius * 9 / 5 + 32
+
+
+def to_celsius(fahrenheit):
+    return (fahrenheit - 32) * 5 / 9
+
+
+def parse_range(text):
+    """``'95-105°F'`` -> ``(95.0, 105.0)``; a single value gives a zero-width range"""
+    values = [float(v) for v in re.findall(r"\d+(?:\.\d+)?", text)]
+    return (values[0], values[-1]) if values else None
+
+
+def face_material(rgba, family):
+    """Wall material of a model face: glass and screen by color, other solids by family"""
+    kind = appearance(tuple(int(round(c * 255)) for c in rgba))
+    if kind in ("glass", "screen"):
+        return kind
+    return "pvc" if family == "pvc" else "frame"
+
+
+def voxelize(path, family, cell=CELL):
+    """Interior grid of a model and the wall material behind each boundary cell face
+
+    Returns a dict with the interior ``low``/``high``, the grid ``shape``, the
+    per-axis cell ``size`` and ``faces``: for each ``(axis, side)`` a 2D array
+    of indices into ``WALL_MATERIALS`` over that wall's cells.
+    """
+    low, high = model_interior(str(path))
+    shape = np.maximum(np.round((high - low) / cell).astype(int), 2)
+    size = (high - low) / shape
+    triangles, colors = load_triangles(path)
+    materials = [face_material(rgba, family) for rgba in colors]
+
+    faces = {}
+    for axis in range(3):
+        others = [a for a in range(3) if a != axis]
+        grids = np.meshgrid(*[(np.arange(shape[a]) + 0.5) * size[a] + low[a] for a in others], indexing="ij")
+        for side in (0, 1):
+            origins = np.zeros(grids[0].shape + (3,))
+            origins[..., others[0]], origins[..., others[1]] = grids
+            origins[..., axis] = high[axis] - 0.5 * size[axis] if side else low[axis] + 0.5 * size[axis]
+            directions = np.zeros_like(origins)
+            directions[..., axis] = 1.0 if side else -1.0
+            _, hit = ray_hits(origins.reshape(-1, 3), directions.reshape(-1, 3), triangles)
+            labels = [WALL_MATERIALS.index(materials[i]) if i >= 0 else WALL_MATERIALS.index("open") for i in hit]
+            faces[(axis, side)] = np.array(labels, dtype=np.int8).reshape(grids[0].shape)
+    return {"low": low, "high": high, "shape": tuple(int(n) for n in shape), "size": size, "faces": faces}
+
+
+def wall_conductance(grid):
+    """Per-cell conductance to the room, W/K, summed over the cell's wall faces"""
+    conductance = np.zeros(grid["shape"])
+    u_values = np.array([WALL_U[m] for m in WALL_MATERIALS])
+    for (axis, side), labels in grid["faces"].items():
+        area = np.prod([grid["size"][a] for a in range(3) if a != axis])
+        index = [slice(None)] * 3
+        index[axis] = -1 if side else 0
+        conductance[tuple(index)] += u_values[labels] * area
+    return conductance
+
+
+def _footprint(grid, center, radius):
+    """Normalized Gaussian weights over the floor cells around ``center`` (x, y in meters)"""
+    x = (np.arange(grid["shape"][0]) + 0.5) * grid["size"][0] + grid["low"][0]
+    y = (np.arange(grid["shape"][1]) + 0.5) * grid["size"][1] + grid["low"][1]
+    distance2 = (x[:, None] - center[0]) ** 2 + (y[None, :] - center[1]) ** 2
+    weights = np.exp(-distance2 / (2 * max(radius / 2, grid["size"][:2].min()) ** 2))
+    return weights / weights.sum()
+
+
+def heat_sources(grid, heaters):
+    """Watts deposited in each cell for one setup (a list of heater dicts)"""
+    sources = np.zeros(grid["shape"])
+    extent = grid["high"] - grid["low"]
+    for heater in heaters:
+        spec = HEATERS[heater["kind"]]
+        at = heater.get("at", BASKING_AT)
+        center = grid["low"][:2] + np.asarray(at) * extent[:2]
+        watts = float(heater["watts"])
+        if heater["kind"] == "mat":
+            x = (np.arange(grid["shape"][0]) + 0.5) * grid["size"][0] + grid["low"][0]
+            y = (np.arange(grid["shape"][1]) + 0.5) * grid["size"][1] + grid["low"][1]
+            half = np.asarray(heater.get("size", MAT_SIZE)) / 2
+            covered = (np.abs(x[:, None] - center[0]) <= half[0]) & (np.abs(y[None, :] - center[1]) <= half[1])
+            if not covered.any():
+                covered[np.abs(x - center[0]).argmin(), np.abs(y - center[1]).argmin()] = True
+            sources[:, :, 0] += watts * spec["radiant"] * covered / covered.sum()
+            continue
+        # Lamps sit on the lid; what the lid lets through splits into floor and air heat
+        column = tuple(np.clip(((center - grid["low"][:2]) / grid["size"][:2]).astype(int), 0, np.array(grid["shape"][:2]) - 1))
+        lid = WALL_MATERIALS[grid["faces"][(2, 1)][column]]
+        watts *= LID_TRANSMISSION.get(lid, 1.0)
+        sources[:, :, 0] += watts * spec["radiant"] * _footprint(grid, center, BEAM_SPREAD * extent[2])
+        sources[:, :, -1] += watts * spec["convective"] * _footprint(grid, center, BEAM_SPREAD * grid["size"][2])
+    return sources
+
+
+def solve(grid, sources, ambient_c, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """Steady-state temperatures (°C) for a batch of source arrays ``(B, nx, ny, nz)``
+
+    Every cell balances conduction to its neighbors, loss through its walls
+    and its heat input; red-black SOR sweeps update half the cells at a time
+    across the whole batch. Returns ``(temperatures, iterations)``.
+    """
+    shape = grid["shape"]
+    size = grid["size"]
+    # Conductance between neighbors along each axis: k * face area / spacing
+    links = [K_EFFECTIVE * np.prod([size[a] for a in range(3) if a != axis]) / size[axis] for axis in range(3)]
+    walls = wall_conductance(grid)
+    diagonal = walls.copy()
+    for axis in range(3):
+        count = np.full(shape[axis], 2.0)
+        count[0] = count[-1] = 1.0
+        diagonal += links[axis] * count.reshape([-1 if a == axis else 1 for a in range(3)])
+    constant = walls * ambient_c + sources
+
+    omega = 2 / (1 + np.sin(np.pi / max(shape)))
+    parity = np.indices(shape).sum(axis=0) % 2
+    # Relaxation factor for each half-sweep: omega on that color's cells, zero elsewhere
+    steps = [omega * (parity == color) / diagonal for color in (0, 1)]
+    shifts = []
+    for axis in range(3):
+        lower, upper = [slice(None)] * 4, [slice(None)] * 4
+        lower[axis + 1], upper[axis + 1] = slice(None, -1), slice(1, None)
+        shifts.append((links[axis], tuple(lower), tuple(upper)))
+
+    temperatures = np.full(sources.shape, float(ambient_c))
+    flow = np.empty_like(temperatures)
+    for iteration in range(1, max_iterations + 1):
+        previous = temperatures.copy() if iteration % CHECK_EVERY == 0 else None
+        for step in steps:
+            # Residual heat flow into each cell; SOR moves the cell by omega times its correction
+            np.multiply(temperatures, -diagonal, out=flow)
+            flow += constant
+            for link, lower, upper in shifts:
+                flow[upper] += link * temperatures[lower]
+                flow[lower] += link * temperatures[upper]
+            flow *= step
+            temperatures += flow
+        if previous is not None and np.abs(temperatures - previous).max() < tolerance:
+            return temperatures, iteration
+    return temperatures, max_iterations
+
+
+def gradient(grid, temperatures, at=BASKING_AT):
+    """Basking (hottest floor cell) and cool-side (far third of the floor) temperatures in °F"""
+    floor = temperatures[..., 0]
+    third = max(1, grid["shape"][0] // 3)
+    cool = floor[:, -third:] if at[0] <= 0.5 else floor[:, :third]
+    return to_fahrenheit(floor.reshape(len(floor), -1).max(axis=1)), to_fahrenheit(cool.reshape(len(cool), -1).mean(axis=1))
+
+
+def simulate(enclosure_id, setups, ambient_f=AMBIENT_F, cell=CELL, registry_path=REGISTRY_PATH):
+    """Solve every setup (a list of heater dicts each) for one enclosure in a single batch"""
+    model, _ = resolve_enclosure(enclosure_id, registry_path)
+    if model is None:
+        raise KeyError(f"no generated model for enclosure {enclosure_id}")
+    registry = json.loads(Path(registry_path).read_text(encoding="utf-8"))["models"]
+    family = next((e.get("type") for e in registry.values() if e["file"] == model.name), "basic")
+    grid = voxelize(model, family, cell)
+    sources = np.stack([heat_sources(grid, heaters) for heaters in setups])
+    temperatures, iterations = solve(grid, sources, to_celsius(ambient_f))
+    # The cool side is opposite each setup's own heater, so score each basking spot separately
+    spots = [tuple(setup[0].get("at", BASKING_AT)) if setup else tuple(BASKING_AT) for setup in setups]
+    basking, cool = np.empty(len(setups)), np.empty(len(setups))
+    for at in set(spots):
+        group = [i for i, spot in enumerate(spots) if spot == at]
+        basking[group], cool[group] = gradient(grid, temperatures[group], at)
+    lids = sorted({WALL_MATERIALS[i] for i in np.unique(grid["faces"][(2, 1)])})
+    return [{"basking_f": round(float(b), 1), "cool_f": round(float(c), 1), "iterations": iterations, "lid": lids}
+            for b, c in zip(basking, cool)]
+
+
+def sweep_model(job):
+    """Worker: every heater item × wattage for one registry model"""
+    model_id, wattages, ambient_f, cell = job
+    setups = [[{"kind": kind, "watts": watts, "item": item}] for item, kind in HEATER_ITEMS.items()
+              for watts in (wattages or SWEEP_WATTAGES[kind])]
+    try:
+        start = time.perf_counter()
+        results = simulate(model_id, setups, ambient_f, cell)
+        elapsed = time.perf_counter() - start
+    except (KeyError, ValueError) as e:
+        return model_id, {"error": str(e)}
+    return model_id, {"seconds": round(elapsed, 3), "runs": [
+        {"item": setup[0]["item"], "kind": setup[0]["kind"], "watts": setup[0]["watts"], **result}
+        for setup, result in zip(setups, results)
+    ]}
+
+
+def sweep_catalog(wattages=None, ambient_f=AMBIENT_F, cell=CELL, registry_path=REGISTRY_PATH, jobs=None):
+    """Every registry model × heater item × wattage; one batched solve per model
+
+    ``wattages`` applies to every heater; by default each kind uses its
+    ``SWEEP_WATTAGES`` range.
+    """
+    registry = json.loads(Path(registry_path).read_text(encoding="utf-8"))["models"]
+    job_list = [(model_id, tuple(wattages) if wattages else None, ambient_f, cell) for model_id in registry]
+    if jobs == 1:
+        return dict(map(sweep_model, job_list))
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        return dict(pool.map(sweep_model, job_list))
+
+
+def matching_setups(results, animal):
+    """Runs whose basking and cool temperatures fall inside an animal's care-sheet ranges"""
+    basking, cool = parse_range(animal["temperature"]["basking"]), parse_range(animal["temperature"]["cool"])
+    return [(model_id, run) for model_id, result in results.items() for run in result.get("runs", [])
+            if basking[0] <= run["basking_f"] <= basking[1] and cool[0] <= run["cool_f"] <= cool[1]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep heater setups across the enclosure catalog")
+    parser.add_argument("--watts", type=float, nargs="+", help="wattages to try (default: a range per heater kind)")
+    parser.add_argument("--ambient", type=float, default=AMBIENT_F, help="room temperature in °F")
+    parser.add_argument("--cell", type=float, default=CELL / INCH, help="voxel size in inches")
+    parser.add_argument("--animal", help="care-sheet slug to check the results against")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--out", type=Path, help="write the full results JSON here")
+    args = parser.parse_args()
+
+    print(f"🌡️  Simulating heater setups at {args.ambient:.0f}°F room temperature...")
+    start = time.perf_counter()
+    results = sweep_catalog(args.watts, args.ambient, args.cell * INCH, jobs=args.jobs)
+    for model_id, result in results.items():
+        if "error" in result:
+            print(f"❌ {model_id}: {result['error']}")
+            continue
+        print(f"   • {model_id} ({result['seconds']:.2f}s)")
+        for run in result["runs"]:
+            print(f"      {run['item']} {run['kind']:>7} {run['watts']:>5.0f} W: "
+                  f"basking {run['basking_f']:.1f}°F, cool {run['cool_f']:.1f}°F")
+    print(f"✅ {sum(len(r.get('runs', [])) for r in results.values())} setups in {time.perf_counter() - start:.1f}s")
+
+    if args.animal:
+        _, animals = load_enclosure_data()
+        animal = animals[args.animal]
+        matches = matching_setups(results, animal)
+        print(f"🦎 {args.animal} needs basking {animal['temperature']['basking']}, cool {animal['temperature']['cool']}")
+        for model_id, run in matches:
+            print(f"   ✓ {model_id}: {run['item']} at {run['watts']:.0f} W")
+        if not matches:
+            print("   ⚠️  No setup in the sweep reaches both ranges")
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"💾 Wrote {args.out}")
+    return 1 if any("error" in r for r in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
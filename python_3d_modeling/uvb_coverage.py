@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Map UVB Coverage on Enclosure Floors
+Casts a ray from every floor cell of an enclosure to every emitting point
+of a UVB fixture, attenuates each one by the model faces it crosses (screen
+mesh passes part of the UVB, glass and solid panels block it) and sums the
+Lambertian contributions into a floor UV-index map. Summarizes each map by
+Ferguson zone and writes it as a heatmap PNG for every model × fixture
+combination in the catalog.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from build_model_registry import INCH
+from place_decor import EPSILON, REGISTRY_PATH, intersect_rays, model_interior, ray_hits
+from render_thumbnails import load_triangles
+from thermal_sim import face_material
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+MODELS_DIR = REPO_ROOT / "models"
+OUT_DIR = MODELS_DIR / "uvb"
+
+CELL = 1.0 * INCH
+# items.json fixtures that emit UVB, with a typical datasheet UV index directly
+# below the bare lamp at the reference distance
+FIXTURES = {
+    "light-001": {"shape": "tube", "length": 22 * INCH, "uvi": 5.0, "reference": 0.30},
+    "heat-003": {"shape": "point", "uvi": 6.0, "reference": 0.30},
+}
+TUBE_SAMPLES = 12
+# Fixtures rest this far above the lid (or hang this far below an opaque ceiling)
+FIXTURE_CLEARANCE = 1.0 * INCH
+FIXTURE_AT = (0.3, 0.5)
+# UVB passed by one crossing of a panel; closed meshes are crossed through two faces,
+# so each face passes the square root
+SLAB_TRANSMISSION = {"screen": 0.55, "glass": 0.0, "frame": 0.0, "pvc": 0.0}
+# Ferguson zones by UV index
+ZONES = (("zone 1", 0.0, 0.7), ("zone 2", 0.7, 1.0), ("zone 3", 1.0, 2.6), ("zone 4", 2.6, np.inf))
+RAY_CHUNK = 128
+# Heatmap pixels per floor cell, and color stops from 0 to HEATMAP_MAX UVI
+HEATMAP_SCALE = 8
+HEATMAP_MAX = 4.0
+HEATMAP_COLORS = np.array([[20, 20, 60], [40, 90, 200], [40, 190, 120], [250, 220, 40], [240, 60, 40]], dtype=np.float64)
+
+
+def face_transmission(colors, family):
+    """UVB passed by each model face when a ray crosses it"""
+    return np.array([np.sqrt(SLAB_TRANSMISSION[face_material(rgba, family)]) for rgba in colors])
+
+
+def fixture_points(fixture, center, axis=0):
+    """Emitting sample points of a fixture centered at ``center``, tubes running along ``axis``"""
+    if fixture["shape"] == "tube":
+        offsets = (np.arange(TUBE_SAMPLES) + 0.5) / TUBE_SAMPLES - 0.5
+        points = np.tile(center, (TUBE_SAMPLES, 1))
+        points[:, axis] += offsets * fixture["length"]
+        return points
+    return np.asarray(center, dtype=np.float64)[None]
+
+
+def emitter_intensity(fixture):
+    """Per-sample intensity that gives the fixture's rated UVI at its reference distance"""
+    points = fixture_points(fixture, np.zeros(3))
+    below = np.array([0.0, 0.0, -fixture["reference"]])
+    distance = np.linalg.norm(points - below, axis=1)
+    return fixture["uvi"] / np.sum(fixture["reference"] ** 2 / distance ** 4)
+
+
+def transmission(origins, targets, triangles, passes):
+    """Share of UVB that survives every face between each origin and target"""
+    result = np.ones(len(origins))
+    for start in range(0, len(origins), RAY_CHUNK):
+        delta = targets[start:start + RAY_CHUNK] - origins[start:start + RAY_CHUNK]
+        length = np.linalg.norm(delta, axis=1)
+        t = intersect_rays(origins[start:start + RAY_CHUNK], delta / length[:, None], triangles)
+        t = np.where(t < length[:, None] - EPSILON, t, np.inf)
+        order = np.argsort(t, axis=1)
+        t = np.take_along_axis(t, order, axis=1)
+        passed = np.where(np.isfinite(t), passes[order], 1.0)
+        # A ray through a shared edge meets both triangles at the same distance; count it once
+        with np.errstate(invalid="ignore"):
+            passed[:, 1:][np.diff(t, axis=1) < 1e-7] = 1.0
+        result[start:start + RAY_CHUNK] = passed.prod(axis=1)
+    return result
+
+
+def tube_axis(fixture, low, high):
+    """Axis a tube runs along: X when it fits over the interior, else Y; ValueError when neither does"""
+    for axis in (0, 1):
+        if fixture["length"] <= high[axis] - low[axis]:
+            return axis
+    raise ValueError(f'{fixture["length"] / INCH:.0f} in tube does not fit over the '
+                     f'{(high[0] - low[0]) / INCH:.1f} x {(high[1] - low[1]) / INCH:.1f} in interior')
+
+
+def floor_uvi(path, family, fixture, at=FIXTURE_AT, cell=CELL):
+    """UV index on a ``(nx, ny)`` grid of floor cells, plus where the fixture ended up
+
+    Tubes are turned to the long axis when they are longer than the
+    interior is wide and slid inward until they lie wholly over it.
+    """
+    triangles, colors = load_triangles(path)
+    passes = face_transmission(colors, family)
+    low, high = model_interior(str(path))
+    shape = np.maximum(np.round((high[:2] - low[:2]) / cell).astype(int), 1)
+    size = (high[:2] - low[:2]) / shape
+
+    center = np.array([low[0] + at[0] * (high[0] - low[0]), low[1] + at[1] * (high[1] - low[1]), high[2]])
+    axis = 0
+    if fixture["shape"] == "tube":
+        axis = tube_axis(fixture, low, high)
+        half = fixture["length"] / 2
+        center[axis] = np.clip(center[axis], low[axis] + half, high[axis] - half)
+    # A lamp goes on top of a screen or open lid and inside under anything solid
+    _, hit = ray_hits(center[None] - [0.0, 0.0, EPSILON * 10], np.array([[0.0, 0.0, 1.0]]), triangles)
+    lid = "open" if hit[0] < 0 else face_material(colors[hit[0]], family)
+    if lid in ("screen", "open"):
+        center[2] = triangles[..., 2].max() + FIXTURE_CLEARANCE
+    else:
+        center[2] = high[2] - FIXTURE_CLEARANCE
+    sources = fixture_points(fixture, center, axis)
+    intensity = emitter_intensity(fixture)
+
+    xs = low[0] + (np.arange(shape[0]) + 0.5) * size[0]
+    ys = low[1] + (np.arange(shape[1]) + 0.5) * size[1]
+    floor = np.stack(np.meshgrid(xs, ys, [low[2] + 1e-3], indexing="ij"), axis=-1).reshape(-1, 3)
+    origins = np.repeat(floor, len(sources), axis=0)
+    targets = np.tile(sources, (len(floor), 1))
+    drop = targets[:, 2] - origins[:, 2]
+    distance2 = np.sum((targets - origins) ** 2, axis=1)
+    # Lambertian emitter facing down onto a horizontal floor: I cos θ cos θ / d²
+    direct = intensity * drop ** 2 / distance2 ** 2 * (drop > 0)
+    uvi = (direct * transmission(origins, targets, triangles, passes)).reshape(len(floor), len(sources)).sum(axis=1)
+    placement = {"lid": lid, "mount": "top" if lid in ("screen", "open") else "ceiling"}
+    if fixture["shape"] == "tube":
+        placement["axis"] = "xy"[axis]
+    return uvi.reshape(tuple(shape)), placement
+
+
+def zone_summary(uvi):
+    """Share of the floor in each Ferguson zone, and the peak and mean UV index"""
+    summary = {name: round(float(np.mean((uvi >= lo) & (uvi < hi))), 3) for name, lo, hi in ZONES}
+    summary.update(peak=round(float(uvi.max()), 2), mean=round(float(uvi.mean()), 2))
+    return summary
+
+
+def heatmap(uvi):
+    """RGB heatmap pixels for a UVI grid, +X to the right and the front (+Y) at the bottom"""
+    scaled = np.clip(uvi.T / HEATMAP_MAX, 0, 1) * (len(HEATMAP_COLORS) - 1)
+    index = np.minimum(scaled.astype(int), len(HEATMAP_COLORS) - 2)
+    fraction = (scaled - index)[..., None]
+    pixels = HEATMAP_COLORS[index] * (1 - fraction) + HEATMAP_COLORS[index + 1] * fraction
+    pixels = np.repeat(np.repeat(pixels, HEATMAP_SCALE, axis=0), HEATMAP_SCALE, axis=1)
+    return pixels.round().astype(np.uint8)
+
+
+def coverage_job(job):
+    """Worker: floor map and zone summary for one model × fixture combination"""
+    model_id, path, family, fixture_id, out_dir = job
+    started = time.perf_counter()
+    try:
+        uvi, placement = floor_uvi(path, family, FIXTURES[fixture_id])
+    except (KeyError, ValueError) as e:
+        return f"{model_id}/{fixture_id}", {"error": str(e)}
+    result = {"model": model_id, "fixture": fixture_id, **placement, **zone_summary(uvi)}
+    if out_dir is not None:
+        target = Path(out_dir) / f"{model_id}_{fixture_id}.png"
+        Image.fromarray(heatmap(uvi), "RGB").save(target, "PNG", optimize=True)
+        result["heatmap"] = target.name
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return f"{model_id}/{fixture_id}", result
+
+
+def coverage_catalog(out_dir=OUT_DIR, fixtures=tuple(FIXTURES), registry_path=REGISTRY_PATH, jobs=None):
+    """Every registry model × UVB fixture; heatmaps go to ``out_dir`` unless it is None"""
+    if out_dir is not None:
+        if Image is None:
+            raise RuntimeError("Pillow is required to write heatmaps: pip install pillow")
+        Path(out_dir).mkdir(parents=True, exist_ok=True)
+    registry = json.loads(Path(registry_path).read_text(encoding="utf-8"))["models"]
+    work = [(model_id, str(Path(registry_path).parent / entry["file"]), entry.get("type", "basic"), fixture_id,
+             None if out_dir is None else str(out_dir))
+            for model_id, entry in registry.items() for fixture_id in fixtures]
+    if jobs == 1:
+        return dict(map(coverage_job, work))
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        return dict(pool.map(coverage_job, work))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Map floor UVB coverage for every enclosure and fixture")
+    parser.add_argument("--out", type=Path, default=OUT_DIR, help="directory for heatmaps and summary.json")
+    parser.add_argument("--fixtures", nargs="+", choices=sorted(FIXTURES), default=sorted(FIXTURES))
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    print("☀️  Casting UVB coverage maps...")
+    started = time.perf_counter()
+    results = coverage_catalog(args.out, args.fixtures, jobs=args.jobs)
+    for key, result in results.items():
+        if "error" in result:
+            print(f"❌ {key}: {result['error']}")
+            continue
+        zones = ", ".join(f"{name[-1]}: {result[name]:.0%}" for name, _, _ in ZONES)
+        print(f"   • {key} ({result['mount']}, {result['lid']} lid): peak UVI {result['peak']:.1f}, zones {zones}")
+    (args.out / "summary.json").write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    print(f"✅ {len(results)} combinations in {time.perf_counter() - started:.1f}s")
+    print(f"💾 Output: {args.out}")
+    return 1 if any("error" in r for r in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
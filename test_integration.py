@@ -1,160 +1,232 @@
 #!/usr/bin/env python3
 """
-Integration Test for REPTIZOO 36x18x18 Terrarium
-Tests the connection between Python 3D modeling and the web interface
+Performance Budget Tests
+Checks every page, the GLB models and model generation against fixed
+budgets and writes perf-report.json so results can be diffed across commits.
+Run with pytest, or directly: python test_integration.py [--demo]
 """
 
+import gzip
 import json
-import subprocess
+import os
+import re
+import sys
+import time
 import webbrowser
+from html.parser import HTMLParser
 from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(REPO_ROOT / "python"))
+
+from build_assets import COMPRESSIBLE_SUFFIXES
+
+# Pages are measured as served from this directory; point PERF_ROOT at dist/
+# or release/ to budget a build instead of the source tree
+SITE_ROOT = Path(os.environ.get("PERF_ROOT", REPO_ROOT))
+REPORT_PATH = Path(os.environ.get("PERF_REPORT", REPO_ROOT / "perf-report.json"))
+MODELS_DIR = REPO_ROOT / "models"
+REGISTRY_PATH = MODELS_DIR / "model_registry.json"
+
+# Transferred bytes are gzip sizes for text assets, raw sizes otherwise
+# (lazy-loaded images are not counted). The default covers the species pages.
+DEFAULT_BUDGET = {"bytes": 580 * 1024, "requests": 16}
+PAGE_BUDGETS = {
+    "index.html": {"bytes": 340 * 1024, "requests": 9},
+    "about.html": {"bytes": 340 * 1024, "requests": 10},
+    "all-care-guides.html": {"bytes": 340 * 1024, "requests": 9},
+    "enclosure-builder.html": {"bytes": 370 * 1024, "requests": 16},
+}
+
+# GLB files without a byte count in the registry must stay under this
+MODEL_BYTES_BUDGET = 256 * 1024
+GENERATION_SECONDS = 5.0
+
+# Requests made by scripts after the page loads
+RUNTIME_FETCHES = {
+    "js/mobile-menu.js": ["header.html", "footer.html", "js/search-functionality.js"],
+    "js/search-functionality.js": ["data/index/search.json"],
+    "js/enclosure-quiz.js": ["data/index/quiz.json"],
+}
+# Runtime fetches that are skipped once the mount point was filled at build time
+PRERENDERED_MOUNTS = {"header.html": "main-header", "footer.html": "main-footer"}
+
+REPORT = {"pages": {}, "models": {}, "generation": {}}
+
+
+class ResourceParser(HTMLParser):
+    """Collect the URLs a page requests while loading"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.urls = []
+        self.prerendered = set()
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if "data-prerendered" in attrs and attrs.get("id"):
+            self.prerendered.add(attrs["id"])
+        if tag == "link" and (attrs.get("rel") or "") in ("stylesheet", "preload", "icon"):
+            self.urls.append(attrs.get("href"))
+        elif tag == "script" and attrs.get("src"):
+            self.urls.append(attrs["src"])
+        elif tag == "img" and attrs.get("loading") != "lazy":
+            self.urls.append(attrs.get("src"))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+
+def transferred_bytes(path):
+    data = path.read_bytes()
+    if path.suffix.lower() in COMPRESSIBLE_SUFFIXES:
+        return len(gzip.compress(data, mtime=0))
+    return len(data)
+
+
+def _local(url, base):
+    """Site-relative path for a local URL, or None for external and inline ones"""
+    if not url or url.startswith(("data:", "#", "mailto:", "javascript:")):
+        return None
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc:
+        return None
+    path = unquote(parts.path)
+    return path.lstrip("/") if path.startswith("/") else os.path.normpath(os.path.join(base, path)).replace("\\", "/")
+
+
+def page_requests(page, root=SITE_ROOT):
+    """Every request a page makes, in discovery order: ``[(url, bytes or None)]``"""
+    seen = {}
+    queue = [(page, "")]
+    while queue:
+        url, base = queue.pop(0)
+        relative = _local(url, base)
+        key = relative or url
+        if key in seen:
+            continue
+        path = root / relative if relative else None
+        if relative is None or not path.is_file():
+            seen[key] = None
+            continue
+        seen[key] = transferred_bytes(path)
+        directory = os.path.dirname(relative)
+
+        if path.suffix == ".html":
+            parser = ResourceParser()
+            parser.feed(path.read_text(encoding="utf-8"))
+            queue += [(u, directory) for u in parser.urls]
+            for script in [_local(u, directory) for u in parser.urls]:
+                for fetched in RUNTIME_FETCHES.get(script, []):
+                    if PRERENDERED_MOUNTS.get(fetched) not in parser.prerendered:
+                        queue.append((fetched, ""))
+        elif path.suffix == ".css":
+            css = path.read_text(encoding="utf-8")
+            queue += [(u, directory) for u in re.findall(r'@import\s+url\(\s*[\'"]?([^\'")]+)', css)]
+        elif relative in RUNTIME_FETCHES:
+            queue += [(u, "") for u in RUNTIME_FETCHES[relative]]
+    return list(seen.items())
+
+
+def glb_stats(path):
+    """Triangle count and size of a binary glTF file, read from its JSON chunk"""
+    data = path.read_bytes()
+    assert data[:4] == b"glTF", f"{path.name} is not a GLB file"
+    length = int.from_bytes(data[12:16], "little")
+    gltf = json.loads(data[20:20 + length])
+    triangles = 0
+    for mesh in gltf.get("meshes", []):
+        for primitive in mesh["primitives"]:
+            if primitive.get("mode", 4) != 4:
+                continue
+            accessor = primitive.get("indices", primitive["attributes"]["POSITION"])
+            triangles += gltf["accessors"][accessor]["count"] // 3
+    return {"triangles": triangles, "bytes": len(data)}
+
+
+def _pages():
+    return sorted(p.name for p in SITE_ROOT.glob("*.html") if p.name not in ("header.html", "footer.html"))
+
+
+def _registry_models():
+    return json.loads(REGISTRY_PATH.read_text(encoding="utf-8"))["models"]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def perf_report():
+    """Write everything the budget tests measured once the module finishes"""
+    yield REPORT
+    REPORT["root"] = str(SITE_ROOT)
+    REPORT_PATH.write_text(json.dumps(REPORT, indent=1, sort_keys=True) + "\n", encoding="utf-8")
+
+
+@pytest.mark.parametrize("page", _pages())
+def test_page_budget(page):
+    """Page weight and request count, including header/footer fetches, stay within budget"""
+    requests = page_requests(page)
+    budget = PAGE_BUDGETS.get(page, DEFAULT_BUDGET)
+    total = sum(size for _, size in requests if size)
+    REPORT["pages"][page] = {
+        "bytes": total,
+        "requests": len(requests),
+        "unmeasured": sorted(url for url, size in requests if size is None),
+        "budget": budget,
+    }
+    assert total <= budget["bytes"], f"{page}: {total} bytes > {budget['bytes']}"
+    assert len(requests) <= budget["requests"], f"{page}: {len(requests)} requests > {budget['requests']}"
+
+
+@pytest.mark.parametrize("name", sorted(_registry_models()))
+def test_model_budget(name):
+    """GLB files stay within the triangle and byte counts the registry advertises"""
+    entry = _registry_models()[name]
+    stats = glb_stats(MODELS_DIR / entry["file"])
+    byte_budget = entry.get("bytes", MODEL_BYTES_BUDGET)
+    REPORT["models"][name] = {**stats, "budget": {"triangles": entry["faces"], "bytes": byte_budget}}
+    assert stats["triangles"] <= entry["faces"], f"{name}: {stats['triangles']} triangles > {entry['faces']}"
+    assert stats["bytes"] <= byte_budget, f"{name}: {stats['bytes']} bytes > {byte_budget}"
+
+
+def test_model_generation_time():
+    """The corrected terrarium builds fast enough to regenerate in CI"""
+    pytest.importorskip("trimesh")
+    pytest.importorskip("shapely")
+    sys.path.insert(0, str(REPO_ROOT / "python_3d_modeling"))
+    from generate_corrected_terrarium import create_corrected_terrarium
+
+    started = time.perf_counter()
+    terrarium = create_corrected_terrarium()
+    elapsed = time.perf_counter() - started
+    REPORT["generation"]["reptizoo_36x18x18"] = {
+        "seconds": round(elapsed, 3),
+        "triangles": len(terrarium.faces),
+        "budget": GENERATION_SECONDS,
+    }
+    assert elapsed <= GENERATION_SECONDS
 
-def test_terrarium_model():
-    """Test that the terrarium model data is properly integrated"""
-    
-    # Check if enclosure-builder.html exists
-    builder_file = Path("enclosure-builder.html")
-    js_file = Path("js/enclosure-builder.js")
-    
-    if not builder_file.exists():
-        print("❌ enclosure-builder.html not found")
-        return False
-    
-    if not js_file.exists():
-        print("❌ enclosure-builder.js not found")
-        return False
-    
-    # Read the files and check for REPTIZOO integration
-    html_content = builder_file.read_text(encoding='utf-8')
-    js_content = js_file.read_text(encoding='utf-8')
-    
-    checks = [
-        ("REPTIZOO terrarium model", "REPTIZOO 50 Gallon Glass Terrarium" in html_content),
-        ("Premium enclosure flag", "isPremium: true" in html_content),
-        ("Amazon URL integration", "amazon.com/REPTIZOO-Reptile-Terrarium" in html_content),
-        ("Drag and drop functionality", "setupDropZone" in html_content),
-        ("Selected enclosure counter", "Selected Enclosure (0/1)" in html_content),
-        ("Canvas overflow fix", "overflow: hidden" in html_content),
-        ("Premium CSS styling", "enclosure-option.premium" in html_content),
-        ("Enhanced 3D model", "createReptizooModel" in js_content),
-        ("JavaScript file referenced", "enclosure-builder.js" in html_content),
-        ("Camera controls working", "rotateCamera" in js_content and "zoomCamera" in js_content),
-        ("Reset view functionality", "resetCamera" in js_content),
-        ("Keyboard shortcuts", "keydown" in js_content),
-        ("Help panel", "help-toggle" in html_content)
-    ]
-    
-    print("🔍 Integration Test Results:")
-    print("=" * 50)
-    
-    all_passed = True
-    for check_name, result in checks:
-        status = "✅" if result else "❌"
-        print(f"{status} {check_name}")
-        if not result:
-            all_passed = False
-    
-    print("=" * 50)
-    
-    if all_passed:
-        print("🎉 All integration tests passed!")
-        print("\n📋 Features Successfully Integrated:")
-        print("   • REPTIZOO 36x18x18 terrarium model")
-        print("   • Drag and drop to selected enclosure area")
-        print("   • Default 0/1 selection display")
-        print("   • Fixed canvas overflow issues")
-        print("   • Premium enclosure styling")
-        print("   • Enhanced 3D model with detailed features")
-        print("   • Amazon purchase link integration")
-        return True
-    else:
-        print("⚠️  Some integration tests failed")
-        return False
-
-def test_python_3d_capabilities():
-    """Test Python 3D modeling capabilities"""
-    
-    print("\n🐍 Python 3D Modeling Capabilities:")
-    print("=" * 50)
-    
-    # Check if our Python 3D files exist
-    python_files = [
-        "python_3d_modeling/reptizoo_terrarium_blender.py",
-        "python_3d_modeling/alternative_approaches.py",
-        "python_3d_modeling/demo.py",
-        "python_3d_modeling/requirements.txt",
-        "python_3d_modeling/README.md"
-    ]
-    
-    for file_path in python_files:
-        if Path(file_path).exists():
-            print(f"✅ {file_path}")
-        else:
-            print(f"❌ {file_path}")
-    
-    print("\n📦 Python Libraries Available For:")
-    capabilities = [
-        "Procedural modeling with Blender Python API",
-        "Mesh processing with Open3D",
-        "Lightweight modeling with Trimesh",
-        "Scientific visualization with VTK",
-        "Interactive plotting with PyVista",
-        "Animation and rendering capabilities",
-        "STL/OBJ export functionality",
-        "Real-time 3D preview"
-    ]
-    
-    for capability in capabilities:
-        print(f"🔧 {capability}")
 
 def launch_demo():
-    """Launch the enclosure builder demo"""
-    
-    print("\n🚀 Launching Enclosure Builder Demo...")
-    print("=" * 50)
-    
+    """Open the enclosure builder served by python/serve.py"""
     url = "http://localhost:3001/enclosure-builder.html"
-    
-    print(f"🌐 Opening: {url}")
-    print("\n📖 Demo Instructions:")
-    print("1. Select a reptile species from the dropdown")
-    print("2. Look for the REPTIZOO terrarium with ⭐ PREMIUM badge")
-    print("3. Click or drag it to the selected enclosure area")
-    print("4. Notice the count changes from (0/1) to (1/1)")
-    print("5. View the enhanced 3D model with:")
-    print("   • Aluminum frame structure")
-    print("   • Double hinge front doors") 
-    print("   • Screen ventilation")
-    print("   • Tempered glass panels")
-    print("6. Click 'View on Amazon' to see the actual product")
-    
+    print(f"🌐 Opening: {url} (start the server with: python python/serve.py)")
     try:
         webbrowser.open(url)
-        print("✅ Demo launched successfully!")
     except Exception as e:
         print(f"❌ Could not launch browser: {e}")
         print(f"   Please manually navigate to: {url}")
 
+
 def main():
-    """Run all integration tests"""
-    
-    print("🦎 REPTIZOO 36x18x18 Terrarium Integration Test")
-    print("=" * 60)
-    
-    # Test web integration
-    web_success = test_terrarium_model()
-    
-    # Test Python capabilities
-    test_python_3d_capabilities()
-    
-    # Launch demo if tests pass
-    if web_success:
-        print("\n" + "=" * 60)
-        user_input = input("🚀 Launch demo? (y/n): ").lower().strip()
-        if user_input in ['y', 'yes']:
-            launch_demo()
-    
-    print("\n✨ Integration test complete!")
+    """Run the budget suite; --demo also opens the enclosure builder"""
+    status = pytest.main([__file__, "-q"])
+    print(f"📄 Report: {REPORT_PATH}")
+    if "--demo" in sys.argv[1:]:
+        launch_demo()
+    return status
+
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,524 @@
+#!/usr/bin/env python3
+"""
+Tests for the model tools in python_3d_modeling/
+Runs against the committed models/ directory and small generated meshes
+"""
+
+import json
+import shutil
+import sys
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(REPO_ROOT / "python_3d_modeling"))
+
+np = pytest.importorskip("numpy")
+
+import build_model_registry
+import compose_scene
+import compress_models
+import gltf_utils
+import ingest_cad
+import meshopt_codec
+import occupancy
+import place_decor
+import render_thumbnails
+import thermal_sim
+import uvb_coverage
+
+
+def test_model_registry_matches_model_files():
+    """The committed registry is exactly what the builder computes"""
+    previous = json.loads((REPO_ROOT / "models" / "model_registry.json").read_text(encoding="utf-8"))
+    registry = build_model_registry.build_registry(previous=previous, jobs=1)
+    assert build_model_registry.registry_drift(previous, registry) == []
+
+
+def test_model_registry_detects_and_fixes_drift(tmp_path):
+    """Hand-edited stats are reported and replaced, metadata is kept"""
+    for name in ("reptizoo_36x18x18.glb", "reptizoo_36x18x18.json", "model_registry.json"):
+        shutil.copy(REPO_ROOT / "models" / name, tmp_path / name)
+    stale = json.loads((tmp_path / "model_registry.json").read_text(encoding="utf-8"))
+    stale["models"]["reptizoo_36x18x18"]["faces"] = 999
+    stale["generated_at"] = "1750901692.487687"
+
+    registry = build_model_registry.build_registry(tmp_path, stale, jobs=1)
+    changes = build_model_registry.registry_drift(stale, registry)
+    assert any(c.startswith("reptizoo_36x18x18.faces: 999") for c in changes)
+    assert any(c.startswith("generated_at") for c in changes)
+    assert any("model files removed" in c for c in changes)
+
+    entry = registry["models"]["reptizoo_36x18x18"]
+    assert (entry["vertices"], entry["faces"], entry["primitives"]) == (236, 376, 5)
+    assert (entry["fallback"]["vertices"], entry["fallback"]["faces"]) == (8, 12)
+    assert entry["fixes"] == stale["models"]["reptizoo_36x18x18"]["fixes"]
+
+    written = build_model_registry.write_registry(registry, tmp_path / "model_registry.json")
+    assert build_model_registry.registry_drift(written, build_model_registry.build_registry(tmp_path, written, jobs=1)) == []
+
+
+def test_rasterizer_depth_and_glass():
+    """The nearest opaque face wins and glass in front of it is blended over it"""
+    square = np.array([[[-1, 0, -1], [1, 0, -1], [1, 0, 1]], [[-1, 0, -1], [1, 0, 1], [-1, 0, 1]]], dtype=float)
+    basis = (np.array([1.0, 0, 0]), np.array([0, 0, 1.0]), np.array([0, 1.0, 0]))
+    # Red in front (smaller y is nearer), blue behind, then a half-transparent white pane in front of both
+    triangles = np.concatenate([square, square + [0, 1, 0], square - [0, 1, 0]])
+    colors = np.array([[1, 0, 0, 1]] * 2 + [[0, 0, 1, 1]] * 2 + [[1, 1, 1, 0.5]] * 2, dtype=float)
+    screen = render_thumbnails.project(triangles, 20, 20, basis, margin=0.0)
+
+    image = render_thumbnails.rasterize(screen[:4], colors[:4], 20, 20)
+    assert np.allclose(image[10, 10], [1, 0, 0, 1])
+
+    image = render_thumbnails.rasterize(screen, colors, 20, 20)
+    assert np.allclose(image[10, 10], [1.0, 0.5, 0.5, 1])
+    assert image[..., 3].min() == 1.0
+
+
+def test_render_model_thumbnail():
+    """A committed model renders centered with transparent corners"""
+    pixels = render_thumbnails.render(REPO_ROOT / "models" / "reptizoo_36x18x18.glb", (80, 60))
+    assert pixels.shape == (60, 80, 4)
+    assert pixels[0, 0, 3] == 0 and pixels[-1, -1, 3] == 0
+    assert pixels[30, 40, 3] > 0
+    assert 0.2 < (pixels[..., 3] > 0).mean() < 0.9
+
+
+def test_split_export_groups_materials(tmp_path):
+    """Opaque faces come first; transparent panels are sorted back to front"""
+    trimesh = pytest.importorskip("trimesh")
+    import generate_corrected_terrarium
+
+    frame = trimesh.creation.box(extents=[1, 1, 1])
+    frame.visual.face_colors = [180, 180, 190, 255]
+    far, near = trimesh.creation.box(extents=[1, 0.01, 1]), trimesh.creation.box(extents=[1, 0.01, 1])
+    far.apply_translation([0, -1, 0])
+    near.apply_translation([0, 1, 0])
+    for pane in (near, far):
+        pane.visual.face_colors = [100, 150, 255, 80]
+    mesh = trimesh.util.concatenate([frame, near, far])
+
+    path = tmp_path / "split.glb"
+    generate_corrected_terrarium.export_split_glb(mesh, path)
+    gltf, binary = gltf_utils.read_glb(path)
+    materials = [(m["name"], m["alphaMode"]) for m in gltf["materials"]]
+    assert materials == [("aluminum", "OPAQUE"), ("glass", "BLEND")]
+
+    glass = gltf["meshes"][0]["primitives"][1]
+    positions = gltf_utils.accessor_array(gltf, binary, glass["attributes"]["POSITION"])
+    faces = gltf_utils.accessor_array(gltf, binary, glass["indices"]).reshape(-1, 3)
+    assert len(faces) == 24
+    centers = positions[faces].mean(axis=1)
+    assert np.all(centers[:12, 1] < 0) and np.all(centers[12:, 1] > 0)
+
+    triangles, colors = render_thumbnails.load_triangles(path)
+    assert len(triangles) == len(mesh.faces)
+    assert sorted(np.unique(colors[:, 3]).round(3)) == [0.314, 1.0]
+
+
+def _grid_faces(size):
+    """Triangle list for a ``size`` x ``size`` vertex grid"""
+    corners = (np.arange(size - 1)[:, None] * size + np.arange(size - 1)).ravel()
+    return np.stack([corners, corners + 1, corners + size, corners + 1, corners + size + 1, corners + size], axis=1).reshape(-1, 3)
+
+
+def test_meshopt_codecs_round_trip():
+    """Vertex streams decode exactly; triangles keep their order and winding"""
+    rng = np.random.default_rng(7)
+    vertices = (np.cumsum(rng.integers(-3, 4, (300, 8)), axis=0) % 256).astype(np.uint8)
+    encoded = meshopt_codec.encode_vertex_buffer(vertices)
+    assert len(encoded) < vertices.nbytes
+    assert np.array_equal(meshopt_codec.decode_vertex_buffer(encoded, 300, 8), vertices)
+
+    faces = _grid_faces(12)
+    decoded = meshopt_codec.decode_index_buffer(meshopt_codec.encode_index_buffer(faces), faces.size).reshape(-1, 3)
+    rotations = [np.all(decoded == np.roll(faces, -r, axis=1), axis=1) for r in range(3)]
+    assert np.any(rotations, axis=0).all()
+
+
+def test_meshopt_codecs_match_reference():
+    """The streams are byte-identical to the meshoptimizer encoder's"""
+    meshoptimizer = pytest.importorskip("meshoptimizer")
+    vertices = (np.arange(64 * 12) * 37 % 251).astype(np.uint8).reshape(64, 12)
+    assert meshopt_codec.encode_vertex_buffer(vertices) == bytes(meshoptimizer.encode_vertex_buffer(vertices, 64, 12))
+    faces = _grid_faces(9).astype(np.uint32).ravel()
+    assert meshopt_codec.encode_index_buffer(faces) == bytes(meshoptimizer.encode_index_buffer(faces, faces.size, 81))
+
+
+def test_compress_model_within_error_bound(tmp_path):
+    """A committed model shrinks, decodes within the bound, and tampering is caught"""
+    source = REPO_ROOT / "models" / "reptizoo_24x18x36.glb"
+    name, result = compress_models.compress_model((str(source), str(tmp_path), compress_models.POSITION_BITS))
+    assert result["ratio"] > 3
+    assert result["max_error"] <= result["bound"] < 0.05e-3
+
+    compressed = (tmp_path / name).read_bytes()
+    gltf, binary = gltf_utils.parse_glb(compressed)
+    assert gltf["extensionsRequired"] == ["EXT_meshopt_compression", "KHR_mesh_quantization"]
+
+    # Corrupt the first stored vertex of the position stream
+    stream = gltf["bufferViews"][0]["extensions"]["EXT_meshopt_compression"]
+    binary = bytearray(binary)
+    binary[stream["byteOffset"] + stream["byteLength"] - 7] ^= 0x40
+    with pytest.raises(ValueError):
+        compress_models.verify(source.read_bytes(), gltf_utils.pack_glb(gltf, binary))
+
+
+def test_compress_non_indexed_primitive(tmp_path):
+    """A triangle soup without an index accessor compresses and verifies"""
+    positions = np.random.default_rng(3).uniform(-0.2, 0.2, size=(48, 3)).astype(np.float32)
+    gltf = {
+        "asset": {"version": "2.0"}, "scene": 0, "scenes": [{"nodes": [0]}], "nodes": [{"mesh": 0}],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0}}]}],
+        "accessors": [{"bufferView": 0, "componentType": 5126, "count": len(positions), "type": "VEC3",
+                       "min": positions.min(axis=0).tolist(), "max": positions.max(axis=0).tolist()}],
+        "bufferViews": [{"buffer": 0, "byteLength": positions.nbytes}],
+        "buffers": [{"byteLength": positions.nbytes}],
+    }
+    source = tmp_path / "soup.glb"
+    source.write_bytes(gltf_utils.pack_glb(gltf, positions.tobytes()))
+    out = tmp_path / "out"
+    out.mkdir()
+    name, result = compress_models.compress_model((str(source), str(out), compress_models.POSITION_BITS))
+    assert "error" not in result and result["max_error"] <= result["bound"]
+
+
+def test_bake_atlas_keeps_face_colors(tmp_path):
+    """Every baked face samples a tile whose average is its original flat color"""
+    Image = pytest.importorskip("PIL.Image")
+    pytest.importorskip("trimesh")
+    import bake_atlas
+
+    source = REPO_ROOT / "models" / "reptizoo_36x18x18.glb"
+    summary = bake_atlas.bake_family("reptizoo", [source], tmp_path)
+    assert summary["tiles"] == 5
+    atlas = np.asarray(Image.open(tmp_path / summary["atlas"]), dtype=np.float64)
+
+    gltf, binary = gltf_utils.read_glb(tmp_path / "reptizoo_36x18x18.glb")
+    assert gltf["images"] == [{"uri": summary["atlas"]}]
+    assert [m["alphaMode"] for m in gltf["materials"]] == ["OPAQUE", "BLEND"]
+    assert {m["pbrMetallicRoughness"]["baseColorTexture"]["index"] for m in gltf["materials"]} == {0}
+
+    triangles, colors = render_thumbnails.load_triangles(source)
+    expected = {tuple(sorted(map(tuple, t.round(5)))): c * 255 for t, c in zip(triangles, colors)}
+    checked = 0
+    for primitive in gltf["meshes"][0]["primitives"]:
+        positions = gltf_utils.accessor_array(gltf, binary, primitive["attributes"]["POSITION"])
+        texcoords = gltf_utils.accessor_array(gltf, binary, primitive["attributes"]["TEXCOORD_0"])
+        faces = gltf_utils.accessor_array(gltf, binary, primitive["indices"]).reshape(-1, 3)
+        assert texcoords.min() > 0 and texcoords.max() < 1
+        for face in faces:
+            column, row = (texcoords[face].mean(axis=0) * len(atlas) // bake_atlas.TILE).astype(int)
+            tile = atlas[row * bake_atlas.TILE:(row + 1) * bake_atlas.TILE, column * bake_atlas.TILE:(column + 1) * bake_atlas.TILE]
+            color = expected[tuple(sorted(map(tuple, positions[face].astype(np.float64).round(5))))]
+            assert np.abs(tile.reshape(-1, 4).mean(axis=0) - color).max() < 16
+            checked += 1
+    assert checked == len(triangles)
+
+
+def _rack_layout(rows):
+    return {"name": "rack", "units": "in", "instances": [
+        {"model": "reptizoo_36x18x18", "grid": [rows, 1, 2], "spacing": [38, 0, 20]},
+        {"model": "pvc_48x24x24", "translation": [0, 40, 0], "grid": [rows, 1, 1], "spacing": [50, 0, 0], "yaw": 180},
+    ]}
+
+
+def test_compose_scene_instances_share_meshes(tmp_path):
+    """Every enclosure is a node; each model's meshes are stored once"""
+    out = tmp_path / "rack.glb"
+    summary = compose_scene.compose_layout(_rack_layout(100), out)
+    assert summary["instances"] == 300 and summary["models"] == 2
+
+    gltf, binary = gltf_utils.read_glb(out)
+    placed = list(gltf_utils.scene_meshes(gltf))
+    assert len(placed) == 300
+    assert len(gltf["meshes"]) == 2
+    assert gltf["scenes"][0]["nodes"][:3] == [0, 1, 2]
+    reptizoo = [world[:3, 3] for world, mesh in placed if mesh == 0]
+    assert np.allclose(reptizoo[1], [0, 0, 20 * 0.0254]) and np.allclose(reptizoo[2], [38 * 0.0254, 0, 0])
+    for primitive in gltf["meshes"][1]["primitives"]:
+        gltf_utils.accessor_array(gltf, binary, primitive["attributes"]["POSITION"])
+
+    with pytest.raises(KeyError):
+        compose_scene.compose_layout({"instances": [{"model": "no_such_model"}]}, tmp_path / "bad.glb")
+
+
+def test_compose_scene_memory_is_bounded(tmp_path):
+    """Peak memory does not grow with the number of instances"""
+    peaks = []
+    for rows in (20, 400):
+        tracemalloc.start()
+        compose_scene.compose_layout(_rack_layout(rows), tmp_path / f"rack_{rows}.glb")
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    assert peaks[1] < peaks[0] * 1.5
+
+
+def _ellipsoid_grid(rings, radii):
+    theta, phi = np.meshgrid(np.linspace(0, np.pi, rings + 1), np.linspace(0, 2 * np.pi, 2 * rings + 1), indexing="ij")
+    unit = np.stack([np.sin(theta) * np.cos(phi), np.sin(theta) * np.sin(phi), np.cos(theta)], axis=-1)
+    return (unit * radii).astype(np.float32)
+
+
+def _write_stl(path, grid):
+    a, b, c, d = grid[:-1, :-1], grid[1:, :-1], grid[1:, 1:], grid[:-1, 1:]
+    triangles = np.concatenate([np.stack([a, b, c], axis=-2), np.stack([a, c, d], axis=-2)], axis=-3).reshape(-1, 3, 3)
+    records = np.zeros(len(triangles), dtype=ingest_cad.STL_RECORD)
+    records["vertices"] = triangles
+    with open(path, "wb") as f:
+        f.write(b"\0" * ingest_cad.STL_HEADER + np.uint32(len(records)).tobytes())
+        records.tofile(f)
+    return len(triangles)
+
+
+def test_ingest_cad_streams_and_decimates(tmp_path):
+    """A heavy STL and the same surface as an OBJ of quads decimate identically, within budget and memory"""
+    radii = np.array([150.0, 300.0, 150.0])  # millimeters
+    peaks = []
+    for rings in (96, 288):
+        stl = tmp_path / f"vendor_{rings}.stl"
+        count = _write_stl(stl, _ellipsoid_grid(rings, radii))
+        tracemalloc.start()
+        vertices, faces, stats = ingest_cad.decimate(stl, budget=500, chunk=4096)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        assert stats["source_faces"] == count and 250 < len(faces) <= 500
+        # Quadric placement keeps the simplified vertices on the original surface
+        radius = np.linalg.norm(vertices / (radii / 1000), axis=1)
+        assert np.abs(radius - 1).max() < 0.02
+    # Nine times the triangles, about the same working memory
+    assert peaks[1] < peaks[0] * 1.5
+
+    grid = _ellipsoid_grid(288, radii)
+    ids = np.arange(grid[..., 0].size).reshape(grid.shape[:2]) + 1
+    quads = np.stack([ids[:-1, :-1], ids[1:, :-1], ids[1:, 1:], ids[:-1, 1:]], axis=-1).reshape(-1, 4)
+    obj = tmp_path / "vendor.obj"
+    obj.write_text("".join(f"v {x!r} {y!r} {z!r}\n" for x, y, z in grid.reshape(-1, 3).tolist())
+                   + "".join("f {} {} {} {}\n".format(*q) for q in quads.tolist()), encoding="utf-8")
+    obj_vertices, obj_faces, _ = ingest_cad.decimate(obj, budget=500, chunk=4096)
+    assert np.allclose(obj_vertices, vertices) and np.array_equal(obj_faces, faces)
+
+    models = tmp_path / "models"
+    models.mkdir()
+    shutil.copy(REPO_ROOT / "models" / "pvc_36x18x18.glb", models)
+    entry = ingest_cad.ingest(stl, "vendor_ellipsoid", "basic", budget=500, models_dir=models)
+    registry = json.loads((models / "model_registry.json").read_text(encoding="utf-8"))
+    assert sorted(registry["models"]) == ["pvc_36x18x18", "vendor_ellipsoid"]
+    assert entry["dimensions"] == [12, 24, 12] and entry["faces"] == len(faces) and entry["type"] == "basic"
+    assert build_model_registry.dimension_mismatches(registry) == []
+
+
+def test_obj_relative_indices_resolve_against_vertices_read_so_far(tmp_path):
+    """Negative face indices in interleaved v/f blocks refer back from the current vertex"""
+    first = [(0, 0, 0), (1, 0, 0), (0, 1, 0)]
+    second = [(0, 0, 5), (2, 0, 5), (0, 2, 5)]
+    obj = tmp_path / "relative.obj"
+    obj.write_text("".join(f"v {x} {y} {z}\n" for x, y, z in first) + "f -3 -2 -1\n"
+                   + "".join(f"v {x} {y} {z}\n" for x, y, z in second) + "f -3 -2 -1\nf 1 2 -1\n",
+                   encoding="utf-8")
+    triangles = np.concatenate(list(ingest_cad.triangle_chunks(obj, chunk=1)))
+    assert np.array_equal(triangles, [first, second, [first[0], first[1], second[2]]])
+
+
+def test_aabb_tree_matches_brute_force():
+    """Tree queries return exactly the boxes a linear scan finds"""
+    rng = np.random.default_rng(7)
+    lows = rng.uniform(0, 10, size=(200, 3))
+    highs = lows + rng.uniform(0.1, 2, size=(200, 3))
+    tree = place_decor.AABBTree()
+    for index, (low, high) in enumerate(zip(lows, highs)):
+        tree.insert(low, high, index)
+    assert len(tree) == 200
+    for low in rng.uniform(0, 10, size=(50, 3)):
+        high = low + 1.5
+        expected = np.flatnonzero(np.all(lows < high, axis=1) & np.all(highs > low, axis=1))
+        assert sorted(tree.overlaps(low, high)) == expected.tolist()
+
+
+def test_plan_decor_packs_without_overlap():
+    """Placements stay inside the measured interior, never overlap, and oversized pieces are rejected"""
+    selection = ["hide-001", "hide-002", "dec-001", "dec-002", "plant-001", "plant-001", "dec-003",
+                 "light-001", "heat-001", "heat-002", "sub-001", "no-such-item"]
+    plan = place_decor.plan_decor("reptizoo_36x18x18", selection)
+    low, high = np.array(plan["interior"]["low"]), np.array(plan["interior"]["high"])
+    # Walls and floor are a few millimeters thick; the interior sits just inside the model
+    assert np.all(low > -np.array([36, 18, 18]) * 0.0254 / 2) and np.all(high - low > 0.4)
+
+    assert not plan["fits"] and plan["layers"] == ["sub-001"]
+    assert plan["rejected"] == [{"id": "dec-003", "reason": "taller than the interior"},
+                                {"id": "no-such-item", "reason": "not in items.json"}]
+    assert [p["id"] for p in plan["placements"]] == [i for i in selection if i not in ("dec-003", "sub-001", "no-such-item")]
+
+    floor = [p for p in plan["placements"] if p["mount"] == "floor"]
+    boxes = []
+    for placement in floor:
+        center = np.array([placement["position"][k] for k in ("x", "z", "y")])
+        extent = np.array([placement["size"][k] for k in ("length", "width", "height")])
+        boxes.append((center - extent / 2, center + extent / 2))
+        assert np.all(boxes[-1][0] >= low - 1e-6) and np.all(boxes[-1][1] <= high + 1e-6)
+        assert abs(boxes[-1][0][2] - low[2]) < 1e-6
+    for i, (a_low, a_high) in enumerate(boxes):
+        for b_low, b_high in boxes[i + 1:]:
+            assert np.any(a_high <= b_low + 1e-6) or np.any(b_high <= a_low + 1e-6)
+    top = {p["id"]: p["position"]["y"] for p in plan["placements"] if p["mount"] != "floor"}
+    assert top["light-001"] > high[2] and top["heat-002"] < low[2]
+
+    # An enclosure-data.js id resolves to the same generated model
+    assert place_decor.plan_decor("0000002", ["hide-001"])["model"] == "reptizoo_36x18x18.glb"
+
+
+def test_thermal_solver_matches_direct_solve():
+    """The batched SOR sweeps reach the same steady state as a dense linear solve"""
+    rng = np.random.default_rng(3)
+    shape = (6, 4, 3)
+    size = np.array([0.03, 0.025, 0.04])
+    faces = {(axis, side): rng.integers(0, len(thermal_sim.WALL_MATERIALS), [n for a, n in enumerate(shape) if a != axis])
+             for axis in range(3) for side in (0, 1)}
+    grid = {"low": np.zeros(3), "high": size * shape, "shape": shape, "size": size, "faces": faces}
+    sources = rng.uniform(0, 5, size=(2,) + shape)
+    temperatures, _ = thermal_sim.solve(grid, sources, 20.0, tolerance=1e-9)
+
+    cells = np.arange(np.prod(shape)).reshape(shape)
+    walls = thermal_sim.wall_conductance(grid).ravel()
+    matrix = np.diag(walls)
+    for axis in range(3):
+        link = thermal_sim.K_EFFECTIVE * np.prod(np.delete(size, axis)) / size[axis]
+        first, second = np.moveaxis(cells, axis, 0)[:-1].ravel(), np.moveaxis(cells, axis, 0)[1:].ravel()
+        np.add.at(matrix, (first, first), link)
+        np.add.at(matrix, (second, second), link)
+        np.add.at(matrix, (first, second), -link)
+        np.add.at(matrix, (second, first), -link)
+    for batch in range(2):
+        expected = np.linalg.solve(matrix, walls * 20.0 + sources[batch].ravel())
+        assert np.allclose(temperatures[batch].ravel(), expected, atol=1e-6)
+
+
+def test_thermal_simulation_of_catalog_model():
+    """Heat in equals heat lost through the walls, and more watts give a hotter basking spot"""
+    path = REPO_ROOT / "models" / "reptizoo_36x18x18.glb"
+    grid = thermal_sim.voxelize(path, "reptizoo")
+    assert grid["shape"] == (36, 17, 17)
+    assert "screen" in {thermal_sim.WALL_MATERIALS[i] for i in np.unique(grid["faces"][(2, 1)])}
+    assert {thermal_sim.WALL_MATERIALS[i] for i in np.unique(grid["faces"][(1, 0)])} <= {"glass", "frame"}
+
+    sources = np.stack([thermal_sim.heat_sources(grid, [{"kind": "lamp", "watts": 100}])])
+    assert sources.sum() == pytest.approx(100 * 0.75 * (0.6 + 0.25))
+    temperatures, _ = thermal_sim.solve(grid, sources, 22.0)
+    lost = (thermal_sim.wall_conductance(grid) * (temperatures[0] - 22.0)).sum()
+    assert lost == pytest.approx(sources.sum(), rel=0.01)
+
+    runs = thermal_sim.simulate("reptizoo_36x18x18", [[{"kind": "lamp", "watts": w}] for w in (50, 100)])
+    assert thermal_sim.AMBIENT_F < runs[0]["cool_f"] < runs[0]["basking_f"] < runs[1]["basking_f"]
+    assert thermal_sim.parse_range("95-105°F") == (95.0, 105.0)
+
+    # Mirrored heaters in one batch each measure the cool side opposite their own lamp
+    left, right = thermal_sim.simulate("reptizoo_36x18x18", [[{"kind": "lamp", "watts": 100, "at": at}]
+                                                             for at in ((0.2, 0.5), (0.8, 0.5))])
+    assert left["cool_f"] == pytest.approx(right["cool_f"], abs=0.5)
+    assert left["cool_f"] < right["basking_f"] - 5
+
+
+def _box_triangles(low, high):
+    corners = np.array([[(low, high)[(i >> axis) & 1][axis] for axis in range(3)] for i in range(8)])
+    quads = [(0, 2, 3, 1), (4, 5, 7, 6), (0, 1, 5, 4), (2, 6, 7, 3), (0, 4, 6, 2), (1, 3, 7, 5)]  # outward-facing
+    return np.array([[corners[a], corners[b], corners[c]] for q in quads for a, b, c in ((q[0], q[1], q[2]), (q[0], q[2], q[3]))])
+
+
+def test_uvb_transmission_through_panels():
+    """A closed screen slab passes its slab transmission once, even through a shared edge; glass blocks UVB"""
+    slab = _box_triangles([-1, -1, 0.5], [1, 1, 0.51])
+    screen = np.full(len(slab), np.sqrt(uvb_coverage.SLAB_TRANSMISSION["screen"]))
+    origins = np.array([[0.3, 0.2, 0.0], [0.0, 0.0, 0.0], [0.5, -0.5, 0.0], [3.0, 0.0, 0.0]])
+    targets = origins + [0.0, 0.0, 1.0]
+    passed = uvb_coverage.transmission(origins, targets, slab, screen)
+    assert np.allclose(passed, [0.55, 0.55, 0.55, 1.0])
+    assert np.allclose(uvb_coverage.transmission(origins, targets, slab, np.zeros(len(slab))), [0, 0, 0, 1])
+    # Stopping short of the slab is not attenuated
+    assert np.allclose(uvb_coverage.transmission(origins, origins + [0.0, 0.0, 0.4], slab, screen), 1.0)
+
+
+def test_uvb_floor_map(monkeypatch):
+    """Open tops follow the inverse-square law and the screen lid cuts the peak by its transmission"""
+    path = REPO_ROOT / "models" / "basic_40gal_breeder.glb"
+    fixture = uvb_coverage.FIXTURES["heat-003"]
+    uvi, placement = uvb_coverage.floor_uvi(path, "basic", fixture, at=(0.5, 0.5))
+    assert placement == {"lid": "open", "mount": "top"}
+    height = render_thumbnails.load_triangles(path)[0][..., 2].max() + uvb_coverage.FIXTURE_CLEARANCE
+    floor = place_decor.model_interior(str(path))[0][2] + 1e-3
+    distance = height - floor
+    # The peak cell is within half a cell of the axis below the lamp
+    assert uvi.max() == pytest.approx(fixture["uvi"] * (fixture["reference"] / distance) ** 2, rel=0.02)
+
+    screened, placement = uvb_coverage.floor_uvi(REPO_ROOT / "models" / "reptizoo_36x18x18.glb", "reptizoo", fixture)
+    assert placement == {"lid": "screen", "mount": "top"}
+    monkeypatch.setitem(uvb_coverage.SLAB_TRANSMISSION, "screen", 1.0)
+    bare, _ = uvb_coverage.floor_uvi(REPO_ROOT / "models" / "reptizoo_36x18x18.glb", "reptizoo", fixture)
+    assert screened.max() / bare.max() == pytest.approx(0.55, rel=0.01)
+
+    summary = uvb_coverage.zone_summary(screened)
+    assert sum(summary[name] for name, _, _ in uvb_coverage.ZONES) == pytest.approx(1.0, abs=0.005)
+    assert uvb_coverage.heatmap(screened).shape == (screened.shape[1] * 8, screened.shape[0] * 8, 3)
+
+
+def test_uvb_tube_stays_over_the_interior(monkeypatch):
+    """A tube too long for the width turns to the long axis and every emitter sits over the interior"""
+    tube = uvb_coverage.FIXTURES["light-001"]
+    emitters = []
+    fixture_points = uvb_coverage.fixture_points
+
+    def placed(fixture, center, axis=None):
+        points = fixture_points(fixture, center, axis or 0)
+        if axis is not None:  # emitter_intensity's unit fixture leaves it out
+            emitters.append(points)
+        return points
+
+    monkeypatch.setattr(uvb_coverage, "fixture_points", placed)
+    for name, axis in (("reptizoo_40gal_36x16x18", "y"), ("basic_40gal_breeder", "x")):
+        path = REPO_ROOT / "models" / f"{name}.glb"
+        low, high = place_decor.model_interior(str(path))
+        uvi, placement = uvb_coverage.floor_uvi(path, "reptizoo" if "reptizoo" in name else "basic", tube)
+        assert placement["axis"] == axis and uvi.max() > 0
+        assert (emitters[-1][:, :2] >= low[:2]).all() and (emitters[-1][:, :2] <= high[:2]).all()
+
+    with pytest.raises(ValueError, match="does not fit"):
+        uvb_coverage.floor_uvi(REPO_ROOT / "models" / "reptizoo_24x18x36.glb", "reptizoo", tube)
+
+
+def test_occupancy_solid_and_dilation():
+    """Overlapping closed meshes voxelize to their union and dilation grows by whole cells"""
+    triangles = np.concatenate([_box_triangles([-0.5, -0.5, -0.5], [0.5, 0.5, 0.0]),
+                                _box_triangles([-0.25, -0.25, -0.25], [0.25, 0.25, 0.5])])
+    grid = {"low": np.full(3, -1.0), "shape": (8, 8, 8), "size": np.full(3, 0.25)}
+    solid = occupancy.model_solid(triangles, grid, backend="numpy")
+    centers = (np.arange(8) + 0.5) * 0.25 - 1.0
+    x, y, z = np.meshgrid(centers, centers, centers, indexing="ij")
+    expected = ((np.abs(x) < 0.5) & (np.abs(y) < 0.5) & (z > -0.5) & (z < 0.0)) | \
+        ((np.abs(x) < 0.25) & (np.abs(y) < 0.25) & (z > -0.25) & (z < 0.5))
+    assert np.array_equal(solid, expected)
+    assert np.array_equal(occupancy.mesh_parts(triangles), np.repeat([0, 1], 12))
+    if occupancy.o3d is not None:
+        assert np.array_equal(occupancy.model_solid(triangles, grid, backend="open3d"), expected)
+
+    seed = np.zeros((7, 7, 7), dtype=bool)
+    seed[3, 3, 3] = True
+    assert occupancy.dilate(seed, 2).sum() == 125
+    assert np.array_equal(occupancy.box_cells(grid, [-0.5, -0.5, -0.5], [0.0, 0.5, 0.0]), (np.abs(x + 0.25) < 0.25) & (np.abs(y) < 0.5) & (z > -0.5) & (z < 0))
+
+
+def test_occupancy_subtracts_substrate_and_decor():
+    """Substrate lowers the air volume and decor takes its footprint out of the floor"""
+    empty = occupancy.usable_space("reptizoo_36x18x18")
+    low, high = place_decor.model_interior(str(REPO_ROOT / "models" / "reptizoo_36x18x18.glb"))
+    assert empty["floor_in2"] == pytest.approx((high - low)[0] * (high - low)[1] / build_model_registry.INCH ** 2, rel=0.03)
+    assert empty["air_in3"] < empty["nominal_volume_in3"]
+
+    bedded = occupancy.usable_space("reptizoo_36x18x18", ["sub-001"])
+    assert bedded["substrate_in"] == 2.0
+    assert empty["air_in3"] - bedded["air_in3"] == pytest.approx(2.0 * empty["floor_in2"], rel=0.03)
+
+    rock = occupancy.usable_space("reptizoo_36x18x18", ["sub-001", "dec-001"])
+    assert bedded["floor_in2"] - rock["floor_in2"] == pytest.approx(12 * 8, abs=10)
+    assert rock["climb_in3"] > bedded["climb_in3"]
+    assert rock["rejected"] == []
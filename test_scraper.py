@@ -0,0 +1,610 @@
+#!/usr/bin/env python3
+"""
+Tests for the scraping and price refresh tools in python/
+Drives them with fake clocks, scripted fetchers and local stub servers, so
+nothing touches the network
+"""
+
+import asyncio
+import http.client
+import io
+import json
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+REPO_ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(REPO_ROOT / "python"))
+
+import extract_listings
+import refresh_prices
+import scrape_scheduler
+
+
+class FakeClock:
+    """Manual clock whose ``sleep`` just advances time"""
+
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def _scheduler(fetch, clock, state=None, **options):
+    return scrape_scheduler.ScrapeScheduler(fetch, state, clock=clock, sleep=clock.sleep, rng=random.Random(1), **options)
+
+
+URLS = {
+    "leopard_gecko": "https://a.example/leopard",
+    "crested_gecko": "https://a.example/crested",
+    "ball_python": "https://b.example/ball",
+}
+
+
+def test_parse_listing_count():
+    """Counts come out of the results label with thousands separators"""
+    assert scrape_scheduler.parse_listing_count("1-48 of 2,148") == 2148
+    assert scrape_scheduler.parse_listing_count("No results") is None
+    assert scrape_scheduler.parse_listing_count(None) is None
+
+
+def test_backoff_is_jittered_exponential_and_capped():
+    """Delays stay inside [0, min(cap, base * 2^n)] and actually vary"""
+    rng = random.Random(7)
+    for attempt in range(10):
+        delays = [scrape_scheduler.backoff_delay(attempt, 2.0, 60.0, rng) for _ in range(200)]
+        assert 0 <= min(delays) and max(delays) <= min(60.0, 2.0 * 2 ** attempt)
+        assert len(set(delays)) > 100
+
+
+def test_circuit_breaker_opens_and_recovers():
+    """Threshold failures open the circuit; after the cooldown one trial decides"""
+    clock = FakeClock()
+    breaker = scrape_scheduler.CircuitBreaker(threshold=3, cooldown=100, clock=clock)
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock.now += 100
+    assert breaker.state == "half-open" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now += 100
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_scheduler_scrapes_only_stale_entries_in_priority_order():
+    """Fresh entries are skipped; never-scraped ones go first, then the oldest"""
+    clock = FakeClock()
+    state = {
+        "leopard_gecko": {"url": URLS["leopard_gecko"], "count": 10, "lastSuccess": clock.now - 7200, "failures": 0},
+        "crested_gecko": {"url": URLS["crested_gecko"], "count": 20, "lastSuccess": clock.now - 60, "failures": 0},
+    }
+    fetched = []
+    scheduler = _scheduler(lambda url: fetched.append(url) or 99, clock, state, host_interval=5.0)
+    assert scheduler.stale(URLS) == ["ball_python", "leopard_gecko"]
+
+    summary = scheduler.run(URLS)
+    assert summary == {"scraped": ["ball_python", "leopard_gecko"], "failed": [], "skipped": []}
+    assert fetched == [URLS["ball_python"], URLS["leopard_gecko"]]
+    assert state["crested_gecko"]["count"] == 20
+    assert scheduler.stale(URLS) == []
+
+    # A changed URL makes an entry stale regardless of age
+    assert scheduler.stale({**URLS, "crested_gecko": "https://a.example/crested-2"}) == ["crested_gecko"]
+
+
+def test_scheduler_retries_and_keeps_last_known_good(tmp_path):
+    """Failures are retried with backoff and never overwrite a good count"""
+    clock = FakeClock()
+    state = {"leopard_gecko": {"url": URLS["leopard_gecko"], "count": 2148, "lastSuccess": 0, "failures": 0}}
+    attempts = iter([RuntimeError("timeout"), None, None])
+
+    def flaky(url):
+        outcome = next(attempts)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    scheduler = _scheduler(flaky, clock, state, retries=3, host_interval=0.0)
+    summary = scheduler.run({"leopard_gecko": URLS["leopard_gecko"]})
+    assert summary["failed"] == ["leopard_gecko"]
+    entry = state["leopard_gecko"]
+    assert entry["count"] == 2148 and entry["lastSuccess"] == 0 and entry["failures"] == 1
+    assert entry["lastError"] == "listing count not found"
+    assert len(clock.slept) == 2 and clock.slept[0] <= 2.0 and clock.slept[1] <= 4.0
+
+    # The next success resets the failure count
+    scheduler.fetch = lambda url: 2200
+    assert scheduler.run({"leopard_gecko": URLS["leopard_gecko"]})["scraped"] == ["leopard_gecko"]
+    assert entry["count"] == 2200 and entry["failures"] == 0 and entry["lastSuccess"] == clock.now
+
+    state_path, out_path = tmp_path / "state.json", tmp_path / "counts.json"
+    scrape_scheduler.write_json(state, state_path)
+    scrape_scheduler.write_json(scrape_scheduler.availability({**state, "new": {"count": None}}), out_path)
+    assert scrape_scheduler.load_state(state_path) == state
+    assert json.loads(out_path.read_text()) == {"leopard_gecko": 2200}
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_scheduler_circuit_breaker_isolates_a_failing_host():
+    """A host that keeps failing is skipped while other hosts are still scraped, politely spaced"""
+    clock = FakeClock()
+    urls = {f"a{i}": f"https://a.example/{i}" for i in range(6)}
+    urls.update({f"b{i}": f"https://b.example/{i}" for i in range(3)})
+    requests = []
+
+    def fetch(url):
+        requests.append((url, clock.now))
+        if "a.example" in url:
+            raise ConnectionError("refused")
+        return 1
+
+    scheduler = _scheduler(fetch, clock, retries=2, host_interval=5.0)
+    summary = scheduler.run(urls)
+    a_requests = [t for url, t in requests if "a.example" in url]
+    assert len(a_requests) == scrape_scheduler.FAILURE_THRESHOLD
+    assert summary["scraped"] == ["b0", "b1", "b2"]
+    assert len(summary["failed"]) + len(summary["skipped"]) == 6 and summary["skipped"]
+    b_requests = [t for url, t in requests if "b.example" in url]
+    assert all(later - earlier >= 5.0 for earlier, later in zip(b_requests, b_requests[1:]))
+
+
+def test_scheduler_open_circuit_persists_across_runs(tmp_path):
+    """A host's open circuit is saved with the state, so the next run sends nothing until the cooldown"""
+    clock = FakeClock()
+    urls = {f"a{i}": f"https://a.example/{i}" for i in range(6)}
+    requests = []
+
+    def fetch(url):
+        requests.append(url)
+        raise ConnectionError("refused")
+
+    state_path = tmp_path / "state.json"
+    state = {}
+    _scheduler(fetch, clock, state, retries=2, host_interval=5.0).run(urls)
+    assert len(requests) == scrape_scheduler.FAILURE_THRESHOLD
+    scrape_scheduler.write_json(state, state_path)
+    assert scrape_scheduler.availability(state) == {}
+
+    # The next hourly run starts with a fresh scheduler but the saved breaker
+    clock.now += 600
+    requests.clear()
+    summary = _scheduler(fetch, clock, scrape_scheduler.load_state(state_path), retries=2, host_interval=5.0).run(urls)
+    assert requests == [] and sorted(summary["skipped"]) == sorted(urls)
+
+    # Once the cooldown has passed a single trial goes out, and its failure reopens the circuit
+    clock.now += scrape_scheduler.COOLDOWN
+    summary = _scheduler(fetch, clock, scrape_scheduler.load_state(state_path), retries=2, host_interval=5.0).run(urls)
+    assert len(requests) == 1 and len(summary["skipped"]) == 5
+
+
+MORPHS = ["Normal", "Tremper Albino", "Mack Snow", "Black Night"]
+
+
+def _listing_html(index):
+    return (f'<div class="listingCard--x1"><a class="title--a2"> {MORPHS[index % 4]} </a>'
+            f'<span class="price--b3">{"$1,%03d.50" % index if index % 7 else "Inquire"}</span>'
+            f'<span class="sex--c4">{"Female" if index % 2 else "Male"}</span><img src="x.jpg">'
+            f'<span class="location--d5">Region {index % 3}</span></div>')
+
+
+class StubListings:
+    """Local search-results server: ``total`` listings, ``per_page`` to a page"""
+
+    def __init__(self, total, per_page=24, label=True, flaky=()):
+        self.total, self.per_page, self.label = total, per_page, label
+        self.flaky = set(flaky)
+        self.lock = threading.Lock()
+        self.in_flight = self.peak = 0
+        self.starts = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                page = int(parse_qs(urlsplit(self.path).query).get("page", ["1"])[0])
+                with stub.lock:
+                    stub.starts.append((page, time.monotonic()))
+                    stub.in_flight += 1
+                    stub.peak = max(stub.peak, stub.in_flight)
+                    failing = page in stub.flaky
+                    stub.flaky.discard(page)
+                time.sleep(0.005)
+                first = (page - 1) * stub.per_page
+                cards = "".join(_listing_html(i) for i in range(first, min(first + stub.per_page, stub.total)))
+                label = f'<span class="resultsCount--z9">{first + 1}-{first + stub.per_page} of {stub.total:,}</span>'
+                body = f"<html><body>{label if stub.label else ''}<main>{cards}</main></body></html>".encode()
+                with stub.lock:
+                    stub.in_flight -= 1
+                self.send_response(503 if failing else 200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/search?state=for_sale"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def test_parse_page_reads_cards_and_total():
+    """Cards become normalized records and the results label gives the total"""
+    records, total = extract_listings.parse_page(
+        '<span class="resultsCount--q">1-24 of 2,148</span>' + _listing_html(1) + _listing_html(7))
+    assert total == 2148
+    assert records == [
+        {"morph": "Tremper Albino", "price": 1001.5, "sex": "female", "region": "Region 1"},
+        {"morph": "Black Night", "price": None, "sex": "female", "region": "Region 1"},
+    ]
+    assert extract_listings.page_url("https://a.example/s?state=for_sale&page=3", 4) == \
+        "https://a.example/s?state=for_sale&page=4"
+
+
+def test_extract_streams_every_page_politely():
+    """Every listing arrives once, within the concurrency cap and request spacing, despite a 503"""
+    with StubListings(230, flaky={4}) as stub:
+        out = io.StringIO()
+        summary = asyncio.run(extract_listings.extract(stub.url, out, "leopard_gecko", concurrency=3, interval=0.02))
+    lines = out.getvalue().splitlines()
+    assert summary == {"pages": 10, "records": 230, "failed": [], "skipped": []}
+    assert len(lines) == 230
+    records = [json.loads(line) for line in lines]
+    assert sorted(r["page"] for r in records) == sorted((i // 24) + 1 for i in range(230))
+    assert {r["species"] for r in records} == {"leopard_gecko"}
+    assert stub.peak <= 3
+    # Request starts are spaced by the interval (measured on arrival, so allow for jitter)
+    starts = sorted(t for _, t in stub.starts)
+    assert starts[-1] - starts[0] >= 0.9 * 0.02 * (len(starts) - 1)
+    assert [page for page, _ in stub.starts].count(4) == 2
+
+    morphs = extract_listings.summarize(lines)
+    assert sum(entry["count"] for entry in morphs.values()) == 230
+    assert morphs["Normal"]["count"] == 58 and morphs["Normal"]["sexes"] == {"male": 58}
+    priced = [1000 + i + 0.5 for i in range(0, 230, 4) if i % 7]
+    assert morphs["Normal"]["priced"] == len(priced)
+    assert morphs["Normal"]["mean"] == round(sum(priced) / len(priced), 2)
+    assert sum(morphs["Normal"]["histogram"]) == len(priced)
+
+
+def test_extract_without_a_total_walks_to_the_first_empty_page():
+    """Without a results label workers stop at the first empty page"""
+    with StubListings(100, per_page=10, label=False) as stub:
+        out = io.StringIO()
+        summary = asyncio.run(extract_listings.extract(stub.url, out, concurrency=4, interval=0.0))
+    assert summary["records"] == 100 and summary["pages"] == 10 and summary["failed"] == []
+    assert max(page for page, _ in stub.starts) <= 10 + 4
+
+
+def test_extract_with_custom_selectors_survives_truncated_pages():
+    """Selector overrides are honored and a truncated body is retried rather than aborting the run"""
+    html = _listing_html(1).replace("listingCard--", "card--").replace("title--", "heading--")
+    records, _ = extract_listings.parse_page(html, {"card": "card--", "morph": "heading--"})
+    assert records[0]["morph"] == "Tremper Albino" and records[0]["sex"] == "female"
+    assert extract_listings.parse_page(html) == ([], None)
+
+    truncated = {3}
+
+    def fetch_page(url):
+        page = int(parse_qs(urlsplit(url).query)["page"][0])
+        if page in truncated:
+            truncated.discard(page)
+            raise http.client.IncompleteRead(b"<html>")
+        return extract_listings.http_get(url)
+
+    with StubListings(100, per_page=20) as stub:
+        out = io.StringIO()
+        summary = asyncio.run(extract_listings.extract(stub.url, out, fetch_page=fetch_page, concurrency=3,
+                                                       interval=0.0))
+    assert summary == {"pages": 5, "records": 100, "failed": [], "skipped": []}
+
+
+def test_extract_reports_pages_skipped_after_the_breaker_opens():
+    """Every labelled page is written, failed or skipped once the circuit opens partway through"""
+
+    def fetch_page(url):
+        if int(parse_qs(urlsplit(url).query)["page"][0]) >= 4:
+            raise OSError("503")
+        return extract_listings.http_get(url)
+
+    with StubListings(500, per_page=10) as stub:
+        out = io.StringIO()
+        summary = asyncio.run(extract_listings.extract(stub.url, out, fetch_page=fetch_page, concurrency=3,
+                                                       interval=0.0))
+    assert summary["pages"] == 3 and summary["records"] == 30
+    assert summary["failed"] and summary["skipped"]
+    assert sorted(summary["failed"] + summary["skipped"]) == list(range(4, 51))
+
+
+class FakePlaywright:
+    """Stands in for ``async_playwright()``: tabs render search pages of ``total`` listings, 10 to a page"""
+
+    def __init__(self, total):
+        self.total = total
+        self.in_flight = self.peak = self.tabs = 0
+        fake = self
+
+        class Element:
+            def __init__(self, text):
+                self.text = text
+
+            async def inner_text(self):
+                return self.text
+
+        class Page:
+            async def goto(self, url):
+                self.url = url
+                fake.in_flight += 1
+                fake.peak = max(fake.peak, fake.in_flight)
+
+            async def wait_for_timeout(self, ms):
+                await asyncio.sleep(0.01)
+                fake.in_flight -= 1
+
+            async def content(self):
+                page = int(parse_qs(urlsplit(self.url).query).get("page", ["1"])[0])
+                first = (page - 1) * 10
+                cards = "".join(_listing_html(i) for i in range(first, min(first + 10, fake.total)))
+                return f'<span class="resultsCount--z9">{first + 1}-{first + 10} of {fake.total}</span>{cards}'
+
+            async def query_selector(self, selector):
+                return Element(f"1-10 of {fake.total:,}")
+
+        class Browser:
+            async def new_page(self):
+                fake.tabs += 1
+                return Page()
+
+            async def close(self):
+                pass
+
+        class Chromium:
+            async def launch(self, headless):
+                return Browser()
+
+        class Driver:
+            chromium = Chromium()
+
+            async def stop(self):
+                pass
+
+        class Starter:
+            async def start(self):
+                return Driver()
+
+        self.starter = Starter
+
+    def __call__(self):
+        return self.starter()
+
+
+def test_browser_pages_render_concurrently(monkeypatch):
+    """Each worker gets its own tab, and the scheduler's fetcher shares the same wrapper"""
+    fake = FakePlaywright(120)
+    monkeypatch.setattr(scrape_scheduler, "async_playwright", fake)
+
+    async def run():
+        async with scrape_scheduler.BrowserPages(pages=3, settle_ms=0) as pages:
+            out = io.StringIO()
+            return await extract_listings.extract("https://a.example/s", out, fetch_page=pages.load,
+                                                  concurrency=3, interval=0.0)
+
+    summary = asyncio.run(run())
+    assert summary == {"pages": 12, "records": 120, "failed": [], "skipped": []}
+    assert fake.tabs == 3 and fake.peak == 3
+
+    with scrape_scheduler.BrowserFetcher() as fetch:
+        assert fetch("https://a.example/s") == 120
+
+
+def test_extract_memory_stays_flat(tmp_path):
+    """Peak memory does not grow with the number of listings streamed"""
+    peaks = []
+    for total in (400, 2400):
+        with StubListings(total, per_page=40) as stub, open(tmp_path / f"{total}.jsonl", "w") as out:
+            tracemalloc.start()
+            asyncio.run(extract_listings.extract(stub.url, out, concurrency=3, interval=0.0))
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        assert sum(1 for _ in open(tmp_path / f"{total}.jsonl")) == total
+    assert peaks[1] < 1.5 * peaks[0]
+
+
+PRODUCT_PAGES = {
+    # Carousel JSON and an accessory price come before the buy box
+    "/dp/B07CV797LC": '<script>{"asin":"B0ACCESSORY","price":"12.99"}</script>'
+                      '<span class="a-offscreen">$8.49</span>'
+                      '<div id="corePrice_feature_div"><span class="a-price"><span class="a-offscreen">$179.99</span></span></div>'
+                      '<div id="availability"><span>In Stock</span></div>',
+    "/pdp/rptz1194.html": '<script>{"related":[{"sku":"W001","price":"49.99"}]}</script>'
+                          '<script type="application/ld+json">{"@type":"Product","offers":'
+                          '{"@type":"Offer","price":"159.99","availability":"https://schema.org/InStock"}}</script>',
+    "/products/pvc": '<meta property="product:price:amount" content="1,215.00">Sold out',
+    "/no-price": "<html>No price here</html>",
+    "/hide": '<div id="corePriceDisplay_desktop_feature_div"><span class="a-offscreen">$16.49</span></div>',
+}
+
+
+class StubShop:
+    """Local stand-in for retailer product pages with ETag revalidation and a short link
+
+    ``/4o8mtc5`` redirects to the buy-box page with affiliate parameters, the
+    way amzn.to links do.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = []
+        self.in_flight = self.peak = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_HEAD(self):
+                with stub.lock:
+                    stub.requests.append((self.path, None))
+                self.send_response(301)
+                self.send_header("Location", f"{stub.base}/dp/B07CV797LC?tag=reptilecare09-20&linkCode=ll1")
+                self.end_headers()
+
+            def do_GET(self):
+                with stub.lock:
+                    stub.requests.append((self.path, self.headers.get("If-None-Match")))
+                    stub.in_flight += 1
+                    stub.peak = max(stub.peak, stub.in_flight)
+                time.sleep(0.02)
+                with stub.lock:
+                    stub.in_flight -= 1
+                body = PRODUCT_PAGES[urlsplit(self.path).path].encode()
+                etag = '"' + str(len(body)) + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base = f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def test_parse_product_prices_and_availability():
+    """Buy-box, JSON-LD and Open Graph prices are found; stock status is read when present"""
+    pages = {path: refresh_prices.parse_product(page) for path, page in PRODUCT_PAGES.items()}
+    assert pages["/dp/B07CV797LC"] == {"price": 179.99, "available": True}
+    assert pages["/pdp/rptz1194.html"] == {"price": 159.99, "available": True}
+    assert pages["/products/pvc"] == {"price": 1215.0, "available": False}
+    assert pages["/no-price"] == {"price": None, "available": None}
+
+
+def test_check_prices_busy_host_does_not_starve_others(tmp_path):
+    """Products queued behind one retailer leave global slots free for other hosts"""
+    starts = []
+
+    def fetch(url, cached):
+        starts.append((time.monotonic(), url))
+        time.sleep(0.05)
+        return 200, {}, '<meta property="og:price:amount" content="10.00">'
+
+    products = [{"kind": "item", "id": f"a{i}", "name": "", "url": f"https://a.example/{i}", "price": 10.0}
+                for i in range(8)]
+    products.append({"kind": "item", "id": "b", "name": "", "url": "https://b.example/1", "price": 10.0})
+    results = asyncio.run(refresh_prices.check_prices(products, refresh_prices.ResponseCache(tmp_path),
+                                                      fetch, concurrency=3, host_concurrency=2, interval=0.0))
+    assert {r["status"] for r in results} == {"fetched"}
+    first = starts[0][0]
+    assert next(t for t, url in starts if "b.example" in url) - first < 0.04
+
+
+def test_canonical_urls_and_retailers():
+    """Affiliate parameters are dropped and every link to a retailer shares one bucket"""
+    assert refresh_prices.canonical_url("https://www.amazon.com/x/dp/B07CV797LC?&linkCode=ll1&tag=reptilecare09-20"
+                                        "&linkId=454f&language=en_US&ref_=as_li_ss_tl") == \
+        "https://www.amazon.com/x/dp/B07CV797LC?language=en_US"
+    assert {refresh_prices.retailer(u) for u in ("https://www.amazon.com/dp/1", "https://amzn.to/4o8mtc5",
+                                                 "https://smile.amazon.com/dp/2")} == {"amazon.com"}
+    assert refresh_prices.retailer("https://shop.example.co.uk/p") == "example.co.uk"
+
+
+def test_refresh_prices_writes_only_changes_and_revalidates(tmp_path, monkeypatch):
+    """Changed prices are written back in place; later runs revalidate with 304s or skip requests"""
+    with StubShop() as shop:
+        # The stub's localhost name plays amzn.to, a short link for the 127.0.0.1 retailer
+        monkeypatch.setattr(refresh_prices, "SHORT_LINKS", {"localhost": "127.0.0.1"})
+        source = (REPO_ROOT / "js" / "enclosure-data.js").read_text(encoding="utf-8")
+        for original, base, path in (
+                ("https://www.amazon.com/REPTIZOO-Reptile-Terrarium-Ventilation-Knock-Down/dp/B07CV797LC?",
+                 shop.base, "/dp/B07CV797LC?"),
+                ("https://www.wayfair.com/pet/pdp/reptizoo-36-x-16-x-18-reptile-terrarium-rptz1194.html",
+                 shop.base, "/pdp/rptz1194.html"),
+                ("https://dubiaroaches.com/products/36x18x18-pvc-panel-reptile-enclosure", shop.base, "/products/pvc"),
+                ("https://amzn.to/4o8mtc5", shop.base.replace("127.0.0.1", "localhost"), "/4o8mtc5")):
+            assert original in source
+            source = source.replace(original, base + path)
+        enclosure_path = tmp_path / "enclosure-data.js"
+        enclosure_path.write_text(source, encoding="utf-8")
+        items_source = (REPO_ROOT / "data" / "items.json").read_text(encoding="utf-8")
+        items_source = items_source.replace('"name": "Cave Hide",', f'"name": "Cave Hide",\n            "link": "{shop.base}/hide",')
+        items_path = tmp_path / "items.json"
+        items_path.write_text(items_source, encoding="utf-8")
+
+        products = refresh_prices.catalog_products(enclosure_path, items_path)
+        assert len(products) == 5
+        cache = refresh_prices.ResponseCache(tmp_path / "cache")
+        results = asyncio.run(refresh_prices.check_prices(products, cache, concurrency=4, interval=0.0))
+        assert {r["status"] for r in results} == {"fetched"}
+        assert shop.peak <= 2
+        # No request carries the affiliate parameters, and the short link is resolved, not followed
+        assert not any("tag=" in path or "linkId=" in path for path, _ in shop.requests)
+        assert sorted(path for path, _ in shop.requests) == [
+            "/4o8mtc5", "/dp/B07CV797LC", "/dp/B07CV797LC?language=en_US", "/hide", "/pdp/rptz1194.html",
+            "/products/pvc"]
+
+        changes = refresh_prices.price_changes(results)
+        assert sorted((c["id"], c["current"]) for c in changes) == [
+            ("0000002", 179.99), ("0000004", 1215.0), ("0000005", 179.99), ("hide-001", 16.49)]
+        refresh_prices.write_changes(changes, "2026-01-02", enclosure_path, items_path,
+                                     tmp_path / "index", tmp_path / "quiz.json")
+
+        enclosures, _ = refresh_prices.load_enclosure_data(enclosure_path)
+        assert (enclosures["0000002"]["price"], enclosures["0000002"]["lastUpdated"]) == (179.99, "2026-01-02")
+        assert (enclosures["0000003"]["price"], enclosures["0000003"]["lastUpdated"]) == (159.99, "2025-11-20")
+        changed_lines = [a for a, b in zip(source.splitlines(), enclosure_path.read_text().splitlines()) if a != b]
+        assert len(changed_lines) == 6
+        new_items = items_path.read_text(encoding="utf-8")
+        assert [a for a, b in zip(items_source.splitlines(), new_items.splitlines()) if a != b] == \
+            ['            "price": 14.99,']
+        shard = json.loads((tmp_path / "index" / "all.json").read_text())
+        assert shard["items"]["hide-001"]["price"] == 16.49
+
+        # A second pass past the TTL revalidates every page and finds nothing new
+        shop.requests.clear()
+        results = asyncio.run(refresh_prices.check_prices(
+            refresh_prices.catalog_products(enclosure_path, items_path), cache, interval=0.0, ttl=0))
+        assert {r["status"] for r in results} == {"not-modified"}
+        # The short link stays resolved from the cache
+        assert all(etag for _, etag in shop.requests) and len(shop.requests) == 5
+        assert refresh_prices.price_changes(results) == []
+
+        # Within the TTL nothing is requested at all
+        shop.requests.clear()
+        results = asyncio.run(refresh_prices.check_prices(products, cache, interval=0.0))
+        assert {r["status"] for r in results} == {"fresh"} and shop.requests == []
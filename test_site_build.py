@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Tests for the site build tools in python/
+Runs each build stage against the real data/ and page files in this repo
+"""
+
+import itertools
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(REPO_ROOT / "python"))
+
+import build_assets
+import build_critical_css
+import build_fonts
+import build_images
+import build_items_index
+import build_quiz_table
+import build_search_index
+import build_site
+import recommend_build
+import serve
+
+
+def _items_shards():
+    catalog = json.loads((REPO_ROOT / "data" / "items.json").read_text(encoding="utf-8"))
+    return catalog, build_items_index.build_index(catalog)
+
+
+def test_items_index_matches_linear_scan():
+    """Indexed queries return exactly what a full scan of items.json would"""
+    catalog, shards = _items_shards()
+
+    for species, shard in shards.items():
+        for category, records in catalog.items():
+            for max_price in (None, 15, 30):
+                for max_size in (None, 5, 12, 18, 100):
+                    expected = sorted(
+                        (float(item["price"]), item["id"])
+                        for item in records
+                        if ({species, "all"} & set(item["compatibleSpecies"]))
+                        and (max_price is None or item["price"] <= max_price)
+                        and (max_size is None or build_items_index.longest_dimension(item) <= max_size)
+                    )
+                    actual = [
+                        (item["price"], item["id"])
+                        for item in build_items_index.query_shard(shard, category, max_price, max_size)
+                    ]
+                    assert actual == expected, (species, category, max_price, max_size)
+
+
+def test_items_index_universal_items_in_every_shard():
+    """Items compatible with "all" are copied into every species shard"""
+    catalog, shards = _items_shards()
+    universal = {item["id"] for records in catalog.values() for item in records
+                 if "all" in item["compatibleSpecies"]}
+
+    for shard in shards.values():
+        assert universal <= set(shard["items"])
+
+
+def _brute_force_builds(candidates, species, objective, required, budget):
+    pool = candidates[species]
+    builds = []
+    for enclosure in pool["enclosures"]:
+        model = enclosure["model"]
+        picks = [itertools.combinations_with_replacement(
+            [i for i in pool["categories"].get(c, []) if recommend_build.fits(i, enclosure)], n)
+            for c, n in required.items()]
+        for combo in itertools.product(*picks):
+            chosen = [item for group in combo for item in group]
+            area = sum(recommend_build.footprint(item) for item in chosen)
+            price = float(enclosure["price"]) + sum(item["price"] for item in chosen)
+            if area > recommend_build.FLOOR_FILL * model["length"] * model["width"] or (budget and price > budget):
+                continue
+            builds.append(round(recommend_build.enclosure_cost(enclosure, objective) + price - float(enclosure["price"]), 2))
+    return sorted(builds)
+
+
+def test_recommender_matches_exhaustive_search():
+    """Branch and bound returns the same top-k costs as trying every build"""
+    enclosures, animals = recommend_build.load_enclosure_data()
+    catalog = json.loads((REPO_ROOT / "data" / "items.json").read_text(encoding="utf-8"))
+    candidates = recommend_build.build_candidates(catalog, enclosures, animals)
+
+    for species in animals:
+        for objective in recommend_build.OBJECTIVES:
+            for required, budget in (({"substrate": 1, "hides": 2}, None), ({"decor": 2, "plants": 1}, 260)):
+                builds = recommend_build.recommend(candidates, species, 5, objective, required, budget)
+                expected = _brute_force_builds(candidates, species, objective, required, budget)[:5]
+                assert [b["cost"] for b in builds] == expected, (species, objective, required)
+                for build in builds:
+                    assert build["enclosure"] in animals[species]["approvedEnclosureIds"]
+                    allowed = {item["id"] for items in candidates[species]["categories"].values() for item in items}
+                    assert set(build["items"]) <= allowed
+                    assert budget is None or build["price"] <= budget
+
+    assert recommend_build.recommend(candidates, "leopard-gecko", required={"water": 1}) == []
+    with pytest.raises(KeyError):
+        recommend_build.recommend(candidates, "no-such-animal")
+
+
+def test_recommender_prunes_a_large_catalog():
+    """Thousands of candidate items still answer in milliseconds"""
+    enclosures, animals = recommend_build.load_enclosure_data()
+    catalog = json.loads((REPO_ROOT / "data" / "items.json").read_text(encoding="utf-8"))
+    for category in ("substrate", "hides", "decor"):
+        template = catalog[category][0]
+        catalog[category] = catalog[category] + [
+            {**template, "id": f"{category}-{n}", "price": 5 + (n * 7919) % 9000 / 100, "compatibleSpecies": ["all"]}
+            for n in range(2000)]
+    candidates = recommend_build.build_candidates(catalog, enclosures, animals)
+
+    start = time.perf_counter()
+    builds = recommend_build.recommend(candidates, "bearded-dragon", 10, required={"substrate": 1, "hides": 2, "decor": 1})
+    assert time.perf_counter() - start < 0.25
+    assert len(builds) == 10
+    assert [b["cost"] for b in builds] == sorted(b["cost"] for b in builds)
+
+
+def test_quiz_table_is_current_and_consistent():
+    """The committed quiz table matches a fresh build and every path obeys the catalog"""
+    enclosures, animals = build_quiz_table.load_enclosure_data()
+    catalog = json.loads(build_quiz_table.ITEMS_PATH.read_text(encoding="utf-8"))
+    table = build_quiz_table.build_table(enclosures, animals, catalog)
+    committed = json.loads(build_quiz_table.TABLE_PATH.read_text(encoding="utf-8"))
+    assert committed.pop("sourceHash") == build_quiz_table.source_hash(
+        build_quiz_table.ENCLOSURE_DATA_PATH, build_quiz_table.ITEMS_PATH)
+    assert committed == table
+
+    items = {item["id"]: item for records in catalog.values() for item in records}
+    for slug, animal in animals.items():
+        approved = {e["id"] for e in build_quiz_table.stage_enclosures(animal, "adult", enclosures)}
+        outcomes = table["quiz"][slug]["adult"]
+        assert set().union(*(o["enclosures"] for o in outcomes.values())) == approved
+        for kind, outcome in outcomes.items():
+            assert all(enclosures[i]["enclosureType"] == kind for i in outcome["enclosures"])
+            for item_id in [outcome["substrate"]] + outcome["plants"]:
+                assert {slug, "all"} & set(items[item_id]["compatibleSpecies"])
+                assert table["items"][item_id]["price"] == items[item_id]["price"]
+
+    # The picks the quiz used to hard-code
+    assert build_quiz_table.lookup(table, "leopard-gecko", "glass")["substrate"] == "sub-002"
+    assert build_quiz_table.lookup(table, "bearded-dragon", "pvc")["substrate"] == "sub-003"
+    assert build_quiz_table.lookup(table, "crested-gecko", "glass-mesh")["plants"] == ["plant-002", "plant-001"]
+    assert build_quiz_table.lookup(table, "crested-gecko", "pvc") is None
+    assert build_quiz_table.lookup(table, "leopard-gecko", "glass", "juvenile") is None
+
+
+def test_search_index_finds_every_care_guide():
+    """Each care guide page ranks first for its own title"""
+    index = build_search_index.build_index(build_search_index.collect_documents(REPO_ROOT))
+    guides = [doc for doc in index["docs"] if doc["type"] == "Care Guide"]
+    assert len(guides) >= 20
+
+    for guide in guides:
+        query = guide["title"].replace(" Care Guide", "")
+        top = build_search_index.search(index, query)[0]
+        assert top["url"] == guide["url"], (query, top)
+
+
+def test_search_index_prefix_and_infix_matches():
+    """Partial words match by prefix, and by trigram when mid-word"""
+    index = build_search_index.build_index(build_search_index.collect_documents(REPO_ROOT))
+
+    assert "leopard-gecko.html" in [r["url"] for r in build_search_index.search(index, "leopa")]
+    assert "crested-gecko.html" in [r["url"] for r in build_search_index.search(index, "crestie")]
+    assert any("gecko" in r["url"] for r in build_search_index.search(index, "ecko"))
+    assert build_search_index.search(index, "zzzz") == []
+
+
+def test_species_pages_render_from_data():
+    """Rendering the data reproduces the content of the hand-written pages"""
+    template = (REPO_ROOT / "templates" / "species-page.html").read_text(encoding="utf-8")
+    species = json.loads((REPO_ROOT / "data" / "species_pages.json").read_text(encoding="utf-8"))["species"]
+
+    for slug, record in species.items():
+        rendered = build_site.render_species_page(template, record)
+        original = (REPO_ROOT / f"{slug}.html").read_text(encoding="utf-8")
+        # Compare the data-driven part; pages differ elsewhere only in hand-edited whitespace
+        content = lambda html: re.search(r'<section class="species-hero">.*<!-- Modal Overlay -->',
+                                         html, re.S).group(0).split()
+        assert content(rendered) == content(original), slug
+
+
+def test_site_build_inlines_partials_and_is_incremental(tmp_path):
+    """Header and footer are inlined, and a second build rewrites nothing"""
+    first = build_site.build(out_dir=tmp_path)
+    assert "corn-snake.html" in first["built"]
+
+    page = (tmp_path / "corn-snake.html").read_text(encoding="utf-8")
+    assert '<header id="main-header" data-prerendered>' in page
+    assert "&copy; 2025 ReptileCare" in page
+
+    second = build_site.build(out_dir=tmp_path)
+    assert second["built"] == []
+    assert set(second["skipped"]) == set(first["built"])
+
+
+def test_image_pipeline_variants_manifest_and_cache(tmp_path):
+    """Variants are generated once, listed in the manifest and wired into pages"""
+    Image = pytest.importorskip("PIL.Image")
+    source = tmp_path / "src"
+    (source / "images" / "animals").mkdir(parents=True)
+    Image.new("RGB", (700, 350), (30, 120, 60)).save(source / "images" / "animals" / "tree frog.png")
+    out = tmp_path / "dist"
+    out.mkdir()
+    (out / "page.html").write_text('<img src="images/animals/tree frog.png" alt="Frog">', encoding="utf-8")
+
+    manifest, report = build_images.build_images(root=source, out_dir=out, jobs=1)
+    entry = manifest["images"]["images/animals/tree frog.png"]
+    assert report["processed"] == ["images/animals/tree frog.png"]
+    assert entry["fallback"] == "jpg"
+    assert [v["width"] for v in entry["variants"]["jpg"]] == [320, 640, 700]
+    assert "images/responsive/animals/tree-frog-640.jpg 640w" in entry["srcset"]["jpg"]
+
+    _, report = build_images.build_images(root=source, out_dir=out, jobs=1)
+    assert report["skipped"] == ["images/animals/tree frog.png"]
+
+    build_images.rewrite_html(out, manifest)
+    page = (out / "page.html").read_text(encoding="utf-8")
+    assert page.startswith("<picture>") and 'alt="Frog"' in page
+    assert build_images.rewrite_html(out, manifest) == {}
+
+
+def test_minify_css_keeps_strings_and_selectors():
+    css = "/* c */ a  :hover , b > i {\n  content: '  x ; y  ';\n  margin: 0 auto ;\n}"
+    assert build_assets.minify_css(css) == "a :hover,b>i{content:'  x ; y  ';margin:0 auto}"
+
+
+def test_release_bundle_hashes_rewrites_and_precompresses(tmp_path):
+    """Pages point at hashed assets, which exist alongside .gz siblings"""
+    src = tmp_path / "dist"
+    (src / "images").mkdir(parents=True)
+    (src / "images" / "corn snake.png").write_bytes(b"png-bytes")
+    (src / "styles.css").write_text("body { background: url('images/corn snake.png'); }" * 40, encoding="utf-8")
+    (src / "index.html").write_text(
+        '<link href="styles.css"><img src="images/corn snake.png"><a href="https://example.com/x.css">'
+        + "<p>filler</p>" * 50, encoding="utf-8")
+
+    manifest = build_assets.build_release(src, tmp_path / "release")
+    release = tmp_path / "release"
+    styles = manifest["assets"]["styles.css"]["hashed"]
+    image = manifest["assets"]["images/corn snake.png"]["hashed"]
+
+    page = (release / "index.html").read_text(encoding="utf-8")
+    assert f'href="{styles}"' in page
+    assert 'src="images/corn%20snake.' in page
+    assert 'href="https://example.com/x.css"' in page
+    assert image.replace(" ", "%20") in (release / styles).read_text(encoding="utf-8")
+    assert (release / (styles + ".gz")).exists() and (release / "index.html.gz").exists()
+    assert build_assets.cache_control(styles) == build_assets.CACHE_IMMUTABLE
+    assert build_assets.cache_control("index.html") == build_assets.CACHE_REVALIDATE
+
+
+def test_font_subsets_cover_pages_and_preload_once(tmp_path):
+    """Subsets keep the page's characters, shrink the font and are preloaded once"""
+    pytest.importorskip("fontTools.subset")
+    pytest.importorskip("brotli")
+    (tmp_path / "fonts").mkdir()
+    source = REPO_ROOT / "fonts" / "helvetica-255" / "Helvetica.woff2"
+    (tmp_path / "fonts" / "Helvetica.woff2").write_bytes(source.read_bytes())
+    (tmp_path / "styles.css").write_text("body { font-family: 'Helvetica', Arial, sans-serif; }", encoding="utf-8")
+    page = tmp_path / "index.html"
+    page.write_text('<html><head><link rel="stylesheet" href="styles.css"></head>'
+                    '<body><p>Café – 28°C</p><img alt="Gecko ©"></body></html>', encoding="utf-8")
+    (tmp_path / "other.html").write_text("<html><head></head><body>Plain</body></html>", encoding="utf-8")
+
+    manifest, report = build_fonts.build_fonts(tmp_path)
+    face = manifest["faces"]["fonts/Helvetica.woff2"]
+    assert report["processed"] == ["fonts/Helvetica.woff2"]
+    assert (face["family"], face["weight"], face["style"]) == ("Helvetica", 400, "normal")
+    assert face["bytes"] < face["sourceBytes"] / 4
+
+    from fontTools.ttLib import TTFont
+    cmap = TTFont(tmp_path / face["subset"]).getBestCmap()
+    assert set(map(ord, "Café – 28°C Gecko ©")) <= set(cmap)
+    assert ord("Ж") not in cmap
+
+    assert build_fonts.add_preloads(tmp_path, manifest) == {"index.html": 1}
+    build_fonts.add_preloads(tmp_path, manifest)
+    html = page.read_text(encoding="utf-8")
+    assert html.count('rel="preload"') == 1 and 'href="fonts/subset/helvetica.woff2"' in html
+    assert "subset" not in (tmp_path / "other.html").read_text(encoding="utf-8")
+
+    _, report = build_fonts.build_fonts(tmp_path)
+    assert report["skipped"] == ["fonts/Helvetica.woff2"]
+
+
+def test_static_server_etags_encodings_and_ranges(tmp_path):
+    """Conditional, precompressed and ranged requests get the right responses"""
+    import asyncio
+    import gzip
+    import http.client
+
+    (tmp_path / "styles.css").write_text("body { color: red; }", encoding="utf-8")
+    (tmp_path / "styles.css.gz").write_bytes(gzip.compress(b"body { color: red; }"))
+    (tmp_path / "models").mkdir()
+    model = bytes(range(256)) * 40
+    (tmp_path / "models" / "tank.glb").write_bytes(model)
+
+    def fetch(port, path, **headers):
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        connection.request("GET", path, headers=headers)
+        response = connection.getresponse()
+        result = response.status, dict(response.getheaders()), response.read()
+        connection.close()
+        return result
+
+    async def scenario():
+        server, listener = await serve.start_server(tmp_path, port=0)
+        server.cache.file_limit = 1024
+        port = listener.sockets[0].getsockname()[1]
+        run = lambda path, **headers: asyncio.get_running_loop().run_in_executor(None, lambda: fetch(port, path, **headers))
+        async with listener:
+            status, headers, body = await run("/styles.css")
+            assert status == 200 and body == b"body { color: red; }"
+            assert headers["Vary"] == "Accept-Encoding"
+            status, _, _ = await run("/styles.css", **{"If-None-Match": headers["ETag"]})
+            assert status == 304
+
+            status, headers, body = await run("/styles.css", **{"Accept-Encoding": "gzip, br;q=0"})
+            assert headers["Content-Encoding"] == "gzip" and gzip.decompress(body) == b"body { color: red; }"
+
+            status, headers, body = await run("/models/tank.glb", Range="bytes=100-199")
+            assert status == 206 and body == model[100:200]
+            assert headers["Content-Range"] == f"bytes 100-199/{len(model)}"
+            status, _, body = await run("/models/tank.glb", Range="bytes=-10")
+            assert status == 206 and body == model[-10:]
+            status, _, _ = await run("/models/tank.glb", Range=f"bytes={len(model)}-")
+            assert status == 416
+            status, _, body = await run("/models/tank.glb")
+            assert status == 200 and body == model
+
+            assert (await run("/../test_site_build.py"))[0] == 404
+            assert (await run("/missing.html"))[0] == 404
+            await run("/styles.css")
+        assert server.cache.hits >= 2
+        assert server.latency_summary()["requests"] == 10
+
+    asyncio.run(scenario())
+
+
+def test_critical_css_inlines_matching_rules_once(tmp_path):
+    """Only rules matching above-the-fold elements are inlined, and reruns are stable"""
+    (tmp_path / "styles.css").write_text(
+        "/* site */ body { margin: 0 } header > .logo { width: 40px } .hero h1:hover { color: red }\n"
+        ".modal { display: none } li:not(.active) a { color: blue } @media print { body { color: black } }\n"
+        "@media (max-width: 600px) { .hero { padding: 0 } .footer-only { margin: 0 } }\n"
+        "@keyframes fade { to { opacity: 1 } } @keyframes spin { to { transform: rotate(1turn) } }\n"
+        ".hero { animation: fade 1s } img + .caption { font-size: 12px }", encoding="utf-8")
+    page = tmp_path / "index.html"
+    original = ('<html><head><link rel="stylesheet" href="styles.css"></head><body>'
+                '<header><img class="logo"><ul><li class="active"><a>Home</a></li><li><a>Care</a></li></ul></header>'
+                '<section class="hero"><h1>Care</h1><img><p class="caption">Gecko</p></section>'
+                + "<p>filler</p>" * build_critical_css.FOLD_ELEMENTS
+                + '<div class="modal">Hidden</div></body></html>')
+    page.write_text(original, encoding="utf-8")
+
+    report = build_critical_css.inline_critical(tmp_path)
+    html = page.read_text(encoding="utf-8")
+    css = re.search(r"<style data-critical-css>(.*?)</style>", html).group(1)
+    for kept in ("body{margin:0}", "header>.logo", ".hero h1:hover", "li:not(.active) a",
+                 "@media (max-width:600px){.hero{padding:0}}", "@keyframes fade", "img + .caption"):
+        assert kept in css, kept
+    for dropped in (".modal", "print", ".footer-only", "spin"):
+        assert dropped not in css, dropped
+    assert 'rel="preload" href="styles.css" as="style"' in html
+    assert report["index.html"]["saved"] > 0
+
+    build_critical_css.inline_critical(tmp_path)
+    assert page.read_text(encoding="utf-8") == html
+    assert build_critical_css.restore_links(html) == original